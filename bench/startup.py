@@ -0,0 +1,111 @@
+import argparse
+import collections
+import json
+import pathlib
+import re
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+__all__ = ("measure",)
+
+# these are only needed once a command talks to a database of that kind, so loading any of them
+# just to start up is a regression
+DRIVERS: typing.Final[tuple[str, ...]] = ("keyring", "psycopg", "pyodbc")
+
+_IMPORT_TIME_PATTERN: typing.Final[re.Pattern[str]] = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<indent>\s*)(?P<module>\S+)$"
+)
+
+_ROOT_DIR: typing.Final[pathlib.Path] = pathlib.Path(__file__).parent.parent
+
+
+def measure(*, module: str, runs: int) -> dict[str, typing.Any]:
+    """Import module in a fresh interpreter runs times, under python -X importtime.
+
+    Returns the median wall time of the whole process, which includes interpreter startup, the
+    median cumulative import time of module itself, the packages that took the most time on the
+    median run, and any DRIVERS that were loaded.
+    """
+    wall_ms: list[float] = []
+    import_ms: list[float] = []
+    package_ms: list[dict[str, float]] = []
+    drivers_loaded: set[str] = set()
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            (sys.executable, "-X", "importtime", "-c", f"import {module}"),
+            capture_output=True,
+            cwd=_ROOT_DIR,
+            text=True,
+        )
+        wall_ms.append((time.perf_counter() - start) * 1000)
+
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+
+        total_us = 0
+        self_us_by_package: collections.Counter[str] = collections.Counter()
+        for line in completed.stderr.splitlines():
+            if (match := _IMPORT_TIME_PATTERN.match(line)) is None:
+                continue
+
+            package = match["module"].split(".")[0]
+            self_us_by_package[package] += int(match["self"])
+
+            if match["module"] == module:
+                total_us = int(match["cumulative"])
+
+            if package in DRIVERS:
+                drivers_loaded.add(package)
+
+        import_ms.append(total_us / 1000)
+        package_ms.append({k: v / 1000 for k, v in self_us_by_package.items()})
+
+    median_run = sorted(range(runs), key=lambda i: import_ms[i])[runs // 2]
+
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_ms": round(statistics.median(wall_ms), 1),
+        "import_ms": round(statistics.median(import_ms), 1),
+        "top_packages_ms": {
+            package: round(ms, 1)
+            for package, ms in sorted(
+                package_ms[median_run].items(), key=lambda kv: kv[1], reverse=True
+            )[:15]
+        },
+        "drivers_loaded": sorted(drivers_loaded),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bench.startup")
+    parser.add_argument("--module", type=str, default="src.cli")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=400)
+
+    args = parser.parse_args(sys.argv[1:])
+
+    result = measure(module=args.module, runs=args.runs)
+    print(json.dumps(result, indent=2))
+
+    failures: list[str] = []
+    if result["import_ms"] > args.budget_ms:
+        failures.append(
+            f"import {args.module} took {result['import_ms']}ms, which is over the "
+            f"{args.budget_ms}ms budget."
+        )
+    if result["drivers_loaded"]:
+        failures.append(
+            f"import {args.module} loaded {', '.join(result['drivers_loaded'])}, which should "
+            f"only be imported once a command needs them."
+        )
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    sys.exit(1 if failures else 0)
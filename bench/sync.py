@@ -0,0 +1,477 @@
+import argparse
+import concurrent.futures
+import dataclasses
+import datetime
+import json
+import multiprocessing
+import pathlib
+import platform
+import subprocess
+import sys
+import time
+import typing
+
+import psycopg
+from loguru import logger
+from psycopg import sql
+from psycopg.rows import dict_row
+
+from src import data
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.ds.dst_ds.pg import PgDstDs
+from src.adapter.ds.src_ds.pg import PgSrcDs
+from src.service.check import _check
+from src.service.sync import _sync
+
+__all__ = ("BenchParams", "compare", "run")
+
+SCENARIOS: typing.Final[tuple[str, ...]] = ("full", "increasing", "compare", "check")
+
+# sql type, and an expression over the generate_series value, g, that fills the column
+_COL_TYPES: typing.Final[dict[str, tuple[str, str]]] = {
+    "bigint": ("BIGINT", "g * 31 + {i}"),
+    "bool": ("BOOL", "(g + {i}) % 2 = 0"),
+    "date": ("DATE", "DATE '2000-01-01' + ((g + {i}) % 9000)::INT"),
+    "float": ("DOUBLE PRECISION", "(g + {i}) / 3.0"),
+    "int": ("INT", "((g * 7 + {i}) % 1000000)::INT"),
+    "numeric": ("NUMERIC(18, 4)", "((g + {i}) % 1000000) / 7.0"),
+    "text": ("TEXT", "md5((g + {i})::TEXT)"),
+    "timestamptz": (
+        "TIMESTAMPTZ",
+        "TIMESTAMPTZ '2000-01-01 +0' + (g + {i}) * INTERVAL '1 second'",
+    ),
+}
+
+_SCHEMA_NAME: typing.Final[str] = "poa_bench"
+_SRC_TABLE_NAME: typing.Final[str] = "src"
+_DST_TABLE_NAME: typing.Final[str] = "dst"
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class BenchParams:
+    rows: int
+    width: int
+    types: tuple[str, ...]
+    change_ratio: float
+    batch_size: int
+    binary: bool = False
+
+
+def run(*, connection_string: str, params: BenchParams) -> dict[str, typing.Any]:
+    """Provision a synthetic source table, then time each sync scenario against it.
+
+    Every scenario runs in a fresh process, so peak_rss_kb is the high-water mark of that scenario
+    alone.  The source is mutated by change_ratio before each incremental scenario.
+    """
+    results: dict[str, typing.Any] = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": dataclasses.asdict(params),
+        "scenarios": {},
+    }
+
+    logger.info(f"Provisioning {params.rows:,} rows x {params.width} columns...")
+    _provision(connection_string=connection_string, params=params)
+
+    for scenario in SCENARIOS:
+        if scenario in ("increasing", "compare"):
+            _mutate(
+                connection_string=connection_string,
+                params=params,
+                seed=len(results["scenarios"]),
+            )
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            result = pool.submit(
+                _run_scenario,
+                scenario=scenario,
+                connection_string=connection_string,
+                batch_size=params.batch_size,
+                binary=params.binary,
+            ).result()
+
+        logger.info(
+            f"{scenario}: {result['wall_secs']:.3f}s, {result['rows_per_sec'] or 0:,.0f} rows/sec, "
+            f"{result['round_trips']:,} round trips"
+        )
+
+        results["scenarios"][scenario] = result
+
+    return results
+
+
+def compare(*, old: dict[str, typing.Any], new: dict[str, typing.Any]) -> str:
+    lines = [
+        f"old: {old['commit'][:10]}{'+' if old['dirty'] else ''} {old['params']}",
+        f"new: {new['commit'][:10]}{'+' if new['dirty'] else ''} {new['params']}",
+        "",
+        f"{'scenario':<12}{'metric':<14}{'old':>16}{'new':>16}{'change':>10}",
+    ]
+    for scenario in SCENARIOS:
+        old_result = old["scenarios"].get(scenario)
+        new_result = new["scenarios"].get(scenario)
+        if old_result is None or new_result is None:
+            continue
+
+        for metric in ("wall_secs", "rows_per_sec", "peak_rss_kb", "round_trips", "statements"):
+            old_value, new_value = old_result.get(metric), new_result.get(metric)
+            if old_value is None or new_value is None:
+                continue
+
+            change = f"{(new_value - old_value) / old_value:+.1%}" if old_value else ""
+            lines.append(
+                f"{scenario:<12}{metric:<14}{old_value:>16,.3f}{new_value:>16,.3f}{change:>10}"
+            )
+
+    return "\n".join(lines)
+
+
+class _CountingCursor(data.Cursor):
+    """Counts the calls that reach the server.  An execute_many is one round trip, since psycopg
+    pipelines it, but each of its rows is counted as a statement.
+    """
+
+    def __init__(self, cur: data.Cursor, /):
+        self._cur: typing.Final[data.Cursor] = cur
+
+        self.round_trips = 0
+        self.statements = 0
+
+    def execute(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> None | data.Error:
+        self.round_trips += 1
+        self.statements += 1
+        return self._cur.execute(sql=sql, params=params, prepare=prepare)
+
+    def execute_many(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Iterable[typing.Hashable]],
+    ) -> None | data.Error:
+        params = list(params)
+        self.round_trips += 1
+        self.statements += len(params)
+        return self._cur.execute_many(sql=sql, params=params)
+
+    def fetch_one(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> data.Row | None | data.Error:
+        self.round_trips += 1
+        self.statements += 1
+        return self._cur.fetch_one(sql=sql, params=params, prepare=prepare)
+
+    def fetch_all(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> tuple[data.Row, ...] | data.Error:
+        self.round_trips += 1
+        self.statements += 1
+        return self._cur.fetch_all(sql=sql, params=params, prepare=prepare)
+
+    def fetch_batches(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        self.round_trips += 1
+        self.statements += 1
+        return self._cur.fetch_batches(sql=sql, params=params, batch_size=batch_size)
+
+
+def _run_scenario(
+    *,
+    scenario: str,
+    connection_string: str,
+    batch_size: int,
+    binary: bool,
+) -> dict[str, typing.Any]:
+    with (
+        psycopg.connect(connection_string) as con,
+        con.cursor(row_factory=dict_row, binary=binary) as psycopg_cur,
+    ):
+        cur = _CountingCursor(PgCursor(cursor=psycopg_cur))
+
+        src_ds = PgSrcDs(
+            cur=cur,
+            db_name="bench",
+            schema_name=_SCHEMA_NAME,
+            table_name=_SRC_TABLE_NAME,
+            after={},
+        )
+
+        src_table = src_ds.get_table()
+        if isinstance(src_table, data.Error):
+            raise src_table
+
+        src_rows = src_ds.get_row_count()
+        if isinstance(src_rows, data.Error):
+            raise src_rows
+
+        dst_ds = PgDstDs(
+            cur=cur,
+            dst_db_name="bench",
+            dst_schema_name=_SCHEMA_NAME,
+            dst_table_name=_DST_TABLE_NAME,
+            src_table=src_table,
+            after={},
+        )
+
+        cur.round_trips = 0
+        cur.statements = 0
+
+        start = time.perf_counter()
+
+        if scenario == "check":
+            result: typing.Any = _check(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                src_db_name="bench",
+                src_schema_name=_SCHEMA_NAME,
+                src_table_name=_SRC_TABLE_NAME,
+                dst_db_name="bench",
+                dst_schema_name=_SCHEMA_NAME,
+                dst_table_name=_DST_TABLE_NAME,
+                pk=src_table.pk,
+            )
+        else:
+            result = _sync(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                incremental=scenario != "full",
+                compare_cols={"updated_at"} if scenario == "compare" else None,
+                increasing_cols={"updated_at"} if scenario == "increasing" else None,
+                skip_if_row_counts_match=False,
+                recreate=scenario == "full",
+                batch_size=batch_size,
+                track_history=False,
+                max_memory_bytes=None,
+                trace_memory=False,
+            )
+
+        con.commit()
+
+        wall_secs = time.perf_counter() - start
+
+    if isinstance(result, data.Error):
+        raise result
+
+    scenario_result: dict[str, typing.Any] = {
+        "wall_secs": wall_secs,
+        "rows": src_rows,
+        "rows_per_sec": src_rows / wall_secs if wall_secs else None,
+        "peak_rss_kb": _peak_rss_kb(),
+        "round_trips": cur.round_trips,
+        "statements": cur.statements,
+    }
+
+    if isinstance(result, data.CheckResult):
+        scenario_result["missing_keys"] = len(result.missing_keys or ())
+        scenario_result["extra_keys"] = len(result.extra_keys or ())
+    else:
+        if result.status == "failed":
+            raise Exception(result.error_message)
+
+        scenario_result["status"] = result.status
+        scenario_result["rows_added"] = result.rows_added
+        scenario_result["rows_deleted"] = result.rows_deleted
+        scenario_result["rows_updated"] = result.rows_updated
+        scenario_result["phases"] = [dataclasses.asdict(phase) for phase in result.phases]
+
+    return scenario_result
+
+
+def _provision(*, connection_string: str, params: BenchParams) -> None:
+    unknown_types = set(params.types) - _COL_TYPES.keys()
+    if unknown_types:
+        raise ValueError(
+            f"Unknown column types, {', '.join(sorted(unknown_types))}.  "
+            f"Choose from {', '.join(sorted(_COL_TYPES))}."
+        )
+
+    col_types = [params.types[i % len(params.types)] for i in range(params.width)]
+
+    col_defs = sql.SQL("\n, ").join(
+        sql.SQL("{} {} NULL").format(sql.Identifier(f"c{i:03}"), sql.SQL(_COL_TYPES[t][0]))
+        for i, t in enumerate(col_types)
+    )
+    col_values = sql.SQL("\n, ").join(
+        sql.SQL(_COL_TYPES[t][1].format(i=i)) for i, t in enumerate(col_types)
+    )
+
+    with psycopg.connect(connection_string, autocommit=True) as con, con.cursor() as cur:
+        cur.execute(
+            sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(_SCHEMA_NAME))
+        )
+        cur.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(_SCHEMA_NAME)))
+        cur.execute(
+            sql.SQL(
+                """
+                CREATE TABLE {table} (
+                  id BIGINT NOT NULL PRIMARY KEY
+                , updated_at TIMESTAMPTZ NOT NULL
+                , {col_defs}
+                )
+                """
+            ).format(table=_src_table(), col_defs=col_defs)
+        )
+        cur.execute(
+            sql.SQL(
+                """
+                INSERT INTO {table}
+                SELECT
+                  g
+                , TIMESTAMPTZ '2020-01-01 +0' + g * INTERVAL '1 millisecond'
+                , {col_values}
+                FROM generate_series(1, %s) AS g
+                """
+            ).format(table=_src_table(), col_values=col_values),
+            (params.rows,),
+        )
+        cur.execute(sql.SQL("ANALYZE {}").format(_src_table()))
+
+
+def _mutate(*, connection_string: str, params: BenchParams, seed: int) -> None:
+    """Update change_ratio of the rows, and insert and delete a tenth as many."""
+    changed = int(params.rows * params.change_ratio)
+    if changed == 0:
+        return
+
+    step = max(params.rows // changed, 2)
+
+    with psycopg.connect(connection_string, autocommit=True) as con, con.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                """
+                UPDATE {table}
+                SET updated_at = clock_timestamp()
+                WHERE id %% %s = %s
+                """
+            ).format(table=_src_table()),
+            (step, seed % step),
+        )
+        cur.execute(
+            sql.SQL(
+                """
+                INSERT INTO {table} (id, updated_at)
+                SELECT
+                  (SELECT max(id) FROM {table}) + g
+                , clock_timestamp()
+                FROM generate_series(1, %s) AS g
+                """
+            ).format(table=_src_table()),
+            (max(changed // 10, 1),),
+        )
+        cur.execute(
+            sql.SQL(
+                """
+                DELETE FROM {table}
+                WHERE id IN (
+                    SELECT id FROM {table} WHERE id %% %s = %s LIMIT %s
+                )
+                """
+            ).format(table=_src_table()),
+            (step, (seed + 1) % step, max(changed // 10, 1)),
+        )
+        cur.execute(sql.SQL("ANALYZE {}").format(_src_table()))
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ("git", *args),
+            capture_output=True,
+            check=True,
+            cwd=pathlib.Path(__file__).parent,
+            text=True,
+        ).stdout.strip()
+    except:  # noqa
+        return ""
+
+
+def _peak_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _src_table() -> sql.Identifier:
+    return sql.Identifier(_SCHEMA_NAME, _SRC_TABLE_NAME)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bench.sync")
+    subparser = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparser.add_parser("run")
+    compare_parser = subparser.add_parser("compare")
+
+    run_parser.add_argument("--connection-string", type=str, required=True)
+    run_parser.add_argument("--rows", type=int, default=100_000)
+    run_parser.add_argument("--width", type=int, default=10)
+    run_parser.add_argument("--types", nargs="+", type=str, default=sorted(_COL_TYPES))
+    run_parser.add_argument("--change-ratio", type=float, default=0.05)
+    run_parser.add_argument("--batch-size", type=int, default=10_000)
+    run_parser.add_argument("--binary", action="store_true")
+    run_parser.add_argument("--output", type=pathlib.Path)
+
+    compare_parser.add_argument("old", type=pathlib.Path)
+    compare_parser.add_argument("new", type=pathlib.Path)
+
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.command == "run":
+        bench_results = run(
+            connection_string=args.connection_string,
+            params=BenchParams(
+                rows=args.rows,
+                width=args.width,
+                types=tuple(args.types),
+                change_ratio=args.change_ratio,
+                batch_size=args.batch_size,
+                binary=args.binary,
+            ),
+        )
+
+        commit = bench_results["commit"][:10] or "nogit"
+        output = args.output or (
+            pathlib.Path(__file__).parent
+            / "results"
+            / f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(bench_results, indent=2))
+
+        logger.info(f"Results were written to {output!s}.")
+    else:
+        print(
+            compare(
+                old=json.loads(args.old.read_text()),
+                new=json.loads(args.new.read_text()),
+            )
+        )
@@ -58,9 +58,80 @@ CREATE TABLE poa.sync_success (
 ,   rows_deleted INT NOT NULL
 ,   rows_updated INT NOT NULL
 ,   execution_millis INT NOT NULL
+,   peak_rss_bytes BIGINT NULL
+,   peak_traced_bytes BIGINT NULL
 ,   ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
 );
 
+CREATE TABLE poa.sync_phase (
+    sync_id INT NOT NULL REFERENCES poa.sync (sync_id)
+,   phase TEXT NOT NULL CHECK (length(phase) > 0)
+,   calls INT NOT NULL CHECK (calls > 0)
+,   execution_millis INT NOT NULL CHECK (execution_millis >= 0)
+,   rows INT NULL CHECK (rows IS NULL OR rows >= 0)
+,   est_bytes BIGINT NULL CHECK (est_bytes IS NULL OR est_bytes >= 0)
+,   batch_size INT NULL CHECK (batch_size IS NULL OR batch_size > 0)
+,   ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+,   PRIMARY KEY (sync_id, phase)
+);
+
+CREATE TABLE poa.sync_plan (
+    sync_id INT PRIMARY KEY REFERENCES poa.sync (sync_id)
+,   strategy TEXT NOT NULL CHECK (strategy IN ('full_pull', 'key_fetch', 'range_fetch', 'skip'))
+,   reason TEXT NOT NULL
+,   estimated_rows BIGINT NULL
+,   est_millis INT NULL CHECK (est_millis IS NULL OR est_millis >= 0)
+,   raw_est_millis INT NULL CHECK (raw_est_millis IS NULL OR raw_est_millis >= 0)
+,   actual_millis INT NULL CHECK (actual_millis IS NULL OR actual_millis >= 0)
+,   ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+);
+
+-- the catalog's change counters for each src table, as of its last sync to each dst table that
+-- didn't fail
+CREATE TABLE poa.table_snapshot (
+    src_db_name TEXT NOT NULL
+,   src_schema_name TEXT NULL
+,   src_table_name TEXT NOT NULL
+,   dst_db_name TEXT NOT NULL
+,   dst_schema_name TEXT NOT NULL
+,   dst_table_name TEXT NOT NULL
+,   fingerprint TEXT NOT NULL CHECK (length(fingerprint) > 0)
+,   estimated_rows BIGINT NULL
+,   ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX ux_table_snapshot ON poa.table_snapshot (
+    src_db_name
+,   coalesce(src_schema_name, '')
+,   src_table_name
+,   dst_db_name
+,   dst_schema_name
+,   dst_table_name
+);
+
+-- how far each src table's captured changes have been applied to each dst table
+CREATE TABLE poa.watermark (
+    src_db_name TEXT NOT NULL
+,   src_schema_name TEXT NULL
+,   src_table_name TEXT NOT NULL
+,   dst_db_name TEXT NOT NULL
+,   dst_schema_name TEXT NOT NULL
+,   dst_table_name TEXT NOT NULL
+,   capture TEXT NOT NULL CHECK (length(capture) > 0)
+,   watermark TEXT NOT NULL CHECK (length(watermark) > 0)
+,   ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX ux_watermark ON poa.watermark (
+    src_db_name
+,   coalesce(src_schema_name, '')
+,   src_table_name
+,   dst_db_name
+,   dst_schema_name
+,   dst_table_name
+,   capture
+);
+
 CREATE OR REPLACE PROCEDURE poa.add_check_result (
     p_src_db_name TEXT
 ,   p_src_schema_name TEXT
@@ -127,6 +198,238 @@ BEGIN
 END;
 $$;
 
+CREATE OR REPLACE PROCEDURE poa.add_sync_phase (
+    p_sync_id INT
+,   p_phase TEXT
+,   p_calls INT
+,   p_execution_millis INT
+,   p_rows INT
+,   p_est_bytes BIGINT
+,   p_batch_size INT DEFAULT NULL
+)
+LANGUAGE sql
+AS $$
+    INSERT INTO poa.sync_phase (sync_id, phase, calls, execution_millis, rows, est_bytes, batch_size)
+    VALUES (p_sync_id, p_phase, p_calls, p_execution_millis, p_rows, p_est_bytes, p_batch_size);
+$$;
+
+CREATE OR REPLACE FUNCTION poa.get_batch_sizes (
+    p_src_db_name TEXT
+,   p_src_schema_name TEXT
+,   p_src_table_name TEXT
+)
+RETURNS TABLE (phase TEXT, batch_size INT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT ON (sp.phase)
+        sp.phase
+    ,   sp.batch_size
+    FROM poa.sync_phase AS sp
+    JOIN poa.sync AS s
+        ON sp.sync_id = s.sync_id
+    WHERE
+        s.src_db_name = p_src_db_name
+        AND s.src_schema_name IS NOT DISTINCT FROM p_src_schema_name
+        AND s.src_table_name = p_src_table_name
+        AND sp.batch_size IS NOT NULL
+    ORDER BY
+        sp.phase
+    ,   sp.ts DESC
+    ,   sp.sync_id DESC;
+$$;
+
+CREATE OR REPLACE PROCEDURE poa.add_sync_plan (
+    p_sync_id INT
+,   p_strategy TEXT
+,   p_reason TEXT
+,   p_estimated_rows BIGINT
+,   p_est_millis INT
+,   p_raw_est_millis INT
+,   p_actual_millis INT
+)
+LANGUAGE sql
+AS $$
+    INSERT INTO poa.sync_plan (
+        sync_id
+    ,   strategy
+    ,   reason
+    ,   estimated_rows
+    ,   est_millis
+    ,   raw_est_millis
+    ,   actual_millis
+    ) VALUES (
+        p_sync_id
+    ,   p_strategy
+    ,   p_reason
+    ,   p_estimated_rows
+    ,   p_est_millis
+    ,   p_raw_est_millis
+    ,   p_actual_millis
+    );
+$$;
+
+-- what recent successful syncs of a table cost per row, and how far off the planner's estimates were
+CREATE OR REPLACE FUNCTION poa.get_sync_history (
+    p_src_db_name TEXT
+,   p_src_schema_name TEXT
+,   p_src_table_name TEXT
+,   p_runs INT DEFAULT 10
+)
+RETURNS TABLE (
+    fetch_millis_per_row FLOAT8
+,   fetch_by_key_millis_per_row FLOAT8
+,   upsert_millis_per_row FLOAT8
+,   corrections JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH table_syncs AS (
+        SELECT
+            s.sync_id
+        ,   s.ts
+        ,   EXISTS (SELECT 1 FROM poa.sync_success AS ss WHERE s.sync_id = ss.sync_id) AS succeeded
+        FROM poa.sync AS s
+        WHERE
+            s.src_db_name = p_src_db_name
+            AND s.src_schema_name IS NOT DISTINCT FROM p_src_schema_name
+            AND s.src_table_name = p_src_table_name
+    )
+    , recent_syncs AS (
+        SELECT t.sync_id
+        FROM table_syncs AS t
+        WHERE t.succeeded
+        ORDER BY t.ts DESC
+        LIMIT p_runs
+    )
+    , phase_costs AS (
+        SELECT
+            CASE sp.phase
+                WHEN 'fetch_src_rows_by_key' THEN 'fetch_by_key'
+                WHEN 'upsert' THEN 'upsert'
+                ELSE 'fetch'
+            END AS cost
+        ,   sum(sp.execution_millis)::FLOAT8 / NULLIF(sum(sp.rows), 0) AS millis_per_row
+        FROM poa.sync_phase AS sp
+        JOIN recent_syncs AS rs
+            ON sp.sync_id = rs.sync_id
+        WHERE
+            sp.phase IN ('fetch_src_rows', 'fetch_src_rows_in_range', 'fetch_src_rows_by_key', 'upsert')
+        GROUP BY 1
+    )
+    , plan_corrections AS (
+        SELECT
+            sp.strategy
+        ,   avg(sp.actual_millis::FLOAT8 / sp.raw_est_millis) AS correction
+        FROM poa.sync_plan AS sp
+        JOIN recent_syncs AS rs
+            ON sp.sync_id = rs.sync_id
+        WHERE
+            sp.raw_est_millis > 0
+            AND sp.actual_millis IS NOT NULL
+        GROUP BY sp.strategy
+    )
+    SELECT
+        (SELECT pc.millis_per_row FROM phase_costs AS pc WHERE pc.cost = 'fetch')
+    ,   (SELECT pc.millis_per_row FROM phase_costs AS pc WHERE pc.cost = 'fetch_by_key')
+    ,   (SELECT pc.millis_per_row FROM phase_costs AS pc WHERE pc.cost = 'upsert')
+    ,   (
+            SELECT coalesce(jsonb_object_agg(c.strategy, c.correction), '{}'::JSONB)
+            FROM plan_corrections AS c
+        );
+$$;
+
+CREATE OR REPLACE PROCEDURE poa.save_table_snapshot (
+    p_src_db_name TEXT
+,   p_src_schema_name TEXT
+,   p_src_table_name TEXT
+,   p_dst_db_name TEXT
+,   p_dst_schema_name TEXT
+,   p_dst_table_name TEXT
+,   p_fingerprint TEXT
+,   p_estimated_rows BIGINT
+)
+LANGUAGE sql
+AS $$
+    INSERT INTO poa.table_snapshot (
+        src_db_name
+    ,   src_schema_name
+    ,   src_table_name
+    ,   dst_db_name
+    ,   dst_schema_name
+    ,   dst_table_name
+    ,   fingerprint
+    ,   estimated_rows
+    ) VALUES (
+        p_src_db_name
+    ,   p_src_schema_name
+    ,   p_src_table_name
+    ,   p_dst_db_name
+    ,   p_dst_schema_name
+    ,   p_dst_table_name
+    ,   p_fingerprint
+    ,   p_estimated_rows
+    )
+    ON CONFLICT (
+        src_db_name
+    ,   coalesce(src_schema_name, '')
+    ,   src_table_name
+    ,   dst_db_name
+    ,   dst_schema_name
+    ,   dst_table_name
+    )
+    DO UPDATE SET
+        fingerprint = EXCLUDED.fingerprint
+    ,   estimated_rows = EXCLUDED.estimated_rows
+    ,   ts = now();
+$$;
+
+CREATE OR REPLACE PROCEDURE poa.save_watermark (
+    p_src_db_name TEXT
+,   p_src_schema_name TEXT
+,   p_src_table_name TEXT
+,   p_dst_db_name TEXT
+,   p_dst_schema_name TEXT
+,   p_dst_table_name TEXT
+,   p_capture TEXT
+,   p_watermark TEXT
+)
+LANGUAGE sql
+AS $$
+    INSERT INTO poa.watermark (
+        src_db_name
+    ,   src_schema_name
+    ,   src_table_name
+    ,   dst_db_name
+    ,   dst_schema_name
+    ,   dst_table_name
+    ,   capture
+    ,   watermark
+    ) VALUES (
+        p_src_db_name
+    ,   p_src_schema_name
+    ,   p_src_table_name
+    ,   p_dst_db_name
+    ,   p_dst_schema_name
+    ,   p_dst_table_name
+    ,   p_capture
+    ,   p_watermark
+    )
+    ON CONFLICT (
+        src_db_name
+    ,   coalesce(src_schema_name, '')
+    ,   src_table_name
+    ,   dst_db_name
+    ,   dst_schema_name
+    ,   dst_table_name
+    ,   capture
+    )
+    DO UPDATE SET
+        watermark = EXCLUDED.watermark
+    ,   ts = now();
+$$;
+
 CREATE OR REPLACE PROCEDURE poa.sync_skipped (
     p_sync_id INT
 ,   p_skip_reason TEXT
@@ -178,6 +481,8 @@ CREATE OR REPLACE PROCEDURE poa.sync_succeeded (
 ,   p_rows_deleted INT
 ,   p_rows_updated INT
 ,   p_execution_millis INT
+,   p_peak_rss_bytes BIGINT DEFAULT NULL
+,   p_peak_traced_bytes BIGINT DEFAULT NULL
 )
 LANGUAGE plpgsql
 AS $$
@@ -188,8 +493,23 @@ BEGIN
     ASSERT p_rows_updated >= 0, 'p_rows_updated must be >= 0, but got %.', p_rows_updated;
     ASSERT p_execution_millis >= 0, 'p_execution_millis must be >= 0, but got %.', p_execution_millis;
 
-    INSERT INTO poa.sync_success (sync_id, rows_added, rows_deleted, rows_updated, execution_millis)
-    VALUES (p_sync_id, p_rows_added, p_rows_deleted, p_rows_updated, p_execution_millis);
+    INSERT INTO poa.sync_success (
+        sync_id
+    ,   rows_added
+    ,   rows_deleted
+    ,   rows_updated
+    ,   execution_millis
+    ,   peak_rss_bytes
+    ,   peak_traced_bytes
+    ) VALUES (
+        p_sync_id
+    ,   p_rows_added
+    ,   p_rows_deleted
+    ,   p_rows_updated
+    ,   p_execution_millis
+    ,   p_peak_rss_bytes
+    ,   p_peak_traced_bytes
+    );
 END;
 $$;
 
@@ -233,6 +553,20 @@ BEGIN
         WHERE s.sync_id = os.sync_id
     );
 
+    DELETE FROM poa.sync_plan AS s
+    WHERE EXISTS (
+        SELECT 1
+        FROM tmp_sync_ids_to_delete AS os
+        WHERE s.sync_id = os.sync_id
+    );
+
+    DELETE FROM poa.sync_phase AS s
+    WHERE EXISTS (
+        SELECT 1
+        FROM tmp_sync_ids_to_delete AS os
+        WHERE s.sync_id = os.sync_id
+    );
+
     DELETE FROM poa.sync_success AS s
     WHERE EXISTS (
         SELECT 1
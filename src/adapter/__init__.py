@@ -1,2 +1,50 @@
-from src.adapter import cache, config, cursor_provider, fs, log
-from src.adapter.ds import dst_ds, src_ds
+import importlib
+import typing
+
+# Each adapter is imported the first time it is used, rather than here, since most of them pull in
+# a database driver, and a single run usually only talks to one or two kinds of database.
+_MODULES: typing.Final[dict[str, str]] = {
+    "cache": "src.adapter.cache",
+    "change_detector": "src.adapter.change_detector",
+    "config": "src.adapter.config",
+    "cursor_provider": "src.adapter.cursor_provider",
+    "digest_snapshot": "src.adapter.digest_snapshot",
+    "dst_ds": "src.adapter.ds.dst_ds",
+    "fs": "src.adapter.fs",
+    "log": "src.adapter.log",
+    "memory": "src.adapter.memory",
+    "metrics": "src.adapter.metrics",
+    "schedule": "src.adapter.schedule",
+    "spill": "src.adapter.spill",
+    "src_ds": "src.adapter.ds.src_ds",
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    if (module_name := _MODULES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(module_name)
+    globals()[name] = module
+    return module
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_MODULES})
+
+
+if typing.TYPE_CHECKING:
+    from src.adapter import (
+        cache,
+        change_detector,
+        config,
+        cursor_provider,
+        digest_snapshot,
+        fs,
+        log,
+        memory,
+        metrics,
+        schedule,
+        spill,
+    )
+    from src.adapter.ds import dst_ds, src_ds
@@ -0,0 +1,21 @@
+from src import data
+
+__all__ = ("NullCache",)
+
+
+class NullCache(data.Cache):
+    """A cache that keeps nothing, for apis like file that have no database to keep table defs
+    in, so the src table is read from its catalog on every sync.
+    """
+
+    def add_table(self, /, table: data.Table) -> None | data.Error:
+        return None
+
+    def get_table_def(
+        self,
+        *,
+        db_name: str | None,
+        schema_name: str | None,
+        table_name: str,
+    ) -> data.Table | None | data.Error:
+        return None
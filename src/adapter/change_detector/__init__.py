@@ -0,0 +1 @@
+from src.adapter.change_detector.strategy import *
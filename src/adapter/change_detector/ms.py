@@ -0,0 +1,73 @@
+import datetime
+import typing
+
+from src import data
+
+__all__ = ("MSChangeDetector",)
+
+
+class MSChangeDetector(data.ChangeDetector):
+    """Uses the last time any index on the table was written to, from
+    sys.dm_db_index_usage_stats, along with the row counts in sys.partitions.
+
+    The usage stats are cleared when the server restarts, and have no last_user_update for a
+    table until it is written to again, so until then there is no snapshot.  Reading them takes
+    VIEW SERVER STATE.
+    """
+
+    def __init__(self, *, cur: data.Cursor, schema_name: str | None, table_name: str):
+        self._cur: typing.Final[data.Cursor] = cur
+        self._schema_name: typing.Final[str] = schema_name or "dbo"
+        self._table_name: typing.Final[str] = table_name
+
+    def snapshot(self) -> data.TableSnapshot | None | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql="""
+                    SELECT
+                        (
+                            SELECT max(u.last_user_update)
+                            FROM sys.dm_db_index_usage_stats AS u
+                            WHERE
+                                u.database_id = DB_ID()
+                                AND u.object_id = t.object_id
+                        ) AS last_user_update
+                    ,   (
+                            SELECT sum(p.rows)
+                            FROM sys.partitions AS p
+                            WHERE
+                                p.object_id = t.object_id
+                                AND p.index_id IN (0, 1)
+                        ) AS estimated_rows
+                    ,   (SELECT i.sqlserver_start_time FROM sys.dm_os_sys_info AS i) AS started
+                    FROM sys.tables AS t
+                    JOIN sys.schemas AS s
+                        ON t.schema_id = s.schema_id
+                    WHERE
+                        s.name = ?
+                        AND t.name = ?
+                """,
+                params=(self._schema_name, self._table_name),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None or row["last_user_update"] is None:
+                return None
+
+            last_user_update = typing.cast(datetime.datetime, row["last_user_update"])
+            started = typing.cast(datetime.datetime, row["started"])
+            estimated_rows = typing.cast(int | None, row["estimated_rows"])
+
+            return data.TableSnapshot(
+                fingerprint=(
+                    f"{last_user_update.isoformat()}:{estimated_rows}:{started.isoformat()}"
+                ),
+                estimated_rows=None if estimated_rows is None else int(estimated_rows),
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+            )
@@ -0,0 +1,68 @@
+import typing
+
+from src import data
+
+__all__ = ("PgChangeDetector",)
+
+
+class PgChangeDetector(data.ChangeDetector):
+    """Uses the cumulative insert, update, and delete counts in pg_stat_user_tables.
+
+    Those counters start over when the stats are reset or the server restarts, so the reset time
+    and start time are part of the fingerprint, and a table is never mistaken for unchanged
+    because its counters happened to land back where they were.
+
+    A hot standby's counters don't move while it replays WAL, so on a standby there's no
+    snapshot, and every sync goes ahead.
+    """
+
+    def __init__(self, *, cur: data.Cursor, schema_name: str | None, table_name: str):
+        self._cur: typing.Final[data.Cursor] = cur
+        self._schema_name: typing.Final[str] = schema_name or "public"
+        self._table_name: typing.Final[str] = table_name
+
+    def snapshot(self) -> data.TableSnapshot | None | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql="""
+                    SELECT
+                        concat_ws(
+                            ':'
+                        ,   s.n_tup_ins
+                        ,   s.n_tup_upd
+                        ,   s.n_tup_del
+                        ,   extract(EPOCH FROM d.stats_reset)
+                        ,   extract(EPOCH FROM pg_postmaster_start_time())
+                        ) AS fingerprint
+                    ,   c.reltuples::BIGINT AS estimated_rows
+                    FROM pg_stat_user_tables AS s
+                    JOIN pg_class AS c
+                        ON s.relid = c.oid
+                    CROSS JOIN pg_stat_database AS d
+                    WHERE
+                        s.schemaname = %s
+                        AND s.relname = %s
+                        AND d.datname = current_database()
+                        AND NOT pg_is_in_recovery()
+                """,
+                params=(self._schema_name, self._table_name),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return None
+
+            # reltuples is -1 until the table has been vacuumed or analyzed
+            estimated_rows = typing.cast(int, row["estimated_rows"])
+
+            return data.TableSnapshot(
+                fingerprint=typing.cast(str, row["fingerprint"]),
+                estimated_rows=estimated_rows if estimated_rows >= 0 else None,
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+            )
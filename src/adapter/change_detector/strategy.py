@@ -0,0 +1,27 @@
+from src import data
+
+__all__ = ("create",)
+
+
+def create(
+    *,
+    cur: data.Cursor,
+    api: data.API,
+    schema_name: str | None,
+    table_name: str,
+) -> data.ChangeDetector | None | data.Error:
+    """Returns None for sources whose catalogs don't track changes, like plain ODBC."""
+    try:
+        if api == data.API.PSYCOPG:
+            from src.adapter.change_detector.pg import PgChangeDetector
+
+            return PgChangeDetector(cur=cur, schema_name=schema_name, table_name=table_name)
+
+        if api == data.API.MSSQL:
+            from src.adapter.change_detector.ms import MSChangeDetector
+
+            return MSChangeDetector(cur=cur, schema_name=schema_name, table_name=table_name)
+
+        return None
+    except Exception as e:
+        return data.Error.new(str(e), api=api, schema_name=schema_name, table_name=table_name)
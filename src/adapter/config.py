@@ -49,11 +49,28 @@ def load(*, config_file: pathlib.Path) -> data.Config | data.Error:
 
             databases.append(database)
 
+        # optional, since most installs don't run node_exporter
+        metrics_file: typing.Final[str | None] = d.get("metrics-file")
+
+        # optional, and when it's missing, every batch is batch-size rows
+        batch_seconds: typing.Final[float | None] = d.get("batch-seconds")
+
+        # optional, and when it's missing, a compare reads dst's digests every time
+        snapshot_folder: typing.Final[str | None] = d.get("snapshot-folder")
+
+        # optional, and when it's missing, rows are diffed in the sync's own process, since a
+        # frozen exe, or a host that's short on memory, may not want worker processes
+        diff_workers: typing.Final[int] = int(d.get("diff-workers", 1))
+
         return data.Config(
             seconds_between_cleanups=seconds_between_cleanups,
             days_logs_to_keep=days_logs_to_keep,
             batch_size=batch_size,
             databases=tuple(databases),
+            metrics_file=None if metrics_file is None else pathlib.Path(metrics_file),
+            batch_seconds=None if batch_seconds is None else float(batch_seconds),
+            snapshot_folder=None if snapshot_folder is None else pathlib.Path(snapshot_folder),
+            diff_workers=diff_workers,
         )
     except:  # noqa: E722
         # import traceback
@@ -85,6 +102,14 @@ def _parse_datasource_dict(datasource_dict: dict[str, typing.Any], /) -> data.Db
                 f"could not convert api entry, {datasource_dict['api']!r}, to a data.API instance."
             )
 
+        # a file export is a folder rather than a server, so it has no host or credentials
+        if api == data.API.FILE:
+            return _parse_file_export(db_id=db_id, datasource_dict=datasource_dict)
+
+        # and a sqlite database is a file
+        if api == data.API.SQLITE:
+            return _parse_sqlite(db_id=db_id, datasource_dict=datasource_dict)
+
         if "host" not in datasource_dict.keys():
             return data.Error.new("datasource entry in config file is missing an entry for 'host'.")
 
@@ -138,6 +163,25 @@ def _parse_datasource_dict(datasource_dict: dict[str, typing.Any], /) -> data.Db
         else:
             con_str = pydantic.SecretStr(connection_string)
 
+        # optional, since only psycopg can fetch results in binary
+        binary: typing.Final[bool] = datasource_dict.get("binary", False)
+        if not isinstance(binary, bool):
+            return data.Error.new(f"binary must be true or false, but {db_id!r} has {binary!r}.")
+
+        if binary and api != data.API.PSYCOPG:
+            return data.Error.new(
+                f"binary is only supported for the psycopg api, but {db_id!r} uses {api!s}."
+            )
+
+        # optional, since only pg has advisory locks to wait on or skip
+        lock: typing.Final[data.LockPolicy] = data.LockPolicy(
+            datasource_dict.get("lock", data.LockPolicy.WAIT.value)
+        )
+        if "lock" in datasource_dict and api != data.API.PSYCOPG:
+            return data.Error.new(
+                f"lock is only supported for the psycopg api, but {db_id!r} uses {api!s}."
+            )
+
         return data.DbConfig(
             db_id=db_id,
             api=api,
@@ -146,10 +190,68 @@ def _parse_datasource_dict(datasource_dict: dict[str, typing.Any], /) -> data.Db
             keyring_db_username_entry=keyring_db_username_entry,
             keyring_db_password_entry=keyring_db_password_entry,
             connection_string=con_str,
+            binary=binary,
+            lock=lock,
         )
     except:  # noqa: E722
         return data.Error.new("An error occurred while parsing datasource from json.")
 
 
+def _parse_file_export(
+    *, db_id: str, datasource_dict: dict[str, typing.Any]
+) -> data.DbConfig | data.Error:
+    if "folder" not in datasource_dict.keys():
+        return data.Error.new(
+            f"datasource entry {db_id!r} in config file is missing an entry for 'folder'."
+        )
+
+    # the rest are optional, and fall back to FileExport's defaults
+    options: dict[str, typing.Any] = {}
+    for key, field_name in (
+        ("format", "format"),
+        ("compression", "compression"),
+        ("partition-col", "partition_col"),
+        ("rows-per-file", "rows_per_file"),
+    ):
+        if key in datasource_dict.keys():
+            options[field_name] = datasource_dict[key]
+
+    try:
+        export = data.FileExport(folder=pathlib.Path(datasource_dict["folder"]), **options)
+    except pydantic.ValidationError as e:
+        return data.Error.new(f"datasource entry {db_id!r} has an invalid file export: {e}")
+
+    return data.DbConfig(
+        db_id=db_id,
+        api=data.API.FILE,
+        host=None,
+        db_name=datasource_dict.get("db-name") or db_id,
+        keyring_db_username_entry=None,
+        keyring_db_password_entry=None,
+        connection_string=None,
+        export=export,
+    )
+
+
+def _parse_sqlite(
+    *, db_id: str, datasource_dict: dict[str, typing.Any]
+) -> data.DbConfig | data.Error:
+    if "path" not in datasource_dict.keys():
+        return data.Error.new(
+            f"datasource entry {db_id!r} in config file is missing an entry for 'path'."
+        )
+
+    return data.DbConfig(
+        db_id=db_id,
+        api=data.API.SQLITE,
+        host=None,
+        db_name=datasource_dict.get("db-name") or db_id,
+        keyring_db_username_entry=None,
+        keyring_db_password_entry=None,
+        connection_string=None,
+        path=pathlib.Path(datasource_dict["path"]),
+    )
+
+
 if __name__ == "__main__":
     print(load(config_file=pathlib.Path(r"C:\bu\py\poa\assets\config.json")))
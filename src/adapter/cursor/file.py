@@ -0,0 +1,61 @@
+import typing
+
+from src import data
+
+__all__ = ("FileCursor",)
+
+
+class FileCursor(data.Cursor):
+    """The cursor handed out for the file api, which has no SQL to run.
+
+    FileDstDs writes its files directly, so it never uses the cursor, and anything that does gets
+    an error back rather than a statement that silently did nothing.
+    """
+
+    def execute(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> None | data.Error:
+        return _no_sql(sql)
+
+    def execute_many(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Iterable[typing.Hashable]],
+    ) -> None | data.Error:
+        return _no_sql(sql)
+
+    def fetch_batches(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        return _no_sql(sql)
+
+    def fetch_one(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> data.Row | None | data.Error:
+        return _no_sql(sql)
+
+    def fetch_all(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> tuple[data.Row, ...] | data.Error:
+        return _no_sql(sql)
+
+
+def _no_sql(sql: str | data.TrustedSql, /) -> data.Error:
+    return data.Error.new("The file api cannot run SQL.", sql=str(sql))
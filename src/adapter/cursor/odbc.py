@@ -8,6 +8,8 @@ from src.adapter.cursor import shared
 __all__ = ("OdbcCursor",)
 
 
+# pyodbc keeps the last statement prepared and reuses it when the same sql is executed again, so
+# prepare is a no-op here.
 class OdbcCursor(data.Cursor):
     def __init__(self, *, cursor: pyodbc.Cursor):
         self._cursor: typing.Final[pyodbc.Cursor] = cursor
@@ -15,8 +17,9 @@ class OdbcCursor(data.Cursor):
     def execute(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> None | data.Error:
         return shared.execute(
             cur=self._cursor,
@@ -27,7 +30,7 @@ class OdbcCursor(data.Cursor):
     def execute_many(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Iterable[typing.Hashable]] | None,
     ) -> None | data.Error:
         return shared.execute_many(
@@ -36,11 +39,26 @@ class OdbcCursor(data.Cursor):
             params=params,
         )
 
+    def fetch_batches(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        return shared.fetch_batches(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+            batch_size=batch_size,
+        )
+
     def fetch_one(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> data.Row | None | data.Error:
         return shared.fetch_one(
             cur=self._cursor,
@@ -51,8 +69,9 @@ class OdbcCursor(data.Cursor):
     def fetch_all(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> tuple[data.Row, ...] | data.Error:
         return shared.fetch_all(
             cur=self._cursor,
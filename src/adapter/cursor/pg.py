@@ -15,19 +15,21 @@ class PgCursor(data.Cursor):
     def execute(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> None | data.Error:
         return shared.execute(
             cur=self._cursor,
             sql=sql,
             params=params,
+            prepare=prepare,
         )
 
     def execute_many(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Iterable[typing.Hashable]] | None,
     ) -> None | data.Error:
         return shared.execute_many(
@@ -36,26 +38,45 @@ class PgCursor(data.Cursor):
             params=params,
         )
 
+    def fetch_batches(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        return shared.fetch_batches(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+            batch_size=batch_size,
+            stream=True,
+        )
+
     def fetch_one(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> data.Row | None | data.Error:
         return shared.fetch_one(
             cur=self._cursor,
             sql=sql,
             params=params,
+            prepare=prepare,
         )
 
     def fetch_all(
         self,
         *,
-        sql: str,
+        sql: str | data.TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> tuple[data.Row, ...] | data.Error:
         return shared.fetch_all(
             cur=self._cursor,
             sql=sql,
             params=params,
+            prepare=prepare,
         )
@@ -1,35 +1,39 @@
-import typing
+from __future__ import annotations
 
-import psycopg
-import pyodbc
+import typing
 
 from src import data
 
+if typing.TYPE_CHECKING:
+    import psycopg
+    import pyodbc
+
 __all__ = (
     "execute",
     "execute_many",
     "fetch_all",
+    "fetch_batches",
     "fetch_one",
 )
 
+T = typing.TypeVar("T")
+
 
 def execute(
     cur: pyodbc.Cursor | psycopg.Cursor,
-    sql: str,
+    sql: str | data.TrustedSql,
     params: typing.Iterable[typing.Hashable] | None,
+    prepare: bool = False,
 ) -> None | data.Error:
     try:
-        if errors := query_errors(sql=sql, params=params):
+        if isinstance(sql, str) and (errors := query_errors(sql=sql, params=params)):
             return data.Error.new(
                 "\n".join(errors),
                 sql=sql,
                 params=None if params is None else tuple(params),
             )
 
-        if params:
-            cur.execute(sql, list(params))
-        else:
-            cur.execute(sql)
+        _execute(cur=cur, sql=sql, params=params, prepare=prepare)
 
         return None
     except Exception as e:
@@ -43,50 +47,93 @@ def execute(
 def execute_many(
     *,
     cur: pyodbc.Cursor | psycopg.Cursor,
-    sql: str,
+    sql: str | data.TrustedSql,
     params: typing.Iterable[typing.Iterable[typing.Hashable]] | None,
 ) -> None | data.Error:
+    rows: typing.Sequence[typing.Iterable[typing.Hashable]] = []
     try:
-        if errors := query_errors(sql=sql, params=params):
+        if params is not None:
+            rows = _as_sequence(params)
+
+        if isinstance(sql, str):
+            errors = query_errors(sql=sql, params=None)
+            for row in rows:
+                errors += query_errors(sql="", params=row)
+
+            if errors:
+                return data.Error.new(
+                    "\n".join(sorted(set(errors))),
+                    sql=sql,
+                    rows=len(rows),
+                )
+
+        if rows:
+            cur.executemany(sql, rows)
+        else:
+            return data.Error.new("executemany was called with no parameters.")
+    except Exception as e:
+        return data.Error.new(
+            str(e),
+            sql=sql,
+            rows=len(rows),
+            first_row=tuple(rows[0]) if rows else None,
+        )
+
+
+def fetch_batches(
+    *,
+    cur: pyodbc.Cursor | psycopg.Cursor,
+    sql: str | data.TrustedSql,
+    params: typing.Iterable[typing.Hashable] | None,
+    batch_size: int,
+    stream: bool = False,
+) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+    try:
+        if isinstance(sql, str) and (errors := query_errors(sql=sql, params=params)):
             return data.Error.new(
                 "\n".join(errors),
                 sql=sql,
-                params=None if params is None else tuple(tuple(p) for p in params),
+                params=None if params is None else tuple(params),
             )
 
-        if params:
-            cur.executemany(sql, list(list(p) for p in params))
+        if stream:
+            # only psycopg supports this.  A plain execute buffers the whole result in libpq before
+            # the first row is read, whereas stream() pulls one row at a time in single-row mode
+            rows: typing.Iterable[typing.Any] = cur.stream(  # type: ignore[union-attr]
+                sql, _as_sequence(params) if params else None
+            )
         else:
-            return data.Error.new("executemany was called with no parameters.")
+            _execute(cur=cur, sql=sql, params=params, prepare=False)
+            rows = _fetch_many(cur=cur, batch_size=batch_size)
+
+        return _batches(rows=rows, batch_size=batch_size, sql=sql)
     except Exception as e:
         return data.Error.new(
             str(e),
             sql=sql,
-            params=None if params is None else tuple(tuple(p) for p in params),
+            params=None if params is None else tuple(params),
         )
 
 
 def fetch_one(
     *,
     cur: pyodbc.Cursor | psycopg.Cursor,
-    sql: str,
+    sql: str | data.TrustedSql,
     params: typing.Iterable[typing.Hashable] | None,
+    prepare: bool = False,
 ) -> data.Row | None | data.Error:
     try:
-        if errors := query_errors(sql=sql, params=params):
+        if isinstance(sql, str) and (errors := query_errors(sql=sql, params=params)):
             return data.Error.new(
                 "\n".join(errors),
                 sql=sql,
                 params=None if params is None else tuple(params),
             )
 
-        if params:
-            cur.execute(sql, params)
-        else:
-            cur.execute(sql)
+        _execute(cur=cur, sql=sql, params=params, prepare=prepare)
 
         if result := cur.fetchone():
-            return data.Row(result)
+            return _as_row(result)
 
         return None
     except Exception as e:
@@ -100,25 +147,23 @@ def fetch_one(
 def fetch_all(
     *,
     cur: pyodbc.Cursor | psycopg.Cursor,
-    sql: str,
+    sql: str | data.TrustedSql,
     params: typing.Iterable[typing.Hashable] | None,
+    prepare: bool = False,
 ) -> tuple[data.Row, ...] | data.Error:
     try:
-        if errors := query_errors(sql=sql, params=params):
+        if isinstance(sql, str) and (errors := query_errors(sql=sql, params=params)):
             return data.Error.new(
                 "\n".join(errors),
                 sql=sql,
                 params=None if params is None else tuple(params),
             )
 
-        if params:
-            cur.execute(sql, params)
-        else:
-            cur.execute(sql)
+        _execute(cur=cur, sql=sql, params=params, prepare=prepare)
 
         result = cur.fetchall()
 
-        return tuple(data.Row(row) for row in result)
+        return tuple(_as_row(row) for row in result)
     except Exception as e:
         return data.Error.new(
             str(e),
@@ -162,3 +207,61 @@ def query_errors(
                     errors.append("*/ is not allowed in parameters.")
 
     return errors
+
+
+def _execute(
+    *,
+    cur: pyodbc.Cursor | psycopg.Cursor,
+    sql: str | data.TrustedSql,
+    params: typing.Iterable[typing.Hashable] | None,
+    prepare: bool,
+) -> None:
+    if prepare:
+        # only psycopg supports this, and it will PREPARE the statement on first use and reuse it
+        # for the rest of the connection
+        cur.execute(sql, _as_sequence(params) if params else None, prepare=True)
+    elif params:
+        cur.execute(sql, _as_sequence(params))
+    else:
+        cur.execute(sql)
+
+
+def _batches(
+    *,
+    rows: typing.Iterable[typing.Any],
+    batch_size: int,
+    sql: str | data.TrustedSql,
+) -> typing.Iterator[tuple[data.Row, ...]]:
+    try:
+        batch: list[data.Row] = []
+        for row in rows:
+            batch.append(_as_row(row))
+            if len(batch) >= batch_size:
+                yield tuple(batch)
+                batch = []
+
+        if batch:
+            yield tuple(batch)
+    except data.Error:
+        raise
+    except Exception as e:
+        raise data.Error.new(str(e), sql=sql, batch_size=batch_size)
+
+
+def _fetch_many(*, cur: pyodbc.Cursor, batch_size: int) -> typing.Iterator[typing.Any]:
+    while rows := cur.fetchmany(batch_size):
+        yield from rows
+
+
+def _as_row(row: typing.Any, /) -> data.Row:
+    # psycopg's dict_row already makes a new dict for each row, so it isn't copied again
+    if type(row) is dict:
+        return row
+    return data.Row(row)
+
+
+def _as_sequence(items: typing.Iterable[T], /) -> typing.Sequence[T]:
+    # drivers want a sequence, but we don't want to copy one that already is
+    if isinstance(items, (list, tuple)):
+        return items
+    return list(items)
@@ -0,0 +1,100 @@
+import sqlite3
+import typing
+
+from src import data
+from src.adapter.cursor import shared
+
+__all__ = ("SqliteCursor",)
+
+
+# sqlite3 keeps a cache of prepared statements on each connection and reuses them when the same sql
+# is executed again, so prepare is a no-op here.
+class SqliteCursor(data.Cursor):
+    def __init__(self, *, con: sqlite3.Connection):
+        self._cursor: typing.Final[sqlite3.Cursor] = con.cursor(_DriverCursor)
+        self._cursor.row_factory = _dict_row
+
+    def execute(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> None | data.Error:
+        return shared.execute(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+        )
+
+    def execute_many(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Iterable[typing.Hashable]] | None,
+    ) -> None | data.Error:
+        return shared.execute_many(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+        )
+
+    def fetch_batches(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        return shared.fetch_batches(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+            batch_size=batch_size,
+        )
+
+    def fetch_one(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> data.Row | None | data.Error:
+        return shared.fetch_one(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+        )
+
+    def fetch_all(
+        self,
+        *,
+        sql: str | data.TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
+    ) -> tuple[data.Row, ...] | data.Error:
+        return shared.fetch_all(
+            cur=self._cursor,
+            sql=sql,
+            params=params,
+        )
+
+
+class _DriverCursor(sqlite3.Cursor):
+    """sqlite3 only takes statements as str, so a TrustedSql is rendered before it's run."""
+
+    def execute(self, sql: typing.Any, parameters: typing.Any = (), /) -> sqlite3.Cursor:
+        return super().execute(_as_str(sql), parameters)
+
+    def executemany(self, sql: typing.Any, parameters: typing.Any, /) -> sqlite3.Cursor:
+        return super().executemany(_as_str(sql), parameters)
+
+
+def _as_str(sql: str | data.TrustedSql, /) -> str:
+    if isinstance(sql, str):
+        return sql
+    return sql.as_string(None)
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple[typing.Any, ...]) -> dict[str, typing.Any]:
+    return {col[0]: value for col, value in zip(cursor.description, row)}
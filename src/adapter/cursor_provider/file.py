@@ -0,0 +1,15 @@
+import contextlib
+import typing
+
+from src import data
+from src.adapter.cursor.file import FileCursor
+
+__all__ = ("FileCursorProvider",)
+
+
+class FileCursorProvider(data.CursorProvider):
+    """There's no connection to open for the file api, so this just hands out a FileCursor."""
+
+    @contextlib.contextmanager
+    def open(self) -> typing.Generator[data.Cursor | data.Error, None, None]:
+        yield FileCursor()
@@ -6,14 +6,19 @@ import pyodbc
 
 from src import data
 from src.adapter.cursor.odbc import OdbcCursor
+from src.adapter.cursor_provider import shared
 
 __all__ = ("OdbcCursorProvider",)
 
 
 class OdbcCursorProvider(data.CursorProvider):
-    def __init__(self, *, db_config: data.DbConfig):
+    def __init__(self, *, db_config: data.DbConfig, max_idle: int = 0):
         self._db_config: typing.Final[data.DbConfig] = db_config
 
+        self._idle: typing.Final[shared.IdleConnections[pyodbc.Connection]] = (
+            shared.IdleConnections(max_idle=max_idle)
+        )
+
     @contextlib.contextmanager
     def open(self) -> typing.Generator[data.Cursor | data.Error, None, None]:
         if self._db_config.api == data.API.HH:
@@ -24,26 +29,35 @@ class OdbcCursorProvider(data.CursorProvider):
         con_str = self._db_config.connection_string
         if con_str is None:
             yield data.Error.new("Connection string is required for OdbcCursorProvider")
+            return
+
+        con = self._idle.take()
+        if con is None or con.closed:
+            con = _connect(connection_string=con_str, autocommit=autocommit)
+            if isinstance(con, data.Error):
+                yield con
+                return
+
+        try:
+            with con.cursor() as cur:
+                yield OdbcCursor(cursor=cur)
+        except BaseException:
+            con.rollback()
+            con.close()
+            raise
         else:
-            with _connect(connection_string=con_str, autocommit=autocommit) as con:
-                if isinstance(con, data.Error):
-                    yield con
-                else:
-                    with con.cursor() as cur:
-                        yield OdbcCursor(cursor=cur)
+            con.commit()
+            if not self._idle.give_back(con):
+                con.close()
 
 
-@contextlib.contextmanager
 def _connect(
     *,
     connection_string: pydantic.SecretStr,
     autocommit: bool,
-) -> typing.Generator[data.Cursor | data.Error, None, None]:
+) -> pyodbc.Connection | data.Error:
     # noinspection PyBroadException
     try:
-        con = pyodbc.connect(connection_string.get_secret_value(), autocommit=autocommit)
+        return pyodbc.connect(connection_string.get_secret_value(), autocommit=autocommit)
     except:  # noqa: E722
-        yield data.Error.new("An error occurred while connecting to the database.")
-    else:
-        with con:
-            yield con
+        return data.Error.new("An error occurred while connecting to the database.")
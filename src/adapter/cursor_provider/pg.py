@@ -2,50 +2,82 @@ import contextlib
 import pathlib
 import typing
 
-import keyring
 import psycopg
 from psycopg.rows import dict_row
 
 from src import data
 from src.adapter.cursor.pg import PgCursor
+from src.adapter.cursor_provider import shared
 
 __all__ = ("PgCursorProvider",)
 
 
 class PgCursorProvider(data.CursorProvider):
-    def __init__(self, *, db_config: data.DbConfig):
+    def __init__(self, *, db_config: data.DbConfig, max_idle: int = 0):
         self._db_config: typing.Final[data.DbConfig] = db_config
 
+        self._idle: typing.Final[shared.IdleConnections[psycopg.Connection]] = (
+            shared.IdleConnections(max_idle=max_idle)
+        )
+
     @contextlib.contextmanager
     def open(self) -> typing.Generator[data.Cursor | data.Error, None, None]:
+        con = self._idle.take()
+        if con is None or con.closed or con.broken:
+            con = self._connect()
+            if isinstance(con, data.Error):
+                yield con
+                return
+
         # noinspection PyBroadException
         try:
-            username = keyring.get_password("system", self._db_config.keyring_db_username_entry)
-            password = keyring.get_password("system", self._db_config.keyring_db_password_entry)
-
-            con: typing.Final[psycopg.Connection] = psycopg.connect(
-                host=self._db_config.host,
-                dbname=self._db_config.db_name,
-                user=username,
-                password=password,
-            )
-        except:  # noqa: E722
-            yield data.Error.new("An error occurred while connecting to the database.")
+            # in binary, numbers, timestamps, and uuids are decoded from their wire format, rather
+            # than parsed from text
+            with con.cursor(row_factory=dict_row, binary=self._db_config.binary) as cur:
+                yield PgCursor(cursor=cur)
+        except BaseException:
+            con.rollback()
+            con.close()
+            raise
         else:
-            # noinspection PyBroadException
-            try:
-                with con.cursor(row_factory=dict_row) as cur:
-                    cur.execute("SET SESSION idle_in_transaction_session_timeout = '15min';")
-                    cur.execute("SET SESSION lock_timeout = '5min';")
-                    cur.execute("SET SESSION TIME ZONE 'UTC';")
-                    yield PgCursor(cursor=cur)
-            except BaseException:
-                con.rollback()
-            else:
-                con.commit()
-            finally:
+            con.commit()
+            if not self._idle.give_back(con):
                 con.close()
 
+    def _connect(self) -> psycopg.Connection | data.Error:
+        # noinspection PyBroadException
+        try:
+            if self._db_config.connection_string is not None:
+                con = psycopg.connect(self._db_config.connection_string.get_secret_value())
+            else:
+                # keyring looks up its backends through package metadata, which is slow, and a
+                # connection string doesn't need it
+                import keyring
+
+                username = keyring.get_password(
+                    "system", self._db_config.keyring_db_username_entry
+                )
+                password = keyring.get_password(
+                    "system", self._db_config.keyring_db_password_entry
+                )
+
+                con = psycopg.connect(
+                    host=self._db_config.host,
+                    dbname=self._db_config.db_name,
+                    user=username,
+                    password=password,
+                )
+
+            # these are session settings, so a connection that is kept open only needs them once
+            con.execute("SET SESSION idle_in_transaction_session_timeout = '15min';")
+            con.execute("SET SESSION lock_timeout = '5min';")
+            con.execute("SET SESSION TIME ZONE 'UTC';")
+            con.commit()
+
+            return con
+        except:  # noqa: E722
+            return data.Error.new("An error occurred while connecting to the database.")
+
 
 if __name__ == "__main__":
     from src.adapter.config import load
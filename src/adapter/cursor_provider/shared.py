@@ -0,0 +1,34 @@
+import threading
+import typing
+
+__all__ = ("IdleConnections",)
+
+T = typing.TypeVar("T")
+
+
+class IdleConnections(typing.Generic[T]):
+    """Connections that a CursorProvider keeps open between uses.
+
+    With max_idle = 0, which is the default for a one-off sync, nothing is kept, and every open()
+    connects from scratch.
+    """
+
+    def __init__(self, *, max_idle: int):
+        self._max_idle: typing.Final[int] = max_idle
+
+        self._connections: list[T] = []
+        self._lock = threading.Lock()
+
+    def give_back(self, con: T, /) -> bool:
+        """Returns False if the pool is full, in which case the caller should close con."""
+        with self._lock:
+            if len(self._connections) < self._max_idle:
+                self._connections.append(con)
+                return True
+            return False
+
+    def take(self) -> T | None:
+        with self._lock:
+            if self._connections:
+                return self._connections.pop()
+            return None
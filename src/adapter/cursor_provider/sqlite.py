@@ -0,0 +1,73 @@
+import contextlib
+import sqlite3
+import typing
+
+from src import data
+from src.adapter.cursor.sqlite import SqliteCursor
+from src.adapter.cursor_provider import shared
+
+__all__ = ("SqliteCursorProvider",)
+
+# how long a statement waits for another connection's write to finish, like lock_timeout for pg
+_BUSY_TIMEOUT_SECONDS: typing.Final[float] = 5 * 60
+
+
+class SqliteCursorProvider(data.CursorProvider):
+    """Each open() is one transaction, committed when it closes, so a sync's writes are a few
+    large transactions rather than one per statement.
+    """
+
+    def __init__(self, *, db_config: data.DbConfig, max_idle: int = 0):
+        self._db_config: typing.Final[data.DbConfig] = db_config
+
+        self._idle: typing.Final[shared.IdleConnections[sqlite3.Connection]] = (
+            shared.IdleConnections(max_idle=max_idle)
+        )
+
+    @contextlib.contextmanager
+    def open(self) -> typing.Generator[data.Cursor | data.Error, None, None]:
+        con = self._idle.take()
+        if con is None:
+            con = self._connect()
+            if isinstance(con, data.Error):
+                yield con
+                return
+
+        try:
+            yield SqliteCursor(con=con)
+        except BaseException:
+            con.rollback()
+            con.close()
+            raise
+        else:
+            con.commit()
+            if not self._idle.give_back(con):
+                con.close()
+
+    def _connect(self) -> sqlite3.Connection | data.Error:
+        # noinspection PyBroadException
+        try:
+            if self._db_config.path is None:
+                return data.Error.new(
+                    "A path is required for SqliteCursorProvider.",
+                    db_id=self._db_config.db_id,
+                )
+
+            # a connection that's kept idle for poa serve can be taken by another worker thread
+            con = sqlite3.connect(
+                self._db_config.path,
+                timeout=_BUSY_TIMEOUT_SECONDS,
+                check_same_thread=False,
+            )
+
+            # in WAL mode, a sync reading the database doesn't block one writing to it, and a
+            # commit only has to sync the log rather than the database itself
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("PRAGMA synchronous = NORMAL")
+
+            return con
+        except:  # noqa: E722
+            return data.Error.new(
+                "An error occurred while connecting to the database.",
+                path=self._db_config.path,
+            )
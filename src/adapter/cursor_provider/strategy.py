@@ -1,20 +1,65 @@
+import threading
+import typing
+
 from src import data
-from src.adapter.cursor_provider.odbc import OdbcCursorProvider
-from src.adapter.cursor_provider.pg import PgCursorProvider
 
-__all__ = ("create",)
+__all__ = (
+    "create",
+    "keep_alive",
+)
+
+_lock: typing.Final[threading.Lock] = threading.Lock()
+_max_idle = 0
+_providers: dict[data.DbConfig, data.CursorProvider] = {}
 
 
 def create(*, db_config: data.DbConfig) -> data.CursorProvider | data.Error:
     try:
-        if db_config.api in (data.API.HH, data.API.MSSQL, data.API.PYODBC):
-            return OdbcCursorProvider(db_config=db_config)
-        elif db_config.api == data.API.PSYCOPG:
-            return PgCursorProvider(db_config=db_config)
-        else:
-            return data.Error.new(
-                f"CursorProvider is not implemented for the {db_config.api!s} api.",
-                db_config=db_config,
-            )
+        if _max_idle:
+            with _lock:
+                if (provider := _providers.get(db_config)) is None:
+                    provider = _create(db_config=db_config, max_idle=_max_idle)
+                    if not isinstance(provider, data.Error):
+                        _providers[db_config] = provider
+                return provider
+
+        return _create(db_config=db_config, max_idle=0)
     except Exception as e:
         return data.Error.new(str(e), db_config=db_config)
+
+
+def keep_alive(*, max_idle: int) -> None:
+    """Have create() hand out one shared CursorProvider per database for the rest of the process,
+    each keeping up to max_idle connections open between uses.  This is for poa serve, where the
+    same tables are synced over and over, and a one-off sync has no use for it.
+    """
+    global _max_idle
+
+    with _lock:
+        _max_idle = max_idle
+        _providers.clear()
+
+
+def _create(*, db_config: data.DbConfig, max_idle: int) -> data.CursorProvider | data.Error:
+    # each provider is imported here, so only the driver for the api in use is loaded
+    if db_config.api in (data.API.HH, data.API.MSSQL, data.API.PYODBC):
+        from src.adapter.cursor_provider.odbc import OdbcCursorProvider
+
+        return OdbcCursorProvider(db_config=db_config, max_idle=max_idle)
+    elif db_config.api == data.API.PSYCOPG:
+        from src.adapter.cursor_provider.pg import PgCursorProvider
+
+        return PgCursorProvider(db_config=db_config, max_idle=max_idle)
+    elif db_config.api == data.API.SQLITE:
+        from src.adapter.cursor_provider.sqlite import SqliteCursorProvider
+
+        return SqliteCursorProvider(db_config=db_config, max_idle=max_idle)
+    elif db_config.api == data.API.FILE:
+        from src.adapter.cursor_provider.file import FileCursorProvider
+
+        return FileCursorProvider()
+    else:
+        return data.Error.new(
+            f"CursorProvider is not implemented for the {db_config.api!s} api.",
+            db_config=db_config,
+        )
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import os
+import pathlib
+import pickle
+import re
+import sqlite3
+import typing
+
+from src import data
+
+__all__ = ("DigestSnapshot",)
+
+# rows are written to the snapshot file this many at a time
+_WRITE_BATCH_SIZE: typing.Final[int] = 10_000
+
+
+class DigestSnapshot:
+    """A local SQLite file per dst table that holds the digest of each row as of the last sync,
+    so a compare can diff src against it, and dst is only read to fall back on.
+
+    The file is taken, meaning read and deleted, before dst is written, so if a sync dies part way
+    through, there's no snapshot left to disagree with dst, and the next sync reads dst instead.
+    The digests staged by the sync are only written once dst has been committed, to a temp file
+    that is swapped in with a rename.
+
+    A snapshot can only be trusted as long as syncs are the only thing that write to dst.
+    """
+
+    def __init__(
+        self,
+        *,
+        folder: pathlib.Path,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        key_cols: tuple[str, ...],
+        col_names: tuple[str, ...],
+    ):
+        name = re.sub(
+            r"[^A-Za-z0-9_.-]", "_", f"{dst_db_name}.{dst_schema_name}.{dst_table_name}"
+        )
+
+        self._path: typing.Final[pathlib.Path] = folder / f"{name}.sqlite"
+        self._key_cols: typing.Final[tuple[str, ...]] = key_cols
+        self._col_names: typing.Final[tuple[str, ...]] = tuple(sorted(col_names))
+
+        self._last: dict[data.RowKey, str] | None = None
+        self._next: dict[data.RowKey, str] | None = None
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    @property
+    def last(self) -> dict[data.RowKey, str] | None:
+        """The digests the last sync left, if take found a snapshot that matches the table."""
+        return self._last
+
+    def take(self) -> None | data.Error:
+        """Read the snapshot into last, if it was made for the same key and digest columns, and
+        delete the file.
+        """
+        try:
+            if not self._path.exists():
+                return None
+
+            with contextlib.closing(sqlite3.connect(self._path)) as con:
+                meta = dict(con.execute("SELECT name, value FROM meta").fetchall())
+                if (
+                    json.loads(meta.get("key_cols", "null")) == list(self._key_cols)
+                    and json.loads(meta.get("col_names", "null")) == list(self._col_names)
+                ):
+                    self._last = {
+                        data.FrozenDict(zip(self._key_cols, pickle.loads(key))): digest
+                        for key, digest in con.execute("SELECT key, digest FROM digest")
+                    }
+
+            self._path.unlink()
+
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def stage(self, digests: dict[data.RowKey, str], /) -> None:
+        """Set the digests to save once dst has been committed."""
+        self._next = digests
+
+    def save(self, *, unchanged: bool) -> None | data.Error:
+        """Write the staged digests, or, if the sync didn't change dst, the ones that were taken.
+
+        If there's nothing to write, there's nothing to do, since take already removed the file.
+        """
+        digests = self._next
+        if digests is None and unchanged:
+            digests = self._last
+
+        if digests is None:
+            return None
+
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.unlink(missing_ok=True)
+
+            with contextlib.closing(sqlite3.connect(tmp_path)) as con:
+                # the temp file is thrown away if the write fails, so it doesn't need a journal
+                con.execute("PRAGMA journal_mode = OFF")
+                con.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                con.execute("CREATE TABLE digest (key BLOB NOT NULL, digest TEXT NOT NULL)")
+                con.executemany(
+                    "INSERT INTO meta (name, value) VALUES (?, ?)",
+                    (
+                        ("key_cols", json.dumps(list(self._key_cols))),
+                        ("col_names", json.dumps(list(self._col_names))),
+                    ),
+                )
+
+                items = iter(digests.items())
+                while batch := [
+                    (pickle.dumps(tuple(key[col] for col in self._key_cols)), digest)
+                    for key, digest in itertools.islice(items, _WRITE_BATCH_SIZE)
+                ]:
+                    con.executemany("INSERT INTO digest (key, digest) VALUES (?, ?)", batch)
+
+                con.commit()
+
+            os.replace(tmp_path, self._path)
+
+            return None
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            return data.Error.new(str(e), path=self._path)
+
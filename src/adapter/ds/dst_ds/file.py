@@ -0,0 +1,606 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+import datetime
+import io
+import json
+import os
+import pathlib
+import re
+import shutil
+import typing
+
+import pydantic
+
+from src import data
+from src.adapter.ds import flat_file, shared
+
+__all__ = ("FileDstDs",)
+
+_MANIFEST_FILE_NAME: typing.Final[str] = "manifest.json"
+
+# written after the table's own columns.  poa_batch is the number of the upsert or delete the row
+# came from, so the latest version of a key can be told apart from the ones it replaced.
+_META_COL_NAMES: typing.Final[tuple[str, ...]] = ("poa_hd", "poa_op", "poa_batch")
+
+
+class FileDstDs(data.DstDs):
+    """Writes a table as CSV or JSON lines files, optionally gzip or zstd compressed, in a folder
+    per table under export.folder, for tools that load files rather than read a database.
+
+    The files are only ever appended to.  Each upsert or delete is written as a batch of rows
+    tagged with poa_op and poa_batch, a delete being a row with only the key, so reading the table
+    back folds the files by key, and the row from the latest batch wins.  Rows go to a file per
+    value of export.partition_col, with deletes in a partition of their own, and a new file is
+    started every export.rows_per_file rows.
+
+    manifest.json lists the files, and how many rows and bytes of each have been written.  It's
+    replaced after each batch, so an append that dies part way is cut off at the length the
+    manifest recorded the next time the table is opened.
+    """
+
+    def __init__(
+        self,
+        *,
+        export: data.FileExport,
+        dst_db_name: str,
+        dst_schema_name: str | None,
+        dst_table_name: str,
+        src_table: data.Table,
+        after: dict[str, datetime.date],
+    ):
+        self._export: typing.Final[data.FileExport] = export
+        self._after: typing.Final[dict[str, datetime.date]] = after
+
+        self._dst_table: typing.Final[data.Table] = dataclasses.replace(
+            src_table,
+            db_name=dst_db_name,
+            schema_name=dst_schema_name,
+            table_name=dst_table_name,
+        )
+
+        folder = export.folder
+        if dst_schema_name is not None:
+            folder /= _safe_name(dst_schema_name)
+        self._folder: typing.Final[pathlib.Path] = folder / _safe_name(dst_table_name)
+
+        self._data_types: typing.Final[dict[str, data.DataType]] = {
+            c.name: c.data_type for c in src_table.columns
+        }
+        self._col_names: typing.Final[tuple[str, ...]] = tuple(sorted(self._data_types))
+        self._key_cols: typing.Final[tuple[str, ...]] = src_table.pk
+        self._hd_col_names: typing.Final[tuple[str, ...]] = tuple(
+            c for c in self._col_names if c not in src_table.pk
+        )
+
+        # the partition column only applies to the tables that have it
+        self._partition_col: typing.Final[str | None] = (
+            export.partition_col if export.partition_col in self._data_types else None
+        )
+
+        self._suffix: typing.Final[str] = flat_file.suffix(
+            file_format=export.format, compression=export.compression
+        )
+
+        self._manifest: _Manifest | None = None
+
+        # the poa_hd of each live key, loaded the first time it's needed, and kept up to date as
+        # batches are written, so an upsert can skip rows that haven't changed like PgDstDs does
+        self._digests: dict[data.RowKey, str] | None = None
+
+    def add_check_result(self, /, result: data.CheckResult) -> None | data.Error:
+        try:
+            line = pydantic.TypeAdapter(data.CheckResult).dump_json(result)
+
+            self._export.folder.mkdir(parents=True, exist_ok=True)
+            with (self._export.folder / "poa_check_result.jsonl").open("ab") as fh:
+                fh.write(line + b"\n")
+
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder, result=result)
+
+    def add_increasing_col_indices(
+        self, /, increasing_cols: typing.Iterable[str]
+    ) -> None | data.Error:
+        try:
+            manifest = self._load_manifest()
+
+            # there's no index to build, but the max of each column is kept in the manifest, so
+            # get_max_values doesn't have to read every file
+            new_cols = sorted(set(increasing_cols) - set(manifest.increasing_cols))
+            if not new_cols:
+                return None
+
+            max_values: dict[str, typing.Hashable] = {}
+            for row in self._read_rows(manifest, col_names=tuple(new_cols)):
+                _update_max_values(max_values, row=row, col_names=new_cols)
+
+            manifest.increasing_cols.extend(new_cols)
+            manifest.max_values.update(
+                {col: flat_file.to_text(value) for col, value in max_values.items()}
+            )
+
+            return self._save_manifest(manifest)
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                folder=self._folder,
+                increasing_cols=tuple(increasing_cols),
+            )
+
+    def create(self) -> None | data.Error:
+        try:
+            if self._manifest_path.exists():
+                return data.Error.new(
+                    f"{self._folder!s} already has a manifest.",
+                    folder=self._folder,
+                )
+
+            self._folder.mkdir(parents=True, exist_ok=True)
+            self._digests = {}
+
+            return self._save_manifest(_Manifest(col_names=list(self._col_names)))
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def create_history_table(self) -> None | data.Error:
+        # every batch is kept in the files, tagged with its poa_batch, so they are the history
+        return None
+
+    def create_staging_table(self) -> None | data.Error:
+        # batches are written straight to the files
+        return None
+
+    def delete_rows(self, *, keys: typing.Iterable[data.RowKey]) -> int | data.Error:
+        try:
+            manifest = self._load_manifest()
+            digests = self._live_digests(manifest)
+
+            tombstones: list[data.Row] = []
+            for key in keys:
+                if digests.pop(key, None) is not None:
+                    tombstones.append(
+                        {**dict.fromkeys(self._col_names), **key, "poa_hd": None, "poa_op": "d"}
+                    )
+
+            if not tombstones:
+                return 0
+
+            append_result = self._append(manifest, rows=tombstones)
+            if isinstance(append_result, data.Error):
+                return append_result
+
+            return len(tombstones)
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def drop_table(self) -> None | data.Error:
+        try:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            self._manifest = None
+            self._digests = None
+
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def fetch_digests(self) -> dict[data.RowKey, str] | data.Error:
+        try:
+            return dict(self._live_digests(self._load_manifest()))
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[typing.Sequence[data.Row]] | data.Error:
+        rows = self.fetch_rows(col_names=col_names, after=after)
+        if isinstance(rows, data.Error):
+            return rows
+
+        return (rows[i : i + batch_size] for i in range(0, len(rows), batch_size))
+
+    def fetch_rows(
+        self,
+        *,
+        col_names: typing.Iterable[str] | None,
+        after: dict[str, typing.Hashable] | None,
+    ) -> list[data.Row] | data.Error:
+        try:
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            if col_names:
+                cols = tuple(sorted(set(col_names)))
+            else:
+                cols = self._col_names
+
+            rows = self._fold(
+                self._load_manifest(),
+                col_names=tuple(sorted({*cols, *full_after})),
+            )
+
+            return [
+                {col: row[col] for col in cols}
+                for row in rows
+                if flat_file.is_after(row, after=full_after)
+            ]
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                folder=self._folder,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+            )
+
+    def get_max_values(
+        self, /, col_names: typing.Iterable[str]
+    ) -> dict[str, typing.Hashable] | None | data.Error:
+        try:
+            manifest = self._load_manifest()
+
+            col_names = sorted(col_names)
+            untracked = [col for col in col_names if col not in manifest.increasing_cols]
+
+            max_values: dict[str, typing.Hashable] = {}
+            if untracked:
+                for row in self._read_rows(manifest, col_names=tuple(untracked)):
+                    _update_max_values(max_values, row=row, col_names=untracked)
+
+            for col in col_names:
+                text = manifest.max_values.get(col)
+                if text is not None:
+                    max_values[col] = flat_file.parse(text, data_type=self._data_types[col])
+
+            if max_values:
+                return max_values
+
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                folder=self._folder,
+                col_names=tuple(col_names),
+            )
+
+    def get_row_count(self) -> int | data.Error:
+        try:
+            manifest = self._load_manifest()
+            if not self._after:
+                return len(self._live_digests(manifest))
+
+            return sum(
+                flat_file.is_after(row, after=self._after)
+                for row in self._fold(manifest, col_names=tuple(sorted(self._after)))
+            )
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def lock(self) -> bool | data.Error:
+        # an export folder has one writer, the poa instance it's configured on
+        return True
+
+    def table_exists(self) -> bool | data.Error:
+        try:
+            return self._manifest_path.exists()
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def truncate(self) -> None | data.Error:
+        try:
+            manifest = self._load_manifest()
+            for part in manifest.parts:
+                (self._folder / part.path).unlink(missing_ok=True)
+
+            self._digests = {}
+
+            # the tracked columns stay tracked, like an index survives a TRUNCATE
+            return self._save_manifest(
+                _Manifest(
+                    col_names=list(self._col_names),
+                    increasing_cols=manifest.increasing_cols,
+                )
+            )
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    def update_history_table(self) -> None | data.Error:
+        return None
+
+    def upsert_rows_from_staging(self, /, rows: typing.Iterable[data.Row]) -> int | data.Error:
+        try:
+            manifest = self._load_manifest()
+            digests = self._live_digests(manifest)
+
+            changed: list[data.Row] = []
+            for row in rows:
+                key = data.FrozenDict({col: row[col] for col in self._key_cols})
+                digest = data.row_digest(row, col_names=self._hd_col_names)
+                if digests.get(key) == digest:
+                    continue
+
+                digests[key] = digest
+                changed.append(
+                    {
+                        **{col: row[col] for col in self._col_names},
+                        "poa_hd": digest,
+                        "poa_op": "u",
+                    }
+                )
+
+            if not changed:
+                return 0
+
+            append_result = self._append(manifest, rows=changed)
+            if isinstance(append_result, data.Error):
+                return append_result
+
+            return len(changed)
+        except Exception as e:
+            return data.Error.new(str(e), folder=self._folder)
+
+    @property
+    def _manifest_path(self) -> pathlib.Path:
+        return self._folder / _MANIFEST_FILE_NAME
+
+    def _append(
+        self,
+        manifest: _Manifest,
+        /,
+        *,
+        rows: typing.Sequence[data.Row],
+    ) -> None | data.Error:
+        """Write rows as the next batch, and then the manifest, so it's only counted once all of
+        it is on disk.
+        """
+        manifest.batches += 1
+
+        by_partition: dict[str | None, list[data.Row]] = {}
+        for row in rows:
+            partition = self._partition(row)
+            by_partition.setdefault(partition, []).append({**row, "poa_batch": manifest.batches})
+
+        for partition, partition_rows in by_partition.items():
+            written = 0
+            while written < len(partition_rows):
+                part = self._open_part(manifest, partition=partition)
+                chunk = partition_rows[written : written + self._export.rows_per_file - part.rows]
+                self._write_part(part, rows=chunk)
+                written += len(chunk)
+
+        if manifest.increasing_cols:
+            max_values = {
+                col: flat_file.parse(text, data_type=self._data_types[col])
+                for col, text in manifest.max_values.items()
+                if text is not None
+            }
+            for row in rows:
+                if row["poa_op"] != "d":
+                    _update_max_values(max_values, row=row, col_names=manifest.increasing_cols)
+            manifest.max_values = {
+                col: flat_file.to_text(value) for col, value in max_values.items()
+            }
+
+        return self._save_manifest(manifest)
+
+    def _fold(self, manifest: _Manifest, /, *, col_names: tuple[str, ...]) -> list[data.Row]:
+        """The latest version of each key that hasn't been deleted, with col_names and poa_hd."""
+        latest: dict[tuple[typing.Hashable, ...], data.Row] = {}
+        for row in self._read_rows(manifest, col_names=col_names):
+            key = tuple(row[col] for col in self._key_cols)
+            last = latest.get(key)
+            if last is None or typing.cast(int, last["poa_batch"]) < typing.cast(
+                int, row["poa_batch"]
+            ):
+                latest[key] = row
+
+        return [row for row in latest.values() if row["poa_op"] != "d"]
+
+    def _live_digests(self, manifest: _Manifest, /) -> dict[data.RowKey, str]:
+        if self._digests is None:
+            self._digests = {
+                data.FrozenDict({col: row[col] for col in self._key_cols}): typing.cast(
+                    str, row["poa_hd"]
+                )
+                for row in self._fold(manifest, col_names=())
+            }
+
+        return self._digests
+
+    def _load_manifest(self) -> _Manifest:
+        if self._manifest is not None:
+            return self._manifest
+
+        with self._manifest_path.open("r", encoding="utf-8") as fh:
+            manifest = _Manifest.from_json(json.load(fh))
+
+        if manifest.col_names != list(self._col_names):
+            raise ValueError(
+                f"The columns in {self._manifest_path!s}, {', '.join(manifest.col_names)}, don't "
+                f"match the src table's, {', '.join(self._col_names)}.  Recreate the table."
+            )
+
+        # cut off whatever an append that died part way left past what the manifest counted
+        for part in manifest.parts:
+            path = self._folder / part.path
+            if path.stat().st_size > part.bytes:
+                with path.open("r+b") as fh:
+                    fh.truncate(part.bytes)
+
+        self._manifest = manifest
+        return manifest
+
+    def _open_part(self, manifest: _Manifest, /, *, partition: str | None) -> _Part:
+        """The part rows for partition go to, which is a new one if the last one is full."""
+        for part in reversed(manifest.parts):
+            if part.partition == partition:
+                if part.rows < self._export.rows_per_file:
+                    return part
+                break
+
+        file_name = f"part-{len(manifest.parts):05d}{self._suffix}"
+        if partition is None:
+            path = file_name
+        else:
+            path = f"{partition}/{file_name}"
+
+        part = _Part(path=path, partition=partition, rows=0, bytes=0)
+        manifest.parts.append(part)
+        return part
+
+    def _partition(self, row: data.Row, /) -> str | None:
+        if self._partition_col is None:
+            return None
+
+        # a delete only has the key, so it can't be put with the row it deletes
+        if row["poa_op"] == "d":
+            return "poa_op=d"
+
+        value = row[self._partition_col]
+        if value is None:
+            text = "null"
+        elif isinstance(value, datetime.datetime):
+            # a file per day, rather than one per timestamp
+            text = value.date().isoformat()
+        else:
+            text = flat_file.to_text(value)
+
+        return _safe_name(f"{self._partition_col}={text}")
+
+    def _read_part(self, part: _Part, /) -> typing.Iterator[dict[str, typing.Any]]:
+        """The rows of part as written, so CSV values are text, and JSON values are what JSON
+        has, with anything else as text.
+        """
+        if part.rows == 0:
+            return
+
+        with (self._folder / part.path).open("rb", buffering=flat_file.BUFFER_BYTES) as raw:
+            with flat_file.text_reader(raw, compression=self._export.compression) as text:
+                yield from flat_file.read_records(text, file_format=self._export.format)
+
+    def _read_rows(
+        self,
+        manifest: _Manifest,
+        /,
+        *,
+        col_names: tuple[str, ...],
+    ) -> typing.Iterator[data.Row]:
+        """Every row in the files, deleted and replaced ones too, with the key, col_names, and the
+        meta columns, parsed to their column's type.
+        """
+        cols = tuple(sorted({*self._key_cols, *col_names}))
+        for part in manifest.parts:
+            for record in self._read_part(part):
+                row: data.Row = {
+                    col: flat_file.parse(record[col], data_type=self._data_types[col])
+                    for col in cols
+                }
+                row["poa_hd"] = record["poa_hd"]
+                row["poa_op"] = record["poa_op"]
+                row["poa_batch"] = int(record["poa_batch"])
+                yield row
+
+    def _save_manifest(self, manifest: _Manifest, /) -> None:
+        self._folder.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self._manifest_path.with_name(f"{_MANIFEST_FILE_NAME}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(manifest.to_json(), fh, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        os.replace(tmp_path, self._manifest_path)
+        self._manifest = manifest
+
+    def _write_part(self, part: _Part, /, *, rows: typing.Sequence[data.Row]) -> None:
+        path = self._folder / part.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        col_names = (*self._col_names, *_META_COL_NAMES)
+        with path.open("ab", buffering=flat_file.BUFFER_BYTES) as raw:
+            # each append is its own gzip member or zstd frame, and both formats read a file of
+            # several of them back as one stream
+            with flat_file.compress(raw, compression=self._export.compression) as compressed:
+                text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+                if self._export.format == "csv":
+                    writer = csv.writer(text, lineterminator="\n")
+                    if part.rows == 0:
+                        writer.writerow(col_names)
+                    writer.writerows(
+                        [flat_file.to_text(row[col]) for col in col_names] for row in rows
+                    )
+                else:
+                    text.writelines(
+                        json.dumps(
+                            {col: row[col] for col in col_names},
+                            default=flat_file.to_text,
+                            separators=(",", ":"),
+                        )
+                        + "\n"
+                        for row in rows
+                    )
+                text.flush()
+                # detached, so closing the text wrapper doesn't close the file before it's synced
+                text.detach()
+
+            raw.flush()
+            os.fsync(raw.fileno())
+            part.bytes = raw.tell()
+
+        part.rows += len(rows)
+
+
+@dataclasses.dataclass(kw_only=True)
+class _Part:
+    path: str
+    partition: str | None
+    rows: int
+    bytes: int
+
+
+@dataclasses.dataclass(kw_only=True)
+class _Manifest:
+    col_names: list[str]
+    batches: int = 0
+    parts: list[_Part] = dataclasses.field(default_factory=list)
+    increasing_cols: list[str] = dataclasses.field(default_factory=list)
+    # as text, the way they'd be written to a CSV file
+    max_values: dict[str, str | None] = dataclasses.field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, d: dict[str, typing.Any], /) -> _Manifest:
+        return cls(
+            col_names=d["col_names"],
+            batches=d["batches"],
+            parts=[_Part(**part) for part in d["parts"]],
+            increasing_cols=d["increasing_cols"],
+            max_values=d["max_values"],
+        )
+
+    def to_json(self) -> dict[str, typing.Any]:
+        return dataclasses.asdict(self)
+
+
+def _safe_name(name: str, /) -> str:
+    return re.sub(r"[^A-Za-z0-9_.=-]", "_", name)
+
+
+def _update_max_values(
+    max_values: dict[str, typing.Hashable],
+    /,
+    *,
+    row: data.Row,
+    col_names: typing.Iterable[str],
+) -> None:
+    for col in col_names:
+        value = row[col]
+        if value is None:
+            continue
+
+        last = max_values.get(col)
+        if last is None or value > last:  # type: ignore[operator]
+            max_values[col] = value
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import dataclasses
 import datetime
-import itertools
 import operator
 import typing
 
+from psycopg import sql
+
 from src import data
 from src.adapter.ds import shared
 
@@ -23,10 +24,12 @@ class PgDstDs(data.DstDs):
         dst_table_name: str,
         src_table: data.Table,
         after: dict[str, datetime.date],
+        lock_policy: data.LockPolicy = data.LockPolicy.WAIT,
     ):
         self._cur: typing.Final[data.Cursor] = cur
         self._src_table: typing.Final[data.Table] = src_table
         self._after: typing.Final[dict[str, datetime.date]] = after
+        self._lock_policy: typing.Final[data.LockPolicy] = lock_policy
 
         self._dst_table: typing.Final[data.Table] = dataclasses.replace(
             src_table,
@@ -35,22 +38,38 @@ class PgDstDs(data.DstDs):
             table_name=dst_table_name,
         )
 
-        self._full_table_name: typing.Final[str] = _generate_full_table_name(
+        self._full_table_name: typing.Final[sql.Identifier] = _generate_full_table_name(
             schema_name=self._dst_table.schema_name,
             table_name=self._dst_table.table_name,
         )
-        self._history_table_name: typing.Final[str] = _generate_full_table_name(
+        self._history_table_name: typing.Final[sql.Identifier] = _generate_full_table_name(
             schema_name=self._dst_table.schema_name,
             table_name=self._dst_table.table_name + "_history",
         )
-        self._staging_table_name: typing.Final[str] = _generate_full_table_name(
-            schema_name=self._dst_table.schema_name,
-            table_name=self._dst_table.table_name + "_staging",
+        # staging is a temp table, so each session gets its own, and a sync can't truncate rows
+        # another sync to the same table has staged
+        self._staging_table_name: typing.Final[sql.Identifier] = sql.Identifier(
+            "pg_temp",
+            "_".join(
+                s.lower()
+                for s in (self._dst_table.schema_name, self._dst_table.table_name, "staging")
+                if s
+            ),
         )
 
+        self._plan: typing.Final[_Plan] = _compile_plan(
+            table=self._dst_table,
+            full_table_name=self._full_table_name,
+            staging_table_name=self._staging_table_name,
+        )
+        self._fetch_plans: typing.Final[
+            dict[tuple[tuple[str, ...], tuple[str, ...]], shared.SqlPlan]
+        ] = {}
+
     def add_check_result(self, /, result: data.CheckResult) -> None | data.Error:
         try:
-            sql = """
+            qry = sql.SQL(
+                """
                 CALL poa.add_check_result (
                     p_src_db_name := %s
                 ,   p_src_schema_name := %s
@@ -58,16 +77,17 @@ class PgDstDs(data.DstDs):
                 ,   p_dst_db_name := %s
                 ,   p_dst_schema_name := %s
                 ,   p_dst_table_name := %s
-                ,   p_src_rows := %s 
+                ,   p_src_rows := %s
                 ,   p_dst_rows := %s
-                ,   p_extra_keys := %s 
+                ,   p_extra_keys := %s
                 ,   p_missing_keys := %s
                 ,   p_execution_millis := %s
                 )
-            """
+                """
+            )
 
             return self._cur.execute(
-                sql=sql,
+                sql=qry,
                 params=(
                     result.src_db_name,
                     result.src_schema_name,
@@ -92,33 +112,21 @@ class PgDstDs(data.DstDs):
     def add_rows_to_staging(self, /, rows: typing.Iterable[data.Row]) -> None | data.Error:
         try:
             truncate_result = self._cur.execute(
-                sql=f"TRUNCATE {self._staging_table_name}",
+                sql=sql.SQL("TRUNCATE {}").format(self._staging_table_name),
                 params=None,
             )
             if isinstance(truncate_result, data.Error):
                 return truncate_result
 
-            col_names = sorted({c.name for c in self._dst_table.columns})
-            col_name_csv = ", ".join(_wrap_name(c) for c in col_names)
-            col_placeholders = ", ".join("%s" for _ in col_names)
-
-            hd_cols = [c for c in col_names if c not in self._dst_table.pk]
-            hd_col_csv = ", ".join("%s" for _ in hd_cols)
-            hd_placeholder = f"md5(row({hd_col_csv})::TEXT)"
-
-            params: list[list[typing.Hashable]] = []
-            for row in rows:
-                row_params = [row[col] for col in col_names]
-                row_params += [row[col] for col in hd_cols]
-                params.append(row_params)
-
-            sql = f"""
-                INSERT INTO {self._staging_table_name} ({col_name_csv}, poa_op, poa_hd)
-                VALUES ({col_placeholders}, 'a', '{hd_placeholder}')
-                ON CONFLICT DO NOTHING
-            """
+            plan = self._plan.staging_insert
 
-            return self._cur.execute_many(sql=sql, params=params)
+            return self._cur.execute_many(
+                sql=plan.sql,
+                params=[
+                    [*plan.params(row), data.row_digest(row, col_names=self._plan.hd_col_names)]
+                    for row in rows
+                ],
+            )
         except Exception as e:
             return data.Error.new(str(e), table_name=self._full_table_name)
 
@@ -128,9 +136,10 @@ class PgDstDs(data.DstDs):
         try:
             for col in increasing_cols:
                 add_index_result = self._cur.execute(
-                    sql=(
-                        f"CREATE INDEX IF NOT EXISTS ix_{self._dst_table.table_name}_{col} "
-                        f"ON {self._full_table_name} ({_wrap_name(col)} DESC)"
+                    sql=sql.SQL("CREATE INDEX IF NOT EXISTS {index} ON {table} ({col} DESC)").format(
+                        index=_wrap_name(f"ix_{self._dst_table.table_name}_{col}"),
+                        table=self._full_table_name,
+                        col=_wrap_name(col),
                     ),
                     params=None,
                 )
@@ -147,35 +156,44 @@ class PgDstDs(data.DstDs):
 
     def create(self) -> None | data.Error:
         try:
-            sql = f"CREATE TABLE {self._full_table_name} (\n  "
-            sql += "\n, ".join(
-                _generate_column_definition(col=col)
-                for col in sorted(self._dst_table.columns, key=operator.attrgetter("name"))
-            )
-            sql += (
-                "\n, poa_hd CHAR(32) NOT NULL"
-                "\n, poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))"
-                "\n, poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()"
-                "\n, PRIMARY KEY (" + ", ".join(_wrap_name(col) for col in self._dst_table.pk) + ")"
-                "\n)"
+            qry = sql.SQL(
+                """
+                CREATE TABLE {table} (
+                  {col_defs}
+                , poa_hd CHAR(32) NOT NULL
+                , poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))
+                , poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+                , PRIMARY KEY ({pk})
+                )
+                """
+            ).format(
+                table=self._full_table_name,
+                col_defs=_col_def_csv(self._dst_table.columns),
+                pk=_col_name_csv(self._dst_table.pk),
             )
-            create_table_result = self._cur.execute(sql=sql, params=None)
+            create_table_result = self._cur.execute(sql=qry, params=None)
             if isinstance(create_table_result, data.Error):
                 return create_table_result
 
             poa_ts_index_result = self._cur.execute(
-                sql=f"CREATE INDEX ix_{self._dst_table.table_name}_poa_ts ON {self._full_table_name} (poa_ts DESC)",
+                sql=sql.SQL("CREATE INDEX {index} ON {table} (poa_ts DESC)").format(
+                    index=_wrap_name(f"ix_{self._dst_table.table_name}_poa_ts"),
+                    table=self._full_table_name,
+                ),
                 params=None,
             )
             if isinstance(poa_ts_index_result, data.Error):
                 return poa_ts_index_result
 
             poa_op_index_result = self._cur.execute(
-                sql=f"CREATE INDEX ix_{self._dst_table.table_name}_poa_op ON {self._full_table_name} (poa_op)",
+                sql=sql.SQL("CREATE INDEX {index} ON {table} (poa_op)").format(
+                    index=_wrap_name(f"ix_{self._dst_table.table_name}_poa_op"),
+                    table=self._full_table_name,
+                ),
                 params=None,
             )
             if isinstance(poa_op_index_result, data.Error):
-                return poa_ts_index_result
+                return poa_op_index_result
 
             return None
         except Exception as e:
@@ -183,34 +201,30 @@ class PgDstDs(data.DstDs):
 
     def create_history_table(self) -> None | data.Error:
         try:
-            history_table_name = _generate_full_table_name(
-                schema_name=self._dst_table.schema_name,
-                table_name=self._dst_table.table_name + "_history",
-            )
-
-            sql = f"CREATE TABLE IF NOT EXISTS {history_table_name} (\n  "
-            sql += "\n, ".join(
-                _generate_column_definition(col=col)
-                for col in sorted(self._dst_table.columns, key=operator.attrgetter("name"))
-            )
-            sql += (
-                "\n, poa_hd CHAR(32) NOT NULL"
-                "\n, poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))"
-                "\n, poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()"
-                "\n, PRIMARY KEY ("
-                + ", ".join(_wrap_name(col) for col in self._dst_table.pk)
-                + ", poa_ts)"
-                "\n)"
+            qry = sql.SQL(
+                """
+                CREATE TABLE IF NOT EXISTS {table} (
+                  {col_defs}
+                , poa_hd CHAR(32) NOT NULL
+                , poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))
+                , poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+                , PRIMARY KEY ({pk}, poa_ts)
+                )
+                """
+            ).format(
+                table=self._history_table_name,
+                col_defs=_col_def_csv(self._dst_table.columns),
+                pk=_col_name_csv(self._dst_table.pk),
             )
 
-            create_table_result = self._cur.execute(sql=sql, params=None)
+            create_table_result = self._cur.execute(sql=qry, params=None)
             if isinstance(create_table_result, data.Error):
                 return create_table_result
 
             poa_ts_index_result = self._cur.execute(
-                sql=(
-                    f"CREATE INDEX IF NOT EXISTS ix_{self._dst_table.table_name}_history_poa_ts "
-                    f"ON {history_table_name} (poa_ts DESC)"
+                sql=sql.SQL("CREATE INDEX IF NOT EXISTS {index} ON {table} (poa_ts DESC)").format(
+                    index=_wrap_name(f"ix_{self._dst_table.table_name}_history_poa_ts"),
+                    table=self._history_table_name,
                 ),
                 params=None,
             )
@@ -218,9 +232,9 @@ class PgDstDs(data.DstDs):
                 return poa_ts_index_result
 
             poa_op_result = self._cur.execute(
-                sql=(
-                    f"CREATE INDEX IF NOT EXISTS ix_{self._dst_table.table_name}_history_poa_op "
-                    f"ON {history_table_name} (poa_op)"
+                sql=sql.SQL("CREATE INDEX IF NOT EXISTS {index} ON {table} (poa_op)").format(
+                    index=_wrap_name(f"ix_{self._dst_table.table_name}_history_poa_op"),
+                    table=self._history_table_name,
                 ),
                 params=None,
             )
@@ -233,88 +247,110 @@ class PgDstDs(data.DstDs):
 
     def create_staging_table(self) -> None | data.Error:
         try:
-            staging_table_name = _generate_full_table_name(
-                schema_name=self._dst_table.schema_name,
-                table_name=self._dst_table.table_name + "_staging",
+            # dropped when the sync's transaction ends, so a pooled connection doesn't carry it
+            # over to a sync of another version of the table
+            qry = sql.SQL(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS {table} (
+                  {col_defs}
+                , poa_hd CHAR(32) NOT NULL
+                , poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))
+                , poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()
+                , PRIMARY KEY ({pk}, poa_ts)
+                )
+                ON COMMIT DROP
+                """
+            ).format(
+                table=self._staging_table_name,
+                col_defs=_col_def_csv(self._dst_table.columns),
+                pk=_col_name_csv(self._dst_table.pk),
             )
 
-            sql = f"CREATE TABLE IF NOT EXISTS {staging_table_name} (\n  "
-            sql += "\n, ".join(
-                _generate_column_definition(col=col)
-                for col in sorted(self._dst_table.columns, key=operator.attrgetter("name"))
+            return self._cur.execute(sql=qry, params=None)
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def delete_rows(self, *, keys: typing.Iterable[data.RowKey]) -> int | data.Error:
+        try:
+            keys = tuple(keys)
+            if not keys:
+                return 0
+
+            plan = self._plan.delete
+
+            # each key column is sent as one array, so a batch is one statement, however many
+            # keys it has
+            row = self._cur.fetch_one(
+                sql=plan.sql,
+                params=[[key[col] for key in keys] for col in plan.param_names],
+                prepare=True,
             )
-            sql += (
-                "\n, poa_hd CHAR(32) NOT NULL"
-                "\n, poa_op CHAR(1) NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))"
-                "\n, poa_ts TIMESTAMPTZ(3) NOT NULL DEFAULT now()"
-                "\n, PRIMARY KEY ("
-                + ", ".join(_wrap_name(col) for col in self._dst_table.pk)
-                + ", poa_ts)"
-                "\n)"
+            if isinstance(row, data.Error):
+                return row
+
+            return 0 if row is None else typing.cast(int, row["ct"])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                key=tuple(keys),
             )
 
-            create_table_result = self._cur.execute(sql=sql, params=None)
-            if isinstance(create_table_result, data.Error):
-                return create_table_result
+    def drop_table(self) -> None | data.Error:
+        return self._cur.execute(
+            sql=sql.SQL("DROP TABLE IF EXISTS {}").format(self._full_table_name),
+            params=None,
+        )
 
-            poa_ts_index_result = self._cur.execute(
-                sql=(
-                    f"CREATE INDEX IF NOT EXISTS ix_{self._dst_table.table_name}_staging_poa_ts "
-                    f"ON {staging_table_name} (poa_ts DESC)"
-                ),
-                params=None,
-            )
-            if isinstance(poa_ts_index_result, data.Error):
-                return poa_ts_index_result
+    def fetch_digests(self) -> dict[data.RowKey, str] | data.Error:
+        try:
+            key_cols = tuple(sorted(self._dst_table.pk))
 
-            poa_op_result = self._cur.execute(
-                sql=(
-                    f"CREATE INDEX IF NOT EXISTS ix_{self._dst_table.table_name}_staging_poa_op "
-                    f"ON {staging_table_name} (poa_op)"
+            rows = self._cur.fetch_all(
+                sql=sql.SQL("SELECT {cols}, poa_hd FROM {table} WHERE poa_op <> 'd'").format(
+                    cols=_col_name_csv(key_cols),
+                    table=self._full_table_name,
                 ),
                 params=None,
             )
-            if isinstance(poa_op_result, data.Error):
-                return poa_op_result
+            if isinstance(rows, data.Error):
+                return rows
 
-            return None
+            return {
+                data.FrozenDict({col: row[col.lower()] for col in key_cols}): typing.cast(
+                    str, row["poa_hd"]
+                )
+                for row in rows
+            }
         except Exception as e:
             return data.Error.new(str(e), table_name=self._full_table_name)
 
-    def delete_rows(self, /, keys: typing.Iterable[data.RowKey]) -> None | data.Error:
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
         try:
-            if keys:
-                first_key: data.RowKey = next(itertools.islice(keys, 1))
-
-                key_cols = sorted(first_key.keys())
-                where_clause = " AND ".join(f"{_wrap_name(c)} = %s" for c in key_cols)
-                sql = f"""
-                    UPDATE {self._full_table_name}
-                    SET 
-                        poa_op = 'd'
-                    ,   poa_ts = now()
-                    WHERE 
-                        {where_clause}
-                        AND poa_op <> 'd'
-                """
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
 
-                return self._cur.execute_many(
-                    sql=sql,
-                    params=[list(key.values()) for key in keys],
-                )
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after.keys()))
+
+            return self._cur.fetch_batches(
+                sql=plan.sql,
+                params=plan.params(full_after),
+                batch_size=batch_size,
+            )
         except Exception as e:
             return data.Error.new(
                 str(e),
                 table_name=self._full_table_name,
-                key=tuple(keys),
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+                batch_size=batch_size,
             )
 
-    def drop_table(self) -> None | data.Error:
-        return self._cur.execute(
-            sql=f"DROP TABLE IF EXISTS {self._full_table_name}",
-            params=None,
-        )
-
     def fetch_rows(
         self,
         *,
@@ -322,40 +358,20 @@ class PgDstDs(data.DstDs):
         after: dict[str, typing.Hashable] | None,
     ) -> tuple[data.Row, ...] | data.Error:
         try:
-            if col_names:
-                cols = sorted(set(col_names))
-            else:
-                cols = sorted({c.name for c in self._dst_table.columns})
-
-            full_table_name = _generate_full_table_name(
-                schema_name=self._dst_table.schema_name,
-                table_name=self._dst_table.table_name,
-            )
-
-            sql = "SELECT "
-            sql += ", ".join(_wrap_name(col) for col in cols)
-            sql += f"FROM {full_table_name}"
-
             full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
 
-            sql += "WHERE poa_op <> 'd'"
-
-            if full_after:
-                sql += (
-                    " AND ("
-                    + " OR ".join(f"{_wrap_name(key)} > %s" for key, val in full_after.items())
-                    + ")"
-                )
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after.keys()))
 
-            return self._cur.execute(
-                sql=sql,
-                params=full_after.values(),
+            return self._cur.fetch_all(
+                sql=plan.sql,
+                params=plan.params(full_after),
+                prepare=True,
             )
         except Exception as e:
             return data.Error.new(
                 str(e),
                 table_name=self._full_table_name,
-                col_names=tuple(col_names),
+                col_names=tuple(col_names or ()),
                 after=tuple((after or {}).items()),
             )
 
@@ -365,9 +381,12 @@ class PgDstDs(data.DstDs):
         try:
             max_values: dict[str, typing.Hashable] = {}
             for col in sorted(col_names):
-                sql = f"SELECT max({_wrap_name(col)}) AS v FROM {self._full_table_name}"
+                qry = sql.SQL("SELECT max({col}) AS v FROM {table}").format(
+                    col=_wrap_name(col),
+                    table=self._full_table_name,
+                )
 
-                row = self._cur.fetch_one(sql=sql, params=None)
+                row = self._cur.fetch_one(sql=qry, params=None)
                 if isinstance(row, data.Error):
                     return row
 
@@ -387,17 +406,15 @@ class PgDstDs(data.DstDs):
 
     def get_row_count(self) -> int | data.Error:
         try:
-            sql = f"SELECT count(*) AS ct FROM {self._full_table_name} WHERE poa_op <> 'd'"
+            qry = sql.SQL("SELECT count(*) AS ct FROM {table} WHERE poa_op <> 'd'").format(
+                table=self._full_table_name,
+            )
 
             if self._after:
-                sql += (
-                    "AND ("
-                    + " OR ".join(f"{_wrap_name(key)} > %s" for key in self._after.keys())
-                    + ")"
-                )
-                row = self._cur.fetch_one(sql=sql, params=self._after.values())
+                qry += sql.SQL(" AND ({})").format(_after_clause(self._after.keys()))
+                row = self._cur.fetch_one(sql=qry, params=list(self._after.values()))
             else:
-                row = self._cur.fetch_one(sql=sql, params=None)
+                row = self._cur.fetch_one(sql=qry, params=None)
 
             if isinstance(row, data.Error):
                 return row
@@ -406,10 +423,51 @@ class PgDstDs(data.DstDs):
         except Exception as e:
             return data.Error.new(str(e), table_name=self._full_table_name)
 
+    def lock(self) -> bool | data.Error:
+        try:
+            # a transaction level lock is released by the commit or rollback that ends the sync,
+            # so a connection returned to the pool never holds on to one
+            if self._lock_policy == data.LockPolicy.WAIT:
+                qry = sql.SQL(
+                    "SELECT true AS locked FROM pg_advisory_xact_lock(hashtextextended(%s, 0))"
+                )
+            else:
+                qry = sql.SQL("SELECT pg_try_advisory_xact_lock(hashtextextended(%s, 0)) AS locked")
+
+            # the key is the table's qualified name, so syncs to it agree on the lock whatever
+            # database they are syncing from
+            row = self._cur.fetch_one(
+                sql=qry,
+                params=(
+                    ".".join(
+                        s.lower()
+                        for s in (self._dst_table.schema_name, self._dst_table.table_name)
+                        if s
+                    ),
+                ),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow the lock() query returned None.",
+                    table_name=self._full_table_name,
+                )
+
+            return typing.cast(bool, row["locked"])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                lock_policy=self._lock_policy,
+            )
+
     def table_exists(self) -> bool | data.Error:
         try:
             row = self._cur.fetch_one(
-                sql="""
+                sql=sql.SQL(
+                    """
                     SELECT EXISTS (
                         SELECT 1
                         FROM information_schema.tables AS t
@@ -417,7 +475,8 @@ class PgDstDs(data.DstDs):
                             t.table_schema = %s
                             AND t.table_name = %s
                     ) AS tbl_exists
-                """,
+                    """
+                ),
                 params=(self._dst_table.schema_name, self._dst_table.table_name),
             )
             if isinstance(row, data.Error):
@@ -434,7 +493,10 @@ class PgDstDs(data.DstDs):
             return data.Error.new(str(e), table_name=self._full_table_name)
 
     def truncate(self) -> None | data.Error:
-        return self._cur.execute(sql=f"TRUNCATE {self._full_table_name}", params=None)
+        return self._cur.execute(
+            sql=sql.SQL("TRUNCATE {}").format(self._full_table_name),
+            params=None,
+        )
 
     def update_history_table(self) -> None | data.Error:
         try:
@@ -444,106 +506,282 @@ class PgDstDs(data.DstDs):
                 "poa_ts",
             ]
 
-            col_name_csv = ", ".join(_wrap_name(c) for c in col_names)
-
-            pks_match = " AND ".join(
-                f"d.{col} = h.{col}" for col in self._dst_table.pk + ("poa_ts",)
+            pks_match = sql.SQL(" AND ").join(
+                sql.SQL("d.{col} = h.{col}").format(col=_wrap_name(col))
+                for col in self._dst_table.pk + ("poa_ts",)
             )
 
-            sql = f"""
-                INSERT INTO {self._history_table_name} (
-                    {col_name_csv}
+            qry = sql.SQL(
+                """
+                INSERT INTO {history_table} (
+                    {cols}
                 )
                 SELECT
-                    {col_name_csv}
-                FROM {self._full_table_name} AS d
+                    {cols}
+                FROM {table} AS d
                 WHERE
                     NOT EXISTS (
-                        SELECT 1 
-                        FROM {self._history_table_name} AS h
+                        SELECT 1
+                        FROM {history_table} AS h
                         WHERE
                             {pks_match}
                     )
-            """
+                """
+            ).format(
+                history_table=self._history_table_name,
+                table=self._full_table_name,
+                cols=_col_name_csv(col_names),
+                pks_match=pks_match,
+            )
 
-            return self._cur.execute(sql=sql, params=None)
+            return self._cur.execute(sql=qry, params=None)
         except Exception as e:
             return data.Error.new(str(e), table_name=self._full_table_name)
 
-    def upsert_rows_from_staging(self, /, rows: typing.Iterable[data.Row]) -> None | data.Error:
+    def upsert_rows_from_staging(self, /, rows: typing.Iterable[data.Row]) -> int | data.Error:
         try:
             if not rows:
-                return None
+                return 0
 
-            col_names = sorted({c.name for c in self._dst_table.columns})
+            add_rows_result = self.add_rows_to_staging(rows)
+            if isinstance(add_rows_result, data.Error):
+                return add_rows_result
 
-            def col_name_csv(prefix: str, /) -> str:
-                return ", ".join(prefix + _wrap_name(c) for c in col_names)
+            rehash_result = self._cur.execute(sql=self._plan.rehash.sql, params=None, prepare=True)
+            if isinstance(rehash_result, data.Error):
+                return rehash_result
 
-            pk_csv = ", ".join(_wrap_name(c) for c in self._dst_table.pk)
+            row = self._cur.fetch_one(sql=self._plan.upsert.sql, params=None, prepare=True)
+            if isinstance(row, data.Error):
+                return row
 
-            set_values_csv = (
-                ", ".join(
-                    f"{_wrap_name(c)} = EXCLUDED.{_wrap_name(c)}"
-                    for c in col_names
-                    if c not in self._dst_table.pk
-                )
-                + ", poa_hd = EXCLUDED.poa_hd, poa_op = 'u', poa_ts = now()"
+            return 0 if row is None else typing.cast(int, row["ct"])
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def _fetch_rows_plan(
+        self,
+        *,
+        col_names: set[str] | None,
+        after_cols: tuple[str, ...],
+    ) -> shared.SqlPlan:
+        if col_names:
+            cols = tuple(sorted(set(col_names)))
+        else:
+            cols = self._plan.col_names
+
+        plan_key = (cols, after_cols)
+        plan = self._fetch_plans.get(plan_key)
+        if plan is None:
+            plan = _compile_fetch_rows_plan(
+                full_table_name=self._full_table_name,
+                col_names=cols,
+                after_col_names=after_cols,
+            )
+            self._fetch_plans[plan_key] = plan
+
+        return plan
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class _Plan:
+    col_names: tuple[str, ...]
+    hd_col_names: tuple[str, ...]
+    delete: shared.SqlPlan
+    rehash: shared.SqlPlan
+    staging_insert: shared.SqlPlan
+    upsert: shared.SqlPlan
+
+
+def _compile_plan(
+    *,
+    table: data.Table,
+    full_table_name: sql.Identifier,
+    staging_table_name: sql.Identifier,
+) -> _Plan:
+    cols_by_name = {c.name: c for c in table.columns}
+    col_names = tuple(sorted(cols_by_name))
+    hd_cols = tuple(c for c in col_names if c not in table.pk)
+    key_cols = tuple(sorted(table.pk))
+
+    # poa_hd is computed client side, with data.row_digest, so a src that can't hash in SQL can
+    # still be compared to it
+    staging_insert = sql.SQL(
+        """
+        INSERT INTO {table} ({cols}, poa_op, poa_hd)
+        VALUES ({col_placeholders}, 'a', %s)
+        ON CONFLICT DO NOTHING
+        """
+    ).format(
+        table=staging_table_name,
+        cols=_col_name_csv(col_names),
+        col_placeholders=_placeholder_csv(len(col_names)),
+    )
+
+    delete = sql.SQL(
+        """
+        WITH deleted AS (
+            UPDATE {table} AS t
+            SET
+                poa_op = 'd'
+            ,   poa_ts = now()
+            FROM unnest({key_arrays}) AS k ({key_cols})
+            WHERE
+                {join_clause}
+                AND t.poa_op <> 'd'
+            RETURNING 1
+        )
+        SELECT count(*) AS ct FROM deleted
+        """
+    ).format(
+        table=full_table_name,
+        key_arrays=sql.SQL(", ").join(
+            sql.SQL("%s::{}[]").format(_sql_type(cols_by_name[c])) for c in key_cols
+        ),
+        key_cols=_col_name_csv(key_cols),
+        join_clause=sql.SQL(" AND ").join(
+            sql.SQL("t.{col} = k.{col}").format(col=_wrap_name(c)) for c in key_cols
+        ),
+    )
+
+    # a row whose values are the same as dst's, but whose poa_hd isn't, was hashed before poa_hd
+    # was a data.row_digest, so it just gets the new poa_hd, and keeps its poa_op and poa_ts,
+    # which leaves it out of the upsert's count, and out of the history table
+    rehash = sql.SQL(
+        """
+        UPDATE {table} AS t
+        SET
+            poa_hd = stg.poa_hd
+        FROM {staging_table} AS stg
+        WHERE
+            {join_clause}
+            AND t.poa_op <> 'd'
+            AND t.poa_hd <> stg.poa_hd
+            AND ROW({cols}) IS NOT DISTINCT FROM ROW({stg_cols})
+        """
+    ).format(
+        table=full_table_name,
+        staging_table=staging_table_name,
+        join_clause=sql.SQL(" AND ").join(
+            sql.SQL("t.{col} = stg.{col}").format(col=_wrap_name(c)) for c in key_cols
+        ),
+        cols=sql.SQL(", ").join(sql.Identifier("t", c.lower()) for c in hd_cols),
+        stg_cols=sql.SQL(", ").join(sql.Identifier("stg", c.lower()) for c in hd_cols),
+    )
+
+    upsert = sql.SQL(
+        """
+        WITH upserted AS (
+            INSERT INTO {table} (
+                {cols}, poa_hd, poa_op
             )
+            SELECT
+                {stg_cols}, stg.poa_hd, stg.poa_op
+            FROM {staging_table} AS stg
+            ON CONFLICT ({pk})
+            DO UPDATE SET
+                {set_values}, poa_hd = EXCLUDED.poa_hd, poa_op = 'u', poa_ts = now()
+            WHERE
+                {table}.poa_hd <> EXCLUDED.poa_hd
+                OR {table}.poa_op = 'd'
+            RETURNING 1
+        )
+        SELECT count(*) AS ct FROM upserted
+        """
+    ).format(
+        table=full_table_name,
+        cols=_col_name_csv(col_names),
+        stg_cols=sql.SQL(", ").join(sql.Identifier("stg", c.lower()) for c in col_names),
+        staging_table=staging_table_name,
+        pk=_col_name_csv(table.pk),
+        set_values=sql.SQL(", ").join(
+            sql.SQL("{col} = EXCLUDED.{col}").format(col=_wrap_name(c)) for c in hd_cols
+        ),
+    )
+
+    return _Plan(
+        col_names=col_names,
+        hd_col_names=hd_cols,
+        delete=shared.SqlPlan(sql=delete, col_names=key_cols, param_names=key_cols),
+        rehash=shared.SqlPlan(sql=rehash, col_names=hd_cols, param_names=()),
+        staging_insert=shared.SqlPlan(
+            sql=staging_insert,
+            col_names=col_names,
+            param_names=col_names,
+        ),
+        upsert=shared.SqlPlan(sql=upsert, col_names=col_names, param_names=()),
+    )
 
-            sql = f"""
-                INSERT INTO {self._full_table_name} (
-                    {col_name_csv('')}
-                )
-                SELECT 
-                    {col_name_csv('stg.')}
-                FROM {self._staging_table_name} AS stg
-                ON CONFLICT ({pk_csv})
-                DO UPDATE SET 
-                    {set_values_csv}
-                WHERE
-                    {self._full_table_name}.poa_hd <> EXCLUDED.poa_hd
-                    OR {self._full_table_name}.poa_op = 'd'
-                RETURNING poa_op
-            """
 
-            return self._cur.execute(sql=sql, params=None)
-        except Exception as e:
-            return data.Error.new(str(e), table_name=self._full_table_name)
+def _compile_fetch_rows_plan(
+    *,
+    full_table_name: sql.Identifier,
+    col_names: tuple[str, ...],
+    after_col_names: tuple[str, ...],
+) -> shared.SqlPlan:
+    qry = sql.SQL("SELECT {cols} FROM {table} WHERE poa_op <> 'd'").format(
+        cols=_col_name_csv(col_names),
+        table=full_table_name,
+    )
+
+    if after_col_names:
+        qry += sql.SQL(" AND ({})").format(_after_clause(after_col_names))
+
+    return shared.SqlPlan(sql=qry, col_names=col_names, param_names=after_col_names)
+
+
+def _after_clause(col_names: typing.Iterable[str], /) -> sql.Composed:
+    return sql.SQL(" OR ").join(sql.SQL("{} > %s").format(_wrap_name(c)) for c in col_names)
 
 
-def _generate_column_definition(*, col: data.Column) -> str:
+def _col_def_csv(cols: typing.Iterable[data.Column], /) -> sql.Composed:
+    return sql.SQL("\n, ").join(
+        _generate_column_definition(col=col) for col in sorted(cols, key=operator.attrgetter("name"))
+    )
+
+
+def _col_name_csv(col_names: typing.Iterable[str], /) -> sql.Composed:
+    return sql.SQL(", ").join(_wrap_name(c) for c in col_names)
+
+
+def _generate_column_definition(*, col: data.Column) -> sql.Composed:
     if col.nullable:
-        nullable = "NULL"
+        nullable = sql.SQL("NULL")
     else:
-        nullable = "NOT NULL"
-
-    col_name = _wrap_name(col.name)
+        nullable = sql.SQL("NOT NULL")
 
-    return {
-        data.DataType.BigFloat: lambda: f"{col_name} DOUBLE PRECISION {nullable}",
-        data.DataType.BigInt: lambda: f"{col_name} BIGINT {nullable}",
-        data.DataType.Bool: lambda: f"{col_name} BOOL {nullable}",
-        data.DataType.Date: lambda: f"{col_name} DATE {nullable}",
-        data.DataType.Decimal: lambda: (
-            f"{col_name} NUMERIC({18 if col.precision is None else col.precision}, "
-            f"{4 if col.scale is None else col.scale}) {nullable}"
-        ),
-        data.DataType.Float: lambda: f"{col_name} FLOAT {nullable}",
-        data.DataType.Int: lambda: f"{col_name} INT {nullable}",
-        data.DataType.Text: lambda: f"{col_name} TEXT {nullable}",
-        data.DataType.Timestamp: lambda: f"{col_name} TIMESTAMP {nullable}",
-        data.DataType.TimestampTZ: lambda: f"{col_name} TIMESTAMPTZ {nullable}",
-        data.DataType.UUID: lambda: f"{col_name} UUID {nullable}",
-    }[col.data_type]()
+    return sql.SQL("{} {} {}").format(_wrap_name(col.name), _sql_type(col), nullable)
 
 
-def _generate_full_table_name(*, schema_name: str | None, table_name: str) -> str:
+def _generate_full_table_name(*, schema_name: str | None, table_name: str) -> sql.Identifier:
     if schema_name:
-        return f"{_wrap_name(schema_name)}.{_wrap_name(table_name)}"
+        return sql.Identifier(schema_name.lower(), table_name.lower())
     else:
         return _wrap_name(table_name)
 
 
-def _wrap_name(name: str, /) -> str:
-    return f'"{name.lower()}"'
+def _placeholder_csv(n: int, /) -> sql.Composed:
+    return sql.SQL(", ").join(sql.Placeholder() for _ in range(n))
+
+
+def _sql_type(col: data.Column, /) -> sql.Composable:
+    return {
+        data.DataType.BigFloat: lambda: sql.SQL("DOUBLE PRECISION"),
+        data.DataType.BigInt: lambda: sql.SQL("BIGINT"),
+        data.DataType.Bool: lambda: sql.SQL("BOOL"),
+        data.DataType.Date: lambda: sql.SQL("DATE"),
+        data.DataType.Decimal: lambda: sql.SQL("NUMERIC({}, {})").format(
+            sql.Literal(18 if col.precision is None else col.precision),
+            sql.Literal(4 if col.scale is None else col.scale),
+        ),
+        data.DataType.Float: lambda: sql.SQL("FLOAT"),
+        data.DataType.Int: lambda: sql.SQL("INT"),
+        data.DataType.Text: lambda: sql.SQL("TEXT"),
+        data.DataType.Timestamp: lambda: sql.SQL("TIMESTAMP"),
+        data.DataType.TimestampTZ: lambda: sql.SQL("TIMESTAMPTZ"),
+        data.DataType.UUID: lambda: sql.SQL("UUID"),
+    }[col.data_type]()
+
+
+def _wrap_name(name: str, /) -> sql.Identifier:
+    return sql.Identifier(name.lower())
@@ -0,0 +1,611 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import operator
+import typing
+
+from src import data
+from src.adapter.ds import shared, sqlite_shared
+
+__all__ = ("SqliteDstDs",)
+
+# poa_ts is kept as UTC text, to the millisecond like pg's TIMESTAMPTZ(3), so it sorts as text
+_NOW: typing.Final[str] = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection,SqlResolve
+class SqliteDstDs(data.DstDs):
+    """Writes a table to a SQLite database, for a site that has no server to sync to.
+
+    The table is WITHOUT ROWID, so it's stored in order of its key, and a batch is upserted with
+    one executemany of INSERT ... ON CONFLICT, rather than through a staging table.  Every write
+    is part of the cursor's transaction, which is committed when the sync is done with it.
+    """
+
+    def __init__(
+        self,
+        *,
+        cur: data.Cursor,
+        dst_db_name: str,
+        dst_schema_name: str | None,
+        dst_table_name: str,
+        src_table: data.Table,
+        after: dict[str, datetime.date],
+    ):
+        self._cur: typing.Final[data.Cursor] = cur
+        self._src_table: typing.Final[data.Table] = src_table
+        self._after: typing.Final[dict[str, datetime.date]] = after
+
+        self._dst_table: typing.Final[data.Table] = dataclasses.replace(
+            src_table,
+            db_name=dst_db_name,
+            schema_name=dst_schema_name,
+            table_name=dst_table_name,
+        )
+
+        self._sqlite_table_name: typing.Final[str] = sqlite_shared.table_name(
+            schema_name=dst_schema_name,
+            table_name=dst_table_name,
+        )
+        self._full_table_name: typing.Final[str] = sqlite_shared.wrap(self._sqlite_table_name)
+        self._history_table_name: typing.Final[str] = sqlite_shared.wrap(
+            self._sqlite_table_name + "_history"
+        )
+
+        self._readers: typing.Final[dict[str, sqlite_shared.Reader]] = {
+            c.name: sqlite_shared.reader(c.data_type) for c in self._dst_table.columns
+        }
+        self._readers["poa_hd"] = str
+        self._writers: typing.Final[dict[str, sqlite_shared.Writer]] = {
+            c.name: sqlite_shared.writer(c.data_type) for c in self._dst_table.columns
+        }
+
+        self._plan: typing.Final[_Plan] = _compile_plan(
+            table=self._dst_table,
+            full_table_name=self._full_table_name,
+        )
+        self._fetch_plans: typing.Final[
+            dict[tuple[tuple[str, ...], tuple[str, ...]], shared.SqlPlan]
+        ] = {}
+
+    def add_check_result(self, /, result: data.CheckResult) -> None | data.Error:
+        try:
+            create_result = self._cur.execute(
+                sql=sqlite_shared.Sql(
+                    """
+                    CREATE TABLE IF NOT EXISTS poa_check_result (
+                        src_db_name TEXT NOT NULL
+                    ,   src_schema_name TEXT NULL
+                    ,   src_table_name TEXT NOT NULL
+                    ,   dst_db_name TEXT NOT NULL
+                    ,   dst_schema_name TEXT NULL
+                    ,   dst_table_name TEXT NOT NULL
+                    ,   src_rows INTEGER NOT NULL
+                    ,   dst_rows INTEGER NOT NULL
+                    ,   extra_keys TEXT NULL
+                    ,   missing_keys TEXT NULL
+                    ,   execution_millis INTEGER NOT NULL
+                    ,   ts TEXT NOT NULL
+                    )
+                    """
+                ),
+                params=None,
+            )
+            if isinstance(create_result, data.Error):
+                return create_result
+
+            return self._cur.execute(
+                sql=sqlite_shared.Sql(
+                    f"""
+                    INSERT INTO poa_check_result
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {_NOW})
+                    """
+                ),
+                params=(
+                    result.src_db_name,
+                    result.src_schema_name,
+                    result.src_table_name,
+                    result.dst_db_name,
+                    result.dst_schema_name,
+                    result.dst_table_name,
+                    result.src_rows,
+                    result.dst_rows,
+                    None if result.extra_keys is None else str(tuple(result.extra_keys)),
+                    None if result.missing_keys is None else str(tuple(result.missing_keys)),
+                    result.execution_millis,
+                ),
+            )
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name, result=result)
+
+    def add_increasing_col_indices(
+        self, /, increasing_cols: typing.Iterable[str]
+    ) -> None | data.Error:
+        try:
+            for col in increasing_cols:
+                index_name = sqlite_shared.wrap(f"ix_{self._sqlite_table_name}_{col}")
+                add_index_result = self._cur.execute(
+                    sql=sqlite_shared.Sql(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} "
+                        f"ON {self._full_table_name} ({sqlite_shared.wrap(col)} DESC)"
+                    ),
+                    params=None,
+                )
+                if isinstance(add_index_result, data.Error):
+                    return add_index_result
+
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                increasing_cols=tuple(increasing_cols),
+            )
+
+    def create(self) -> None | data.Error:
+        try:
+            return self._create_table(
+                full_table_name=self._full_table_name,
+                index_prefix=f"ix_{self._sqlite_table_name}",
+                pk=self._dst_table.pk,
+                if_not_exists=False,
+            )
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def create_history_table(self) -> None | data.Error:
+        try:
+            return self._create_table(
+                full_table_name=self._history_table_name,
+                index_prefix=f"ix_{self._sqlite_table_name}_history",
+                pk=(*self._dst_table.pk, "poa_ts"),
+                if_not_exists=True,
+            )
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def create_staging_table(self) -> None | data.Error:
+        # rows are upserted straight from the batch, so there's no staging table
+        return None
+
+    def delete_rows(self, *, keys: typing.Iterable[data.RowKey]) -> int | data.Error:
+        try:
+            keys = tuple(keys)
+            if not keys:
+                return 0
+
+            key_cols = self._plan.key_cols
+            keys_per_query = sqlite_shared.MAX_PARAMS // len(key_cols)
+
+            deleted = 0
+            for i in range(0, len(keys), keys_per_query):
+                batch = keys[i : i + keys_per_query]
+
+                rows = self._cur.fetch_all(
+                    sql=_compile_delete_sql(
+                        full_table_name=self._full_table_name,
+                        key_cols=key_cols,
+                        keys=len(batch),
+                    ),
+                    params=[self._writers[col](key[col]) for key in batch for col in key_cols],
+                )
+                if isinstance(rows, data.Error):
+                    return rows
+
+                deleted += len(rows)
+
+            return deleted
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name, key=tuple(keys))
+
+    def drop_table(self) -> None | data.Error:
+        return self._cur.execute(
+            sql=sqlite_shared.Sql(f"DROP TABLE IF EXISTS {self._full_table_name}"),
+            params=None,
+        )
+
+    def fetch_digests(self) -> dict[data.RowKey, str] | data.Error:
+        try:
+            key_cols = self._plan.key_cols
+
+            rows = self._cur.fetch_all(
+                sql=sqlite_shared.Sql(
+                    f"SELECT {_col_name_csv(key_cols)}, poa_hd FROM {self._full_table_name} "
+                    "WHERE poa_op <> 'd'"
+                ),
+                params=None,
+            )
+            if isinstance(rows, data.Error):
+                return rows
+
+            return {
+                data.FrozenDict({col: self._readers[col](row[col]) for col in key_cols}): (
+                    typing.cast(str, row["poa_hd"])
+                )
+                for row in rows
+            }
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[list[data.Row]] | data.Error:
+        try:
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after))
+
+            batches = self._cur.fetch_batches(
+                sql=plan.sql,
+                params=self._params(plan, full_after),
+                batch_size=batch_size,
+            )
+            if isinstance(batches, data.Error):
+                return batches
+
+            return ([self._read(row) for row in batch] for batch in batches)
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+                batch_size=batch_size,
+            )
+
+    def fetch_rows(
+        self,
+        *,
+        col_names: typing.Iterable[str] | None,
+        after: dict[str, typing.Hashable] | None,
+    ) -> list[data.Row] | data.Error:
+        try:
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after))
+
+            rows = self._cur.fetch_all(sql=plan.sql, params=self._params(plan, full_after))
+            if isinstance(rows, data.Error):
+                return rows
+
+            return [self._read(row) for row in rows]
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+            )
+
+    def get_max_values(
+        self, /, col_names: typing.Iterable[str]
+    ) -> dict[str, typing.Hashable] | None | data.Error:
+        try:
+            types = {c.name: c.data_type for c in self._dst_table.columns}
+
+            max_values: dict[str, typing.Hashable] = {}
+            for col in sorted(col_names):
+                # decimals are stored as text, which doesn't sort like a number
+                if types[col] == data.DataType.Decimal:
+                    sort_key = f"CAST({sqlite_shared.wrap(col)} AS REAL)"
+                else:
+                    sort_key = sqlite_shared.wrap(col)
+
+                row = self._cur.fetch_one(
+                    sql=sqlite_shared.Sql(
+                        f"SELECT {sqlite_shared.wrap(col)} AS v FROM {self._full_table_name} "
+                        f"WHERE {sqlite_shared.wrap(col)} IS NOT NULL "
+                        f"ORDER BY {sort_key} DESC LIMIT 1"
+                    ),
+                    params=None,
+                )
+                if isinstance(row, data.Error):
+                    return row
+
+                max_values[col] = None if row is None else self._readers[col](row["v"])
+
+            if max_values:
+                return max_values
+
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names),
+            )
+
+    def get_row_count(self) -> int | data.Error:
+        try:
+            qry = f"SELECT count(*) AS ct FROM {self._full_table_name} WHERE poa_op <> 'd'"
+            if self._after:
+                qry += f" AND ({_after_clause(self._after)})"
+
+            row = self._cur.fetch_one(
+                sql=sqlite_shared.Sql(qry),
+                params=[self._writers[col](value) for col, value in self._after.items()],
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow the get_row_count() query returned None.",
+                    table_name=self._full_table_name,
+                )
+
+            return typing.cast(int, row["ct"])
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def lock(self) -> bool | data.Error:
+        # SQLite lets one connection write at a time, and the others wait on busy_timeout, so
+        # syncs to the database are already serialized
+        return True
+
+    def table_exists(self) -> bool | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql=sqlite_shared.Sql(
+                    "SELECT count(*) AS ct FROM sqlite_master WHERE type = 'table' AND name = ?"
+                ),
+                params=(self._sqlite_table_name,),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow the table_exists() query returned None.",
+                    table_name=self._full_table_name,
+                )
+
+            return typing.cast(int, row["ct"]) > 0
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def truncate(self) -> None | data.Error:
+        # SQLite has no TRUNCATE, but a DELETE without a WHERE clause drops the table's pages
+        # the same way
+        return self._cur.execute(
+            sql=sqlite_shared.Sql(f"DELETE FROM {self._full_table_name}"),
+            params=None,
+        )
+
+    def update_history_table(self) -> None | data.Error:
+        try:
+            cols = _col_name_csv((*self._plan.col_names, "poa_hd", "poa_op", "poa_ts"))
+
+            pks_match = " AND ".join(
+                f"d.{sqlite_shared.wrap(col)} = h.{sqlite_shared.wrap(col)}"
+                for col in (*self._dst_table.pk, "poa_ts")
+            )
+
+            return self._cur.execute(
+                sql=sqlite_shared.Sql(
+                    f"""
+                    INSERT INTO {self._history_table_name} ({cols})
+                    SELECT {cols}
+                    FROM {self._full_table_name} AS d
+                    WHERE
+                        NOT EXISTS (
+                            SELECT 1
+                            FROM {self._history_table_name} AS h
+                            WHERE
+                                {pks_match}
+                        )
+                    """
+                ),
+                params=None,
+            )
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def upsert_rows_from_staging(self, /, rows: typing.Iterable[data.Row]) -> int | data.Error:
+        try:
+            if not rows:
+                return 0
+
+            plan = self._plan.upsert
+            writers = [self._writers[col] for col in plan.param_names]
+
+            # the WHERE clause skips a row that hasn't changed, so the rows changed by the batch
+            # are the ones that were added or updated
+            before = self._total_changes()
+            if isinstance(before, data.Error):
+                return before
+
+            # poa_hd is computed from the rows as they came from src, before they're converted
+            # to what SQLite stores
+            upsert_result = self._cur.execute_many(
+                sql=plan.sql,
+                params=[
+                    [
+                        *(write(row[col]) for write, col in zip(writers, plan.param_names)),
+                        data.row_digest(row, col_names=self._plan.hd_col_names),
+                    ]
+                    for row in rows
+                ],
+            )
+            if isinstance(upsert_result, data.Error):
+                return upsert_result
+
+            after = self._total_changes()
+            if isinstance(after, data.Error):
+                return after
+
+            return after - before
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def _total_changes(self) -> int | data.Error:
+        row = self._cur.fetch_one(
+            sql=sqlite_shared.Sql("SELECT total_changes() AS ct"),
+            params=None,
+        )
+        if isinstance(row, data.Error):
+            return row
+
+        assert row is not None
+
+        return typing.cast(int, row["ct"])
+
+    def _create_table(
+        self,
+        *,
+        full_table_name: str,
+        index_prefix: str,
+        pk: tuple[str, ...],
+        if_not_exists: bool,
+    ) -> None | data.Error:
+        create_table_result = self._cur.execute(
+            sql=sqlite_shared.Sql(
+                f"""
+                CREATE TABLE {'IF NOT EXISTS ' if if_not_exists else ''}{full_table_name} (
+                  {_col_def_csv(self._dst_table.columns)}
+                , poa_hd TEXT NOT NULL
+                , poa_op TEXT NOT NULL CHECK (poa_op IN ('a', 'd', 'u'))
+                , poa_ts TEXT NOT NULL DEFAULT ({_NOW})
+                , PRIMARY KEY ({_col_name_csv(pk)})
+                ) WITHOUT ROWID
+                """
+            ),
+            params=None,
+        )
+        if isinstance(create_table_result, data.Error):
+            return create_table_result
+
+        for col, order in (("poa_ts", " DESC"), ("poa_op", "")):
+            index_result = self._cur.execute(
+                sql=sqlite_shared.Sql(
+                    f"CREATE INDEX IF NOT EXISTS {sqlite_shared.wrap(f'{index_prefix}_{col}')} "
+                    f"ON {full_table_name} ({col}{order})"
+                ),
+                params=None,
+            )
+            if isinstance(index_result, data.Error):
+                return index_result
+
+        return None
+
+    def _fetch_rows_plan(
+        self,
+        *,
+        col_names: typing.Iterable[str] | None,
+        after_cols: tuple[str, ...],
+    ) -> shared.SqlPlan:
+        if col_names:
+            cols = tuple(sorted(set(col_names)))
+        else:
+            cols = self._plan.col_names
+
+        plan_key = (cols, after_cols)
+        plan = self._fetch_plans.get(plan_key)
+        if plan is None:
+            qry = f"SELECT {_col_name_csv(cols)} FROM {self._full_table_name} WHERE poa_op <> 'd'"
+            if after_cols:
+                qry += f" AND ({_after_clause(after_cols)})"
+            qry += f" ORDER BY {_col_name_csv(self._dst_table.pk)}"
+
+            plan = shared.SqlPlan(
+                sql=sqlite_shared.Sql(qry),
+                col_names=cols,
+                param_names=after_cols,
+            )
+            self._fetch_plans[plan_key] = plan
+
+        return plan
+
+    def _params(
+        self, plan: shared.SqlPlan, /, values: typing.Mapping[str, typing.Any]
+    ) -> list[typing.Any]:
+        return [self._writers[name](values[name]) for name in plan.param_names]
+
+    def _read(self, row: data.Row, /) -> data.Row:
+        return {col: self._readers[col](value) for col, value in row.items()}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class _Plan:
+    col_names: tuple[str, ...]
+    hd_col_names: tuple[str, ...]
+    key_cols: tuple[str, ...]
+    upsert: shared.SqlPlan
+
+
+def _compile_plan(*, table: data.Table, full_table_name: str) -> _Plan:
+    col_names = tuple(sorted(c.name for c in table.columns))
+    hd_cols = tuple(c for c in col_names if c not in table.pk)
+
+    set_values = "".join(
+        f"{sqlite_shared.wrap(c)} = excluded.{sqlite_shared.wrap(c)}, " for c in hd_cols
+    )
+
+    # a row that's unchanged since it was last written is left alone, so poa_ts only moves when
+    # the row does
+    upsert = f"""
+        INSERT INTO {full_table_name} ({_col_name_csv(col_names)}, poa_hd, poa_op)
+        VALUES ({', '.join('?' for _ in col_names)}, ?, 'a')
+        ON CONFLICT ({_col_name_csv(table.pk)})
+        DO UPDATE SET
+            {set_values}poa_hd = excluded.poa_hd, poa_op = 'u', poa_ts = {_NOW}
+        WHERE
+            {full_table_name}.poa_hd <> excluded.poa_hd
+            OR {full_table_name}.poa_op = 'd'
+    """
+
+    return _Plan(
+        col_names=col_names,
+        hd_col_names=hd_cols,
+        key_cols=tuple(sorted(table.pk)),
+        upsert=shared.SqlPlan(
+            sql=sqlite_shared.Sql(upsert),
+            col_names=col_names,
+            param_names=col_names,
+        ),
+    )
+
+
+def _compile_delete_sql(
+    *,
+    full_table_name: str,
+    key_cols: tuple[str, ...],
+    keys: int,
+) -> sqlite_shared.Sql:
+    key_placeholders = "(" + ", ".join("?" for _ in key_cols) + ")"
+    key_values = ", ".join(key_placeholders for _ in range(keys))
+
+    # RETURNING gives a row per key that was deleted, rather than already marked so
+    return sqlite_shared.Sql(
+        f"""
+        UPDATE {full_table_name}
+        SET
+            poa_op = 'd'
+        ,   poa_ts = {_NOW}
+        WHERE
+            ({_col_name_csv(key_cols)}) IN (VALUES {key_values})
+            AND poa_op <> 'd'
+        RETURNING 1 AS deleted
+        """
+    )
+
+
+def _after_clause(col_names: typing.Iterable[str], /) -> str:
+    return " OR ".join(f"{sqlite_shared.wrap(col)} > ?" for col in col_names)
+
+
+def _col_def_csv(cols: typing.Iterable[data.Column], /) -> str:
+    return "\n, ".join(
+        f"{sqlite_shared.wrap(col.name)} {sqlite_shared.column_type(col)} "
+        f"{'NULL' if col.nullable else 'NOT NULL'}"
+        for col in sorted(cols, key=operator.attrgetter("name"))
+    )
+
+
+def _col_name_csv(col_names: typing.Iterable[str], /) -> str:
+    return ", ".join(sqlite_shared.wrap(c) for c in col_names)
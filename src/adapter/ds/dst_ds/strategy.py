@@ -1,9 +1,6 @@
 import datetime
 
-import psycopg
-
 from src import data
-from src.adapter.ds.dst_ds.pg import PgDstDs
 
 __all__ = ("create",)
 
@@ -11,15 +8,19 @@ __all__ = ("create",)
 def create(
     *,
     api: data.API,
-    cur: psycopg.Cursor,
+    cur: data.Cursor,
     dst_db_name: str,
     dst_schema_name: str | None,
     dst_table_name: str,
     src_table: data.Table,
     after: dict[str, datetime.date],
+    export: data.FileExport | None,
+    lock_policy: data.LockPolicy = data.LockPolicy.WAIT,
 ) -> data.DstDs | data.Error:
     try:
         if api == data.API.PSYCOPG:
+            from src.adapter.ds.dst_ds.pg import PgDstDs
+
             return PgDstDs(
                 cur=cur,
                 dst_db_name=dst_db_name,
@@ -27,6 +28,33 @@ def create(
                 dst_table_name=dst_table_name,
                 src_table=src_table,
                 after=after,
+                lock_policy=lock_policy,
+            )
+        elif api == data.API.SQLITE:
+            from src.adapter.ds.dst_ds.sqlite import SqliteDstDs
+
+            return SqliteDstDs(
+                cur=cur,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                src_table=src_table,
+                after=after,
+            )
+        elif api == data.API.FILE and export is not None:
+            if export.compression == "zstd":
+                # zstandard is optional, so a config that asks for it finds out before a sync
+                import zstandard  # noqa: F401
+
+            from src.adapter.ds.dst_ds.file import FileDstDs
+
+            return FileDstDs(
+                export=export,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                src_table=src_table,
+                after=after,
             )
 
         return data.Error.new(
@@ -1,11 +1,35 @@
+from __future__ import annotations
+
+import dataclasses
 import datetime
 import typing
 
-__all__ = ("combine_filters",)
+from src import data
+
+__all__ = (
+    "SqlPlan",
+    "combine_filters",
+)
 
 T = typing.TypeVar("T")
 
 
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class SqlPlan:
+    """A statement compiled once per table, along with the row layout it expects.
+
+    col_names are the columns the statement returns or writes, in order, and param_names are the
+    Row keys whose values are bound to its placeholders, in order.
+    """
+
+    sql: str | data.TrustedSql
+    col_names: tuple[str, ...]
+    param_names: tuple[str, ...]
+
+    def params(self, /, row: data.Row) -> list[typing.Hashable]:
+        return [row[name] for name in self.param_names]
+
+
 def combine_filters(
     *,
     ds_filter: dict[str, datetime.date] | None,
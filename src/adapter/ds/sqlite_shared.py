@@ -0,0 +1,223 @@
+"""What SqliteSrcDs and SqliteDstDs share: how tables are named, and how values are stored.
+
+SQLite has no date, decimal, or uuid types, so those are stored as text, and a column's declared
+type is what tells them apart when they're read back.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+import re
+import typing
+import uuid
+
+from src import data
+
+__all__ = (
+    "MAX_PARAMS",
+    "Reader",
+    "Sql",
+    "Writer",
+    "column_type",
+    "lookup_column",
+    "reader",
+    "table_name",
+    "wrap",
+    "writer",
+)
+
+Reader: typing.TypeAlias = typing.Callable[[typing.Any], typing.Hashable]
+Writer: typing.TypeAlias = typing.Callable[[typing.Any], typing.Any]
+
+# SQLite builds before 3.32 allow at most 999 parameters in a statement
+MAX_PARAMS: typing.Final[int] = 999
+
+_DECLARED_TYPE_PATTERN: typing.Final[re.Pattern[str]] = re.compile(
+    r"\s*([A-Z ]*?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*"
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Sql:
+    """A statement composed from wrapped identifiers, like psycopg's sql.Composed, so the cursor
+    doesn't scan it or its parameters for comments and semicolons.
+    """
+
+    text: str
+
+    def as_string(self, context: typing.Any = None) -> str:
+        return self.text
+
+
+def column_type(col: data.Column, /) -> str:
+    """The type a column is declared as.
+
+    A decimal is declared with TEXT in its name, which gives it text affinity, since SQLite would
+    otherwise store it as a REAL and keep only 15 of its digits.
+    """
+    if col.data_type == data.DataType.Decimal:
+        precision = 18 if col.precision is None else col.precision
+        scale = 4 if col.scale is None else col.scale
+        return f"DECIMAL TEXT({precision}, {scale})"
+
+    return {
+        data.DataType.BigFloat: "DOUBLE",
+        data.DataType.BigInt: "BIGINT",
+        data.DataType.Bool: "BOOLEAN",
+        data.DataType.Date: "DATE",
+        data.DataType.Float: "FLOAT",
+        data.DataType.Int: "INT",
+        data.DataType.Text: "TEXT",
+        data.DataType.Timestamp: "TIMESTAMP",
+        data.DataType.TimestampTZ: "TIMESTAMPTZ",
+        data.DataType.UUID: "UUID",
+    }[col.data_type]
+
+
+def lookup_column(*, name: str, declared_type: str, nullable: bool) -> data.Column:
+    """A column as PRAGMA table_info describes it.
+
+    The types column_type declares are looked up by name, and anything else by SQLite's own
+    affinity rules.
+    """
+    match = _DECLARED_TYPE_PATTERN.fullmatch(declared_type.upper())
+    if match is None:
+        raise NotImplementedError(f"The data type {declared_type} is not supported.")
+
+    type_name = " ".join(match[1].split())
+    size = None if match[2] is None else int(match[2])
+    scale = None if match[3] is None else int(match[3])
+
+    if type_name in ("DECIMAL", "DECIMAL TEXT", "NUMERIC"):
+        return data.Column(
+            name=name,
+            data_type=data.DataType.Decimal,
+            nullable=nullable,
+            length=None,
+            precision=size,
+            scale=scale,
+        )
+
+    data_type = {
+        "BOOL": data.DataType.Bool,
+        "BOOLEAN": data.DataType.Bool,
+        "DATE": data.DataType.Date,
+        "DATETIME": data.DataType.Timestamp,
+        "DOUBLE": data.DataType.BigFloat,
+        "DOUBLE PRECISION": data.DataType.BigFloat,
+        "FLOAT": data.DataType.Float,
+        "INT": data.DataType.Int,
+        "REAL": data.DataType.BigFloat,
+        "SMALLINT": data.DataType.Int,
+        "TIMESTAMP": data.DataType.Timestamp,
+        "TIMESTAMPTZ": data.DataType.TimestampTZ,
+        "UUID": data.DataType.UUID,
+    }.get(type_name)
+
+    if data_type is None:
+        if "INT" in type_name:
+            data_type = data.DataType.BigInt
+        elif "CHAR" in type_name or "CLOB" in type_name or "TEXT" in type_name:
+            data_type = data.DataType.Text
+        elif type_name == "" or "BLOB" in type_name:
+            raise NotImplementedError(f"The data type {declared_type} is not supported.")
+        elif "REAL" in type_name or "FLOA" in type_name or "DOUB" in type_name:
+            data_type = data.DataType.BigFloat
+        else:
+            data_type = data.DataType.Decimal
+
+    return data.Column(
+        name=name,
+        data_type=data_type,
+        nullable=nullable,
+        length=size if data_type == data.DataType.Text else None,
+        precision=None,
+        scale=None,
+    )
+
+
+def reader(data_type: data.DataType, /) -> Reader:
+    """A function that turns a value as SQLite stores it into a value of data_type."""
+    read = _READERS[data_type]
+    return lambda value: None if value is None else read(value)
+
+
+def table_name(*, schema_name: str | None, table_name: str) -> str:
+    """SQLite has no schemas, so sales.order is kept in a table named sales_order."""
+    if schema_name:
+        return f"{schema_name}_{table_name}"
+    return table_name
+
+
+def wrap(name: str, /) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def writer(data_type: data.DataType, /) -> Writer:
+    """A function that turns a value of data_type into one SQLite can store, and that sorts the
+    same way as text.
+    """
+    write = _WRITERS[data_type]
+    return lambda value: None if value is None else write(value)
+
+
+def _read_timestamptz(value: str, /) -> datetime.datetime:
+    ts = datetime.datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=datetime.timezone.utc)
+    return ts
+
+
+def _write_date(value: datetime.date, /) -> str:
+    # a timestamp compared to a date, like a combined after filter, is compared by its day
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def _write_timestamp(value: datetime.date, /) -> str:
+    # a date compared to a timestamp, like an after filter, is midnight of that day
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return value.isoformat()
+
+
+def _write_timestamptz(value: datetime.date, /) -> str:
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+
+    # every value has the same offset, so they sort as text the way they do as timestamps
+    return value.astimezone(datetime.timezone.utc).isoformat()
+
+
+_READERS: typing.Final[dict[data.DataType, Reader]] = {
+    data.DataType.BigFloat: float,
+    data.DataType.BigInt: int,
+    data.DataType.Bool: bool,
+    data.DataType.Date: datetime.date.fromisoformat,
+    data.DataType.Decimal: lambda value: decimal.Decimal(str(value)),
+    data.DataType.Float: float,
+    data.DataType.Int: int,
+    data.DataType.Text: str,
+    data.DataType.Timestamp: datetime.datetime.fromisoformat,
+    data.DataType.TimestampTZ: _read_timestamptz,
+    data.DataType.UUID: uuid.UUID,
+}
+
+_WRITERS: typing.Final[dict[data.DataType, Writer]] = {
+    data.DataType.BigFloat: float,
+    data.DataType.BigInt: int,
+    data.DataType.Bool: int,
+    data.DataType.Date: _write_date,
+    data.DataType.Decimal: str,
+    data.DataType.Float: float,
+    data.DataType.Int: int,
+    data.DataType.Text: str,
+    data.DataType.Timestamp: _write_timestamp,
+    data.DataType.TimestampTZ: _write_timestamptz,
+    data.DataType.UUID: str,
+}
@@ -0,0 +1,529 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import datetime
+import itertools
+import json
+import mmap
+import os
+import pathlib
+import re
+import sqlite3
+import typing
+
+from src import data
+from src.adapter.ds import flat_file, shared
+
+__all__ = ("FileSrcDs",)
+
+# the schema is inferred from this many rows at the top of the file
+_INFER_ROWS: typing.Final[int] = 10_000
+
+# keys are written to, and looked up in, the index this many at a time
+_INDEX_BATCH_SIZE: typing.Final[int] = 10_000
+
+# SQLite builds before 3.32 allow at most 999 parameters in a statement
+_LOOKUP_BATCH_SIZE: typing.Final[int] = 900
+
+_INT_PATTERN: typing.Final[re.Pattern[str]] = re.compile(r"-?\d+")
+_DECIMAL_PATTERN: typing.Final[re.Pattern[str]] = re.compile(r"-?\d+\.\d+")
+_DATE_PATTERN: typing.Final[re.Pattern[str]] = re.compile(r"\d{4}-\d{2}-\d{2}")
+_UUID_PATTERN: typing.Final[re.Pattern[str]] = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+
+
+class FileSrcDs(data.SrcDs):
+    """Reads a table from a CSV or JSON lines file, like a vendor's nightly extract, named for the
+    table in export's folder, e.g. sales/order.csv for sales.order.
+
+    The columns' types come from table when it's given, like the def cached by the sync before,
+    and are otherwise inferred from the rows at the top of the file.
+
+    An uncompressed file is memory-mapped and parsed as it's scanned.  fetch_rows_by_key finds
+    keys by their offset in the file, in an index kept in a SQLite file beside it, which is built
+    on the first lookup and rebuilt whenever the file changes, so each batch of keys a sync
+    fetches is a few seeks rather than a scan.  A compressed file can't be seeked into, so each
+    lookup scans it.
+    """
+
+    def __init__(
+        self,
+        *,
+        export: data.FileExport,
+        db_name: str,
+        schema_name: str | None,
+        table_name: str,
+        pk_cols: tuple[str, ...],
+        after: dict[str, datetime.date],
+        table: data.Table | None = None,
+    ):
+        self._export: typing.Final[data.FileExport] = export
+        self._db_name: typing.Final[str] = db_name
+        self._schema_name: typing.Final[str | None] = schema_name
+        self._table_name: typing.Final[str] = table_name
+        self._pk_cols: typing.Final[tuple[str, ...]] = pk_cols
+        self._after: typing.Final[dict[str, datetime.date]] = after
+        self._table: typing.Final[data.Table | None] = table
+
+        folder = export.folder
+        if schema_name is not None:
+            folder /= schema_name
+        self._path: typing.Final[pathlib.Path] = folder / (
+            table_name
+            + flat_file.suffix(file_format=export.format, compression=export.compression)
+        )
+        self._index_path: typing.Final[pathlib.Path] = self._path.with_name(
+            f"{self._path.name}.poa-index"
+        )
+
+        self._sampled: _Sample | None = None
+
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[list[data.Row]] | data.Error:
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            rows = self._rows(table, col_names=col_names, after=full_after)
+
+            return iter(lambda: list(itertools.islice(rows, batch_size)), [])
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def fetch_rows(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+    ) -> list[data.Row] | data.Error:
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            return list(self._rows(table, col_names=col_names, after=full_after))
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                path=self._path,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+            )
+
+    def fetch_rows_by_key(
+        self,
+        *,
+        col_names: typing.Iterable[str] | None,
+        keys: typing.Iterable[data.RowKey],
+    ) -> list[data.Row] | data.Error:
+        try:
+            keys = set(keys)
+            if not keys:
+                return []
+
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            cols = _col_names(table, col_names=col_names)
+
+            if self._export.compression is not None:
+                return [
+                    {col: row[col] for col in cols}
+                    for row in self._rows(table, col_names=None, after={})
+                    if data.FrozenDict({col: row[col] for col in table.pk}) in keys
+                ]
+
+            index_result = self._build_index(table)
+            if isinstance(index_result, data.Error):
+                return index_result
+
+            offsets = sorted(self._lookup(table, keys=keys))
+            if not offsets:
+                return []
+
+            with self._mmap() as mm:
+                header = _header(mm, file_format=self._export.format)
+
+                rows: list[data.Row] = []
+                for offset in offsets:
+                    mm.seek(offset)
+                    lines = itertools.chain(header, _MmapLines(mm))
+                    record = next(flat_file.read_records(lines, file_format=self._export.format))
+                    rows.append(_row(record, table=table, col_names=cols))
+
+                return rows
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path, col_names=tuple(col_names or ()))
+
+    def get_row_count(self) -> int | data.Error:
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            rows = self._rows(table, col_names=set(table.pk), after=self._after)
+            return sum(1 for _ in rows)
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def get_table(self) -> data.Table | data.Error:
+        try:
+            return self._sample().table
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def get_table_stats(self) -> data.TableStats | data.Error:
+        try:
+            return data.TableStats(estimated_rows=self._sample().estimated_rows)
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def table_exists(self) -> bool | data.Error:
+        try:
+            return self._path.exists()
+        except Exception as e:
+            return data.Error.new(str(e), path=self._path)
+
+    def _build_index(self, table: data.Table, /) -> None | data.Error:
+        """Write the offset of each key in the file to the index, unless it's already there for
+        this version of the file.
+        """
+        stat = self._path.stat()
+        meta = {
+            "size": str(stat.st_size),
+            "mtime_ns": str(stat.st_mtime_ns),
+            "key_cols": json.dumps(list(table.pk)),
+        }
+
+        if self._index_path.exists():
+            with contextlib.closing(sqlite3.connect(self._index_path)) as con:
+                if dict(con.execute("SELECT name, value FROM meta").fetchall()) == meta:
+                    return None
+
+        tmp_path = self._index_path.with_name(f"{self._index_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.unlink(missing_ok=True)
+
+            with contextlib.closing(sqlite3.connect(tmp_path)) as con:
+                # the temp file is thrown away if the build fails, so it doesn't need a journal
+                con.execute("PRAGMA journal_mode = OFF")
+                con.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                con.execute(
+                    """
+                    CREATE TABLE key (
+                        key TEXT PRIMARY KEY
+                    ,   offset INTEGER NOT NULL
+                    ) WITHOUT ROWID
+                    """
+                )
+
+                entries = (
+                    (_key_text(record, table=table), offset)
+                    for offset, record in self._records()
+                )
+                while batch := list(itertools.islice(entries, _INDEX_BATCH_SIZE)):
+                    # a key that's in the file twice is found at its last row, like an upsert
+                    con.executemany(
+                        "INSERT OR REPLACE INTO key (key, offset) VALUES (?, ?)", batch
+                    )
+
+                con.executemany("INSERT INTO meta (name, value) VALUES (?, ?)", meta.items())
+                con.commit()
+
+            os.replace(tmp_path, self._index_path)
+
+            return None
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            return data.Error.new(str(e), path=self._index_path)
+
+    def _sample(self) -> _Sample:
+        """The table, inferred from the rows at the top of the file if it wasn't given, and an
+        estimate of the file's rows from how many bytes those rows take.
+        """
+        if self._sampled is not None:
+            return self._sampled
+
+        sample: list[dict[str, typing.Any]] = []
+        offsets: list[int | None] = []
+        for offset, record in itertools.islice(self._records(), _INFER_ROWS):
+            sample.append(record)
+            offsets.append(offset)
+
+        first_offset, last_offset = (offsets[0], offsets[-1]) if offsets else (None, None)
+        if len(sample) < _INFER_ROWS:
+            # the sample is the whole file
+            estimated_rows: int | None = len(sample)
+        elif first_offset is not None and last_offset is not None:
+            bytes_per_row = max(1, (last_offset - first_offset) // (len(sample) - 1))
+            estimated_rows = self._path.stat().st_size // bytes_per_row
+        else:
+            estimated_rows = None
+
+        table = self._table
+        if table is None:
+            table = self._infer_table(sample)
+
+        self._sampled = _Sample(table=table, estimated_rows=estimated_rows)
+        return self._sampled
+
+    def _infer_table(self, sample: list[dict[str, typing.Any]], /) -> data.Table:
+        col_names: dict[str, None] = {}
+        for record in sample:
+            col_names.update(dict.fromkeys(record))
+
+        missing_pk_cols = [col for col in self._pk_cols if col not in col_names]
+        if missing_pk_cols:
+            raise ValueError(
+                f"The pk columns, {', '.join(missing_pk_cols)}, are not in {self._path!s}."
+            )
+
+        return data.Table(
+            db_name=self._db_name,
+            schema_name=self._schema_name,
+            table_name=self._table_name,
+            pk=self._pk_cols,
+            columns=frozenset(
+                _infer_column(
+                    col_name,
+                    values=[record.get(col_name) for record in sample],
+                    is_pk=col_name in self._pk_cols,
+                )
+                for col_name in col_names
+            ),
+        )
+
+    def _lookup(self, table: data.Table, /, *, keys: set[data.RowKey]) -> list[int]:
+        key_texts = [_key_text(key, table=table) for key in keys]
+
+        offsets: list[int] = []
+        with contextlib.closing(sqlite3.connect(self._index_path)) as con:
+            for i in range(0, len(key_texts), _LOOKUP_BATCH_SIZE):
+                batch = key_texts[i : i + _LOOKUP_BATCH_SIZE]
+                offsets.extend(
+                    offset
+                    for (offset,) in con.execute(
+                        f"SELECT offset FROM key WHERE key IN ({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+
+        return offsets
+
+    @contextlib.contextmanager
+    def _mmap(self) -> typing.Generator[mmap.mmap, None, None]:
+        with self._path.open("rb") as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def _records(self) -> typing.Iterator[tuple[int | None, dict[str, typing.Any]]]:
+        """Each record in the file, as written, with its offset if the file is uncompressed."""
+        if self._export.compression is None:
+            # an empty file can't be mapped, and has no records anyway
+            if self._path.stat().st_size == 0:
+                return
+
+            with self._mmap() as mm:
+                header = _header(mm, file_format=self._export.format)
+                start = sum(len(line.encode("utf-8")) for line in header)
+                mm.seek(start)
+                lines = _MmapLines(mm)
+                for record in flat_file.read_records(
+                    itertools.chain(header, lines), file_format=self._export.format
+                ):
+                    yield start, record
+                    start = lines.pos
+        else:
+            with self._path.open("rb", buffering=flat_file.BUFFER_BYTES) as raw:
+                with flat_file.text_reader(raw, compression=self._export.compression) as text:
+                    for record in flat_file.read_records(text, file_format=self._export.format):
+                        yield None, record
+
+    def _rows(
+        self,
+        table: data.Table,
+        /,
+        *,
+        col_names: typing.Iterable[str] | None,
+        after: dict[str, typing.Any],
+    ) -> typing.Iterator[data.Row]:
+        cols = _col_names(table, col_names=col_names)
+        if after:
+            parse_cols = tuple(sorted({*cols, *after}))
+        else:
+            parse_cols = cols
+
+        for _, record in self._records():
+            row = _row(record, table=table, col_names=parse_cols)
+            if flat_file.is_after(row, after=after):
+                if parse_cols != cols:
+                    row = {col: row[col] for col in cols}
+                yield row
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class _Sample:
+    table: data.Table
+    estimated_rows: int | None
+
+
+class _MmapLines:
+    """Iterates over the lines of mm from its current position, decoded, and keeps track of the
+    offset just past the last line read.
+    """
+
+    def __init__(self, mm: mmap.mmap, /):
+        self._mm: typing.Final[mmap.mmap] = mm
+        self.pos = mm.tell()
+
+    def __iter__(self) -> _MmapLines:
+        return self
+
+    def __next__(self) -> str:
+        line = self._mm.readline()
+        if not line:
+            raise StopIteration
+
+        self.pos += len(line)
+        return line.decode("utf-8")
+
+
+def _col_names(
+    table: data.Table, /, *, col_names: typing.Iterable[str] | None
+) -> tuple[str, ...]:
+    if col_names:
+        return tuple(sorted(set(col_names)))
+
+    return tuple(sorted(c.name for c in table.columns))
+
+
+def _header(mm: mmap.mmap, /, *, file_format: flat_file.Format) -> list[str]:
+    """The lines before the first record, which is the header of a CSV file."""
+    if file_format != "csv":
+        return []
+
+    end = mm.find(b"\n")
+    if end == -1:
+        end = len(mm) - 1
+
+    return [mm[: end + 1].decode("utf-8")]
+
+
+def _infer_column(name: str, /, *, values: list[typing.Any], is_pk: bool) -> data.Column:
+    texts = [flat_file.to_text(value) for value in values if value is not None and value != ""]
+
+    # a column that's all NULL in the sample could hold anything
+    if texts:
+        data_type = next(
+            data_type
+            for data_type, matches in _TYPE_CHECKS
+            if all(matches(text) for text in texts)
+        )
+    else:
+        data_type = data.DataType.Text
+
+    precision: int | None = None
+    scale: int | None = None
+    if data_type == data.DataType.Decimal:
+        scale = max(len(text.partition(".")[2]) for text in texts)
+        int_digits = max(len(text.lstrip("-").partition(".")[0]) for text in texts)
+        # rows past the sample could have larger values, so there's room to spare
+        precision = max(18, int_digits + scale)
+
+    return data.Column(
+        name=name,
+        data_type=data_type,
+        # rows past the sample could be NULL, so only the key can be assumed not to be
+        nullable=not is_pk,
+        length=None,
+        precision=precision,
+        scale=scale,
+    )
+
+
+def _is_timestamp(text: str, /, *, tz: bool) -> bool:
+    if not _DATE_PATTERN.match(text) or len(text) <= 10:
+        return False
+
+    try:
+        return (datetime.datetime.fromisoformat(text).tzinfo is not None) == tz
+    except ValueError:
+        return False
+
+
+def _is_date(text: str, /) -> bool:
+    if not _DATE_PATTERN.fullmatch(text):
+        return False
+
+    try:
+        datetime.date.fromisoformat(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_float(text: str, /) -> bool:
+    try:
+        float(text)
+        return text.strip() == text and "_" not in text
+    except ValueError:
+        return False
+
+
+def _key_text(values: typing.Mapping[str, typing.Any], /, *, table: data.Table) -> str:
+    """A key as the index stores it, so 1 in the file and a key of Decimal(1) are the same."""
+    types = {c.name: c.data_type for c in table.columns}
+    return json.dumps(
+        [
+            flat_file.to_text(flat_file.parse(values[col], data_type=types[col]))
+            for col in table.pk
+        ]
+    )
+
+
+def _row(
+    record: dict[str, typing.Any],
+    /,
+    *,
+    table: data.Table,
+    col_names: tuple[str, ...],
+) -> data.Row:
+    types = {c.name: c.data_type for c in table.columns}
+    return {col: flat_file.parse(record.get(col), data_type=types[col]) for col in col_names}
+
+
+# the types a column is tried as, in order, and the first that every sampled value fits is used
+_TYPE_CHECKS: typing.Final[tuple[tuple[data.DataType, typing.Callable[[str], bool]], ...]] = (
+    (data.DataType.Bool, lambda text: text in ("true", "false")),
+    (
+        data.DataType.Int,
+        lambda text: bool(_INT_PATTERN.fullmatch(text)) and -(2**31) <= int(text) < 2**31,
+    ),
+    (
+        data.DataType.BigInt,
+        lambda text: bool(_INT_PATTERN.fullmatch(text)) and -(2**63) <= int(text) < 2**63,
+    ),
+    (
+        data.DataType.Decimal,
+        lambda text: bool(_INT_PATTERN.fullmatch(text) or _DECIMAL_PATTERN.fullmatch(text)),
+    ),
+    (data.DataType.BigFloat, _is_float),
+    (data.DataType.Date, _is_date),
+    (data.DataType.Timestamp, lambda text: _is_timestamp(text, tz=False)),
+    (data.DataType.TimestampTZ, lambda text: _is_timestamp(text, tz=True)),
+    (data.DataType.UUID, lambda text: bool(_UUID_PATTERN.fullmatch(text))),
+    (data.DataType.Text, lambda text: True),
+)
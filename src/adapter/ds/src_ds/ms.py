@@ -7,6 +7,7 @@ import itertools
 import pyodbc
 
 from src import data
+from src.adapter.ds import shared
 from src.adapter.ds.src_ds.odbc import OdbcSrcDs
 
 __all__ = ("MSSrcDs",)
@@ -47,16 +48,29 @@ class MSSrcDs(OdbcSrcDs):
         )
         return dataclasses.replace(table_def, pk=self._pk_cols, columns=frozenset(col_defs))
 
+    def get_table_stats(self) -> data.TableStats:
+        # the heap or clustered index has one row count per partition, kept current without a scan
+        estimated_rows = self._cur.execute(
+            """
+            SELECT sum(p.rows) AS estimated_rows
+            FROM sys.partitions AS p
+            WHERE
+                p.object_id = OBJECT_ID(?)
+                AND p.index_id IN (0, 1)
+            """,
+            [self._full_table_name],
+        ).fetchval()
+
+        return data.TableStats(
+            estimated_rows=None if estimated_rows is None else int(estimated_rows),
+        )
+
     def fetch_rows_by_key(self, *, col_names: set[str] | None, keys: set[data.RowKey]) -> list[data.Row]:
         if keys:
             if col_names:
-                cols = sorted(col_names)
+                cols = tuple(sorted(col_names))
             else:
-                cols = sorted(c.name for c in self.get_table().columns)
-
-            sql = "SELECT\n  "
-            sql += "\n, ".join(_wrap_col_name_w_alias(col) for col in cols)
-            sql += f"\nFROM {self._full_table_name}"
+                cols = tuple(sorted(c.name for c in self.get_table().columns))
 
             if len(self.get_table().pk) > 1:
                 raise NotImplementedError("MSSrcDs can only handle single-field primary keys.")
@@ -72,8 +86,18 @@ class MSSrcDs(OdbcSrcDs):
                 param_groups.append(param_group)
 
             for param_group in param_groups:
-                where_clause = f"\nWHERE\n  {self._wrapper(key_col)} IN ({', '.join('?' for _ in param_group)});"
-                self._cur.execute(sql + where_clause, param_group)
+                plan_key = ("fetch_rows_by_key", cols, key_col, len(param_group))
+                plan = self._plans.get(plan_key)
+                if plan is None:
+                    sql = "SELECT\n  "
+                    sql += "\n, ".join(_wrap_col_name_w_alias(col) for col in cols)
+                    sql += f"\nFROM {self._full_table_name}"
+                    sql += f"\nWHERE\n  {self._wrapper(key_col)} IN ({', '.join('?' for _ in param_group)});"
+
+                    plan = shared.SqlPlan(sql=sql, col_names=cols, param_names=(key_col,))
+                    self._plans[plan_key] = plan
+
+                self._cur.execute(plan.sql, param_group)
                 rows += [dict(zip(cols, row)) for row in self._cur.fetchall()]
 
             return rows
@@ -45,70 +45,63 @@ class OdbcSrcDs(data.SrcDs):
 
         self._table: data.Table | None = None
 
+        # pyodbc only reuses its prepared statement when it sees the same sql again, so the sql
+        # for each shape of query is built once and reused for every batch
+        self._plans: dict[tuple[typing.Hashable, ...], shared.SqlPlan] = {}
+
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[list[data.Row]]:
+        full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+        plan = self._fetch_rows_plan(col_names=col_names, full_after=full_after)
+
+        self._execute(sql=typing.cast(str, plan.sql), params=plan.params(full_after))
+
+        return self._iter_batches(col_names=plan.col_names, batch_size=batch_size)
+
     def fetch_rows(
         self, *, col_names: set[str] | None, after: dict[str, typing.Hashable] | None
     ) -> list[data.Row]:
-        if col_names:
-            cols = sorted(col_names)
-        else:
-            cols = sorted({c.name for c in self.get_table().columns})
-
         full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
 
-        sorted_after: list[tuple[str, typing.Hashable]] = []
-        params: list[typing.Hashable] | None = None
-        if full_after:
-            sorted_after = sorted((key, val) for key, val in full_after.items() if val is not None)
-            params = [itm[1] for itm in sorted_after]
+        plan = self._fetch_rows_plan(col_names=col_names, full_after=full_after)
 
-        sql = "SELECT "
-        sql += ", ".join(
-            _wrap_col_name_w_alias(wrapper=self._wrapper, col_name=col) for col in cols
-        )
-        sql += f" FROM {self._full_table_name}"
-        if sorted_after:
-            sql += " WHERE " + " OR ".join(f"{self._wrapper(key)} > ?" for key, val in sorted_after)
+        self._execute(sql=typing.cast(str, plan.sql), params=plan.params(full_after))
 
-        if params:
-            try:
-                self._cur.execute(sql, params)
-            except Exception as e:
-                logger.error(
-                    f"An error occurred while running {sql!r}, params: {params!r}: {e!s}\n{traceback.format_exc()}"
-                )
-                raise
-            self._cur.execute(sql, params)
-        else:
-            try:
-                self._cur.execute(sql)
-            except Exception as e:
-                logger.error(
-                    f"An error occurred while running {sql!r}: {e!s}\n{traceback.format_exc()}"
-                )
-                raise
-
-        return [dict(zip(cols, row)) for row in self._cur.fetchall()]
+        return [dict(zip(plan.col_names, row)) for row in self._cur.fetchall()]
 
     def fetch_rows_by_key(
         self, *, col_names: set[str] | None, keys: set[data.RowKey]
     ) -> list[data.Row]:
         if keys:
             if col_names:
-                cols = sorted(col_names)
+                cols = tuple(sorted(col_names))
             else:
-                cols = sorted(c.name for c in self.get_table().columns)
+                cols = tuple(sorted(c.name for c in self.get_table().columns))
 
-            sql = "SELECT "
-            sql += ", ".join(
-                _wrap_col_name_w_alias(wrapper=self._wrapper, col_name=col) for col in cols
-            )
-            sql += f" FROM {self._full_table_name}"
+            key_cols = tuple(sorted(next(itertools.islice(keys, 1)).keys()))
 
-            sql += " WHERE "
-            key_cols = sorted(next(itertools.islice(keys, 1)).keys())
-            sql += " AND ".join(f"{self._wrapper(key_col)} = ?" for key_col in key_cols)
+            plan_key = ("fetch_rows_by_key", cols, key_cols)
+            plan = self._plans.get(plan_key)
+            if plan is None:
+                sql = "SELECT "
+                sql += ", ".join(
+                    _wrap_col_name_w_alias(wrapper=self._wrapper, col_name=col) for col in cols
+                )
+                sql += f" FROM {self._full_table_name}"
+                sql += " WHERE "
+                sql += " AND ".join(f"{self._wrapper(key_col)} = ?" for key_col in key_cols)
 
-            params = (tuple(row[key_col] for key_col in key_cols) for row in keys)
+                plan = shared.SqlPlan(sql=sql, col_names=cols, param_names=key_cols)
+                self._plans[plan_key] = plan
+
+            sql = typing.cast(str, plan.sql)
+            params = (plan.params(key) for key in keys)
 
             self._cur.executemany(sql, params)
             return [dict(zip(cols, row)) for row in self._cur.fetchall()]
@@ -179,12 +172,67 @@ class OdbcSrcDs(data.SrcDs):
 
         return table
 
+    def get_table_stats(self) -> data.TableStats:
+        # plain ODBC has no catalog statistics to go on
+        return data.TableStats(estimated_rows=None)
+
     def table_exists(self) -> bool:
         table_exists = bool(
             self._cur.tables(table=self._table_name, schema=self._schema_name).fetchone()
         )
         return table_exists
 
+    def _execute(self, *, sql: str, params: list[typing.Any]) -> None:
+        try:
+            if params:
+                self._cur.execute(sql, params)
+            else:
+                self._cur.execute(sql)
+        except Exception as e:
+            logger.error(
+                f"An error occurred while running {sql!r}, params: {params!r}: {e!s}\n"
+                f"{traceback.format_exc()}"
+            )
+            raise
+
+    def _fetch_rows_plan(
+        self,
+        *,
+        col_names: set[str] | None,
+        full_after: dict[str, typing.Hashable],
+    ) -> shared.SqlPlan:
+        if col_names:
+            cols = tuple(sorted(col_names))
+        else:
+            cols = tuple(sorted({c.name for c in self.get_table().columns}))
+
+        after_cols = tuple(sorted(key for key, val in full_after.items() if val is not None))
+
+        plan_key = ("fetch_rows", cols, after_cols)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            sql = "SELECT "
+            sql += ", ".join(
+                _wrap_col_name_w_alias(wrapper=self._wrapper, col_name=col) for col in cols
+            )
+            sql += f" FROM {self._full_table_name}"
+            if after_cols:
+                sql += " WHERE " + " OR ".join(f"{self._wrapper(key)} > ?" for key in after_cols)
+
+            plan = shared.SqlPlan(sql=sql, col_names=cols, param_names=after_cols)
+            self._plans[plan_key] = plan
+
+        return plan
+
+    def _iter_batches(
+        self,
+        *,
+        col_names: tuple[str, ...],
+        batch_size: int,
+    ) -> typing.Iterator[list[data.Row]]:
+        while rows := self._cur.fetchmany(batch_size):
+            yield [dict(zip(col_names, row)) for row in rows]
+
 
 def _get_data_type(row: pyodbc.Row, /) -> data.DataType:
     if row.type_name == "bool":
@@ -31,31 +31,36 @@ class PgSrcDs(data.SrcDs):
             self._full_table_name = _wrapper(table_name)
 
         self._table: data.Table | None = None
+        self._plans: dict[tuple[typing.Hashable, ...], shared.SqlPlan] = {}
 
-    def fetch_rows(
+    def fetch_row_batches(
         self,
         *,
         col_names: set[str] | None,
         after: dict[str, typing.Hashable] | None,
-    ) -> tuple[data.Row, ...] | data.Error:
-        if col_names:
-            cols = sorted(col_names)
-        else:
-            cols = sorted({c.name for c in self.get_table().columns})
+        batch_size: int,
+    ) -> typing.Iterator[tuple[data.Row, ...]] | data.Error:
+        full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+        plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after.keys()))
 
-        sql = "SELECT\n  "
-        sql += "\n, ".join(_wrap_col_name_w_alias(col_name=col) for col in cols)
-        sql += f"\nFROM {self._full_table_name}"
+        return self._cur.fetch_batches(
+            sql=plan.sql,
+            params=plan.params(full_after),
+            batch_size=batch_size,
+        )
 
+    def fetch_rows(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+    ) -> tuple[data.Row, ...] | data.Error:
         full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
 
-        if full_after:
-            sql += "\nWHERE\n  " + "\n  OR ".join(
-                f"{_wrapper(key)} > %s" for key in full_after.keys()
-            )
-            return self._cur.fetch_all(sql=sql, params=full_after.values())
-        else:
-            return self._cur.fetch_all(sql=sql, params=None)
+        plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after.keys()))
+
+        return self._cur.fetch_all(sql=plan.sql, params=plan.params(full_after), prepare=True)
 
     def fetch_rows_by_key(
         self,
@@ -73,17 +78,30 @@ class PgSrcDs(data.SrcDs):
 
                 cols = sorted({c.name for c in table.columns})
 
-            sql = _compose_fetch_rows_by_key_sql(
-                full_table_name=self._full_table_name,
-                cols=cols,
-                keys=tuple(keys),
-            )
-            if isinstance(sql, data.Error):
-                return sql
+            keys = tuple(keys)
+
+            plan_key = ("fetch_rows_by_key", tuple(cols), len(keys))
+            plan = self._plans.get(plan_key)
+            if plan is None:
+                sql = _compose_fetch_rows_by_key_sql(
+                    full_table_name=self._full_table_name,
+                    cols=cols,
+                    keys=keys,
+                )
+                if isinstance(sql, data.Error):
+                    return sql
+
+                plan = shared.SqlPlan(
+                    sql=sql,
+                    col_names=tuple(cols),
+                    param_names=tuple(keys[0].keys()),
+                )
+                self._plans[plan_key] = plan
 
             return self._cur.fetch_all(
-                sql=sql,
-                params=[val for key in keys for val in key.values()],
+                sql=plan.sql,
+                params=[val for key in keys for val in plan.params(key)],
+                prepare=True,
             )
 
         return tuple()
@@ -93,7 +111,7 @@ class PgSrcDs(data.SrcDs):
             sql = f"SELECT count(*) AS ct FROM {self._full_table_name}"
 
             if self._after:
-                sql += "WHERE " + " OR ".join(f"{_wrapper(key)} > %s" for key in self._after.keys())
+                sql += "\nWHERE " + " OR ".join(f"{_wrapper(key)} > %s" for key in self._after.keys())
 
                 row = self._cur.fetch_one(
                     sql=sql,
@@ -179,7 +197,7 @@ class PgSrcDs(data.SrcDs):
         if isinstance(pk, data.Error):
             return pk
 
-        return data.Table(
+        self._table = data.Table(
             db_name=self._db_name,
             schema_name=self._schema_name,
             table_name=self._table_name,
@@ -187,6 +205,40 @@ class PgSrcDs(data.SrcDs):
             columns=frozenset(cols),
         )
 
+        return self._table
+
+    def get_table_stats(self) -> data.TableStats | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql="""
+                    SELECT
+                        c.reltuples::BIGINT AS estimated_rows
+                    FROM pg_class AS c
+                    JOIN pg_namespace AS n
+                        ON c.relnamespace = n.oid
+                    WHERE
+                        n.nspname = %s
+                        AND c.relname = %s
+                """,
+                params=(self._schema_name, self._table_name),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.TableStats(estimated_rows=None)
+
+            # reltuples is -1 until the table has been vacuumed or analyzed
+            estimated_rows = typing.cast(int, row["estimated_rows"])
+
+            return data.TableStats(estimated_rows=estimated_rows if estimated_rows >= 0 else None)
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+            )
+
     def table_exists(self) -> bool | data.Error:
         try:
             result = self._cur.fetch_one(
@@ -217,6 +269,34 @@ class PgSrcDs(data.SrcDs):
         except Exception as e:
             return data.Error.new(str(e))
 
+    def _fetch_rows_plan(
+        self,
+        *,
+        col_names: set[str] | None,
+        after_cols: tuple[str, ...],
+    ) -> shared.SqlPlan:
+        if col_names:
+            cols = tuple(sorted(col_names))
+        else:
+            cols = tuple(sorted({c.name for c in self.get_table().columns}))
+
+        plan_key = ("fetch_rows", cols, after_cols)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            sql = "SELECT\n  "
+            sql += "\n, ".join(_wrap_col_name_w_alias(col_name=col) for col in cols)
+            sql += f"\nFROM {self._full_table_name}"
+
+            if after_cols:
+                sql += "\nWHERE\n  " + "\n  OR ".join(
+                    f"{_wrapper(key)} > %s" for key in after_cols
+                )
+
+            plan = shared.SqlPlan(sql=sql, col_names=cols, param_names=after_cols)
+            self._plans[plan_key] = plan
+
+        return plan
+
 
 def _get_pk_for_table(
     *,
@@ -286,7 +366,7 @@ def _lookup_data_type(type_name: str, /) -> data.DataType:
         "character": data.DataType.Text,
         "character varying": data.DataType.Text,
         "date": data.DataType.Date,
-        "double precision": data.DataType.BigInt,
+        "double precision": data.DataType.BigFloat,
         "integer": data.DataType.Int,
         "numeric": data.DataType.Decimal,
         "oid": data.DataType.Int,
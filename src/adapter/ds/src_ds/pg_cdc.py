@@ -0,0 +1,295 @@
+import datetime
+import decimal
+import hashlib
+import re
+import typing
+import uuid
+
+from src import data
+from src.adapter.ds.src_ds.pg import PgSrcDs
+
+__all__ = ("PgCdcSrcDs",)
+
+# test_decoding writes each column as name[type]:value, with the name quoted like an identifier,
+# and the value quoted like a literal when it's text-like
+_COLUMN_PATTERN: typing.Final[re.Pattern[str]] = re.compile(
+    r"(?P<marker>old-key:|new-tuple:)"
+    r"|(?P<name>\"(?:[^\"]|\"\")*\"|[^\[\s]+)\[(?P<type>[^\]]+)\]:(?P<value>'(?:[^']|'')*'|\S+)"
+)
+
+_INT_TYPES: typing.Final[frozenset[str]] = frozenset(("bigint", "integer", "oid", "smallint"))
+
+# the longest name pg allows, since names are truncated to NAMEDATALEN - 1 bytes
+_MAX_SLOT_NAME_LENGTH: typing.Final[int] = 63
+
+
+class PgCdcSrcDs(PgSrcDs, data.CdcSrcDs):
+    """A PgSrcDs that captures changes with a logical replication slot, decoded by test_decoding.
+
+    The slot keeps the WAL from the last confirmed watermark on, so changes are read with
+    pg_logical_slot_peek_changes, and only let go of with confirm once they have been applied.
+    Only the primary key of each changed row is decoded, since the row is fetched again anyway.
+
+    What has been consumed is only ever what the slot was advanced past.  Changes are decoded in
+    commit order, and a change's own LSN can be from before a watermark its transaction committed
+    after, so they are never filtered by LSN.
+
+    Each consumer, which is the dst table the changes are applied to, gets a slot of its own, since
+    advancing a slot lets go of its changes for everyone reading it.
+    """
+
+    def __init__(
+        self,
+        *,
+        cur: data.Cursor,
+        db_name: str,
+        schema_name: str,
+        table_name: str,
+        after: dict[str, datetime.date],
+        consumer: str,
+    ):
+        super().__init__(
+            cur=cur,
+            db_name=db_name,
+            schema_name=schema_name,
+            table_name=table_name,
+            after=after,
+        )
+
+        self._slot_name: typing.Final[str] = _slot_name(
+            schema_name=schema_name, table_name=table_name, consumer=consumer
+        )
+
+    def start_capture(self) -> bool | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql="""
+                    SELECT
+                        count(*) AS ct
+                    FROM pg_replication_slots AS s
+                    WHERE
+                        s.slot_name = %s
+                        AND s.database = current_database()
+                """,
+                params=(self._slot_name,),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is not None and typing.cast(int, row["ct"]) > 0:
+                return False
+
+            result = self._cur.execute(
+                sql="SELECT pg_create_logical_replication_slot(%s, 'test_decoding')",
+                params=(self._slot_name,),
+            )
+            if isinstance(result, data.Error):
+                return result
+
+            return True
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                slot_name=self._slot_name,
+            )
+
+    def current_watermark(self) -> str | None | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql="SELECT pg_current_wal_lsn()::TEXT AS lsn",
+                params=None,
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return None
+
+            return typing.cast(str, row["lsn"])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                slot_name=self._slot_name,
+            )
+
+    def fetch_changes(self, *, after: str | None, limit: int) -> data.ChangeBatch | data.Error:
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            # the slot is shared by every table in the database, so the last row, which has a
+            # NULL data, says how far the batch got, including other tables' changes.  Peeking
+            # starts where the slot was last advanced to, and stops at the end of a transaction,
+            # whose COMMIT row's LSN is the end of its commit record, so that's what the slot is
+            # advanced to once the batch has been applied.
+            rows = self._cur.fetch_all(
+                sql="""
+                    WITH changes AS (
+                        SELECT
+                            c.lsn
+                        ,   c.data
+                        FROM pg_logical_slot_peek_changes(
+                            %s, NULL, %s, 'include-xids', '0', 'skip-empty-xacts', '1'
+                        ) AS c
+                    )
+                    SELECT
+                        c.lsn AS pos
+                    ,   c.lsn::TEXT AS lsn
+                    ,   c.data
+                    ,   NULL::BIGINT AS ct
+                    FROM changes AS c
+                    WHERE
+                        starts_with(
+                            c.data,
+                            format('table %%s.%%s: ', quote_ident(%s), quote_ident(%s))
+                        )
+                    UNION ALL
+                    SELECT
+                        max(c.lsn)
+                    ,   max(c.lsn)::TEXT
+                    ,   NULL
+                    ,   count(*)
+                    FROM changes AS c
+                    ORDER BY ct NULLS FIRST, pos
+                """,
+                params=(
+                    self._slot_name,
+                    limit,
+                    self._schema_name,
+                    self._table_name,
+                ),
+            )
+            if isinstance(rows, data.Error):
+                return rows
+
+            *change_rows, last_row = rows
+
+            changes: list[data.RowChange] = []
+            for row in change_rows:
+                row_changes = _parse_change(typing.cast(str, row["data"]), pk=table.pk)
+                if isinstance(row_changes, data.Error):
+                    return row_changes
+
+                changes.extend(row_changes)
+
+            return data.ChangeBatch(
+                changes=tuple(changes),
+                watermark=typing.cast(str | None, last_row["lsn"]) or after,
+                more=typing.cast(int, last_row["ct"]) >= limit,
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                slot_name=self._slot_name,
+                after=after,
+            )
+
+    def confirm(self, *, watermark: str) -> None | data.Error:
+        try:
+            return self._cur.execute(
+                sql="SELECT pg_replication_slot_advance(%s, %s::pg_lsn)",
+                params=(self._slot_name, watermark),
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                slot_name=self._slot_name,
+                watermark=watermark,
+            )
+
+
+def _slot_name(*, schema_name: str, table_name: str, consumer: str) -> str:
+    # slot names are limited to lowercase letters, numbers, and underscores
+    name = re.sub(r"[^a-z0-9_]", "_", f"poa_{schema_name}_{table_name}_{consumer}".lower())
+    if len(name) <= _MAX_SLOT_NAME_LENGTH:
+        return name
+
+    # cut short, two names could be the same, so the end is swapped for a hash of the whole of it
+    digest = hashlib.blake2b(
+        f"{schema_name}.{table_name}.{consumer}".encode(), digest_size=4
+    ).hexdigest()
+    return f"{name[: _MAX_SLOT_NAME_LENGTH - len(digest) - 1]}_{digest}"
+
+
+def _parse_change(
+    line: str,
+    /,
+    *,
+    pk: tuple[str, ...],
+) -> tuple[data.RowChange, ...] | data.Error:
+    # each line looks like, table public.customer: UPDATE: id[integer]:1 name[text]:'Bob'
+    _, _, rest = line.partition(": ")
+    op_name, _, tuple_data = rest.partition(": ")
+
+    op = typing.cast(
+        typing.Literal["insert", "update", "delete"] | None,
+        {"INSERT": "insert", "UPDATE": "update", "DELETE": "delete"}.get(op_name),
+    )
+    if op is None:
+        # TRUNCATE, which can't be applied key by key
+        return data.Error.new(f"Unsupported change: {line}")
+
+    if tuple_data.startswith("(no-tuple-data)"):
+        return data.Error.new(
+            "The change has no key, so the table needs a primary key or REPLICA IDENTITY.",
+            line=line,
+        )
+
+    old_key: dict[str, typing.Hashable] = {}
+    new_key: dict[str, typing.Hashable] = {}
+    key = new_key
+    for match in _COLUMN_PATTERN.finditer(tuple_data):
+        if match["marker"] == "old-key:":
+            key = old_key
+        elif match["marker"] == "new-tuple:":
+            key = new_key
+        else:
+            name = match["name"]
+            if name.startswith('"'):
+                name = name[1:-1].replace('""', '"')
+
+            if name in pk:
+                key[name] = _parse_value(match["value"], type_name=match["type"])
+
+    if set(new_key.keys()) != set(pk):
+        return data.Error.new(f"The change is missing part of the primary key: {line}", pk=pk)
+
+    # an update that changed the key removes the old row
+    if old_key and old_key != new_key:
+        return (
+            data.RowChange(op="delete", key=data.FrozenDict(old_key)),
+            data.RowChange(op="insert", key=data.FrozenDict(new_key)),
+        )
+
+    return (data.RowChange(op=op, key=data.FrozenDict(new_key)),)
+
+
+def _parse_value(value: str, /, *, type_name: str) -> typing.Hashable:
+    if value == "null":
+        return None
+
+    if value.startswith("'"):
+        value = value[1:-1].replace("''", "'")
+
+    if type_name in _INT_TYPES:
+        return int(value)
+    if type_name == "numeric":
+        return decimal.Decimal(value)
+    if type_name == "boolean":
+        return value == "true"
+    if type_name == "date":
+        return datetime.date.fromisoformat(value)
+    if type_name.startswith("timestamp"):
+        return datetime.datetime.fromisoformat(value)
+    if type_name == "uuid":
+        return uuid.UUID(value)
+    return value
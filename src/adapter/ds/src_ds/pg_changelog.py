@@ -0,0 +1,415 @@
+import datetime
+import re
+import typing
+
+from psycopg import sql
+
+from src import data
+from src.adapter.ds.src_ds.pg import PgSrcDs
+
+__all__ = ("PgChangelogSrcDs",)
+
+_OPS: typing.Final[dict[str, typing.Literal["insert", "update", "delete"]]] = {
+    "I": "insert",
+    "U": "update",
+    "D": "delete",
+}
+
+
+class PgChangelogSrcDs(PgSrcDs, data.CdcSrcDs):
+    """A PgSrcDs that captures changes with triggers, for databases that don't allow replication
+    slots.
+
+    start_capture installs statement-level triggers on the table, which write the key of each row
+    changed by a statement, read from its transition tables, to a poa_changelog table in the same
+    schema.  Changes are drained from it oldest first, and deleted once they have been applied.
+
+    Each consumer, which is the dst table the changes are applied to, is registered in
+    poa_changelog_consumer, and every change is logged once per consumer, so a consumer only ever
+    drains, and deletes, its own copy.
+
+    The triggers are installed through a connection of their own from cursor_provider, since
+    writes are only logged once they're committed, and cur's transaction is the one the table is
+    read in.
+    """
+
+    def __init__(
+        self,
+        *,
+        cur: data.Cursor,
+        cursor_provider: data.CursorProvider,
+        db_name: str,
+        schema_name: str,
+        table_name: str,
+        after: dict[str, datetime.date],
+        consumer: str,
+    ):
+        super().__init__(
+            cur=cur,
+            db_name=db_name,
+            schema_name=schema_name,
+            table_name=table_name,
+            after=after,
+        )
+
+        self._cursor_provider: typing.Final[data.CursorProvider] = cursor_provider
+        self._consumer: typing.Final[str] = consumer
+
+        self._changelog_name: typing.Final[sql.Identifier] = sql.Identifier(
+            schema_name, "poa_changelog"
+        )
+        self._consumer_table_name: typing.Final[sql.Identifier] = sql.Identifier(
+            schema_name, "poa_changelog_consumer"
+        )
+        self._function_name: typing.Final[sql.Identifier] = sql.Identifier(
+            schema_name,
+            re.sub(r"[^a-z0-9_]", "_", f"poa_changelog_{table_name}".lower())[:63],
+        )
+        self._table_identifier: typing.Final[sql.Identifier] = sql.Identifier(
+            schema_name, table_name
+        )
+
+    def start_capture(self) -> bool | data.Error:
+        try:
+            # the provider commits once the block exits, which lets go of the lock CREATE TRIGGER
+            # took, and it rolls back when it's left by an error, so a half installed capture
+            # isn't kept
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                started = self._start_capture(cur=cur)
+                if isinstance(started, data.Error):
+                    raise started
+
+                return started
+        except data.Error as e:
+            return e
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                consumer=self._consumer,
+            )
+
+    def current_watermark(self) -> str | None | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql=sql.SQL(
+                    """
+                    WITH snapshot AS (
+                        SELECT txid_snapshot_xmin(txid_current_snapshot()) AS xmin
+                    )
+                    SELECT
+                        coalesce(max(c.change_id), 0) AS change_id
+                    ,   s.xmin
+                    FROM snapshot AS s
+                    LEFT JOIN {changelog} AS c
+                        ON c.table_name = %s
+                        AND c.consumer = %s
+                        AND c.xid < s.xmin
+                    GROUP BY
+                        s.xmin
+                    """
+                ).format(changelog=self._changelog_name),
+                params=(self._table_name, self._consumer),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return None
+
+            return f"{row['change_id']}:{row['xmin']}"
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                consumer=self._consumer,
+            )
+
+    def fetch_changes(self, *, after: str | None, limit: int) -> data.ChangeBatch | data.Error:
+        """Drains the oldest changes left in the changelog for this consumer.  after isn't needed,
+        since changes are deleted once they have been applied.
+
+        A change_id is taken when a row is logged, not when its transaction commits, so a change
+        from a transaction that is still running can have a lower change_id than ones that are
+        already visible.  Only changes from transactions older than any that are still running
+        are drained, and the watermark says which those were, as last_change_id:xmin.
+        """
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            qry = sql.SQL(
+                """
+                WITH snapshot AS (
+                    SELECT txid_snapshot_xmin(txid_current_snapshot()) AS xmin
+                )
+                , batch AS (
+                    SELECT
+                        c.change_id
+                    ,   c.op
+                    ,   c.key
+                    FROM {changelog} AS c
+                    CROSS JOIN snapshot AS s
+                    WHERE
+                        c.table_name = %s
+                        AND c.consumer = %s
+                        AND c.xid < s.xmin
+                    ORDER BY
+                        c.change_id
+                    LIMIT %s
+                )
+                SELECT
+                    b.change_id
+                ,   b.op
+                ,   {pk_cols}
+                ,   s.xmin
+                FROM batch AS b
+                CROSS JOIN snapshot AS s
+                CROSS JOIN LATERAL jsonb_populate_record(NULL::{table}, b.key) AS r
+                ORDER BY
+                    b.change_id
+                """
+            ).format(
+                changelog=self._changelog_name,
+                pk_cols=sql.SQL(", ").join(
+                    sql.SQL("r.{col} AS {alias}").format(
+                        col=sql.Identifier(col),
+                        alias=sql.Identifier(f"pk_{i}"),
+                    )
+                    for i, col in enumerate(table.pk)
+                ),
+                table=self._table_identifier,
+            )
+
+            rows = self._cur.fetch_all(sql=qry, params=(self._table_name, self._consumer, limit))
+            if isinstance(rows, data.Error):
+                return rows
+
+            if not rows:
+                return data.ChangeBatch(changes=(), watermark=None, more=False)
+
+            changes = tuple(
+                data.RowChange(
+                    op=_OPS[typing.cast(str, row["op"])],
+                    key=data.FrozenDict(
+                        {col: row[f"pk_{i}"] for i, col in enumerate(table.pk)}
+                    ),
+                )
+                for row in rows
+            )
+
+            return data.ChangeBatch(
+                changes=changes,
+                watermark=f"{rows[-1]['change_id']}:{rows[-1]['xmin']}",
+                more=len(rows) >= limit,
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                consumer=self._consumer,
+                after=after,
+            )
+
+    def confirm(self, *, watermark: str) -> None | data.Error:
+        try:
+            last_change_id, _, xmin = watermark.partition(":")
+
+            return self._cur.execute(
+                sql=sql.SQL(
+                    """
+                    DELETE FROM {changelog} AS c
+                    WHERE
+                        c.table_name = %s
+                        AND c.consumer = %s
+                        AND c.change_id <= %s
+                        AND c.xid < %s
+                    """
+                ).format(changelog=self._changelog_name),
+                params=(self._table_name, self._consumer, int(last_change_id), int(xmin)),
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                consumer=self._consumer,
+                watermark=watermark,
+            )
+
+    def _start_capture(self, *, cur: data.Cursor) -> bool | data.Error:
+        row = cur.fetch_one(
+            sql="""
+                SELECT
+                    count(*) AS ct
+                FROM pg_trigger AS t
+                JOIN pg_class AS c
+                    ON t.tgrelid = c.oid
+                JOIN pg_namespace AS n
+                    ON c.relnamespace = n.oid
+                WHERE
+                    n.nspname = %s
+                    AND c.relname = %s
+                    AND t.tgname LIKE 'poa\\_changelog\\_%%'
+            """,
+            params=(self._schema_name, self._table_name),
+        )
+        if isinstance(row, data.Error):
+            return row
+
+        installed = row is None or typing.cast(int, row["ct"]) != 3
+        if installed:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            for qry in self._install_sql(pk=table.pk):
+                result = cur.execute(sql=qry, params=None)
+                if isinstance(result, data.Error):
+                    return result
+
+        # a consumer that is new to the table has nothing logged for it from before now, even
+        # when the triggers were installed for another one
+        registered = cur.fetch_all(
+            sql=sql.SQL(
+                """
+                INSERT INTO {consumer_table} (table_name, consumer)
+                VALUES (%s, %s)
+                ON CONFLICT DO NOTHING
+                RETURNING 1 AS registered
+                """
+            ).format(consumer_table=self._consumer_table_name),
+            params=(self._table_name, self._consumer),
+        )
+        if isinstance(registered, data.Error):
+            return registered
+
+        return installed or len(registered) > 0
+
+    def _install_sql(self, *, pk: tuple[str, ...]) -> tuple[sql.Composed, ...]:
+        def key_json(alias: str, /) -> sql.Composed:
+            return sql.SQL("jsonb_build_object({})").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{name}, {alias}.{col}").format(
+                        name=sql.Literal(col),
+                        alias=sql.Identifier(alias),
+                        col=sql.Identifier(col),
+                    )
+                    for col in pk
+                )
+            )
+
+        create_changelog = sql.SQL(
+            """
+            CREATE TABLE IF NOT EXISTS {changelog} (
+                change_id BIGSERIAL PRIMARY KEY
+            ,   table_name TEXT NOT NULL
+            ,   consumer TEXT NOT NULL
+            ,   op CHAR(1) NOT NULL CHECK (op IN ('I', 'U', 'D'))
+            ,   key JSONB NOT NULL
+            ,   xid BIGINT NOT NULL DEFAULT txid_current()
+            )
+            """
+        ).format(changelog=self._changelog_name)
+
+        create_index = sql.SQL(
+            "CREATE INDEX IF NOT EXISTS ix_poa_changelog_table_name_consumer "
+            "ON {changelog} (table_name, consumer, change_id)"
+        ).format(changelog=self._changelog_name)
+
+        create_consumer_table = sql.SQL(
+            """
+            CREATE TABLE IF NOT EXISTS {consumer_table} (
+                table_name TEXT NOT NULL
+            ,   consumer TEXT NOT NULL
+            ,   PRIMARY KEY (table_name, consumer)
+            )
+            """
+        ).format(consumer_table=self._consumer_table_name)
+
+        # an update logs the old key as well as the new one, so a row whose key changed is found
+        # to be missing when it's fetched again, and is deleted.  Each change is logged once for
+        # every consumer of the table.
+        create_function = sql.SQL(
+            """
+            CREATE OR REPLACE FUNCTION {function}()
+            RETURNS TRIGGER
+            LANGUAGE plpgsql
+            AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO {changelog} (table_name, consumer, op, key)
+                    SELECT {table_name}, t.consumer, 'I', {new_key}
+                    FROM poa_new_rows AS n
+                    JOIN {consumer_table} AS t
+                        ON t.table_name = {table_name};
+                ELSIF TG_OP = 'UPDATE' THEN
+                    INSERT INTO {changelog} (table_name, consumer, op, key)
+                    SELECT {table_name}, t.consumer, 'U', k.key
+                    FROM (
+                        SELECT {new_key} AS key FROM poa_new_rows AS n
+                        UNION
+                        SELECT {old_key} AS key FROM poa_old_rows AS o
+                    ) AS k
+                    JOIN {consumer_table} AS t
+                        ON t.table_name = {table_name};
+                ELSE
+                    INSERT INTO {changelog} (table_name, consumer, op, key)
+                    SELECT {table_name}, t.consumer, 'D', {old_key}
+                    FROM poa_old_rows AS o
+                    JOIN {consumer_table} AS t
+                        ON t.table_name = {table_name};
+                END IF;
+
+                RETURN NULL;
+            END;
+            $$
+            """
+        ).format(
+            function=self._function_name,
+            changelog=self._changelog_name,
+            consumer_table=self._consumer_table_name,
+            table_name=sql.Literal(self._table_name),
+            new_key=key_json("n"),
+            old_key=key_json("o"),
+        )
+
+        # replaced rather than dropped first, since CREATE OR REPLACE TRIGGER doesn't need the
+        # ACCESS EXCLUSIVE lock DROP TRIGGER does, which would wait on any open read of the table
+        create_triggers = tuple(
+            sql.SQL(
+                """
+                CREATE OR REPLACE TRIGGER {trigger}
+                AFTER {event} ON {table}
+                REFERENCING {transition_tables}
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION {function}()
+                """
+            ).format(
+                trigger=sql.Identifier(f"poa_changelog_{event.lower()}"),
+                event=sql.SQL(event),
+                table=self._table_identifier,
+                transition_tables=sql.SQL(transition_tables),
+                function=self._function_name,
+            )
+            for event, transition_tables in (
+                ("INSERT", "NEW TABLE AS poa_new_rows"),
+                ("UPDATE", "OLD TABLE AS poa_old_rows NEW TABLE AS poa_new_rows"),
+                ("DELETE", "OLD TABLE AS poa_old_rows"),
+            )
+        )
+
+        return (
+            create_changelog,
+            create_index,
+            create_consumer_table,
+            create_function,
+            *create_triggers,
+        )
@@ -0,0 +1,170 @@
+import typing
+
+from psycopg import sql
+
+from src import data
+from src.adapter.ds.src_ds.pg import PgSrcDs
+
+__all__ = ("PgXminSrcDs",)
+
+# xmin is a 32-bit transaction id, which wraps around, so it's compared as an offset back from
+# the newest transaction id, which carries the epoch
+_XID_MASK: typing.Final[int] = 2**32 - 1
+
+# rows older than this may have had their xmin frozen and reused, so they can't be told apart
+# from new ones
+_MAX_XID_AGE: typing.Final[int] = 2**31
+
+
+class PgXminSrcDs(PgSrcDs, data.CdcSrcDs):
+    """A PgSrcDs that finds the rows written since the last sync by the transaction id that wrote
+    them, each row's xmin, so a table needs no column of its own for an incremental sync.
+
+    The watermark is the oldest transaction that was still running when src was last read, as a
+    64-bit id, so a transaction that committed after the read is still picked up next time.
+
+    Deletes leave no row behind, so they aren't captured, and a table that has them still needs
+    the occasional --compare or full sync.
+    """
+
+    def start_capture(self) -> bool | data.Error:
+        # every row already has an xmin, so there's nothing to start
+        return False
+
+    def current_watermark(self) -> str | None | data.Error:
+        xids = self._xids()
+        if isinstance(xids, data.Error):
+            return xids
+
+        return str(xids[0])
+
+    def fetch_changes(self, *, after: str | None, limit: int) -> data.ChangeBatch | data.Error:
+        """Every row written since after, however many there are, since rows can't be read in
+        transaction id order without sorting the table.
+        """
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            xids = self._xids()
+            if isinstance(xids, data.Error):
+                return xids
+
+            xmin, xmax = xids
+
+            if after is None:
+                return data.Error.new(
+                    "There is no watermark to compare xmin to, so the table needs a full sync.",
+                    schema_name=self._schema_name,
+                    table_name=self._table_name,
+                )
+
+            since = int(after)
+            if xmax - since >= _MAX_XID_AGE:
+                return data.Error.new(
+                    f"The watermark, {since}, is too many transactions old to compare to a row's "
+                    f"xmin, so the table needs a full sync.",
+                    schema_name=self._schema_name,
+                    table_name=self._table_name,
+                    xmax=xmax,
+                )
+
+            # xids 0, 1, and 2 are reserved, and 2 marks a row that was frozen before 9.4
+            qry = sql.SQL(
+                """
+                SELECT
+                    {pk_cols}
+                FROM {table} AS t
+                WHERE
+                    t.xmin::TEXT::BIGINT >= 3
+                    AND {full_xmin} >= %s
+                """
+            ).format(
+                pk_cols=sql.SQL(", ").join(
+                    sql.SQL("t.{col} AS {alias}").format(
+                        col=sql.Identifier(col),
+                        alias=sql.Identifier(f"pk_{i}"),
+                    )
+                    for i, col in enumerate(table.pk)
+                ),
+                table=sql.Identifier(self._schema_name, self._table_name),
+                full_xmin=_full_xid(
+                    xid=sql.SQL("t.xmin::TEXT::BIGINT"),
+                    xmax=sql.SQL("%s::BIGINT"),
+                ),
+            )
+
+            rows = self._cur.fetch_all(sql=qry, params=(xmax, xmax, since))
+            if isinstance(rows, data.Error):
+                return rows
+
+            return data.ChangeBatch(
+                changes=tuple(
+                    data.RowChange(
+                        op="update",
+                        key=data.FrozenDict(
+                            {col: row[f"pk_{i}"] for i, col in enumerate(table.pk)}
+                        ),
+                    )
+                    for row in rows
+                ),
+                watermark=str(xmin),
+                more=False,
+            )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                after=after,
+            )
+
+    def confirm(self, *, watermark: str) -> None | data.Error:
+        # the watermark is all there is to keep
+        return None
+
+    def _xids(self) -> tuple[int, int] | data.Error:
+        """The oldest transaction still running, and the next one to start, as 64-bit ids.
+
+        They're read before the table is, so a row written by a transaction that starts in between
+        comes out older than xmax, but it's found again next time, since it's newer than xmin.
+        """
+        try:
+            row = self._cur.fetch_one(
+                sql="""
+                    SELECT
+                        txid_snapshot_xmin(s.snapshot) AS xmin
+                    ,   txid_snapshot_xmax(s.snapshot) AS xmax
+                    FROM (SELECT txid_current_snapshot() AS snapshot) AS s
+                """,
+                params=None,
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow txid_current_snapshot() returned no rows.  That should be impossible.",
+                    schema_name=self._schema_name,
+                    table_name=self._table_name,
+                )
+
+            return typing.cast(int, row["xmin"]), typing.cast(int, row["xmax"])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+            )
+
+
+def _full_xid(*, xid: sql.Composable, xmax: sql.Composable) -> sql.Composed:
+    """A 32-bit xid as the 64-bit id it had, counting back from xmax, so one from before the last
+    wraparound comes out older than one from after it.
+    """
+    return sql.SQL("({xmax} - ((({xmax} & {mask}) - {xid}) & {mask}))").format(
+        xid=xid,
+        xmax=xmax,
+        mask=sql.Literal(_XID_MASK),
+    )
@@ -0,0 +1,366 @@
+import datetime
+import typing
+
+from src import data
+from src.adapter.ds import shared, sqlite_shared
+
+__all__ = ("SqliteSrcDs",)
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection,SqlResolve
+class SqliteSrcDs(data.SrcDs):
+    """Reads a table from a SQLite database, like the ones SqliteDstDs writes.
+
+    Rows are read in order of the table's key, which is the order a WITHOUT ROWID table, or one
+    whose key is its rowid, is stored in, so a scan never has to sort.  pk_cols is only used when
+    the table doesn't declare a primary key of its own.
+    """
+
+    def __init__(
+        self,
+        *,
+        cur: data.Cursor,
+        db_name: str,
+        schema_name: str | None,
+        table_name: str,
+        pk_cols: tuple[str, ...] | None,
+        after: dict[str, datetime.date],
+    ):
+        self._cur: typing.Final[data.Cursor] = cur
+        self._db_name: typing.Final[str] = db_name
+        self._schema_name: typing.Final[str | None] = schema_name
+        self._table_name: typing.Final[str] = table_name
+        self._pk_cols: typing.Final[tuple[str, ...] | None] = pk_cols
+        self._after: typing.Final[dict[str, datetime.date]] = after
+
+        self._sqlite_table_name: typing.Final[str] = sqlite_shared.table_name(
+            schema_name=schema_name,
+            table_name=table_name,
+        )
+        self._full_table_name: typing.Final[str] = sqlite_shared.wrap(self._sqlite_table_name)
+
+        self._table: data.Table | None = None
+        self._readers: dict[str, sqlite_shared.Reader] = {}
+        self._writers: dict[str, sqlite_shared.Writer] = {}
+        self._plans: dict[tuple[typing.Hashable, ...], shared.SqlPlan] = {}
+
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[list[data.Row]] | data.Error:
+        try:
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after))
+            if isinstance(plan, data.Error):
+                return plan
+
+            batches = self._cur.fetch_batches(
+                sql=plan.sql,
+                params=self._params(plan, full_after),
+                batch_size=batch_size,
+            )
+            if isinstance(batches, data.Error):
+                return batches
+
+            return ([self._read(row) for row in batch] for batch in batches)
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+                batch_size=batch_size,
+            )
+
+    def fetch_rows(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+    ) -> list[data.Row] | data.Error:
+        try:
+            full_after = shared.combine_filters(ds_filter=self._after, query_filter=after)
+
+            plan = self._fetch_rows_plan(col_names=col_names, after_cols=tuple(full_after))
+            if isinstance(plan, data.Error):
+                return plan
+
+            rows = self._cur.fetch_all(sql=plan.sql, params=self._params(plan, full_after))
+            if isinstance(rows, data.Error):
+                return rows
+
+            return [self._read(row) for row in rows]
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names or ()),
+                after=tuple((after or {}).items()),
+            )
+
+    def fetch_rows_by_key(
+        self,
+        *,
+        col_names: typing.Iterable[str] | None,
+        keys: typing.Iterable[data.RowKey],
+    ) -> list[data.Row] | data.Error:
+        try:
+            keys = tuple(keys)
+            if not keys:
+                return []
+
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            if col_names:
+                cols = tuple(sorted(set(col_names)))
+            else:
+                cols = tuple(sorted(c.name for c in table.columns))
+
+            key_cols = tuple(sorted(table.pk))
+            keys_per_query = sqlite_shared.MAX_PARAMS // len(key_cols)
+
+            rows: list[data.Row] = []
+            for i in range(0, len(keys), keys_per_query):
+                batch = keys[i : i + keys_per_query]
+
+                plan_key = ("fetch_rows_by_key", cols, len(batch))
+                plan = self._plans.get(plan_key)
+                if plan is None:
+                    plan = _compile_fetch_rows_by_key_plan(
+                        full_table_name=self._full_table_name,
+                        col_names=cols,
+                        key_cols=key_cols,
+                        keys=len(batch),
+                    )
+                    self._plans[plan_key] = plan
+
+                found = self._cur.fetch_all(
+                    sql=plan.sql,
+                    params=[val for key in batch for val in self._params(plan, key)],
+                )
+                if isinstance(found, data.Error):
+                    return found
+
+                rows.extend(self._read(row) for row in found)
+
+            return rows
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                table_name=self._full_table_name,
+                col_names=tuple(col_names or ()),
+            )
+
+    def get_row_count(self) -> int | data.Error:
+        try:
+            table = self.get_table()
+            if isinstance(table, data.Error):
+                return table
+
+            qry = f"SELECT count(*) AS ct FROM {self._full_table_name}"
+            if self._after:
+                qry += f" WHERE {_after_clause(self._after)}"
+
+            row = self._cur.fetch_one(
+                sql=sqlite_shared.Sql(qry),
+                params=[self._writers[col](value) for col, value in self._after.items()],
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow get_row_count query returned None.  That should be impossible.",
+                    table_name=self._full_table_name,
+                )
+
+            return typing.cast(int, row["ct"])
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def get_table(self) -> data.Table | data.Error:
+        try:
+            if self._table is not None:
+                return self._table
+
+            rows = self._cur.fetch_all(
+                sql=sqlite_shared.Sql(
+                    'SELECT name, type, "notnull", pk FROM pragma_table_info(?) ORDER BY cid'
+                ),
+                params=(self._sqlite_table_name,),
+            )
+            if isinstance(rows, data.Error):
+                return rows
+
+            if not rows:
+                return data.Error.new(
+                    f"The table, {self._full_table_name}, does not exist.",
+                    schema_name=self._schema_name,
+                    table_name=self._table_name,
+                )
+
+            cols = [
+                sqlite_shared.lookup_column(
+                    name=typing.cast(str, row["name"]),
+                    declared_type=typing.cast(str, row["type"]),
+                    nullable=not row["notnull"] and not row["pk"],
+                )
+                for row in rows
+            ]
+
+            # pk is the column's position in the primary key, or 0 if it isn't in it
+            pk = tuple(
+                typing.cast(str, row["name"])
+                for row in sorted(rows, key=lambda row: typing.cast(int, row["pk"]))
+                if row["pk"]
+            )
+            if not pk:
+                if not self._pk_cols:
+                    return data.Error.new(
+                        f"{self._full_table_name} has no primary key, and no pk_cols were given.",
+                        schema_name=self._schema_name,
+                        table_name=self._table_name,
+                    )
+                pk = self._pk_cols
+
+            self._table = data.Table(
+                db_name=self._db_name,
+                schema_name=self._schema_name,
+                table_name=self._table_name,
+                pk=pk,
+                columns=frozenset(cols),
+            )
+            self._readers.update((c.name, sqlite_shared.reader(c.data_type)) for c in cols)
+            self._writers.update((c.name, sqlite_shared.writer(c.data_type)) for c in cols)
+
+            return self._table
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def get_table_stats(self) -> data.TableStats | data.Error:
+        try:
+            # sqlite_stat1 is only there once the database has been analyzed
+            exists = self._cur.fetch_one(
+                sql=sqlite_shared.Sql(
+                    "SELECT count(*) AS ct FROM sqlite_master WHERE name = 'sqlite_stat1'"
+                ),
+                params=None,
+            )
+            if isinstance(exists, data.Error):
+                return exists
+
+            if exists is None or not exists["ct"]:
+                return data.TableStats(estimated_rows=None)
+
+            rows = self._cur.fetch_all(
+                sql=sqlite_shared.Sql("SELECT stat FROM sqlite_stat1 WHERE tbl = ?"),
+                params=(self._sqlite_table_name,),
+            )
+            if isinstance(rows, data.Error):
+                return rows
+
+            # each stat starts with the number of rows in the table, or the index
+            estimates = [int(typing.cast(str, row["stat"]).split()[0]) for row in rows]
+
+            return data.TableStats(estimated_rows=max(estimates) if estimates else None)
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def table_exists(self) -> bool | data.Error:
+        try:
+            row = self._cur.fetch_one(
+                sql=sqlite_shared.Sql(
+                    """
+                    SELECT count(*) AS ct
+                    FROM sqlite_master
+                    WHERE
+                        type IN ('table', 'view')
+                        AND name = ?
+                    """
+                ),
+                params=(self._sqlite_table_name,),
+            )
+            if isinstance(row, data.Error):
+                return row
+
+            if row is None:
+                return data.Error.new(
+                    "Somehow the table_exists() query returned None.",
+                    table_name=self._full_table_name,
+                )
+
+            return typing.cast(int, row["ct"]) > 0
+        except Exception as e:
+            return data.Error.new(str(e), table_name=self._full_table_name)
+
+    def _fetch_rows_plan(
+        self,
+        *,
+        col_names: set[str] | None,
+        after_cols: tuple[str, ...],
+    ) -> shared.SqlPlan | data.Error:
+        table = self.get_table()
+        if isinstance(table, data.Error):
+            return table
+
+        if col_names:
+            cols = tuple(sorted(col_names))
+        else:
+            cols = tuple(sorted(c.name for c in table.columns))
+
+        plan_key = ("fetch_rows", cols, after_cols)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            qry = f"SELECT {_col_name_csv(cols)} FROM {self._full_table_name}"
+            if after_cols:
+                qry += f" WHERE {_after_clause(after_cols)}"
+            qry += f" ORDER BY {_col_name_csv(table.pk)}"
+
+            plan = shared.SqlPlan(
+                sql=sqlite_shared.Sql(qry),
+                col_names=cols,
+                param_names=after_cols,
+            )
+            self._plans[plan_key] = plan
+
+        return plan
+
+    def _params(
+        self, plan: shared.SqlPlan, /, values: typing.Mapping[str, typing.Any]
+    ) -> list[typing.Any]:
+        return [self._writers[name](values[name]) for name in plan.param_names]
+
+    def _read(self, row: data.Row, /) -> data.Row:
+        return {col: self._readers[col](value) for col, value in row.items()}
+
+
+def _after_clause(col_names: typing.Iterable[str], /) -> str:
+    return " OR ".join(f"{sqlite_shared.wrap(col)} > ?" for col in col_names)
+
+
+def _col_name_csv(col_names: typing.Iterable[str], /) -> str:
+    return ", ".join(sqlite_shared.wrap(col) for col in col_names)
+
+
+def _compile_fetch_rows_by_key_plan(
+    *,
+    full_table_name: str,
+    col_names: tuple[str, ...],
+    key_cols: tuple[str, ...],
+    keys: int,
+) -> shared.SqlPlan:
+    key_placeholders = "(" + ", ".join("?" for _ in key_cols) + ")"
+
+    qry = (
+        f"SELECT {_col_name_csv(col_names)} FROM {full_table_name}"
+        f" WHERE ({_col_name_csv(key_cols)}) IN"
+        f" (VALUES {', '.join(key_placeholders for _ in range(keys))})"
+    )
+
+    return shared.SqlPlan(sql=sqlite_shared.Sql(qry), col_names=col_names, param_names=key_cols)
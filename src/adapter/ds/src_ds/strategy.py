@@ -1,12 +1,12 @@
+from __future__ import annotations
+
 import datetime
 import typing
 
-import pyodbc
-
 from src import data
-from src.adapter.ds.src_ds.hh import HHSrcDs
-from src.adapter.ds.src_ds.ms import MSSrcDs
-from src.adapter.ds.src_ds.odbc import OdbcSrcDs
+
+if typing.TYPE_CHECKING:
+    import pyodbc
 
 __all__ = ("create",)
 
@@ -20,8 +20,29 @@ def create(
     table_name: str,
     pk_cols: tuple[str, ...] | None,
     after: dict[str, datetime.date],
+    capture: data.Capture | None = None,
+    export: data.FileExport | None = None,
+    table: data.Table | None = None,
+    consumer: str = "",
+    cursor_provider: data.CursorProvider | None = None,
 ) -> data.SrcDs | data.Error:
+    """table is only used by file sources, whose schema is otherwise inferred from the file.
+
+    consumer names the dst table a capture is read for, so each dst of a src keeps its own place
+    in the changes.  cursor_provider is cur's, and is only used by a changelog capture, which
+    commits its triggers on a connection of its own.
+    """
     try:
+        if capture is not None and api != data.API.PSYCOPG:
+            return data.Error.new(
+                f"{capture} capture is only supported by psycopg sources.",
+                api=api,
+                db_name=db_name,
+                schema_name=schema_name,
+                table_name=table_name,
+                capture=capture,
+            )
+
         if api == data.API.HH:
             if pk_cols is None or len(pk_cols) == 0:
                 return data.Error.new(
@@ -33,6 +54,8 @@ def create(
                     after=tuple(after.items()),
                 )
 
+            from src.adapter.ds.src_ds.hh import HHSrcDs
+
             return HHSrcDs(
                 cur=typing.cast(pyodbc.Cursor, cur),
                 db_name=db_name,
@@ -52,6 +75,8 @@ def create(
                     after=tuple(after.items()),
                 )
 
+            from src.adapter.ds.src_ds.ms import MSSrcDs
+
             return MSSrcDs(
                 cur=typing.cast(pyodbc.Cursor, cur),
                 db_name=db_name,
@@ -61,6 +86,8 @@ def create(
                 after=after,
             )
         elif api == data.API.PYODBC:
+            from src.adapter.ds.src_ds.odbc import OdbcSrcDs
+
             return OdbcSrcDs(
                 cur=typing.cast(pyodbc.Cursor, cur),
                 db_name=db_name,
@@ -68,6 +95,94 @@ def create(
                 table_name=table_name,
                 after=after,
             )
+        elif api == data.API.PSYCOPG:
+            if capture == data.Capture.CHANGELOG:
+                if cursor_provider is None:
+                    return data.Error.new(
+                        "cursor_provider is required to create a PgChangelogSrcDs.",
+                        api=api,
+                        db_name=db_name,
+                        schema_name=schema_name,
+                        table_name=table_name,
+                    )
+
+                from src.adapter.ds.src_ds.pg_changelog import PgChangelogSrcDs
+
+                return PgChangelogSrcDs(
+                    cur=cur,
+                    cursor_provider=cursor_provider,
+                    db_name=db_name or "",
+                    schema_name=schema_name or "public",
+                    table_name=table_name,
+                    after=after,
+                    consumer=consumer,
+                )
+
+            if capture == data.Capture.LOGICAL_REPLICATION:
+                from src.adapter.ds.src_ds.pg_cdc import PgCdcSrcDs
+
+                return PgCdcSrcDs(
+                    cur=cur,
+                    db_name=db_name or "",
+                    schema_name=schema_name or "public",
+                    table_name=table_name,
+                    after=after,
+                    consumer=consumer,
+                )
+
+            if capture == data.Capture.XMIN:
+                from src.adapter.ds.src_ds.pg_xmin import PgXminSrcDs
+
+                return PgXminSrcDs(
+                    cur=cur,
+                    db_name=db_name or "",
+                    schema_name=schema_name or "public",
+                    table_name=table_name,
+                    after=after,
+                )
+
+            from src.adapter.ds.src_ds.pg import PgSrcDs
+
+            return PgSrcDs(
+                cur=cur,
+                db_name=db_name or "",
+                schema_name=schema_name or "public",
+                table_name=table_name,
+                after=after,
+            )
+        elif api == data.API.SQLITE:
+            from src.adapter.ds.src_ds.sqlite import SqliteSrcDs
+
+            return SqliteSrcDs(
+                cur=cur,
+                db_name=db_name or "",
+                schema_name=schema_name,
+                table_name=table_name,
+                pk_cols=pk_cols,
+                after=after,
+            )
+        elif api == data.API.FILE and export is not None:
+            if pk_cols is None or len(pk_cols) == 0:
+                return data.Error.new(
+                    "pk_cols is required to create a FileSrcDs.",
+                    api=api,
+                    db_name=db_name,
+                    schema_name=schema_name,
+                    table_name=table_name,
+                    after=tuple(after.items()),
+                )
+
+            from src.adapter.ds.src_ds.file import FileSrcDs
+
+            return FileSrcDs(
+                export=export,
+                db_name=db_name or "",
+                schema_name=schema_name,
+                table_name=table_name,
+                pk_cols=pk_cols,
+                after=after,
+                table=table,
+            )
         else:
             raise NotImplementedError(
                 f"The api specified, {api}, does not have an SrcDs implementation."
@@ -81,4 +196,5 @@ def create(
             table_name=table_name,
             pk_cols=pk_cols,
             after=tuple(after.items()),
+            capture=capture,
         )
@@ -7,6 +7,7 @@ from src import data
 __all__ = (
     "get_config_path",
     "get_log_folder",
+    "get_schedule_path",
 )
 
 
@@ -52,3 +53,15 @@ def get_log_folder() -> pathlib.Path | data.Error:
         return folder
     except Exception as e:
         return data.Error.new(str(e))
+
+
+@functools.lru_cache
+def get_schedule_path() -> pathlib.Path | data.Error:
+    try:
+        root = _root_dir()
+        if isinstance(root, data.Error):
+            return root
+
+        return root / "assets" / "schedule.json"
+    except Exception as e:
+        return data.Error.new(str(e))
@@ -9,6 +9,43 @@ class PgLog(data.Log):
     def __init__(self, *, cursor_provider: data.CursorProvider):
         self._cursor_provider: typing.Final[data.CursorProvider] = cursor_provider
 
+    def batch_sizes(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> dict[str, int] | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                rows = cur.fetch_all(
+                    sql="""
+                    SELECT * FROM poa.get_batch_sizes (
+                        p_src_db_name := %s
+                    ,   p_src_schema_name := %s
+                    ,   p_src_table_name := %s
+                    )
+                    """,
+                    params=(src_db_name, src_schema_name, src_table_name),
+                )
+                if isinstance(rows, data.Error):
+                    return rows
+
+                return {
+                    typing.cast(str, row["phase"]): typing.cast(int, row["batch_size"])
+                    for row in rows
+                }
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+
     def delete_old_logs(self, *, days_to_keep: int) -> None | data.Error:
         try:
             with self._cursor_provider.open() as cur:
@@ -35,6 +72,112 @@ class PgLog(data.Log):
         except Exception as e:
             return data.Error.new(str(e), error_message=error_message)
 
+    def save_table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        snapshot: data.TableSnapshot,
+    ) -> None | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                return cur.execute(
+                    sql="""
+                        CALL poa.save_table_snapshot(
+                            p_src_db_name := %s
+                        ,   p_src_schema_name := %s
+                        ,   p_src_table_name := %s
+                        ,   p_dst_db_name := %s
+                        ,   p_dst_schema_name := %s
+                        ,   p_dst_table_name := %s
+                        ,   p_fingerprint := %s
+                        ,   p_estimated_rows := %s
+                        )
+                    """,
+                    params=(
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        snapshot.fingerprint,
+                        snapshot.estimated_rows,
+                    ),
+                )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                snapshot=snapshot,
+            )
+
+    def save_watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+        watermark: str,
+    ) -> None | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                return cur.execute(
+                    sql="""
+                        CALL poa.save_watermark(
+                            p_src_db_name := %s
+                        ,   p_src_schema_name := %s
+                        ,   p_src_table_name := %s
+                        ,   p_dst_db_name := %s
+                        ,   p_dst_schema_name := %s
+                        ,   p_dst_table_name := %s
+                        ,   p_capture := %s
+                        ,   p_watermark := %s
+                        )
+                    """,
+                    params=(
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        capture,
+                        watermark,
+                    ),
+                )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                capture=capture,
+                watermark=watermark,
+            )
+
     def sync_failed(self, *, sync_id: int, reason: str) -> None | data.Error:
         try:
             with self._cursor_provider.open() as cur:
@@ -43,11 +186,131 @@ class PgLog(data.Log):
 
                 cur.execute(
                     sql="CALL poa.sync_failed (p_sync_id := %s, p_error_message := %s)",
-                    parms=(sync_id, reason),
+                    params=(sync_id, reason),
                 )
         except Exception as e:
             return data.Error.new(str(e), sync_id=sync_id, reason=reason)
 
+    def sync_phases(
+        self,
+        *,
+        sync_id: int,
+        phases: typing.Iterable[data.SyncPhase],
+    ) -> None | data.Error:
+        try:
+            phases = tuple(phases)
+            if not phases:
+                return None
+
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                return cur.execute_many(
+                    sql="""
+                        CALL poa.add_sync_phase(
+                            p_sync_id := %s
+                        ,   p_phase := %s
+                        ,   p_calls := %s
+                        ,   p_execution_millis := %s
+                        ,   p_rows := %s
+                        ,   p_est_bytes := %s
+                        ,   p_batch_size := %s
+                        )
+                    """,
+                    params=[
+                        (
+                            sync_id,
+                            phase.name,
+                            phase.calls,
+                            phase.execution_millis,
+                            phase.rows,
+                            phase.est_bytes,
+                            phase.batch_size,
+                        )
+                        for phase in phases
+                    ],
+                )
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, phases=tuple(phases))
+
+    def sync_history(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> data.SyncHistory | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                row = cur.fetch_one(
+                    sql="""
+                    SELECT * FROM poa.get_sync_history (
+                        p_src_db_name := %s
+                    ,   p_src_schema_name := %s
+                    ,   p_src_table_name := %s
+                    )
+                    """,
+                    params=(src_db_name, src_schema_name, src_table_name),
+                )
+                if isinstance(row, data.Error):
+                    return row
+
+                if row is None:
+                    return data.SyncHistory()
+
+                corrections = typing.cast(dict[str, typing.Any], row["corrections"] or {})
+
+                return data.SyncHistory(
+                    fetch_millis_per_row=typing.cast(float | None, row["fetch_millis_per_row"]),
+                    fetch_by_key_millis_per_row=typing.cast(
+                        float | None, row["fetch_by_key_millis_per_row"]
+                    ),
+                    upsert_millis_per_row=typing.cast(float | None, row["upsert_millis_per_row"]),
+                    corrections={k: float(v) for k, v in corrections.items()},
+                )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+
+    def sync_plan(self, *, sync_id: int, plan: data.SyncPlan) -> None | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                return cur.execute(
+                    sql="""
+                        CALL poa.add_sync_plan(
+                            p_sync_id := %s
+                        ,   p_strategy := %s
+                        ,   p_reason := %s
+                        ,   p_estimated_rows := %s
+                        ,   p_est_millis := %s
+                        ,   p_raw_est_millis := %s
+                        ,   p_actual_millis := %s
+                        )
+                    """,
+                    params=(
+                        sync_id,
+                        plan.strategy,
+                        plan.reason,
+                        None if plan.stats is None else plan.stats.estimated_rows,
+                        plan.est_millis,
+                        plan.raw_est_millis,
+                        plan.actual_millis,
+                    ),
+                )
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, plan=plan)
+
     def sync_skipped(self, *, sync_id: int, reason: str) -> None | data.Error:
         try:
             with self._cursor_provider.open() as cur:
@@ -75,7 +338,7 @@ class PgLog(data.Log):
                     return cur
 
                 row = cur.fetch_one(
-                    """
+                    sql="""
                     SELECT * FROM poa.sync_started (
                         p_src_db_name := %s
                     ,   p_src_schema_name := %s
@@ -83,7 +346,7 @@ class PgLog(data.Log):
                     ,   p_incremental := %s
                     ) AS sync_id
                     """,
-                    (
+                    params=(
                         src_db_name,
                         src_schema_name,
                         src_table_name,
@@ -93,6 +356,15 @@ class PgLog(data.Log):
                 if isinstance(row, data.Error):
                     return row
 
+                if row is None:
+                    return data.Error.new(
+                        "poa.sync_started did not return a sync_id.",
+                        src_db_name=src_db_name,
+                        src_schema_name=src_schema_name,
+                        src_table_name=src_table_name,
+                        incremental=incremental,
+                    )
+
                 return typing.cast(int, row["sync_id"])
         except Exception as e:
             return data.Error.new(
@@ -103,6 +375,65 @@ class PgLog(data.Log):
                 incremental=incremental,
             )
 
+    def table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+    ) -> data.TableSnapshot | None | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                row = cur.fetch_one(
+                    sql="""
+                        SELECT
+                            ts.fingerprint
+                        ,   ts.estimated_rows
+                        FROM poa.table_snapshot AS ts
+                        WHERE
+                            ts.src_db_name = %s
+                            AND ts.src_schema_name IS NOT DISTINCT FROM %s
+                            AND ts.src_table_name = %s
+                            AND ts.dst_db_name = %s
+                            AND ts.dst_schema_name = %s
+                            AND ts.dst_table_name = %s
+                    """,
+                    params=(
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                    ),
+                )
+                if isinstance(row, data.Error):
+                    return row
+
+                if row is None:
+                    return None
+
+                return data.TableSnapshot(
+                    fingerprint=typing.cast(str, row["fingerprint"]),
+                    estimated_rows=typing.cast(int | None, row["estimated_rows"]),
+                )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+            )
+
     def sync_succeeded(
         self,
         *,
@@ -111,6 +442,8 @@ class PgLog(data.Log):
         rows_deleted: int,
         rows_updated: int,
         execution_millis: int,
+        peak_rss_bytes: int | None,
+        peak_traced_bytes: int | None,
     ) -> None | data.Error:
         try:
             with self._cursor_provider.open() as cur:
@@ -125,6 +458,8 @@ class PgLog(data.Log):
                         ,   p_rows_deleted := %s
                         ,   p_rows_updated := %s
                         ,   p_execution_millis := %s
+                        ,   p_peak_rss_bytes := %s
+                        ,   p_peak_traced_bytes := %s
                         )
                     """,
                     params=(
@@ -133,6 +468,8 @@ class PgLog(data.Log):
                         rows_deleted,
                         rows_updated,
                         execution_millis,
+                        peak_rss_bytes,
+                        peak_traced_bytes,
                     ),
                 )
         except Exception as e:
@@ -143,4 +480,65 @@ class PgLog(data.Log):
                 rows_deleted=rows_deleted,
                 rows_updated=rows_updated,
                 execution_millis=execution_millis,
+                peak_rss_bytes=peak_rss_bytes,
+                peak_traced_bytes=peak_traced_bytes,
+            )
+
+    def watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+    ) -> str | None | data.Error:
+        try:
+            with self._cursor_provider.open() as cur:
+                if isinstance(cur, data.Error):
+                    return cur
+
+                row = cur.fetch_one(
+                    sql="""
+                        SELECT
+                            w.watermark
+                        FROM poa.watermark AS w
+                        WHERE
+                            w.src_db_name = %s
+                            AND w.src_schema_name IS NOT DISTINCT FROM %s
+                            AND w.src_table_name = %s
+                            AND w.dst_db_name = %s
+                            AND w.dst_schema_name = %s
+                            AND w.dst_table_name = %s
+                            AND w.capture = %s
+                    """,
+                    params=(
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        capture,
+                    ),
+                )
+                if isinstance(row, data.Error):
+                    return row
+
+                if row is None:
+                    return None
+
+                return typing.cast(str, row["watermark"])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                capture=capture,
             )
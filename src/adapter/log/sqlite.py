@@ -0,0 +1,672 @@
+import contextlib
+import datetime
+import pathlib
+import sqlite3
+import typing
+
+from src import data
+
+__all__ = ("SqliteLog",)
+
+# the same tables as the poa schema in setup.sql, for apis that have no database of their own to
+# keep the log in
+_SCHEMA: typing.Final[str] = """
+    CREATE TABLE IF NOT EXISTS sync (
+        sync_id INTEGER PRIMARY KEY AUTOINCREMENT
+    ,   src_db_name TEXT NOT NULL
+    ,   src_schema_name TEXT NULL
+    ,   src_table_name TEXT NOT NULL
+    ,   incremental INTEGER NOT NULL
+    ,   ts TEXT NOT NULL
+    ,   status TEXT NULL
+    ,   reason TEXT NULL
+    ,   rows_added INTEGER NULL
+    ,   rows_deleted INTEGER NULL
+    ,   rows_updated INTEGER NULL
+    ,   execution_millis INTEGER NULL
+    ,   peak_rss_bytes INTEGER NULL
+    ,   peak_traced_bytes INTEGER NULL
+    );
+    CREATE TABLE IF NOT EXISTS sync_phase (
+        sync_id INTEGER NOT NULL REFERENCES sync (sync_id) ON DELETE CASCADE
+    ,   phase TEXT NOT NULL
+    ,   calls INTEGER NOT NULL
+    ,   execution_millis INTEGER NOT NULL
+    ,   rows INTEGER NULL
+    ,   est_bytes INTEGER NULL
+    ,   batch_size INTEGER NULL
+    ,   ts TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sync_plan (
+        sync_id INTEGER NOT NULL REFERENCES sync (sync_id) ON DELETE CASCADE
+    ,   strategy TEXT NOT NULL
+    ,   reason TEXT NOT NULL
+    ,   estimated_rows INTEGER NULL
+    ,   est_millis INTEGER NULL
+    ,   raw_est_millis INTEGER NULL
+    ,   actual_millis INTEGER NULL
+    );
+    CREATE TABLE IF NOT EXISTS table_snapshot (
+        src_db_name TEXT NOT NULL
+    ,   src_schema_name TEXT NULL
+    ,   src_table_name TEXT NOT NULL
+    ,   dst_db_name TEXT NOT NULL
+    ,   dst_schema_name TEXT NOT NULL
+    ,   dst_table_name TEXT NOT NULL
+    ,   fingerprint TEXT NOT NULL
+    ,   estimated_rows INTEGER NULL
+    );
+    CREATE TABLE IF NOT EXISTS watermark (
+        src_db_name TEXT NOT NULL
+    ,   src_schema_name TEXT NULL
+    ,   src_table_name TEXT NOT NULL
+    ,   dst_db_name TEXT NOT NULL
+    ,   dst_schema_name TEXT NOT NULL
+    ,   dst_table_name TEXT NOT NULL
+    ,   capture TEXT NOT NULL
+    ,   watermark TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS error (
+        ts TEXT NOT NULL
+    ,   error_message TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_sync_src_table ON sync (src_table_name, ts);
+    CREATE INDEX IF NOT EXISTS ix_sync_phase_sync_id ON sync_phase (sync_id);
+    CREATE INDEX IF NOT EXISTS ix_sync_plan_sync_id ON sync_plan (sync_id);
+"""
+
+
+# noinspection SqlDialectInspection,SqlNoDataSourceInspection,SqlResolve
+class SqliteLog(data.Log):
+    """Keeps the log in a SQLite file, for apis like file that don't have a database to put the
+    poa schema in.
+    """
+
+    def __init__(self, *, path: pathlib.Path):
+        self._path: typing.Final[pathlib.Path] = path
+
+    def batch_sizes(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> dict[str, int] | data.Error:
+        try:
+            with self._connect() as con:
+                rows = con.execute(
+                    """
+                    SELECT sp.phase, sp.batch_size
+                    FROM sync_phase AS sp
+                    JOIN sync AS s
+                        ON sp.sync_id = s.sync_id
+                    WHERE
+                        s.src_db_name = ?
+                        AND s.src_schema_name IS ?
+                        AND s.src_table_name = ?
+                        AND sp.batch_size IS NOT NULL
+                    ORDER BY
+                        sp.ts
+                    ,   sp.sync_id
+                    """,
+                    (src_db_name, src_schema_name, src_table_name),
+                ).fetchall()
+
+                # later rows overwrite earlier ones, so each phase ends up with its latest size
+                return {phase: batch_size for phase, batch_size in rows}
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+
+    def delete_old_logs(self, *, days_to_keep: int) -> None | data.Error:
+        try:
+            cutoff = _now() - datetime.timedelta(days=days_to_keep)
+            with self._connect() as con:
+                con.execute("DELETE FROM sync WHERE ts < ?", (cutoff.isoformat(),))
+                con.execute("DELETE FROM error WHERE ts < ?", (cutoff.isoformat(),))
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), days_to_keep=days_to_keep)
+
+    def error(self, /, error_message: str) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    "INSERT INTO error (ts, error_message) VALUES (?, ?)",
+                    (_now().isoformat(), error_message),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), error_message=error_message)
+
+    def save_table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        snapshot: data.TableSnapshot,
+    ) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    """
+                    DELETE FROM table_snapshot
+                    WHERE
+                        src_db_name = ?
+                        AND src_schema_name IS ?
+                        AND src_table_name = ?
+                        AND dst_db_name = ?
+                        AND dst_schema_name = ?
+                        AND dst_table_name = ?
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                    ),
+                )
+                con.execute(
+                    """
+                    INSERT INTO table_snapshot (
+                        src_db_name
+                    ,   src_schema_name
+                    ,   src_table_name
+                    ,   dst_db_name
+                    ,   dst_schema_name
+                    ,   dst_table_name
+                    ,   fingerprint
+                    ,   estimated_rows
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        snapshot.fingerprint,
+                        snapshot.estimated_rows,
+                    ),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                snapshot=snapshot,
+            )
+
+    def save_watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+        watermark: str,
+    ) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    """
+                    DELETE FROM watermark
+                    WHERE
+                        src_db_name = ?
+                        AND src_schema_name IS ?
+                        AND src_table_name = ?
+                        AND dst_db_name = ?
+                        AND dst_schema_name = ?
+                        AND dst_table_name = ?
+                        AND capture = ?
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        capture,
+                    ),
+                )
+                con.execute(
+                    """
+                    INSERT INTO watermark (
+                        src_db_name
+                    ,   src_schema_name
+                    ,   src_table_name
+                    ,   dst_db_name
+                    ,   dst_schema_name
+                    ,   dst_table_name
+                    ,   capture
+                    ,   watermark
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        capture,
+                        watermark,
+                    ),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                capture=capture,
+                watermark=watermark,
+            )
+
+    def sync_failed(self, *, sync_id: int, reason: str) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    "UPDATE sync SET status = 'failed', reason = ? WHERE sync_id = ?",
+                    (reason, sync_id),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, reason=reason)
+
+    def sync_phases(
+        self,
+        *,
+        sync_id: int,
+        phases: typing.Iterable[data.SyncPhase],
+    ) -> None | data.Error:
+        try:
+            phases = tuple(phases)
+            if not phases:
+                return None
+
+            ts = _now().isoformat()
+            with self._connect() as con:
+                con.executemany(
+                    """
+                    INSERT INTO sync_phase (
+                        sync_id
+                    ,   phase
+                    ,   calls
+                    ,   execution_millis
+                    ,   rows
+                    ,   est_bytes
+                    ,   batch_size
+                    ,   ts
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            sync_id,
+                            phase.name,
+                            phase.calls,
+                            phase.execution_millis,
+                            phase.rows,
+                            phase.est_bytes,
+                            phase.batch_size,
+                            ts,
+                        )
+                        for phase in phases
+                    ],
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, phases=tuple(phases))
+
+    def sync_history(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> data.SyncHistory | data.Error:
+        try:
+            with self._connect() as con:
+                recent_syncs = """
+                    SELECT s.sync_id
+                    FROM sync AS s
+                    WHERE
+                        s.src_db_name = ?
+                        AND s.src_schema_name IS ?
+                        AND s.src_table_name = ?
+                        AND s.status = 'succeeded'
+                    ORDER BY s.ts DESC
+                    LIMIT 10
+                """
+                params = (src_db_name, src_schema_name, src_table_name)
+
+                costs = dict(
+                    con.execute(
+                        f"""
+                        SELECT
+                            CASE sp.phase
+                                WHEN 'fetch_src_rows_by_key' THEN 'fetch_by_key'
+                                WHEN 'upsert' THEN 'upsert'
+                                ELSE 'fetch'
+                            END AS cost
+                        ,   CAST(sum(sp.execution_millis) AS REAL) / NULLIF(sum(sp.rows), 0)
+                        FROM sync_phase AS sp
+                        WHERE
+                            sp.sync_id IN ({recent_syncs})
+                            AND sp.phase IN (
+                                'fetch_src_rows'
+                            ,   'fetch_src_rows_in_range'
+                            ,   'fetch_src_rows_by_key'
+                            ,   'upsert'
+                            )
+                        GROUP BY 1
+                        """,
+                        params,
+                    ).fetchall()
+                )
+
+                corrections = dict(
+                    con.execute(
+                        f"""
+                        SELECT
+                            sp.strategy
+                        ,   avg(CAST(sp.actual_millis AS REAL) / sp.raw_est_millis)
+                        FROM sync_plan AS sp
+                        WHERE
+                            sp.sync_id IN ({recent_syncs})
+                            AND sp.raw_est_millis > 0
+                            AND sp.actual_millis IS NOT NULL
+                        GROUP BY sp.strategy
+                        """,
+                        params,
+                    ).fetchall()
+                )
+
+                return data.SyncHistory(
+                    fetch_millis_per_row=costs.get("fetch"),
+                    fetch_by_key_millis_per_row=costs.get("fetch_by_key"),
+                    upsert_millis_per_row=costs.get("upsert"),
+                    corrections={k: float(v) for k, v in corrections.items()},
+                )
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+
+    def sync_plan(self, *, sync_id: int, plan: data.SyncPlan) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    """
+                    INSERT INTO sync_plan (
+                        sync_id
+                    ,   strategy
+                    ,   reason
+                    ,   estimated_rows
+                    ,   est_millis
+                    ,   raw_est_millis
+                    ,   actual_millis
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        sync_id,
+                        plan.strategy,
+                        plan.reason,
+                        None if plan.stats is None else plan.stats.estimated_rows,
+                        plan.est_millis,
+                        plan.raw_est_millis,
+                        plan.actual_millis,
+                    ),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, plan=plan)
+
+    def sync_skipped(self, *, sync_id: int, reason: str) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    "UPDATE sync SET status = 'skipped', reason = ? WHERE sync_id = ?",
+                    (reason, sync_id),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), sync_id=sync_id, reason=reason)
+
+    def sync_started(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        incremental: bool,
+    ) -> int | data.Error:
+        try:
+            with self._connect() as con:
+                cur = con.execute(
+                    """
+                    INSERT INTO sync (
+                        src_db_name
+                    ,   src_schema_name
+                    ,   src_table_name
+                    ,   incremental
+                    ,   ts
+                    ) VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (src_db_name, src_schema_name, src_table_name, incremental, _now().isoformat()),
+                )
+                if cur.lastrowid is None:
+                    return data.Error.new(
+                        "The sync row was not assigned a sync_id.",
+                        src_db_name=src_db_name,
+                        src_schema_name=src_schema_name,
+                        src_table_name=src_table_name,
+                        incremental=incremental,
+                    )
+
+                return cur.lastrowid
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                incremental=incremental,
+            )
+
+    def table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+    ) -> data.TableSnapshot | None | data.Error:
+        try:
+            with self._connect() as con:
+                row = con.execute(
+                    """
+                    SELECT
+                        ts.fingerprint
+                    ,   ts.estimated_rows
+                    FROM table_snapshot AS ts
+                    WHERE
+                        ts.src_db_name = ?
+                        AND ts.src_schema_name IS ?
+                        AND ts.src_table_name = ?
+                        AND ts.dst_db_name = ?
+                        AND ts.dst_schema_name = ?
+                        AND ts.dst_table_name = ?
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                    ),
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                return data.TableSnapshot(fingerprint=row[0], estimated_rows=row[1])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+            )
+
+    def sync_succeeded(
+        self,
+        *,
+        sync_id: int,
+        rows_added: int,
+        rows_deleted: int,
+        rows_updated: int,
+        execution_millis: int,
+        peak_rss_bytes: int | None,
+        peak_traced_bytes: int | None,
+    ) -> None | data.Error:
+        try:
+            with self._connect() as con:
+                con.execute(
+                    """
+                    UPDATE sync
+                    SET
+                        status = 'succeeded'
+                    ,   rows_added = ?
+                    ,   rows_deleted = ?
+                    ,   rows_updated = ?
+                    ,   execution_millis = ?
+                    ,   peak_rss_bytes = ?
+                    ,   peak_traced_bytes = ?
+                    WHERE
+                        sync_id = ?
+                    """,
+                    (
+                        rows_added,
+                        rows_deleted,
+                        rows_updated,
+                        execution_millis,
+                        peak_rss_bytes,
+                        peak_traced_bytes,
+                        sync_id,
+                    ),
+                )
+            return None
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                sync_id=sync_id,
+                rows_added=rows_added,
+                rows_deleted=rows_deleted,
+                rows_updated=rows_updated,
+                execution_millis=execution_millis,
+                peak_rss_bytes=peak_rss_bytes,
+                peak_traced_bytes=peak_traced_bytes,
+            )
+
+    def watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+    ) -> str | None | data.Error:
+        try:
+            with self._connect() as con:
+                row = con.execute(
+                    """
+                    SELECT
+                        w.watermark
+                    FROM watermark AS w
+                    WHERE
+                        w.src_db_name = ?
+                        AND w.src_schema_name IS ?
+                        AND w.src_table_name = ?
+                        AND w.dst_db_name = ?
+                        AND w.dst_schema_name = ?
+                        AND w.dst_table_name = ?
+                        AND w.capture = ?
+                    """,
+                    (
+                        src_db_name,
+                        src_schema_name,
+                        src_table_name,
+                        dst_db_name,
+                        dst_schema_name,
+                        dst_table_name,
+                        capture,
+                    ),
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                return typing.cast(str, row[0])
+        except Exception as e:
+            return data.Error.new(
+                str(e),
+                src_db_name=src_db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                capture=capture,
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Generator[sqlite3.Connection, None, None]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        # poa serve syncs tables from several threads, each of which opens its own connection
+        with contextlib.closing(sqlite3.connect(self._path, timeout=30)) as con:
+            con.execute("PRAGMA foreign_keys = ON")
+            con.executescript(_SCHEMA)
+            with con:
+                yield con
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
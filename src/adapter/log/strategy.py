@@ -1,6 +1,5 @@
 from src import data
-from src.adapter.cursor_provider.pg import PgCursorProvider
-from src.adapter.log.pg import PgLog
+from src.adapter import cursor_provider
 
 __all__ = ("create",)
 
@@ -8,9 +7,23 @@ __all__ = ("create",)
 def create(*, db_config: data.DbConfig) -> data.Log | data.Error:
     try:
         if db_config.api == data.API.PSYCOPG:
-            cursor_provider = PgCursorProvider(db_config=db_config)
+            from src.adapter.log.pg import PgLog
 
-            return PgLog(cursor_provider=cursor_provider)
+            provider = cursor_provider.create(db_config=db_config)
+            if isinstance(provider, data.Error):
+                return provider
+
+            return PgLog(cursor_provider=provider)
+        elif db_config.api == data.API.FILE and db_config.export is not None:
+            from src.adapter.log.sqlite import SqliteLog
+
+            return SqliteLog(path=db_config.export.folder / "poa_log.sqlite")
+        elif db_config.api == data.API.SQLITE and db_config.path is not None:
+            from src.adapter.log.sqlite import SqliteLog
+
+            # the log is kept beside the database rather than in it, so writing to it doesn't
+            # wait on the sync's own transaction
+            return SqliteLog(path=db_config.path.parent / "poa_log.sqlite")
 
         return data.Error.new(
             f"The Log interface has not been implemented for the {db_config.api} api.",
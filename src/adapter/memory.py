@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sys
+import threading
+import tracemalloc
+import types
+import typing
+
+__all__ = (
+    "MemoryTracker",
+    "current_rss_bytes",
+)
+
+
+class MemoryTracker:
+    """Track the peak memory of the enclosed block.
+
+    RSS is sampled on a background thread every interval_seconds, which costs next to nothing.
+    If trace is True, tracemalloc is also started, which counts every Python allocation exactly,
+    but slows allocation-heavy code down noticeably, so it is opt-in.
+    """
+
+    def __init__(self, *, trace: bool = False, interval_seconds: float = 0.05):
+        self._trace: typing.Final[bool] = trace
+        self._interval_seconds: typing.Final[float] = interval_seconds
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_tracing = False
+
+        self.peak_rss_bytes: int | None = None
+        self.peak_traced_bytes: int | None = None
+
+    def __enter__(self) -> MemoryTracker:
+        self._sample()
+
+        if self._trace:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self._started_tracing = True
+
+        self._thread = threading.Thread(target=self._run, name="poa-memory-tracker", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: types.TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        self._sample()
+
+        if self._trace:
+            self.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak_rss_bytes is None or rss > self.peak_rss_bytes):
+            self.peak_rss_bytes = rss
+
+
+def current_rss_bytes() -> int | None:
+    # noinspection PyBroadException
+    try:
+        if sys.platform == "win32":
+            return _win32_rss_bytes()
+
+        statm = pathlib.Path("/proc/self/statm")
+        if statm.exists():
+            return int(statm.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+        import resource
+
+        # there is no cheap way to read the current RSS on macOS, so fall back to the peak so far,
+        # which it reports in bytes rather than kilobytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except:  # noqa: E722
+        return None
+
+
+def _win32_rss_bytes() -> int:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+
+    get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo  # type: ignore
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess  # type: ignore
+
+    if not get_process_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+        raise ctypes.WinError()  # type: ignore
+
+    return int(counters.WorkingSetSize)
+
+
+if __name__ == "__main__":
+    with MemoryTracker(trace=True) as tracker:
+        ballast = [dict.fromkeys(range(10), i) for i in range(100_000)]
+
+    print(f"{tracker.peak_rss_bytes=:,} {tracker.peak_traced_bytes=:,}")
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import pathlib
+import re
+import time
+import typing
+
+from src import data
+
+__all__ = ("SyncMetrics",)
+
+_DURATION_BUCKETS: typing.Final[tuple[float, ...]] = (
+    0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600,
+)
+
+_CONNECT_BUCKETS: typing.Final[tuple[float, ...]] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+# name, type, help, in the order they are written
+_FAMILIES: typing.Final[tuple[tuple[str, str, str], ...]] = (
+    ("poa_sync_duration_seconds", "histogram", "How long a sync took, end to end."),
+    ("poa_sync_rows_total", "counter", "Rows written to the destination, by operation."),
+    ("poa_sync_rows_per_second", "gauge", "Rows written per second by the last successful sync."),
+    ("poa_sync_read_bytes_total", "counter", "Estimated bytes of rows read from either side."),
+    ("poa_sync_connect_seconds", "histogram", "How long it took to open a connection."),
+    ("poa_sync_errors_total", "counter", "Syncs that failed or returned an error."),
+    ("poa_sync_last_success_timestamp_seconds", "gauge", "When the last successful sync ended."),
+)
+
+_SAMPLE_PATTERN: typing.Final[re.Pattern[str]] = re.compile(
+    r"^(?P<key>[a-zA-Z_:][a-zA-Z0-9_:]*(?:\{.*\})?)\s+(?P<value>\S+)$"
+)
+
+
+class SyncMetrics:
+    """Collects the metrics of one sync, and merges them into a Prometheus textfile.
+
+    node_exporter's textfile collector scrapes *.prom files from a folder, so each sync process
+    reads the file, adds its own counts to what earlier syncs left there, and swaps the result in
+    with a rename, so a scrape never sees a half-written file.
+    """
+
+    def __init__(self, *, src_table: str, dst_table: str):
+        self._labels: typing.Final[dict[str, str]] = {
+            "src_table": src_table,
+            "dst_table": dst_table,
+        }
+
+        self._connect_seconds: list[tuple[str, float]] = []
+        self._errors = 0
+        self._result: data.SyncResult | None = None
+
+    def add_connect_seconds(self, *, side: typing.Literal["src", "dst"], seconds: float) -> None:
+        self._connect_seconds.append((side, seconds))
+
+    def add_error(self) -> None:
+        self._errors += 1
+
+    def add_result(self, result: data.SyncResult, /) -> None:
+        self._result = result
+        if result.status == "failed":
+            self.add_error()
+
+    def write(self, *, path: pathlib.Path) -> None | data.Error:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            with _locked(path):
+                samples = _read_samples(path)
+
+                self._merge(samples)
+
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(_render(samples), encoding="utf-8")
+                os.replace(tmp_path, path)
+
+            return None
+        except Exception as e:
+            return data.Error.new(str(e), path=path)
+
+    def _merge(self, samples: dict[str, float], /) -> None:
+        for side, seconds in self._connect_seconds:
+            _observe(
+                samples,
+                name="poa_sync_connect_seconds",
+                labels={**self._labels, "side": side},
+                buckets=_CONNECT_BUCKETS,
+                value=seconds,
+            )
+
+        _add(samples, name="poa_sync_errors_total", labels=self._labels, value=self._errors)
+
+        result = self._result
+        if result is None or result.status != "succeeded":
+            return
+
+        seconds = (result.execution_millis or 0) / 1000
+
+        _observe(
+            samples,
+            name="poa_sync_duration_seconds",
+            labels=self._labels,
+            buckets=_DURATION_BUCKETS,
+            value=seconds,
+        )
+
+        for op, rows in (
+            ("added", result.rows_added),
+            ("deleted", result.rows_deleted),
+            ("updated", result.rows_updated),
+        ):
+            _add(samples, name="poa_sync_rows_total", labels={**self._labels, "op": op}, value=rows)
+
+        rows_written = result.rows_added + result.rows_deleted + result.rows_updated
+        if seconds > 0:
+            samples[_key("poa_sync_rows_per_second", self._labels)] = rows_written / seconds
+
+        _add(
+            samples,
+            name="poa_sync_read_bytes_total",
+            labels=self._labels,
+            value=sum(
+                phase.est_bytes or 0 for phase in result.phases if phase.name.startswith("fetch_")
+            ),
+        )
+
+        samples[_key("poa_sync_last_success_timestamp_seconds", self._labels)] = time.time()
+
+
+@contextlib.contextmanager
+def _locked(path: pathlib.Path, /) -> typing.Generator[None, None, None]:
+    # without a lock, two syncs that finish together would each write back their own counts, and
+    # one of them would be lost
+    with path.with_name(f"{path.name}.lock").open("a+b") as fh:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+
+            # LK_LOCK retries once a second for 10 seconds before it gives up
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _read_samples(path: pathlib.Path, /) -> dict[str, float]:
+    if not path.exists():
+        return {}
+
+    samples: dict[str, float] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("#"):
+            continue
+
+        if match := _SAMPLE_PATTERN.match(line.strip()):
+            samples[match["key"]] = float(match["value"])
+
+    return samples
+
+
+def _render(samples: dict[str, float], /) -> str:
+    lines: list[str] = []
+    for name, metric_type, help_text in _FAMILIES:
+        family_samples = [
+            (key, value)
+            for key, value in samples.items()
+            if re.match(rf"{name}(_bucket|_sum|_count)?(\{{|$)", key)
+        ]
+        if not family_samples:
+            continue
+
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(f"{key} {_format_value(value)}" for key, value in family_samples)
+
+    return "\n".join(lines) + "\n"
+
+
+def _add(
+    samples: dict[str, float],
+    /,
+    *,
+    name: str,
+    labels: dict[str, str],
+    value: float,
+) -> None:
+    key = _key(name, labels)
+    samples[key] = samples.get(key, 0) + value
+
+
+def _observe(
+    samples: dict[str, float],
+    /,
+    *,
+    name: str,
+    labels: dict[str, str],
+    buckets: tuple[float, ...],
+    value: float,
+) -> None:
+    for bucket in (*buckets, float("inf")):
+        _add(
+            samples,
+            name=f"{name}_bucket",
+            labels={**labels, "le": _format_value(bucket)},
+            value=1 if value <= bucket else 0,
+        )
+    _add(samples, name=f"{name}_sum", labels=labels, value=value)
+    _add(samples, name=f"{name}_count", labels=labels, value=1)
+
+
+def _key(name: str, labels: dict[str, str], /) -> str:
+    label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{name}{{{label_str}}}"
+
+
+def _escape(value: str, /) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float, /) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    metrics = SyncMetrics(src_table="src.sales.customer", dst_table="dw.sales.customer")
+    metrics.add_connect_seconds(side="src", seconds=0.042)
+    metrics.add_connect_seconds(side="dst", seconds=0.007)
+    metrics.add_result(
+        data.SyncResult.succeeded(
+            rows_added=10,
+            rows_deleted=1,
+            rows_updated=3,
+            execution_millis=2_500,
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as folder:
+        file = pathlib.Path(folder) / "poa.prom"
+        for _ in range(2):
+            if isinstance(err := metrics.write(path=file), data.Error):
+                raise err
+        print(file.read_text())
@@ -0,0 +1,115 @@
+import datetime
+import json
+import pathlib
+import typing
+
+from src import data
+
+__all__ = ("load",)
+
+
+def load(*, schedule_file: pathlib.Path) -> tuple[data.SyncJob, ...] | data.Error:
+    # noinspection PyBroadException
+    try:
+        if not schedule_file.exists():
+            return data.Error.new(
+                f"The schedule file specified, {schedule_file.resolve()!s}, does not exist.",
+                schedule_file=schedule_file,
+            )
+
+        with schedule_file.open("r") as fh:
+            d = typing.cast(dict[str, typing.Any], json.load(fh))
+
+        if "jobs" not in d.keys():
+            return data.Error.new("schedule file is missing an entry for 'jobs'.")
+
+        jobs: list[data.SyncJob] = []
+        for job_dict in d["jobs"]:
+            job = _parse_job_dict(job_dict)
+            if isinstance(job, data.Error):
+                return job
+
+            jobs.append(job)
+
+        names = [job.name for job in jobs]
+        if duplicates := sorted({name for name in names if names.count(name) > 1}):
+            return data.Error.new(f"Job names must be unique, but {', '.join(duplicates)} repeat.")
+
+        return tuple(jobs)
+    except:  # noqa: E722
+        return data.Error.new(
+            "An error occurred while loading the schedule file.",
+            schedule_file=schedule_file,
+        )
+
+
+def _parse_job_dict(job_dict: dict[str, typing.Any], /) -> data.SyncJob | data.Error:
+    # noinspection PyBroadException
+    try:
+        for key in ("name", "src-db", "src-table", "dst-db", "dst-schema", "dst-table", "pk"):
+            if key not in job_dict.keys():
+                return data.Error.new(
+                    f"job entry in schedule file is missing an entry for {key!r}."
+                )
+
+        name: typing.Final[str] = job_dict["name"]
+
+        every_seconds: typing.Final[int | None] = job_dict.get("every-seconds")
+        cron_expr: typing.Final[str | None] = job_dict.get("cron")
+        if (every_seconds is None) == (cron_expr is None):
+            return data.Error.new(
+                f"job {name!r} must have exactly one of 'every-seconds' or 'cron'.",
+            )
+
+        if every_seconds is not None and every_seconds <= 0:
+            return data.Error.new(f"job {name!r} has an 'every-seconds' that is not positive.")
+
+        if cron_expr is None:
+            cron: data.Cron | None = None
+        else:
+            parsed_cron = data.Cron.parse(cron_expr)
+            if isinstance(parsed_cron, data.Error):
+                return parsed_cron
+            cron = parsed_cron
+
+        compare: typing.Final[list[str] | None] = job_dict.get("compare")
+        increasing: typing.Final[list[str] | None] = job_dict.get("increasing")
+        capture_name: typing.Final[str | None] = job_dict.get("capture")
+        incremental: typing.Final[bool] = job_dict.get("incremental", False)
+        if incremental and not compare and not increasing and not capture_name:
+            return data.Error.new(
+                f"job {name!r} is incremental, so it needs one of 'compare', 'increasing', or "
+                f"'capture'."
+            )
+
+        after: typing.Final[dict[str, datetime.date]] = {
+            col: datetime.datetime.strptime(dt, "%Y-%m-%d").date()
+            for col, dt in job_dict.get("after", {}).items()
+        }
+
+        return data.SyncJob(
+            name=name,
+            src_db=job_dict["src-db"],
+            src_schema=job_dict.get("src-schema"),
+            src_table=job_dict["src-table"],
+            dst_db=job_dict["dst-db"],
+            dst_schema=job_dict["dst-schema"],
+            dst_table=job_dict["dst-table"],
+            pk=tuple(job_dict["pk"]),
+            incremental=incremental,
+            compare=frozenset(compare) if compare else None,
+            increasing=frozenset(increasing) if increasing else None,
+            capture=data.Capture(capture_name) if capture_name else None,
+            skip_if_row_counts_match=job_dict.get("skip-if-row-counts-match", False),
+            recreate=job_dict.get("recreate", False),
+            track_history=job_dict.get("track-history", False),
+            after=after,
+            every_seconds=every_seconds,
+            cron=cron,
+        )
+    except:  # noqa: E722
+        return data.Error.new("An error occurred while parsing job from json.")
+
+
+if __name__ == "__main__":
+    print(load(schedule_file=pathlib.Path(r"C:\bu\py\poa\assets\schedule.json")))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import concurrent.futures
+import pathlib
+import pickle
+import tempfile
+import typing
+
+from src import data
+
+__all__ = ("KeyDiff", "SpilledDiff", "diff_partition")
+
+# each side has a file open per partition while it's written, so this keeps well under the usual
+# limit of 1024 open files
+MAX_PARTITIONS: typing.Final[int] = 256
+
+# partition files are written through buffers this big, so a batch is a few large writes
+_BUFFER_BYTES: typing.Final[int] = 1024 * 1024
+
+_KeyValues = tuple[typing.Hashable, ...]
+
+
+class KeyDiff(typing.NamedTuple):
+    added: set[data.RowKey]
+    updated: set[data.RowKey]
+    deleted: set[data.RowKey]
+
+
+class SpilledDiff:
+    """Diffs the (key, digest) pairs of src and dst when they don't fit in memory together.
+
+    Each side's pairs are hash-partitioned by key into temp files, so a key lands in the same
+    partition on both sides, and then the partitions are diffed one at a time, or one per worker
+    process, so only that many partitions' pairs are held at once.  Only the keys that differ are
+    kept.
+
+    The temp files are deleted when the diff is closed.
+    """
+
+    def __init__(self, *, key_cols: tuple[str, ...], partitions: int):
+        self._key_cols: typing.Final[tuple[str, ...]] = key_cols
+        self._partitions: typing.Final[int] = partitions
+
+        self._folder: typing.Final[tempfile.TemporaryDirectory[str]] = tempfile.TemporaryDirectory(
+            prefix="poa_spill_"
+        )
+
+        self.src_pairs = 0
+        self.dst_pairs = 0
+
+    def __enter__(self) -> SpilledDiff:
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._folder.cleanup()
+
+    def write_src(self, batches: typing.Iterable[typing.Iterable[tuple[data.RowKey, str]]]) -> None:
+        self.src_pairs += self._write("src", batches)
+
+    def write_dst(self, batches: typing.Iterable[typing.Iterable[tuple[data.RowKey, str]]]) -> None:
+        self.dst_pairs += self._write("dst", batches)
+
+    def partitions(self) -> tuple[tuple[pathlib.Path, pathlib.Path], ...]:
+        """The src and dst file of each partition, which can be diffed by diff_partition in any
+        order, or at the same time.
+        """
+        return tuple(
+            (self._path("src", partition), self._path("dst", partition))
+            for partition in range(self._partitions)
+        )
+
+    def diff(self, *, max_workers: int = 1) -> KeyDiff:
+        """Diff every partition, in up to max_workers worker processes, if that's more than 1."""
+        partitions = self.partitions()
+        src_paths = [src_path for src_path, _ in partitions]
+        dst_paths = [dst_path for _, dst_path in partitions]
+
+        if max_workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(max_workers, len(partitions))
+            ) as pool:
+                # keys were hashed to their partition here, so the workers, which hash strs with
+                # their own seed, only look keys up within a partition
+                results = list(pool.map(diff_partition, src_paths, dst_paths))
+        else:
+            results = list(map(diff_partition, src_paths, dst_paths))
+
+        key_diff = KeyDiff(added=set(), updated=set(), deleted=set())
+        for added, updated, deleted in results:
+            key_diff.added.update(self._keys(added))
+            key_diff.updated.update(self._keys(updated))
+            key_diff.deleted.update(self._keys(deleted))
+        return key_diff
+
+    def _keys(self, key_values: typing.Iterable[_KeyValues], /) -> typing.Iterator[data.RowKey]:
+        return (data.FrozenDict(zip(self._key_cols, values)) for values in key_values)
+
+    def _path(self, side: str, partition: int, /) -> pathlib.Path:
+        return pathlib.Path(self._folder.name) / f"{side}_{partition:03d}.pickle"
+
+    def _write(
+        self,
+        side: str,
+        batches: typing.Iterable[typing.Iterable[tuple[data.RowKey, str]]],
+        /,
+    ) -> int:
+        files = [
+            self._path(side, partition).open("ab", buffering=_BUFFER_BYTES)
+            for partition in range(self._partitions)
+        ]
+        try:
+            pairs = 0
+            for batch in batches:
+                chunks: list[list[tuple[_KeyValues, str]]] = [[] for _ in files]
+                for key, digest in batch:
+                    values = tuple(key[col] for col in self._key_cols)
+                    # equal values hash the same whatever their type, like 1 and Decimal(1), so
+                    # src's and dst's copies of a key land in the same partition
+                    chunks[hash(values) % self._partitions].append((values, digest))
+
+                for fh, chunk in zip(files, chunks):
+                    if chunk:
+                        pickle.dump(chunk, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                        pairs += len(chunk)
+
+            return pairs
+        finally:
+            for fh in files:
+                fh.close()
+
+
+def diff_partition(
+    src_path: pathlib.Path,
+    dst_path: pathlib.Path,
+    /,
+) -> tuple[list[_KeyValues], list[_KeyValues], list[_KeyValues]]:
+    """The keys added, updated, and deleted in one partition, as tuples of key values.
+
+    It only takes paths, and returns plain tuples, so it can be run in another process.
+    """
+    src_digests = _read(src_path)
+    dst_digests = _read(dst_path)
+
+    added = [key for key in src_digests.keys() if key not in dst_digests]
+    updated = [
+        key
+        for key, digest in src_digests.items()
+        if key in dst_digests and dst_digests[key] != digest
+    ]
+    deleted = [key for key in dst_digests.keys() if key not in src_digests]
+    return added, updated, deleted
+
+
+def _read(path: pathlib.Path, /) -> dict[_KeyValues, str]:
+    digests: dict[_KeyValues, str] = {}
+    if not path.exists():
+        return digests
+
+    with path.open("rb", buffering=_BUFFER_BYTES) as fh:
+        while True:
+            try:
+                chunk = pickle.load(fh)
+            except EOFError:
+                return digests
+
+            digests.update(chunk)
@@ -1,6 +1,10 @@
 import argparse
 import datetime
+import multiprocessing
+import pathlib
+import signal
 import sys
+import threading
 
 import pydantic
 from loguru import logger
@@ -37,6 +41,8 @@ class FullSyncArgs:
     recreate: bool
     track_history: bool
     after: dict[str, datetime.date]
+    max_memory_bytes: int | None
+    trace_memory: bool
 
 
 @pydantic.dataclasses.dataclass(frozen=True, kw_only=True)
@@ -46,7 +52,22 @@ class IncrementalSyncArgs:
     src_table: str
     dst_db: str
     dst_schema: str
+    dst_table: str
     pk: tuple[str, ...]
+    compare: frozenset[str] | None
+    increasing: frozenset[str] | None
+    capture: data.Capture | None
+    skip_if_row_counts_match: bool
+    track_history: bool
+    after: dict[str, datetime.date]
+    max_memory_bytes: int | None
+    trace_memory: bool
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True)
+class ServeArgs:
+    schedule_file: pathlib.Path
+    max_workers: int
 
 
 @pydantic.dataclasses.dataclass(frozen=True, kw_only=True)
@@ -270,6 +291,131 @@ def _inspect(
         return data.Error.new(str(run_error), args=inspect_args)
 
 
+def _full_sync(*, full_sync_args: FullSyncArgs, config: data.Config) -> None | data.Error:
+    try:
+        src_db_config = config.db(full_sync_args.src_db)
+        if src_db_config is None:
+            return data.Error.new(
+                f"--src-db was {full_sync_args.src_db}, but could not find database entry by that "
+                f"name in the config file.",
+                full_sync_args=full_sync_args,
+            )
+
+        dst_db_config = config.db(full_sync_args.dst_db)
+        if dst_db_config is None:
+            return data.Error.new(
+                f"--dst-db was {full_sync_args.dst_db}, but could not find database entry by that "
+                f"name in the config file.",
+                full_sync_args=full_sync_args,
+            )
+
+        return service.sync(
+            src_db_config=src_db_config,
+            src_schema_name=full_sync_args.src_schema,
+            src_table_name=full_sync_args.src_table,
+            dst_db_config=dst_db_config,
+            dst_schema_name=full_sync_args.dst_schema,
+            dst_table_name=full_sync_args.dst_table,
+            incremental=False,
+            pk=list(full_sync_args.pk),
+            compare_cols=None,
+            increasing_cols=None,
+            skip_if_row_counts_match=False,
+            recreate=full_sync_args.recreate,
+            batch_ts=datetime.datetime.utcnow(),
+            track_history=full_sync_args.track_history,
+            after=full_sync_args.after,
+            batch_size=config.batch_size,
+            max_memory_bytes=full_sync_args.max_memory_bytes,
+            trace_memory=full_sync_args.trace_memory,
+            metrics_file=config.metrics_file,
+            batch_seconds=config.batch_seconds,
+            snapshot_folder=config.snapshot_folder,
+            diff_workers=config.diff_workers,
+        )
+    except Exception as e:
+        return data.Error.new(str(e), args=full_sync_args, config=config)
+
+
+def _incremental_sync(
+    *,
+    incremental_sync_args: IncrementalSyncArgs,
+    config: data.Config,
+) -> None | data.Error:
+    try:
+        src_db_config = config.db(incremental_sync_args.src_db)
+        if src_db_config is None:
+            return data.Error.new(
+                f"--src-db was {incremental_sync_args.src_db}, but could not find database entry "
+                f"by that name in the config file.",
+                incremental_sync_args=incremental_sync_args,
+            )
+
+        dst_db_config = config.db(incremental_sync_args.dst_db)
+        if dst_db_config is None:
+            return data.Error.new(
+                f"--dst-db was {incremental_sync_args.dst_db}, but could not find database entry "
+                f"by that name in the config file.",
+                incremental_sync_args=incremental_sync_args,
+            )
+
+        return service.sync(
+            src_db_config=src_db_config,
+            src_schema_name=incremental_sync_args.src_schema,
+            src_table_name=incremental_sync_args.src_table,
+            dst_db_config=dst_db_config,
+            dst_schema_name=incremental_sync_args.dst_schema,
+            dst_table_name=incremental_sync_args.dst_table,
+            incremental=True,
+            pk=list(incremental_sync_args.pk),
+            compare_cols=(
+                None if incremental_sync_args.compare is None
+                else set(incremental_sync_args.compare)
+            ),
+            increasing_cols=(
+                None if incremental_sync_args.increasing is None
+                else set(incremental_sync_args.increasing)
+            ),
+            skip_if_row_counts_match=incremental_sync_args.skip_if_row_counts_match,
+            recreate=False,
+            batch_ts=datetime.datetime.utcnow(),
+            track_history=incremental_sync_args.track_history,
+            after=incremental_sync_args.after,
+            batch_size=config.batch_size,
+            max_memory_bytes=incremental_sync_args.max_memory_bytes,
+            trace_memory=incremental_sync_args.trace_memory,
+            metrics_file=config.metrics_file,
+            batch_seconds=config.batch_seconds,
+            snapshot_folder=config.snapshot_folder,
+            diff_workers=config.diff_workers,
+            capture=incremental_sync_args.capture,
+        )
+    except Exception as e:
+        return data.Error.new(str(e), args=incremental_sync_args, config=config)
+
+
+def _serve(*, serve_args: ServeArgs, config: data.Config) -> None | data.Error:
+    try:
+        jobs = adapter.schedule.load(schedule_file=serve_args.schedule_file)
+        if isinstance(jobs, data.Error):
+            return jobs
+
+        logger.info(f"Serving {len(jobs)} jobs with up to {serve_args.max_workers} at a time...")
+
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        return service.serve(
+            config=config,
+            jobs=jobs,
+            max_workers=serve_args.max_workers,
+            stop=stop,
+        )
+    except Exception as e:
+        return data.Error.new(str(e), args=serve_args, config=config)
+
+
 def _parse_check_args(args: argparse.Namespace, /) -> CheckArgs | data.Error:
     try:
         if not args.src_db:
@@ -342,6 +488,135 @@ def _parse_inspect_args(args: argparse.Namespace, /) -> InspectArgs | data.Error
         return data.Error.new(str(inspect_error), inspect_args=args)
 
 
+def _parse_full_sync_args(args: argparse.Namespace, /) -> FullSyncArgs | data.Error:
+    try:
+        if not args.pk:
+            return data.Error.new("--pk is required.", full_sync_args=args)
+
+        after = _parse_after(args)
+        if isinstance(after, data.Error):
+            return after
+
+        max_memory_bytes = _parse_max_memory(args)
+        if isinstance(max_memory_bytes, data.Error):
+            return max_memory_bytes
+
+        return FullSyncArgs(
+            src_db=args.src_db,
+            src_schema=args.src_schema,
+            src_table=args.src_table,
+            dst_db=args.dst_db,
+            dst_schema=args.dst_schema,
+            dst_table=args.dst_table,
+            pk=tuple(args.pk),
+            recreate=args.recreate,
+            track_history=args.track_history,
+            after=after,
+            max_memory_bytes=max_memory_bytes,
+            trace_memory=args.trace_memory,
+        )
+    except Exception as full_sync_error:
+        return data.Error.new(str(full_sync_error), full_sync_args=args)
+
+
+def _parse_incremental_sync_args(args: argparse.Namespace, /) -> IncrementalSyncArgs | data.Error:
+    try:
+        if not args.pk:
+            return data.Error.new("--pk is required.", incremental_sync_args=args)
+
+        if not args.compare and not args.increasing and not args.capture:
+            return data.Error.new(
+                "One of --compare, --increasing, or --capture is required, but none were provided.",
+                incremental_sync_args=args,
+            )
+
+        after = _parse_after(args)
+        if isinstance(after, data.Error):
+            return after
+
+        max_memory_bytes = _parse_max_memory(args)
+        if isinstance(max_memory_bytes, data.Error):
+            return max_memory_bytes
+
+        return IncrementalSyncArgs(
+            src_db=args.src_db,
+            src_schema=args.src_schema,
+            src_table=args.src_table,
+            dst_db=args.dst_db,
+            dst_schema=args.dst_schema,
+            dst_table=args.dst_table,
+            pk=tuple(args.pk),
+            compare=frozenset(args.compare) if args.compare else None,
+            increasing=frozenset(args.increasing) if args.increasing else None,
+            capture=data.Capture(args.capture) if args.capture else None,
+            skip_if_row_counts_match=args.skip_if_row_counts_match,
+            track_history=args.track_history,
+            after=after,
+            max_memory_bytes=max_memory_bytes,
+            trace_memory=args.trace_memory,
+        )
+    except Exception as incremental_sync_error:
+        return data.Error.new(str(incremental_sync_error), incremental_sync_args=args)
+
+
+def _parse_serve_args(args: argparse.Namespace, /) -> ServeArgs | data.Error:
+    try:
+        if args.max_workers < 1:
+            return data.Error.new("--max-workers must be at least 1.", serve_args=args)
+
+        if args.schedule:
+            schedule_file: pathlib.Path | data.Error = pathlib.Path(args.schedule)
+        else:
+            schedule_file = adapter.fs.get_schedule_path()
+        if isinstance(schedule_file, data.Error):
+            return schedule_file
+
+        return ServeArgs(schedule_file=schedule_file, max_workers=args.max_workers)
+    except Exception as serve_error:
+        return data.Error.new(str(serve_error), serve_args=args)
+
+
+def _parse_after(args: argparse.Namespace, /) -> dict[str, datetime.date] | data.Error:
+    if not args.after:
+        return {}
+
+    if len(args.after) % 2 != 0:
+        return data.Error.new(
+            f"If after is provided, then it must have an even number of elements, but got "
+            f"{args.after!r}."
+        )
+
+    return {
+        args.after[i]: datetime.datetime.strptime(args.after[i + 1], "%Y-%m-%d").date()
+        for i in range(0, len(args.after), 2)
+    }
+
+
+def _parse_max_memory(args: argparse.Namespace, /) -> int | None | data.Error:
+    if not args.max_memory:
+        return None
+
+    text = args.max_memory.strip().upper().removesuffix("B")
+    multiplier = 1
+    for suffix, suffix_multiplier in (("K", 1024), ("M", 1024**2), ("G", 1024**3)):
+        if text.endswith(suffix):
+            text = text.removesuffix(suffix)
+            multiplier = suffix_multiplier
+            break
+
+    try:
+        max_memory_bytes = int(float(text) * multiplier)
+    except ValueError:
+        return data.Error.new(
+            f"--max-memory must be a size like 512MB or 2GB, but got {args.max_memory!r}."
+        )
+
+    if max_memory_bytes <= 0:
+        return data.Error.new(f"--max-memory must be positive, but got {args.max_memory!r}.")
+
+    return max_memory_bytes
+
+
 def _run(args: argparse.Namespace, /) -> None | data.Error:
     match cmd := args.command:
         case "check":
@@ -351,6 +626,20 @@ def _run(args: argparse.Namespace, /) -> None | data.Error:
                 sys.exit(1)
 
             return _check(check_args=check_args, config=cfg)
+        case "full-sync":
+            full_sync_args = _parse_full_sync_args(args)
+            if isinstance(full_sync_args, data.Error):
+                logger.error(str(full_sync_args))
+                sys.exit(1)
+
+            return _full_sync(full_sync_args=full_sync_args, config=cfg)
+        case "incremental-sync":
+            incremental_sync_args = _parse_incremental_sync_args(args)
+            if isinstance(incremental_sync_args, data.Error):
+                logger.error(str(incremental_sync_args))
+                sys.exit(1)
+
+            return _incremental_sync(incremental_sync_args=incremental_sync_args, config=cfg)
         case "inspect":
             inspect_args = _parse_inspect_args(args)
             if isinstance(inspect_args, data.Error):
@@ -358,11 +647,22 @@ def _run(args: argparse.Namespace, /) -> None | data.Error:
                 sys.exit(1)
 
             return _inspect(inspect_args=inspect_args, config=cfg)
+        case "serve":
+            serve_args = _parse_serve_args(args)
+            if isinstance(serve_args, data.Error):
+                logger.error(str(serve_args))
+                sys.exit(1)
+
+            return _serve(serve_args=serve_args, config=cfg)
         case _:
             raise data.Error.new(f"Unrecognized command, {cmd!r}.", args=args)
 
 
 if __name__ == "__main__":
+    # the exe is frozen, so the workers a compare starts with diff-workers would otherwise run the
+    # cli again, rather than the diff
+    multiprocessing.freeze_support()
+
     try:
         batch_ts = datetime.datetime.utcnow()
 
@@ -377,18 +677,6 @@ if __name__ == "__main__":
 
         logger.add(log_folder / "error.log", rotation="5 MB", retention="7 days", level="ERROR")
 
-        config_file_path = adapter.fs.get_config_path()
-        if isinstance(config_file_path, data.Error):
-            logger.error(
-                f"An error occurred while looking up config_file_path: {config_file_path!s}"
-            )
-            sys.exit(1)
-
-        cfg = adapter.config.load(config_file=config_file_path)
-        if isinstance(cfg, data.Error):
-            logger.error(f"An error occurred while loading config file: {cfg!s}")
-            sys.exit(1)
-
         parser = argparse.ArgumentParser()
         subparser = parser.add_subparsers(dest="command")
 
@@ -397,6 +685,7 @@ if __name__ == "__main__":
         full_sync_parser = subparser.add_parser("full-sync")
         inspect_parser = subparser.add_parser("inspect")
         incremental_sync_parser = subparser.add_parser("incremental-sync")
+        serve_parser = subparser.add_parser("serve")
 
         check_parser.add_argument("--src-db", type=str, required=True)
         check_parser.add_argument("--src-schema", type=str, required=True)
@@ -420,6 +709,8 @@ if __name__ == "__main__":
         full_sync_parser.add_argument("--after", nargs="+", type=str)
         full_sync_parser.add_argument("--recreate", action="store_true")
         full_sync_parser.add_argument("--track-history", action="store_true")
+        full_sync_parser.add_argument("--max-memory", type=str)
+        full_sync_parser.add_argument("--trace-memory", action="store_true")
 
         incremental_sync_parser.add_argument("--src-db", type=str, required=True)
         incremental_sync_parser.add_argument("--src-schema", type=str, required=True)
@@ -431,9 +722,17 @@ if __name__ == "__main__":
         incremental_strategy_options = incremental_sync_parser.add_mutually_exclusive_group()
         incremental_strategy_options.add_argument("--compare", nargs="+", type=str)
         incremental_strategy_options.add_argument("--increasing", nargs="+", type=str)
+        incremental_strategy_options.add_argument(
+            "--capture", type=str, choices=[capture.value for capture in data.Capture]
+        )
         incremental_sync_parser.add_argument("--skip-if-row-counts-match", action="store_true")
         incremental_sync_parser.add_argument("--track-history", action="store_true")
         incremental_sync_parser.add_argument("--after", nargs="+", type=str)
+        incremental_sync_parser.add_argument("--max-memory", type=str)
+        incremental_sync_parser.add_argument("--trace-memory", action="store_true")
+
+        serve_parser.add_argument("--schedule", type=str)
+        serve_parser.add_argument("--max-workers", type=int, default=4)
 
         inspect_parser.add_argument("--db", type=str, required=True)
         inspect_parser.add_argument("--schema", type=str, required=True)
@@ -441,7 +740,23 @@ if __name__ == "__main__":
         inspect_parser.add_argument("--cache-db", type=str, required=True)
         inspect_parser.add_argument("--pk", nargs="+")
 
-        result = _run(parser.parse_args(sys.argv[1:]))
+        args = parser.parse_args(sys.argv[1:])
+
+        # the config is read once the arguments are known to be valid, so --help and typos exit
+        # without paying for it
+        config_file_path = adapter.fs.get_config_path()
+        if isinstance(config_file_path, data.Error):
+            logger.error(
+                f"An error occurred while looking up config_file_path: {config_file_path!s}"
+            )
+            sys.exit(1)
+
+        cfg = adapter.config.load(config_file=config_file_path)
+        if isinstance(cfg, data.Error):
+            logger.error(f"An error occurred while loading config file: {cfg!s}")
+            sys.exit(1)
+
+        result = _run(args)
         if isinstance(result, data.Error):
             logger.error(str(result))
             sys.exit(1)
@@ -1,21 +1,39 @@
 from src.data.api import *
 from src.data.batch_id import *
+from src.data.batch_sizer import *
 from src.data.cache import *
+from src.data.capture import *
+from src.data.cdc_src_ds import *
+from src.data.change_batch import *
+from src.data.change_detector import *
 from src.data.check_result import *
 from src.data.column import *
 from src.data.compare_rows import *
 from src.data.config import *
+from src.data.cron import *
 from src.data.cursor import *
 from src.data.cursor_provider import *
 from src.data.data_type import *
 from src.data.db_config import *
 from src.data.dst_ds import *
 from src.data.error import *
+from src.data.estimate_row_bytes import *
+from src.data.file_export import *
 from src.data.frozen_dict import *
+from src.data.lock_policy import *
 from src.data.log import *
+from src.data.plan_sync import *
 from src.data.row import *
+from src.data.row_change import *
 from src.data.row_diff import *
+from src.data.row_digest import *
 from src.data.row_key import *
 from src.data.src_ds import *
+from src.data.sync_history import *
+from src.data.sync_job import *
+from src.data.sync_phase import *
+from src.data.sync_plan import *
 from src.data.sync_result import *
 from src.data.table import *
+from src.data.table_snapshot import *
+from src.data.table_stats import *
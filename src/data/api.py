@@ -4,10 +4,12 @@ __all__ = ("API",)
 
 
 class API(enum.Enum):
+    FILE = "file"
     HH = "hh"
     MSSQL = "mssql"
     PYODBC = "pyodbc"
     PSYCOPG = "psycopg"
+    SQLITE = "sqlite"
 
     def __repr__(self) -> str:
         return f"API.{self.name}"
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import typing
+
+from src.data.column import Column
+from src.data.estimate_row_bytes import estimate_row_bytes
+
+__all__ = ("BatchSizer",)
+
+# how much a cold start fetches or writes at once, before any batch has been timed
+_COLD_START_BYTES: typing.Final[int] = 4 * 1024 * 1024
+
+# a batch can't grow past this, however narrow or fast the table is
+_MAX_BATCH_SIZE: typing.Final[int] = 1_000_000
+
+# how far one batch can move the size, so a single slow batch, like one that waited on a lock,
+# can't undo what the ones before it learned
+_MAX_STEP: typing.Final[float] = 2.0
+
+
+class BatchSizer:
+    """Picks the number of rows per batch for one phase of a sync, like upsert or delete.
+
+    Each batch is timed with observe, and the size moves toward one that would take
+    target_seconds, at most doubling or halving per batch, and never past what fits in max_bytes.
+    When target_seconds is None, the size stays at initial, and when max_bytes is None, it never
+    grows past initial.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        row_bytes: int,
+        max_bytes: int | None,
+        target_seconds: float | None,
+    ) -> None:
+        self._max_size: typing.Final[int] = (
+            max(1, initial)
+            if max_bytes is None
+            else max(1, min(_MAX_BATCH_SIZE, max_bytes // row_bytes))
+        )
+        self._target_seconds: typing.Final[float | None] = target_seconds
+
+        self.size = max(1, min(self._max_size, initial))
+
+    @staticmethod
+    def start(
+        *,
+        columns: typing.Iterable[Column],
+        warm_size: int | None,
+        max_bytes: int,
+        target_seconds: float,
+    ) -> BatchSizer:
+        """Start from the size the last run ended on, or else from the estimated row width."""
+        row_bytes = estimate_row_bytes(columns)
+        return BatchSizer(
+            initial=warm_size or _COLD_START_BYTES // row_bytes,
+            row_bytes=row_bytes,
+            max_bytes=max_bytes,
+            target_seconds=target_seconds,
+        )
+
+    def observe(self, *, rows: int, seconds: float) -> None:
+        if self._target_seconds is None or rows == 0:
+            return
+
+        # a batch too quick to time tells us only that it could be bigger
+        if seconds <= 0:
+            ideal = self.size * _MAX_STEP
+        else:
+            ideal = rows / seconds * self._target_seconds
+
+        ideal = max(self.size / _MAX_STEP, min(self.size * _MAX_STEP, ideal))
+
+        # average with the current size, so the latency of any one batch is smoothed over
+        self.size = max(1, min(self._max_size, int((self.size + ideal) / 2)))
+
+    def __repr__(self) -> str:
+        return f"BatchSizer(size={self.size}, target_seconds={self._target_seconds})"
+
+
+if __name__ == "__main__":
+    sizer = BatchSizer(initial=1_000, row_bytes=200, max_bytes=10_000_000, target_seconds=1)
+    for _ in range(10):
+        sizer.observe(rows=sizer.size, seconds=sizer.size / 20_000)
+        print(sizer)
@@ -0,0 +1,23 @@
+import enum
+
+__all__ = ("Capture",)
+
+
+class Capture(enum.Enum):
+    """How an incremental sync learns what changed in src, without comparing it to dst.
+
+    LOGICAL_REPLICATION decodes a Postgres logical replication slot.  CHANGELOG drains a table that
+    triggers on the src table log changed keys to, for databases that don't allow slots.  XMIN
+    finds the rows written since the last sync by their transaction id, so it needs nothing
+    installed, but it can't see deletes.
+    """
+
+    CHANGELOG = "changelog"
+    LOGICAL_REPLICATION = "logical-replication"
+    XMIN = "xmin"
+
+    def __repr__(self) -> str:
+        return f"Capture.{self.name}"
+
+    def __str__(self) -> str:
+        return self.value
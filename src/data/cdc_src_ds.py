@@ -0,0 +1,39 @@
+import abc
+
+from src.data.change_batch import ChangeBatch
+from src.data.error import Error
+from src.data.src_ds import SrcDs
+
+__all__ = ("CdcSrcDs",)
+
+
+class CdcSrcDs(SrcDs):
+    """A SrcDs that also captures changes as they are made, so they can be applied without
+    reading the whole table.
+    """
+
+    @abc.abstractmethod
+    def start_capture(self) -> bool | Error:
+        """Start capturing changes, if that hasn't been done already.
+
+        Returns True if capture has just started, in which case nothing from before now was
+        captured, and the table needs a full refresh.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def current_watermark(self) -> str | None | Error:
+        """Where capture is up to now.  Taken before a full refresh reads src, it's where the
+        changes after the refresh start from.  None if capture can't tell.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fetch_changes(self, *, after: str | None, limit: int) -> ChangeBatch | Error:
+        """Up to about limit changes, from after the watermark, after, on."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def confirm(self, *, watermark: str) -> None | Error:
+        """Let src discard what was captured up to watermark, now that it has been applied."""
+        raise NotImplementedError
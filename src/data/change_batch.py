@@ -0,0 +1,18 @@
+import pydantic
+
+from src.data.row_change import RowChange
+
+__all__ = ("ChangeBatch",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class ChangeBatch:
+    """The changes captured since a watermark, in the order they were made.
+
+    watermark is where the next batch starts from, once these changes have been applied, or None
+    if nothing has been captured since.  more is True if changes were left for the next batch.
+    """
+
+    changes: tuple[RowChange, ...]
+    watermark: str | None
+    more: bool
@@ -0,0 +1,17 @@
+import abc
+
+from src.data.error import Error
+from src.data.table_snapshot import TableSnapshot
+
+__all__ = ("ChangeDetector",)
+
+
+class ChangeDetector(abc.ABC):
+    @abc.abstractmethod
+    def snapshot(self) -> TableSnapshot | None | Error:
+        """Read the table's change counters from the catalog, without touching its data.
+
+        Returns None when the counters can't be trusted right now, like after a restart has
+        cleared them, in which case the table has to be assumed changed.
+        """
+        raise NotImplementedError
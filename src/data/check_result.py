@@ -1,11 +1,15 @@
-import typing
-
 import pydantic
 
+from src.data.frozen_dict import FrozenDict
+
 __all__ = ("CheckResult",)
 
 
-@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+@pydantic.dataclasses.dataclass(
+    frozen=True,
+    kw_only=True,
+    config=pydantic.ConfigDict(strict=True, arbitrary_types_allowed=True),
+)
 class CheckResult:
     src_db_name: str
     src_schema_name: str | None
@@ -15,6 +19,6 @@ class CheckResult:
     dst_table_name: str
     src_rows: int | None
     dst_rows: int | None
-    missing_keys: frozenset[dict[str, typing.Hashable]] | None
-    extra_keys: frozenset[dict[str, typing.Hashable]] | None
+    missing_keys: frozenset[FrozenDict] | None
+    extra_keys: frozenset[FrozenDict] | None
     execution_millis: int
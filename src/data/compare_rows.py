@@ -1,3 +1,6 @@
+import concurrent.futures
+import operator
+import os
 import typing
 
 from src.data.frozen_dict import FrozenDict
@@ -7,18 +10,138 @@ from src.data.row_key import RowKey
 
 __all__ = ("compare_rows",)
 
+# below this many rows per worker, starting the workers and shipping them rows takes longer than
+# the diff it saves
+_MIN_ROWS_PER_WORKER: typing.Final[int] = 250_000
+
+_Values = tuple[typing.Any, ...]
+
 
 def compare_rows(
     *,
     src_rows: typing.Iterable[Row],
     dst_rows: typing.Iterable[Row],
     key_cols: typing.Iterable[str],
+    max_workers: int | None = 1,
 ) -> RowDiff:
+    """Diff src_rows against dst_rows by key_cols.
+
+    When max_workers is more than 1, or None for one per cpu, and there are enough rows, both
+    sides are hash-partitioned by key, and the partitions are diffed in worker processes.  Rows are
+    sent to the workers as tuples of values, and the workers send back positions, so the diff is
+    made of the same row objects either way.
+    """
+    key_cols = tuple(key_cols)
+    src_rows = src_rows if isinstance(src_rows, typing.Sequence) else tuple(src_rows)
+    dst_rows = dst_rows if isinstance(dst_rows, typing.Sequence) else tuple(dst_rows)
+
+    workers = min(
+        (os.cpu_count() or 1) if max_workers is None else max_workers,
+        (len(src_rows) + len(dst_rows)) // _MIN_ROWS_PER_WORKER,
+    )
+    if workers > 1 and src_rows:
+        return _compare_rows_in_parallel(
+            src_rows=src_rows,
+            dst_rows=dst_rows,
+            key_cols=key_cols,
+            workers=workers,
+        )
+
     indexed_src_rows = _index_rows(key_cols=key_cols, rows=src_rows)
     indexed_dst_rows = _index_rows(key_cols=key_cols, rows=dst_rows)
     return _compare_rows(indexed_src_rows=indexed_src_rows, indexed_dst_rows=indexed_dst_rows)
 
 
+def _compare_rows_in_parallel(
+    *,
+    src_rows: typing.Sequence[Row],
+    dst_rows: typing.Sequence[Row],
+    key_cols: tuple[str, ...],
+    workers: int,
+) -> RowDiff:
+    # the columns are sent once, and each row as its values in that order, rather than as a dict
+    col_names = tuple(src_rows[0].keys())
+    key_positions = tuple(col_names.index(col) for col in key_cols)
+    get_key = operator.itemgetter(*key_positions)
+
+    # a few partitions per worker, so one slow partition doesn't hold up the rest
+    partitions = workers * 4
+
+    src_parts: list[list[int]] = [[] for _ in range(partitions)]
+    dst_parts: list[list[int]] = [[] for _ in range(partitions)]
+    src_values: list[list[_Values]] = [[] for _ in range(partitions)]
+    dst_values: list[list[_Values]] = [[] for _ in range(partitions)]
+    for rows, parts, part_values in (
+        (src_rows, src_parts, src_values),
+        (dst_rows, dst_parts, dst_values),
+    ):
+        for i, row in enumerate(rows):
+            values = tuple(row[col] for col in col_names)
+            part = hash(get_key(values)) % partitions
+            parts[part].append(i)
+            part_values[part].append(values)
+
+    added: list[int] = []
+    updated: list[tuple[int, int]] = []
+    deleted: list[int] = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (
+                src_parts[part],
+                dst_parts[part],
+                pool.submit(_diff_partition, key_positions, src_values[part], dst_values[part]),
+            )
+            for part in range(partitions)
+        ]
+        for src_part, dst_part, future in futures:
+            part_added, part_updated, part_deleted = future.result()
+            added.extend(src_part[i] for i in part_added)
+            updated.extend((src_part[i], dst_part[j]) for i, j in part_updated)
+            deleted.extend(dst_part[j] for j in part_deleted)
+
+    def key(row: Row, /) -> RowKey:
+        return FrozenDict({col: row[col] for col in key_cols})
+
+    return RowDiff(
+        added={key(src_rows[i]): src_rows[i] for i in sorted(added)},
+        updated={
+            key(src_rows[i]): (src_rows[i], dst_rows[j]) for i, j in sorted(updated)
+        },
+        deleted={key(dst_rows[j]): dst_rows[j] for j in sorted(deleted)},
+    )
+
+
+def _diff_partition(
+    key_positions: tuple[int, ...],
+    src_values: list[_Values],
+    dst_values: list[_Values],
+    /,
+) -> tuple[list[int], list[tuple[int, int]], list[int]]:
+    """The positions of the rows added, updated, and deleted in one partition.  It runs in a
+    worker process, so it only takes and returns plain values.
+    """
+    def index(values: list[_Values], /) -> dict[_Values, int]:
+        return {
+            tuple(row[pos] for pos in key_positions): i for i, row in enumerate(values)
+        }
+
+    src_index = index(src_values)
+    dst_index = index(dst_values)
+
+    added: list[int] = []
+    updated: list[tuple[int, int]] = []
+    for key, i in src_index.items():
+        j = dst_index.get(key)
+        if j is None:
+            added.append(i)
+        elif src_values[i] != dst_values[j]:
+            updated.append((i, j))
+
+    deleted = [j for key, j in dst_index.items() if key not in src_index]
+
+    return added, updated, deleted
+
+
 def _index_rows(*, key_cols: typing.Iterable[str], rows: typing.Iterable[Row]) -> dict[RowKey, Row]:
     return {
         FrozenDict({col: row[col] for col in key_cols}): row
@@ -1,3 +1,5 @@
+import pathlib
+
 import pydantic
 
 from src.data.db_config import DbConfig
@@ -11,6 +13,10 @@ class Config:
     days_logs_to_keep: pydantic.PositiveInt
     batch_size: pydantic.PositiveInt
     databases: tuple[DbConfig, ...]
+    metrics_file: pathlib.Path | None = None
+    batch_seconds: pydantic.PositiveFloat | None = None
+    snapshot_folder: pathlib.Path | None = None
+    diff_workers: pydantic.PositiveInt = 1
 
     def db(self, /, db_id: str) -> DbConfig | None:
         return next((db for db in self.databases if db.db_id == db_id), None)
@@ -19,5 +25,7 @@ class Config:
         return (
             f"Config(seconds_between_cleanups={self.seconds_between_cleanups}, "
             f"days_logs_to_keep={self.days_logs_to_keep}, batch_size={self.batch_size}, "
-            f"datasources={self.databases})"
+            f"datasources={self.databases}, metrics_file={self.metrics_file}, "
+            f"batch_seconds={self.batch_seconds}, snapshot_folder={self.snapshot_folder}, "
+            f"diff_workers={self.diff_workers})"
         )
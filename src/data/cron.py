@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import datetime
+import typing
+
+import pydantic
+
+from src.data.error import Error
+
+__all__ = ("Cron",)
+
+# (min, max) of each field, in the order they are written
+_FIELD_RANGES: typing.Final[tuple[tuple[int, int], ...]] = (
+    (0, 59),  # minute
+    (0, 23),  # hour
+    (1, 31),  # day of month
+    (1, 12),  # month
+    (0, 7),  # day of week, where 0 and 7 are both Sunday
+)
+
+# no five-field expression can go longer than this between matches, Feb 29 on a Monday included
+_MAX_SEARCH: typing.Final[datetime.timedelta] = datetime.timedelta(days=366 * 28)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class Cron:
+    """A standard five-field cron expression, like "*/15 6-18 * * 1-5".
+
+    Each field may be *, a number, a range like 1-5, a step like */15 or 0-30/10, or a comma
+    separated list of those.  Names like MON or JAN are not supported.
+    """
+
+    expr: str
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    any_day: bool
+    any_weekday: bool
+
+    @staticmethod
+    def parse(expr: str, /) -> Cron | Error:
+        fields = expr.split()
+        if len(fields) != 5:
+            return Error.new(
+                f"A cron expression must have 5 fields, but {expr!r} has {len(fields)}.",
+                expr=expr,
+            )
+
+        parsed: list[frozenset[int]] = []
+        for field, (lo, hi) in zip(fields, _FIELD_RANGES):
+            values = _parse_field(field, lo=lo, hi=hi)
+            if isinstance(values, Error):
+                return values
+            parsed.append(values)
+
+        minutes, hours, days, months, weekdays = parsed
+
+        return Cron(
+            expr=expr,
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            weekdays=frozenset(d % 7 for d in weekdays),
+            any_day=fields[2] == "*",
+            any_weekday=fields[4] == "*",
+        )
+
+    def next_after(self, ts: datetime.datetime, /) -> datetime.datetime | None:
+        """The first minute after ts that matches, or None if the expression can never match,
+        like "0 0 31 2 *".
+        """
+        t = ts.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = t + _MAX_SEARCH
+        while t < limit:
+            if t.month not in self.months:
+                if t.month == 12:
+                    t = t.replace(year=t.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    t = t.replace(month=t.month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + datetime.timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t
+        return None
+
+    def __repr__(self) -> str:
+        return f"Cron({self.expr!r})"
+
+    def _day_matches(self, ts: datetime.datetime, /) -> bool:
+        day_matches = ts.day in self.days
+        # datetime counts weekdays from Monday, and cron counts them from Sunday
+        weekday_matches = (ts.weekday() + 1) % 7 in self.weekdays
+
+        # when both are restricted, cron runs on either, so "0 0 1 * 1" is the 1st and Mondays
+        if self.any_day:
+            return weekday_matches
+        if self.any_weekday:
+            return day_matches
+        return day_matches or weekday_matches
+
+
+def _parse_field(field: str, /, *, lo: int, hi: int) -> frozenset[int] | Error:
+    values: set[int] = set()
+    for part in field.split(","):
+        try:
+            rng, _, step_str = part.partition("/")
+            step = int(step_str) if step_str else 1
+
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start_str, end_str = rng.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(rng)
+                end = hi if step_str else start
+        except ValueError:
+            return Error.new(f"{part!r} is not a valid cron field.", field=field)
+
+        if step < 1 or start < lo or end > hi or start > end:
+            return Error.new(
+                f"{part!r} is out of range, as values must be between {lo} and {hi}.",
+                field=field,
+            )
+
+        values.update(range(start, end + 1, step))
+
+    return frozenset(values)
+
+
+if __name__ == "__main__":
+    cron = Cron.parse("*/15 6-18 * * 1-5")
+    assert not isinstance(cron, Error)
+    print(cron.next_after(datetime.datetime(2024, 3, 1, 18, 50)))
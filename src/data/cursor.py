@@ -4,16 +4,34 @@ import typing
 from src.data.error import Error
 from src.data.row import Row
 
-__all__ = ("Cursor",)
+__all__ = (
+    "Cursor",
+    "TrustedSql",
+)
+
+
+class TrustedSql(typing.Protocol):
+    """A statement composed by the driver from quoted identifiers, e.g. psycopg.sql.Composed.
+
+    Cursors skip the query_errors scan for these, since none of their text comes from user input.
+    """
+
+    def as_string(self, context: typing.Any = None) -> str:
+        raise NotImplementedError
 
 
 class Cursor(abc.ABC):
+    """prepare asks the driver to use a server-side prepared statement, for statements that are run
+    once per batch.  Drivers that cannot honor it ignore it.
+    """
+
     @abc.abstractmethod
     def execute(
         self,
         *,
-        sql: str,
+        sql: str | TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> None | Error:
         raise NotImplementedError
 
@@ -21,17 +39,32 @@ class Cursor(abc.ABC):
     def execute_many(
         self,
         *,
-        sql: str,
+        sql: str | TrustedSql,
         params: typing.Iterable[typing.Iterable[typing.Hashable]],
     ) -> None | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def fetch_batches(
+        self,
+        *,
+        sql: str | TrustedSql,
+        params: typing.Iterable[typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[tuple[Row, ...]] | Error:
+        """Stream the result in batches of batch_size rows, rather than holding all of it at once.
+
+        Errors found before the query runs are returned, errors while streaming are raised.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def fetch_one(
         self,
         *,
-        sql: str,
+        sql: str | TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> Row | None | Error:
         raise NotImplementedError
 
@@ -39,7 +72,8 @@ class Cursor(abc.ABC):
     def fetch_all(
         self,
         *,
-        sql: str,
+        sql: str | TrustedSql,
         params: typing.Iterable[typing.Hashable] | None,
+        prepare: bool = False,
     ) -> tuple[Row, ...] | Error:
         raise NotImplementedError
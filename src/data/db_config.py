@@ -1,6 +1,10 @@
+import pathlib
+
 import pydantic
 
 from src import data
+from src.data.file_export import FileExport
+from src.data.lock_policy import LockPolicy
 
 __all__ = ("DbConfig",)
 
@@ -14,6 +18,10 @@ class DbConfig:
     keyring_db_username_entry: str | None
     keyring_db_password_entry: str | None
     connection_string: pydantic.SecretStr | None
+    binary: bool = False
+    export: FileExport | None = None
+    path: pathlib.Path | None = None
+    lock: LockPolicy = LockPolicy.WAIT
 
     def __repr__(self) -> str:
         return f"DbConfig(db_id={self.db_id!r}, api={self.api!r})"
@@ -33,13 +33,34 @@ class DstDs(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def delete_rows(self, *, keys: typing.Iterable[RowKey]) -> None | Error:
+    def delete_rows(self, *, keys: typing.Iterable[RowKey]) -> int | Error:
+        """Mark the rows with keys as deleted, and return how many there were that weren't
+        already.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
     def drop_table(self) -> None | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def fetch_digests(self) -> dict[RowKey, str] | Error:
+        """The key and poa_hd of every row that hasn't been deleted."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[typing.Sequence[Row]] | Error:
+        """Like fetch_rows, but streamed batch_size rows at a time.  poa_hd can be asked for like
+        any other column.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def fetch_rows(
         self,
@@ -59,6 +80,14 @@ class DstDs(abc.ABC):
     def get_row_count(self) -> int | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def lock(self) -> bool | Error:
+        """Hold the table until the sync's writes are committed, so syncs to it from other
+        processes don't interleave.  False means another sync holds it, and this one should be
+        skipped.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def table_exists(self) -> bool | Error:
         raise NotImplementedError
@@ -72,5 +101,10 @@ class DstDs(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def upsert_rows_from_staging(self, /, rows: typing.Iterable[Row]) -> None | Error:
+    def upsert_rows_from_staging(self, /, rows: typing.Iterable[Row]) -> int | Error:
+        """Add or update rows, and return how many were added or had a value change.
+
+        A row whose values are the same as dst's, but whose poa_hd isn't, as with one written
+        before poa_hd was a data.row_digest, just has its poa_hd rewritten, and isn't counted.
+        """
         raise NotImplementedError
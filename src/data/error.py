@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import dataclasses
-import inspect
+import functools
 import pathlib
+import sys
 import typing
 
 __all__ = ("Error",)
@@ -16,11 +17,11 @@ class Error(Exception):
     error_message: str
 
     @staticmethod
-    def new(error_message: str, **kwargs: typing.Hashable) -> Error:
+    def new(error_message: str, /, **kwargs: typing.Hashable) -> Error:
+        # sys._getframe only grabs a reference to the caller's frame, whereas inspect.stack() walks
+        # every frame and reads their source lines from disk.  The path is trimmed in __str__.
         try:
-            frame = inspect.stack()[1].frame
-            fn_name = frame.f_code.co_name
-            filename = pathlib.Path(frame.f_code.co_filename).with_suffix("").name
+            code = sys._getframe(1).f_code
         except:  # noqa
             return Error(
                 file="",
@@ -29,19 +30,18 @@ class Error(Exception):
                 error_message="An error occurred while inspecting the first frame to create a new Context.",
             )
 
-        if kwargs:
-            fn_args: dict[str, typing.Hashable] = kwargs
-        else:
-            fn_args = {}
-
         return Error(
-            file=filename,
-            fn=fn_name,
-            fn_args=fn_args,
+            file=code.co_filename,
+            fn=code.co_name,
+            fn_args=kwargs,
             error_message=error_message,
         )
 
     def __str__(self) -> str:
+        return self._formatted
+
+    @functools.cached_property
+    def _formatted(self) -> str:
         file_name = pathlib.Path(self.file).with_suffix("").name
 
         ctx = "\n     " + "\n    ".join(
@@ -61,8 +61,25 @@ def example(x: int) -> float | Error:
 
 
 if __name__ == "__main__":
+    import inspect
+    import timeit
+
     r = example(0)
     print(r)
 
     r2 = example(3)
     print(r2)
+
+    def _inspect_stack_new(error_message: str, **kwargs: typing.Hashable) -> Error:
+        frame = inspect.stack()[1].frame
+        return Error(
+            file=pathlib.Path(frame.f_code.co_filename).with_suffix("").name,
+            fn=frame.f_code.co_name,
+            fn_args=kwargs,
+            error_message=error_message,
+        )
+
+    n = 10_000
+    for label, fn in (("inspect.stack()", _inspect_stack_new), ("sys._getframe()", Error.new)):
+        secs = timeit.timeit(lambda: fn("boom", sql="SELECT 1", params=(1, "a")), number=n)  # noqa
+        print(f"{label:>16}: {secs / n * 1_000_000:,.2f} us per error")
@@ -0,0 +1,44 @@
+import sys
+import typing
+
+from src.data.column import Column
+from src.data.data_type import DataType
+
+__all__ = ("estimate_row_bytes",)
+
+# sys.getsizeof of a typical value of each type, as the drivers hand them back
+_VALUE_BYTES: typing.Final[dict[DataType, int]] = {
+    DataType.BigFloat: 24,
+    DataType.BigInt: 32,
+    DataType.Bool: 0,
+    DataType.Date: 32,
+    DataType.Decimal: 104,
+    DataType.Float: 24,
+    DataType.Int: 28,
+    DataType.Text: 49,
+    DataType.Timestamp: 48,
+    DataType.TimestampTZ: 48,
+    DataType.UUID: 100,
+}
+
+# assumed length of a text column with no max length
+_DEFAULT_TEXT_LENGTH: typing.Final[int] = 32
+
+
+def estimate_row_bytes(columns: typing.Iterable[Column], /) -> int:
+    """Estimate how many bytes one row of these columns takes as a data.Row in memory.
+
+    The column names are shared by every row, so only the dict and its values are counted.  True
+    and False are singletons, so bools are free.
+    """
+    cols = tuple(columns)
+
+    dict_bytes = sys.getsizeof(dict.fromkeys(range(len(cols))))
+
+    value_bytes = 0
+    for col in cols:
+        value_bytes += _VALUE_BYTES[col.data_type]
+        if col.data_type == DataType.Text:
+            value_bytes += min(col.length or _DEFAULT_TEXT_LENGTH, 4_000) // 2
+
+    return dict_bytes + value_bytes
@@ -0,0 +1,21 @@
+import pathlib
+import typing
+
+import pydantic
+
+__all__ = ("FileExport",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class FileExport:
+    """Where and how the file api writes the tables synced to it.
+
+    Each table gets a folder under folder, with a file per partition_col value, if the table has
+    that column, and a new file every rows_per_file rows.
+    """
+
+    folder: pathlib.Path
+    format: typing.Literal["csv", "jsonl"] = "csv"
+    compression: typing.Literal["gzip", "zstd"] | None = "gzip"
+    partition_col: str | None = None
+    rows_per_file: pydantic.PositiveInt = 1_000_000
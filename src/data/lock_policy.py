@@ -0,0 +1,21 @@
+import enum
+
+__all__ = ("LockPolicy",)
+
+
+class LockPolicy(enum.Enum):
+    """What a sync does when another sync, maybe on another host, is already writing to its dst
+    table.
+
+    WAIT queues behind it, for up to the database's lock timeout.  SKIP gives up straight away and
+    logs the sync as skipped, for schedules where the next run will catch up anyway.
+    """
+
+    SKIP = "skip"
+    WAIT = "wait"
+
+    def __repr__(self) -> str:
+        return f"LockPolicy.{self.name}"
+
+    def __str__(self) -> str:
+        return self.value
@@ -1,11 +1,27 @@
 import abc
+import typing
 
 from src.data.error import Error
+from src.data.sync_history import SyncHistory
+from src.data.sync_phase import SyncPhase
+from src.data.sync_plan import SyncPlan
+from src.data.table_snapshot import TableSnapshot
 
 __all__ = ("Log",)
 
 
 class Log(abc.ABC):
+    @abc.abstractmethod
+    def batch_sizes(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> dict[str, int] | Error:
+        """The batch size each phase ended on, the last time the table was synced."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def delete_old_logs(self, *, days_to_keep: int) -> None | Error:
         raise NotImplementedError
@@ -14,10 +30,57 @@ class Log(abc.ABC):
     def error(self, /, error_message: str) -> None | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def save_table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        snapshot: TableSnapshot,
+    ) -> None | Error:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save_watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+        watermark: str,
+    ) -> None | Error:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def sync_failed(self, *, sync_id: int, reason: str) -> None | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def sync_phases(self, *, sync_id: int, phases: typing.Iterable[SyncPhase]) -> None | Error:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def sync_history(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+    ) -> SyncHistory | Error:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def sync_plan(self, *, sync_id: int, plan: SyncPlan) -> None | Error:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def sync_skipped(self, *, sync_id: int, reason: str) -> None | Error:
         raise NotImplementedError
@@ -33,6 +96,22 @@ class Log(abc.ABC):
     ) -> int | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def table_snapshot(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+    ) -> TableSnapshot | None | Error:
+        """The snapshot saved by the last sync of the src table to the dst table that didn't fail,
+        if any.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def sync_succeeded(
         self,
@@ -42,5 +121,24 @@ class Log(abc.ABC):
         rows_deleted: int,
         rows_updated: int,
         execution_millis: int,
+        peak_rss_bytes: int | None,
+        peak_traced_bytes: int | None,
     ) -> None | Error:
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def watermark(
+        self,
+        *,
+        src_db_name: str,
+        src_schema_name: str | None,
+        src_table_name: str,
+        dst_db_name: str,
+        dst_schema_name: str,
+        dst_table_name: str,
+        capture: str,
+    ) -> str | None | Error:
+        """How far the changes captured by capture have been applied to the dst table, if they
+        have been.
+        """
+        raise NotImplementedError
@@ -0,0 +1,50 @@
+import typing
+
+from src.data.sync_history import SyncHistory
+from src.data.sync_plan import SyncPlan
+
+__all__ = ("plan_fetch",)
+
+# used until a table has history of its own.  Fetching by key costs twice what a scan does per
+# row, which picks a full pull once more than half the rows have changed.
+_DEFAULT_FETCH_MILLIS_PER_ROW: typing.Final[float] = 0.01
+_DEFAULT_FETCH_BY_KEY_MILLIS_PER_ROW: typing.Final[float] = 0.03
+_DEFAULT_UPSERT_MILLIS_PER_ROW: typing.Final[float] = 0.01
+
+
+def plan_fetch(
+    *,
+    history: SyncHistory,
+    src_rows: int,
+    changed_rows: int,
+    range_rows: int | None,
+) -> SyncPlan:
+    """Pick the cheapest way to fetch changed_rows of src_rows, by what each has cost before.
+
+    range_rows is how many rows a range_fetch would return, or None if the key can't be ranged.
+    The rows are counted by the compare, so the catalog's estimates have nothing to add.
+    """
+    fetch = history.fetch_millis_per_row or _DEFAULT_FETCH_MILLIS_PER_ROW
+    fetch_by_key = history.fetch_by_key_millis_per_row or _DEFAULT_FETCH_BY_KEY_MILLIS_PER_ROW
+    upsert = history.upsert_millis_per_row or _DEFAULT_UPSERT_MILLIS_PER_ROW
+
+    costs = {
+        "full_pull": src_rows * (fetch + upsert),
+        "key_fetch": changed_rows * (fetch_by_key + upsert),
+    }
+    if range_rows is not None and range_rows < src_rows:
+        costs["range_fetch"] = range_rows * (fetch + upsert)
+
+    est_millis = {
+        strategy: cost * history.corrections.get(strategy, 1.0)
+        for strategy, cost in costs.items()
+    }
+
+    strategy = min(est_millis, key=lambda s: est_millis[s])
+
+    return SyncPlan(
+        strategy=typing.cast(typing.Literal["full_pull", "key_fetch", "range_fetch"], strategy),
+        reason=", ".join(f"{s} ~{int(ms)} ms" for s, ms in sorted(est_millis.items())) + ".",
+        est_millis=int(est_millis[strategy]),
+        raw_est_millis=int(costs[strategy]),
+    )
@@ -0,0 +1,21 @@
+import typing
+
+import pydantic
+
+from src.data.row_key import RowKey
+
+__all__ = ("RowChange",)
+
+
+@pydantic.dataclasses.dataclass(
+    frozen=True,
+    kw_only=True,
+    config=pydantic.ConfigDict(strict=True, arbitrary_types_allowed=True),
+)
+class RowChange:
+    """A row that was inserted, updated, or deleted in src.  Only its key is captured, since the
+    row may have changed again by the time the change is applied.
+    """
+
+    op: typing.Literal["insert", "update", "delete"]
+    key: RowKey
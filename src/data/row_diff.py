@@ -6,7 +6,11 @@ from src.data.row_key import RowKey
 __all__ = ("RowDiff",)
 
 
-@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+@pydantic.dataclasses.dataclass(
+    frozen=True,
+    kw_only=True,
+    config=pydantic.ConfigDict(strict=True, arbitrary_types_allowed=True),
+)
 class RowDiff:
     added: dict[RowKey, Row]
     updated: dict[RowKey, tuple[Row, Row]]
@@ -0,0 +1,74 @@
+import datetime
+import decimal
+import hashlib
+import struct
+import typing
+import uuid
+
+from src.data.row import Row
+
+__all__ = ("row_digest",)
+
+# a digest is 16 bytes, written as 32 hex characters, so it fits dst's poa_hd CHAR(32) column
+_DIGEST_BYTES: typing.Final[int] = 16
+
+
+def row_digest(row: Row, /, *, col_names: typing.Iterable[str]) -> str:
+    """A digest of row's values for col_names, like the one dst stores in poa_hd.
+
+    Each value is encoded with a tag for its type and its length, so a NULL, an empty string, and
+    the string 'None' all differ, and values can't run together.  Numbers are encoded by value,
+    so 1, 1.0 as a Decimal, and 1.00 as a Decimal are the same, however a driver returns them.
+    """
+    h = hashlib.blake2b(digest_size=_DIGEST_BYTES)
+    for col_name in sorted(col_names):
+        tag, payload = _encode(row[col_name])
+        h.update(tag)
+        h.update(struct.pack(">I", len(payload)))
+        h.update(payload)
+    return h.hexdigest()
+
+
+def _encode(value: typing.Any, /) -> tuple[bytes, bytes]:
+    if value is None:
+        return b"0", b""
+
+    # bool is a subclass of int, so it's checked first
+    if isinstance(value, bool):
+        return b"b", b"1" if value else b"0"
+
+    if isinstance(value, int):
+        return b"n", str(value).encode()
+
+    if isinstance(value, decimal.Decimal):
+        if value == value.to_integral_value():
+            return b"n", str(int(value)).encode()
+        return b"n", format(value.normalize(), "f").encode()
+
+    if isinstance(value, float):
+        if value.is_integer():
+            return b"n", str(int(value)).encode()
+        return b"f", value.hex().encode()
+
+    if isinstance(value, str):
+        return b"s", value.encode()
+
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+            return b"z", value.replace(tzinfo=None).isoformat().encode()
+        return b"t", value.isoformat().encode()
+
+    if isinstance(value, datetime.date):
+        return b"d", value.isoformat().encode()
+
+    if isinstance(value, datetime.time):
+        return b"h", value.isoformat().encode()
+
+    if isinstance(value, uuid.UUID):
+        return b"u", value.bytes
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return b"x", bytes(value)
+
+    return b"r", repr(value).encode()
@@ -5,6 +5,7 @@ from src.data.error import Error
 from src.data.row import Row
 from src.data.row_key import RowKey
 from src.data.table import Table
+from src.data.table_stats import TableStats
 
 __all__ = ("SrcDs",)
 
@@ -19,6 +20,16 @@ class SrcDs(abc.ABC):
     ) -> list[Row] | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def fetch_row_batches(
+        self,
+        *,
+        col_names: set[str] | None,
+        after: dict[str, typing.Hashable] | None,
+        batch_size: int,
+    ) -> typing.Iterator[typing.Sequence[Row]] | Error:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def fetch_rows_by_key(
         self,
@@ -36,6 +47,10 @@ class SrcDs(abc.ABC):
     def get_table(self) -> Table | Error:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_table_stats(self) -> TableStats | Error:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def table_exists(self) -> bool | Error:
         raise NotImplementedError
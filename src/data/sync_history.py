@@ -0,0 +1,18 @@
+import pydantic
+
+__all__ = ("SyncHistory",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class SyncHistory:
+    """What past syncs of a table cost, for planning the next one.
+
+    The *_millis_per_row are averaged over recent successful runs, and are None if no recent run
+    had that phase.  corrections are the average actual / estimated cost of each strategy the
+    planner picked, so estimates that were off are scaled by how far off they have been.
+    """
+
+    fetch_millis_per_row: float | None = None
+    fetch_by_key_millis_per_row: float | None = None
+    upsert_millis_per_row: float | None = None
+    corrections: dict[str, float] = pydantic.Field(default_factory=dict)
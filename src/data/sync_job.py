@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import datetime
+
+import pydantic
+
+from src.data.capture import Capture
+from src.data.cron import Cron
+
+__all__ = ("SyncJob",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class SyncJob:
+    """One table sync in a poa serve schedule.  It runs every_seconds, or whenever cron matches."""
+
+    name: str
+    src_db: str
+    src_schema: str | None
+    src_table: str
+    dst_db: str
+    dst_schema: str
+    dst_table: str
+    pk: tuple[str, ...]
+    incremental: bool
+    compare: frozenset[str] | None
+    increasing: frozenset[str] | None
+    capture: Capture | None
+    skip_if_row_counts_match: bool
+    recreate: bool
+    track_history: bool
+    after: dict[str, datetime.date]
+    every_seconds: int | None
+    cron: Cron | None
+
+    def next_run(self, /, after: datetime.datetime) -> datetime.datetime | None:
+        if self.cron is not None:
+            return self.cron.next_after(after)
+        if self.every_seconds is not None:
+            return after + datetime.timedelta(seconds=self.every_seconds)
+        return None
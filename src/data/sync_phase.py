@@ -0,0 +1,14 @@
+import pydantic
+
+__all__ = ("SyncPhase",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class SyncPhase:
+    name: str
+    calls: int
+    execution_millis: int
+    rows: int | None
+    est_bytes: int | None
+    # rows per batch at the end of the phase, for phases that run in adaptively sized batches
+    batch_size: int | None = None
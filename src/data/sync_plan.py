@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import typing
+
+import pydantic
+
+from src.data.table_stats import TableStats
+
+__all__ = ("SyncPlan",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class SyncPlan:
+    """How an incremental compare sync gets the rows that changed.
+
+    key_fetch fetches just the changed rows by key, range_fetch fetches every row from the lowest
+    changed key on, full_pull fetches the whole table, and skip fetches nothing, since nothing
+    changed.
+
+    stats is what the catalog said about src when the plan was made.  est_millis is the estimate
+    the strategy was picked by, and raw_est_millis is that estimate before it was corrected by
+    past runs, which is what the next correction is measured against.
+    """
+
+    strategy: typing.Literal["full_pull", "key_fetch", "range_fetch", "skip"]
+    reason: str
+    stats: TableStats | None = None
+    est_millis: int | None = None
+    raw_est_millis: int | None = None
+    actual_millis: int | None = None
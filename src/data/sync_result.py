@@ -4,6 +4,9 @@ import typing
 
 import pydantic
 
+from src.data.sync_phase import SyncPhase
+from src.data.sync_plan import SyncPlan
+
 __all__ = ("SyncResult",)
 
 
@@ -16,6 +19,15 @@ class SyncResult:
     rows_updated: int
     skip_reason: str | None
     status: typing.Literal["failed", "skipped", "succeeded"]
+    phases: tuple[SyncPhase, ...] = ()
+    peak_rss_bytes: int | None = None
+    peak_traced_bytes: int | None = None
+    plan: SyncPlan | None = None
+    # how far src's captured changes have been applied, for a sync that applied them
+    watermark: str | None = None
+    # skipped because another sync held the dst table's lock, so this one didn't compare src to
+    # dst, and has nothing to say about either
+    dst_busy: bool = False
 
     @staticmethod
     def failed(*, error_message: str) -> SyncResult:
@@ -0,0 +1,15 @@
+import pydantic
+
+__all__ = ("TableSnapshot",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class TableSnapshot:
+    """The catalog's change counters for a table at one point in time.
+
+    fingerprint is the counters rendered as text, so two snapshots of a table that hasn't been
+    written to in between have the same fingerprint.  estimated_rows is only kept for reference.
+    """
+
+    fingerprint: str
+    estimated_rows: int | None
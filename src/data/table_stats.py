@@ -0,0 +1,13 @@
+import pydantic
+
+__all__ = ("TableStats",)
+
+
+@pydantic.dataclasses.dataclass(frozen=True, kw_only=True, config=pydantic.ConfigDict(strict=True))
+class TableStats:
+    """What the database's catalog says about a table, without reading it.
+
+    estimated_rows is the planner's row estimate, or None if the source doesn't keep one.
+    """
+
+    estimated_rows: int | None
@@ -1,4 +1,5 @@
 from src.service.check import *
 from src.service.cleanup import *
 from src.service.inspect import *
+from src.service.serve import *
 from src.service.sync import *
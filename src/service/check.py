@@ -51,6 +51,7 @@ def check(
                 table_name=src_table_name,
                 pk_cols=tuple(pk),
                 after=after,
+                export=src_db_config.export,
             )
             if isinstance(src_ds, data.Error):
                 return src_ds
@@ -100,6 +101,7 @@ def check(
                 dst_table_name=dst_table_name,
                 src_table=src_table,
                 after=after,
+                export=dst_db_config.export,
             )
             if isinstance(dst_ds, data.Error):
                 return dst_ds
@@ -172,7 +174,7 @@ def _check(
             data.FrozenDict(row) for row in src_ds.fetch_rows(col_names=set(pk), after=None)
         )
         dst_keys = set(
-            data.FrozenDict(row) for row in src_ds.fetch_rows(col_names=set(pk), after=None)
+            data.FrozenDict(row) for row in dst_ds.fetch_rows(col_names=set(pk), after=None)
         )
 
         extra_keys = dst_keys - src_keys
@@ -4,6 +4,10 @@ from src import data, adapter
 
 __all__ = ("inspect",)
 
+# entries in the cache table never expire either, so a long-running process can keep its own copy
+# and skip the two connections that looking one up takes
+_tables: typing.Final[dict[tuple[str, str | None, str, tuple[str, ...]], data.Table]] = {}
+
 
 def inspect(
     *,
@@ -12,14 +16,44 @@ def inspect(
     src_table_name: str,
     dst_config: data.DbConfig,
     pk: typing.Iterable[str],
+) -> data.Table | data.Error:
+    try:
+        pk_cols = tuple(pk)
+
+        key = (src_config.db_id, src_schema_name, src_table_name, pk_cols)
+        if (table := _tables.get(key)) is not None:
+            return table
+
+        table = _inspect(
+            src_config=src_config,
+            src_schema_name=src_schema_name,
+            src_table_name=src_table_name,
+            dst_config=dst_config,
+            pk_cols=pk_cols,
+        )
+        if not isinstance(table, data.Error):
+            _tables[key] = table
+
+        return table
+    except Exception as e:
+        return data.Error.new(
+            str(e),
+        )
+
+
+def _inspect(
+    *,
+    src_config: data.DbConfig,
+    src_schema_name: str | None,
+    src_table_name: str,
+    dst_config: data.DbConfig,
+    pk_cols: tuple[str, ...],
 ) -> data.Table | data.Error:
     try:
         cursor_provider = adapter.cursor_provider.create(db_config=src_config)
         if isinstance(cursor_provider, data.Error):
             return cursor_provider
 
-        pk_cols = tuple(pk)
-
         with cursor_provider.open() as cur:
             src = adapter.src_ds.create(
                 cur=cur,
@@ -29,6 +63,7 @@ def inspect(
                 table_name=src_table_name,
                 pk_cols=pk_cols,
                 after=dict(),
+                export=src_config.export,
             )
             if isinstance(src, data.Error):
                 return src
@@ -58,7 +93,7 @@ def inspect(
                 if sorted(cached_src_table.pk) != sorted(pk_cols):
                     return data.Error.new(
                         f"The cached primary key columns for {src_table_name}, {', '.join(cached_src_table.pk)} "
-                        f"does not match the pk argument, {', '.join(pk)}."
+                        f"does not match the pk argument, {', '.join(pk_cols)}."
                     )
                 return cached_src_table
     except Exception as e:
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import concurrent.futures
+import datetime
+import threading
+import typing
+
+from loguru import logger
+
+from src import adapter, data
+from src.service.cleanup import cleanup
+from src.service.sync import sync
+
+__all__ = ("serve",)
+
+
+def serve(
+    *,
+    config: data.Config,
+    jobs: typing.Sequence[data.SyncJob],
+    max_workers: int,
+    stop: threading.Event | None = None,
+) -> None | data.Error:
+    """Run jobs on their schedules until stop is set.
+
+    Unlike a one-off sync, the process stays up, so imports, config, table definitions, and
+    connections, along with the statements prepared on them, are reused from one run to the next.
+    A job that is still running when it comes due again is skipped rather than run twice.
+    """
+    try:
+        if not jobs:
+            return data.Error.new("The schedule has no jobs.")
+
+        for job in jobs:
+            for db_id in (job.src_db, job.dst_db):
+                if config.db(db_id) is None:
+                    return data.Error.new(
+                        f"Job {job.name!r} uses {db_id!r}, but could not find database entry by "
+                        f"that name in the config file."
+                    )
+
+        if stop is None:
+            stop = threading.Event()
+
+        adapter.cursor_provider.keep_alive(max_idle=max_workers)
+
+        now = datetime.datetime.now()
+
+        next_runs: dict[str, datetime.datetime | None] = {
+            job.name: job.next_run(now) for job in jobs
+        }
+        next_cleanup = now
+
+        # job names, plus a key for cleanup that can't clash with one
+        running: dict[str | None, concurrent.futures.Future[None | data.Error]] = {}
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="poa-job",
+        ) as pool:
+            while not stop.is_set():
+                for name, future in list(running.items()):
+                    if future.done():
+                        del running[name]
+                        _log_outcome(name=name, future=future)
+
+                now = datetime.datetime.now()
+
+                if now >= next_cleanup:
+                    if None not in running:
+                        running[None] = pool.submit(_cleanup, config=config, jobs=jobs)
+                    next_cleanup = now + datetime.timedelta(seconds=config.seconds_between_cleanups)
+
+                for job in jobs:
+                    next_run = next_runs[job.name]
+                    if next_run is None or next_run > now:
+                        continue
+
+                    if job.name in running:
+                        logger.warning(f"{job.name} is still running, so this run will be skipped.")
+                    else:
+                        running[job.name] = pool.submit(_run_job, config=config, job=job)
+
+                    next_runs[job.name] = job.next_run(now)
+
+                wake_at = min(
+                    (dt for dt in (*next_runs.values(), next_cleanup) if dt is not None),
+                    default=now + datetime.timedelta(minutes=1),
+                )
+                # wake up at least every second, so finished jobs are logged promptly
+                stop.wait(min(max((wake_at - now).total_seconds(), 0), 1))
+
+            logger.info("Stopping, after the jobs that are running finish...")
+
+        for name, future in running.items():
+            _log_outcome(name=name, future=future)
+
+        return None
+    except Exception as e:
+        return data.Error.new(str(e), jobs=tuple(job.name for job in jobs))
+
+
+def _cleanup(*, config: data.Config, jobs: typing.Sequence[data.SyncJob]) -> None | data.Error:
+    for db_id in sorted({job.dst_db for job in jobs}):
+        db_config = config.db(db_id)
+        assert db_config is not None, f"{db_id!r} was not found in the config."
+
+        if db_config.api not in (data.API.FILE, data.API.PSYCOPG, data.API.SQLITE):
+            continue
+
+        result = cleanup(dst_config=db_config, days_logs_to_keep=config.days_logs_to_keep)
+        if isinstance(result, data.Error):
+            return result
+
+    return None
+
+
+def _log_outcome(
+    *,
+    name: str | None,
+    future: concurrent.futures.Future[None | data.Error],
+) -> None:
+    if name is None:
+        name = "cleanup"
+
+    try:
+        result = future.result()
+    except Exception as e:
+        logger.exception(f"{name} raised an exception: {e!s}")
+    else:
+        if isinstance(result, data.Error):
+            logger.error(f"{name} failed: {result!s}")
+        else:
+            logger.info(f"{name} finished.")
+
+
+def _run_job(*, config: data.Config, job: data.SyncJob) -> None | data.Error:
+    src_db_config = config.db(job.src_db)
+    dst_db_config = config.db(job.dst_db)
+    assert src_db_config is not None, f"{job.src_db!r} was not found in the config."
+    assert dst_db_config is not None, f"{job.dst_db!r} was not found in the config."
+
+    logger.info(f"Starting {job.name}...")
+
+    return sync(
+        src_db_config=src_db_config,
+        src_schema_name=job.src_schema,
+        src_table_name=job.src_table,
+        dst_db_config=dst_db_config,
+        dst_schema_name=job.dst_schema,
+        dst_table_name=job.dst_table,
+        incremental=job.incremental,
+        pk=list(job.pk),
+        compare_cols=None if job.compare is None else set(job.compare),
+        increasing_cols=None if job.increasing is None else set(job.increasing),
+        skip_if_row_counts_match=job.skip_if_row_counts_match,
+        recreate=job.recreate,
+        batch_ts=datetime.datetime.utcnow(),
+        track_history=job.track_history,
+        after=job.after,
+        batch_size=config.batch_size,
+        metrics_file=config.metrics_file,
+        batch_seconds=config.batch_seconds,
+        snapshot_folder=config.snapshot_folder,
+        diff_workers=config.diff_workers,
+        capture=job.capture,
+    )
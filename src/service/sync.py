@@ -1,5 +1,11 @@
+from __future__ import annotations
+
+import bisect
+import dataclasses
 import datetime
 import pathlib
+import sys
+import time
 import traceback
 import typing
 
@@ -11,6 +17,26 @@ __all__ = ("sync",)
 
 from src.service import inspect
 
+# the most an adaptive batch can hold when there's no --max-memory
+_MAX_BATCH_BYTES: typing.Final[int] = 64 * 1024 * 1024
+
+# the most captured changes one sync reads, since they're read all at once, and the rest wait
+# for the next sync
+_MAX_CHANGES_PER_SYNC: typing.Final[int] = 100_000
+
+# the key types that sort the same in Python as in a database's ORDER BY.  Text sorts by the
+# database's collation, and floats can be NaN, so a range bound found in Python could skip rows.
+_RANGE_KEY_TYPES: typing.Final[frozenset[data.DataType]] = frozenset(
+    (
+        data.DataType.BigInt,
+        data.DataType.Date,
+        data.DataType.Decimal,
+        data.DataType.Int,
+        data.DataType.Timestamp,
+        data.DataType.TimestampTZ,
+    )
+)
+
 
 def sync(
     *,
@@ -30,6 +56,81 @@ def sync(
     track_history: bool,
     after: dict[str, datetime.date],
     batch_size: int,
+    max_memory_bytes: int | None = None,
+    trace_memory: bool = False,
+    metrics_file: pathlib.Path | None = None,
+    batch_seconds: float | None = None,
+    capture: data.Capture | None = None,
+    snapshot_folder: pathlib.Path | None = None,
+    diff_workers: int = 1,
+) -> None | data.Error:
+    metrics = adapter.metrics.SyncMetrics(
+        src_table=f"{src_db_config.db_name}.{src_schema_name or ''}.{src_table_name}",
+        dst_table=f"{dst_db_config.db_name}.{dst_schema_name}.{dst_table_name}",
+    )
+
+    result = _sync_and_log(
+        src_db_config=src_db_config,
+        src_schema_name=src_schema_name,
+        src_table_name=src_table_name,
+        dst_db_config=dst_db_config,
+        dst_schema_name=dst_schema_name,
+        dst_table_name=dst_table_name,
+        incremental=incremental,
+        pk=pk,
+        compare_cols=compare_cols,
+        increasing_cols=increasing_cols,
+        skip_if_row_counts_match=skip_if_row_counts_match,
+        recreate=recreate,
+        batch_ts=batch_ts,
+        track_history=track_history,
+        after=after,
+        batch_size=batch_size,
+        batch_seconds=batch_seconds,
+        max_memory_bytes=max_memory_bytes,
+        trace_memory=trace_memory,
+        metrics=metrics,
+        capture=capture,
+        snapshot_folder=snapshot_folder,
+        diff_workers=diff_workers,
+    )
+    if isinstance(result, data.Error):
+        metrics.add_error()
+
+    if metrics_file is not None:
+        # a sync that worked shouldn't be reported as failed because its metrics couldn't be saved
+        metrics_result = metrics.write(path=metrics_file)
+        if isinstance(metrics_result, data.Error):
+            logger.error(f"An error occurred while writing metrics: {metrics_result!s}")
+
+    return result
+
+
+def _sync_and_log(
+    *,
+    src_db_config: data.DbConfig,
+    src_schema_name: str | None,
+    src_table_name: str,
+    dst_db_config: data.DbConfig,
+    dst_schema_name: str,
+    dst_table_name: str,
+    incremental: bool,
+    pk: list[str],
+    compare_cols: set[str] | None,
+    increasing_cols: set[str] | None,
+    skip_if_row_counts_match: bool,
+    recreate: bool,
+    batch_ts: datetime.datetime,
+    track_history: bool,
+    after: dict[str, datetime.date],
+    batch_size: int,
+    batch_seconds: float | None,
+    max_memory_bytes: int | None,
+    trace_memory: bool,
+    metrics: adapter.metrics.SyncMetrics,
+    capture: data.Capture | None,
+    snapshot_folder: pathlib.Path | None,
+    diff_workers: int,
 ) -> None | data.Error:
     try:
         log = adapter.log.create(db_config=dst_db_config)
@@ -45,6 +146,46 @@ def sync(
         if isinstance(sync_id, data.Error):
             return sync_id
 
+        if batch_seconds is None:
+            warm_batch_sizes: dict[str, int] = {}
+        else:
+            batch_sizes = log.batch_sizes(
+                src_db_name=src_db_config.db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+            if isinstance(batch_sizes, data.Error):
+                return batch_sizes
+            warm_batch_sizes = batch_sizes
+
+        # only an incremental compare has a choice of how to fetch what changed
+        if incremental and compare_cols:
+            history = log.sync_history(
+                src_db_name=src_db_config.db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+            )
+            if isinstance(history, data.Error):
+                return history
+        else:
+            history = data.SyncHistory()
+
+        if capture is None:
+            watermark: str | None = None
+        else:
+            last_watermark = log.watermark(
+                src_db_name=src_db_config.db_name,
+                src_schema_name=src_schema_name,
+                src_table_name=src_table_name,
+                dst_db_name=dst_db_config.db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                capture=str(capture),
+            )
+            if isinstance(last_watermark, data.Error):
+                return last_watermark
+            watermark = last_watermark
+
         src_table = inspect(
             src_config=src_db_config,
             src_schema_name=src_schema_name,
@@ -55,31 +196,39 @@ def sync(
         if isinstance(src_table, data.Error):
             return src_table
 
+        if snapshot_folder is None:
+            digest_snapshot: adapter.digest_snapshot.DigestSnapshot | None = None
+        else:
+            digest_snapshot = adapter.digest_snapshot.DigestSnapshot(
+                folder=snapshot_folder,
+                dst_db_name=dst_db_config.db_name,
+                dst_schema_name=dst_schema_name,
+                dst_table_name=dst_table_name,
+                key_cols=src_table.pk,
+                col_names=tuple(
+                    col.name for col in src_table.columns if col.name not in src_table.pk
+                ),
+            )
+
         src_cursor_provider = adapter.cursor_provider.create(db_config=src_db_config)
         if isinstance(src_cursor_provider, data.Error):
             return src_cursor_provider
 
+        connect_start = time.perf_counter()
         with src_cursor_provider.open() as src_cur:
+            metrics.add_connect_seconds(side="src", seconds=time.perf_counter() - connect_start)
+
             if isinstance(src_cur, data.Error):
                 return src_cur
 
-            src_ds = adapter.src_ds.create(
-                cur=src_cur,
-                api=src_db_config.api,
-                db_name=src_db_config.db_name,
-                schema_name=src_schema_name,
-                table_name=src_table_name,
-                pk_cols=tuple(pk),
-                after=after,
-            )
-            if isinstance(src_ds, data.Error):
-                return src_ds
-
             dst_cursor_provider = adapter.cursor_provider.create(db_config=dst_db_config)
             if isinstance(dst_cursor_provider, data.Error):
                 return dst_cursor_provider
 
+            connect_start = time.perf_counter()
             with dst_cursor_provider.open() as dst_cur:
+                metrics.add_connect_seconds(side="dst", seconds=time.perf_counter() - connect_start)
+
                 if isinstance(dst_cur, data.Error):
                     return dst_cur
 
@@ -90,23 +239,94 @@ def sync(
                     dst_schema_name=dst_schema_name,
                     dst_table_name=dst_table_name,
                     src_table=src_table,
-                    batch_ts=batch_ts,
                     after=after,
+                    export=dst_db_config.export,
+                    lock_policy=dst_db_config.lock,
                 )
+                if isinstance(dst_ds, data.Error):
+                    return dst_ds
 
-                result = _sync(
-                    src_ds=src_ds,
-                    dst_ds=dst_ds,
-                    incremental=incremental,
-                    compare_cols=compare_cols,
-                    increasing_cols=increasing_cols,
-                    skip_if_row_counts_match=skip_if_row_counts_match,
-                    recreate=recreate,
-                    batch_size=batch_size,
-                    track_history=track_history,
-                )
-                if isinstance(result, data.Error):
-                    return result
+                # an incremental sync of a table that hasn't been written to since the last one
+                # has nothing to do, and the catalog can tell without the table being read, as
+                # long as the last one left a dst table to have nothing to do to
+                snapshot: data.TableSnapshot | None = None
+                unchanged = False
+                src_ds: data.SrcDs | None = None
+                if incremental and not recreate:
+                    dst_exists = dst_ds.table_exists()
+                    if isinstance(dst_exists, data.Error):
+                        return dst_exists
+
+                    if dst_exists:
+                        checked = _check_for_changes(
+                            log=log,
+                            cur=src_cur,
+                            src_db_config=src_db_config,
+                            src_schema_name=src_schema_name,
+                            src_table_name=src_table_name,
+                            dst_db_name=dst_db_config.db_name,
+                            dst_schema_name=dst_schema_name,
+                            dst_table_name=dst_table_name,
+                        )
+                        if isinstance(checked, data.Error):
+                            return checked
+                        snapshot, unchanged = checked
+
+                if unchanged:
+                    result = data.SyncResult.skipped(
+                        reason="the src table's change counters haven't moved since the last sync."
+                    )
+                else:
+                    src_ds = adapter.src_ds.create(
+                        cur=src_cur,
+                        api=src_db_config.api,
+                        db_name=src_db_config.db_name,
+                        schema_name=src_schema_name,
+                        table_name=src_table_name,
+                        pk_cols=tuple(pk),
+                        after=after,
+                        capture=capture,
+                        export=src_db_config.export,
+                        table=src_table,
+                        consumer=f"{dst_db_config.db_name}.{dst_schema_name}.{dst_table_name}",
+                        cursor_provider=src_cursor_provider,
+                    )
+                    if isinstance(src_ds, data.Error):
+                        return src_ds
+
+                    result = _sync(
+                        src_ds=src_ds,
+                        dst_ds=dst_ds,
+                        incremental=incremental,
+                        compare_cols=compare_cols,
+                        increasing_cols=increasing_cols,
+                        skip_if_row_counts_match=skip_if_row_counts_match,
+                        recreate=recreate,
+                        batch_size=batch_size,
+                        track_history=track_history,
+                        max_memory_bytes=max_memory_bytes,
+                        trace_memory=trace_memory,
+                        batch_seconds=batch_seconds,
+                        warm_batch_sizes=warm_batch_sizes,
+                        history=history,
+                        watermark=watermark,
+                        digest_snapshot=digest_snapshot,
+                        diff_workers=diff_workers,
+                    )
+                    if isinstance(result, data.Error):
+                        return result
+
+            metrics.add_result(result)
+
+            if result.phases:
+                log_result = log.sync_phases(sync_id=sync_id, phases=result.phases)
+                if isinstance(log_result, data.Error):
+                    return log_result
+
+            if result.plan is not None:
+                log_result = log.sync_plan(sync_id=sync_id, plan=result.plan)
+                if isinstance(log_result, data.Error):
+                    return log_result
 
             if result.status == "succeeded":
                 log_result = log.sync_succeeded(
@@ -115,6 +335,8 @@ def sync(
                     rows_deleted=result.rows_deleted,
                     rows_updated=result.rows_updated,
                     execution_millis=result.execution_millis or 0,
+                    peak_rss_bytes=result.peak_rss_bytes,
+                    peak_traced_bytes=result.peak_traced_bytes,
                 )
                 if isinstance(log_result, data.Error):
                     return log_result
@@ -151,6 +373,53 @@ def sync(
                     track_history=track_history,
                     after=tuple(after.items()),
                 )
+
+            # a sync that found dst locked didn't read src, so the snapshot it took of src's
+            # change counters may be of changes the sync holding the lock hasn't applied yet
+            if snapshot is not None and result.status != "failed" and not result.dst_busy:
+                log_result = log.save_table_snapshot(
+                    src_db_name=src_db_config.db_name,
+                    src_schema_name=src_schema_name,
+                    src_table_name=src_table_name,
+                    dst_db_name=dst_db_config.db_name,
+                    dst_schema_name=dst_schema_name,
+                    dst_table_name=dst_table_name,
+                    snapshot=snapshot,
+                )
+                if isinstance(log_result, data.Error):
+                    return log_result
+
+            # dst has been committed by now, so the changes up to the watermark can be let go of,
+            # and if that fails, the next sync will just apply some of them again
+            if (
+                isinstance(src_ds, data.CdcSrcDs)
+                and result.watermark is not None
+                and result.status != "failed"
+            ):
+                log_result = log.save_watermark(
+                    src_db_name=src_db_config.db_name,
+                    src_schema_name=src_schema_name,
+                    src_table_name=src_table_name,
+                    dst_db_name=dst_db_config.db_name,
+                    dst_schema_name=dst_schema_name,
+                    dst_table_name=dst_table_name,
+                    capture=str(capture),
+                    watermark=result.watermark,
+                )
+                if isinstance(log_result, data.Error):
+                    return log_result
+
+                confirm_result = src_ds.confirm(watermark=result.watermark)
+                if isinstance(confirm_result, data.Error):
+                    return confirm_result
+
+            # dst may have been written part way when a sync fails, so the snapshot stays gone,
+            # and the next compare reads dst's digests instead.  A sync that found dst locked
+            # would write back digests from before the sync holding the lock.
+            if digest_snapshot is not None and result.status != "failed" and not result.dst_busy:
+                save_result = digest_snapshot.save(unchanged=result.status == "skipped")
+                if isinstance(save_result, data.Error):
+                    return save_result
     except Exception as e:
         return data.Error.new(
             str(e),
@@ -172,6 +441,53 @@ def sync(
         )
 
 
+def _check_for_changes(
+    *,
+    log: data.Log,
+    cur: data.Cursor,
+    src_db_config: data.DbConfig,
+    src_schema_name: str | None,
+    src_table_name: str,
+    dst_db_name: str,
+    dst_schema_name: str,
+    dst_table_name: str,
+) -> tuple[data.TableSnapshot | None, bool] | data.Error:
+    """Returns the src table's snapshot, if its source keeps change counters, and whether it is
+    the same as the one saved by the last sync to the same dst table.
+    """
+    change_detector = adapter.change_detector.create(
+        cur=cur,
+        api=src_db_config.api,
+        schema_name=src_schema_name,
+        table_name=src_table_name,
+    )
+    if isinstance(change_detector, data.Error):
+        return change_detector
+
+    if change_detector is None:
+        return None, False
+
+    snapshot = change_detector.snapshot()
+    if isinstance(snapshot, data.Error):
+        return snapshot
+
+    if snapshot is None:
+        return None, False
+
+    last_snapshot = log.table_snapshot(
+        src_db_name=src_db_config.db_name,
+        src_schema_name=src_schema_name,
+        src_table_name=src_table_name,
+        dst_db_name=dst_db_name,
+        dst_schema_name=dst_schema_name,
+        dst_table_name=dst_table_name,
+    )
+    if isinstance(last_snapshot, data.Error):
+        return last_snapshot
+
+    return snapshot, last_snapshot is not None and last_snapshot.fingerprint == snapshot.fingerprint
+
+
 def _sync(
     *,
     src_ds: data.SrcDs,
@@ -183,9 +499,110 @@ def _sync(
     recreate: bool,
     batch_size: int,
     track_history: bool,
+    max_memory_bytes: int | None,
+    trace_memory: bool,
+    batch_seconds: float | None = None,
+    warm_batch_sizes: dict[str, int] | None = None,
+    history: data.SyncHistory | None = None,
+    watermark: str | None = None,
+    digest_snapshot: adapter.digest_snapshot.DigestSnapshot | None = None,
+    diff_workers: int = 1,
 ) -> data.SyncResult | data.Error:
+    phases = _Phases()
+    sizes = _BatchSizes(
+        batch_size=batch_size,
+        batch_seconds=batch_seconds,
+        warm=warm_batch_sizes or {},
+        max_memory_bytes=max_memory_bytes,
+    )
+    with adapter.memory.MemoryTracker(trace=trace_memory) as memory:
+        try:
+            result = _run_sync(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                incremental=incremental,
+                compare_cols=compare_cols,
+                increasing_cols=increasing_cols,
+                skip_if_row_counts_match=skip_if_row_counts_match,
+                recreate=recreate,
+                batch_size=batch_size,
+                sizes=sizes,
+                track_history=track_history,
+                max_memory_bytes=max_memory_bytes,
+                history=history or data.SyncHistory(),
+                watermark=watermark,
+                digest_snapshot=digest_snapshot,
+                diff_workers=diff_workers,
+                phases=phases,
+            )
+        except Exception as e:
+            result = data.SyncResult.failed(
+                error_message=(
+                    f"An error occurred while running sync(): {e!s}\n{traceback.format_exc()}"
+                )
+            )
+
+    return dataclasses.replace(
+        result,
+        phases=phases.result(batch_sizes=sizes.result()),
+        peak_rss_bytes=memory.peak_rss_bytes,
+        peak_traced_bytes=memory.peak_traced_bytes,
+    )
+
+
+def _run_sync(
+    *,
+    src_ds: data.SrcDs,
+    dst_ds: data.DstDs,
+    incremental: bool,
+    compare_cols: set[str] | None,
+    increasing_cols: set[str] | None,
+    skip_if_row_counts_match: bool,
+    recreate: bool,
+    batch_size: int,
+    sizes: _BatchSizes,
+    track_history: bool,
+    max_memory_bytes: int | None,
+    history: data.SyncHistory,
+    watermark: str | None,
+    digest_snapshot: adapter.digest_snapshot.DigestSnapshot | None,
+    diff_workers: int,
+    phases: _Phases,
+) -> data.SyncResult:
     start_time = datetime.datetime.now()
-    try:
+
+    # the lock is held until the dst's transaction ends, so two syncs to the same table, from
+    # different hosts, can't interleave their writes, or their staging
+    with phases.time("lock_dst"):
+        locked = dst_ds.lock()
+        if isinstance(locked, data.Error):
+            raise locked
+
+    if not locked:
+        return dataclasses.replace(
+            data.SyncResult.skipped(reason="Another sync is writing to the dst table."),
+            dst_busy=True,
+        )
+
+    # only once the lock is held, since a sync that finds dst busy doesn't write it, and the
+    # snapshot it would have taken still matches dst
+    if digest_snapshot is not None:
+        taken = digest_snapshot.take()
+        if isinstance(taken, data.Error):
+            raise taken
+
+    # changes made while the table is being read are captured too, so capture starts first, and
+    # there's nothing to apply changes to until a full refresh has set a watermark
+    if isinstance(src_ds, data.CdcSrcDs):
+        with phases.time("start_capture"):
+            started = src_ds.start_capture()
+            if isinstance(started, data.Error):
+                raise started
+
+        if started or watermark is None:
+            incremental = False
+
+    with phases.time("prepare_dst"):
         if recreate:
             incremental = False
             dst_ds.drop_table()
@@ -194,54 +611,96 @@ def _sync(
             incremental = False
             dst_ds.create()
 
-        if incremental:
-            if skip_if_row_counts_match:
+        dst_ds.create_staging_table()
+
+    if max_memory_bytes is None:
+        budget: _MemoryBudget | None = None
+    else:
+        budget = _MemoryBudget(
+            max_bytes=max_memory_bytes,
+            columns=src_ds.get_table().columns,
+            batch_size=batch_size,
+        )
+
+    if incremental:
+        if skip_if_row_counts_match:
+            with phases.time("get_row_counts"):
                 src_row_ct = src_ds.get_row_count()
                 dst_row_ct = dst_ds.get_row_count()
-                if src_row_ct == dst_row_ct:
-                    return data.SyncResult.skipped(reason="row counts match.")
-
-            if compare_cols:
-                result = _incremental_compare_refresh(
-                    src_ds=src_ds,
-                    dst_ds=dst_ds,
-                    compare_cols=compare_cols,
-                    start_time=start_time,
-                    batch_size=batch_size,
-                )
-            else:
-                assert increasing_cols is not None, "No increasing_cols were provided."
 
+            if src_row_ct == dst_row_ct:
+                return data.SyncResult.skipped(reason="row counts match.")
+
+        if isinstance(src_ds, data.CdcSrcDs):
+            result = _cdc_refresh(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                watermark=watermark,
+                start_time=start_time,
+                sizes=sizes,
+                phases=phases,
+            )
+        elif compare_cols:
+            result = _incremental_compare_refresh(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                compare_cols=compare_cols,
+                start_time=start_time,
+                sizes=sizes,
+                budget=budget,
+                history=history,
+                digest_snapshot=digest_snapshot,
+                diff_workers=diff_workers,
+                phases=phases,
+            )
+        else:
+            assert increasing_cols is not None, "No increasing_cols were provided."
+
+            with phases.time("add_increasing_col_indices"):
                 dst_ds.add_increasing_col_indices(increasing_cols)
 
+            with phases.time("get_max_values"):
                 after = dst_ds.get_max_values(increasing_cols)
 
-                result = _incremental_refresh_from_last(
-                    src_ds=src_ds,
-                    dst_ds=dst_ds,
-                    after=after,
-                    start_time=start_time,
-                    batch_size=batch_size,
-                )
-        else:
-            result = _full_refresh(
+            result = _incremental_refresh_from_last(
                 src_ds=src_ds,
                 dst_ds=dst_ds,
+                after=after,
                 start_time=start_time,
-                batch_size=batch_size,
+                sizes=sizes,
+                budget=budget,
+                diff_workers=diff_workers,
+                phases=phases,
             )
+    else:
+        if isinstance(src_ds, data.CdcSrcDs):
+            with phases.time("get_watermark"):
+                watermark = src_ds.current_watermark()
+                if isinstance(watermark, data.Error):
+                    raise watermark
 
-        if track_history and (
-            result.rows_added > 0 or result.rows_deleted > 0 or result.rows_updated > 0
-        ):
+        result = _full_refresh(
+            src_ds=src_ds,
+            dst_ds=dst_ds,
+            start_time=start_time,
+            sizes=sizes,
+            budget=budget,
+            phases=phases,
+        )
+
+        if isinstance(src_ds, data.CdcSrcDs):
+            result = dataclasses.replace(result, watermark=watermark)
+
+    if track_history and (
+        result.rows_added > 0 or result.rows_deleted > 0 or result.rows_updated > 0
+    ):
+        with phases.time("create_history_table"):
             dst_ds.create_history_table()
+
+        with phases.time("update_history_table"):
             dst_ds.update_history_table()
 
-        return result
-    except Exception as e:
-        return data.SyncResult.failed(
-            error_message=f"An error occurred while running sync(): {e!s}\n{traceback.format_exc()}"
-        )
+    return result
 
 
 def _full_refresh(
@@ -249,19 +708,52 @@ def _full_refresh(
     src_ds: data.SrcDs,
     dst_ds: data.DstDs,
     start_time: datetime.datetime,
-    batch_size: int,
+    sizes: _BatchSizes,
+    budget: _MemoryBudget | None,
+    phases: _Phases,
 ) -> data.SyncResult:
-    dst_ds.truncate()
+    with phases.time("truncate"):
+        dst_ds.truncate()
 
-    src_rows = src_ds.fetch_rows(col_names=None, after=None)
-    rows_to_upsert = len(src_rows)
-    rows_upserted = 0
-    for chunk in iter_chunk(items=src_rows, n=batch_size):
-        logger.info(
-            f"Upserting rows {rows_upserted} to {rows_upserted + len(chunk)} of {rows_to_upsert}..."
-        )
-        dst_ds.upsert_rows_from_staging(chunk)
-        rows_upserted += len(chunk)
+    if budget is not None:
+        with phases.time("get_row_counts"):
+            src_row_ct = src_ds.get_row_count()
+
+        if not budget.fits(rows=src_row_ct):
+            logger.info(
+                f"{src_row_ct} rows would take an estimated {budget.bytes_for(rows=src_row_ct):,} "
+                f"bytes, which is over the {budget.max_bytes:,} byte budget, so they will be "
+                f"streamed {budget.stream_batch_size} rows at a time."
+            )
+            rows_added, _ = _stream_upsert(
+                dst_ds=dst_ds,
+                batches=src_ds.fetch_row_batches(
+                    col_names=None,
+                    after=None,
+                    batch_size=budget.stream_batch_size,
+                ),
+                key_cols=(),
+                dst_keys=None,
+                phases=phases,
+            )
+
+            execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
+            return data.SyncResult.succeeded(
+                rows_added=rows_added,
+                rows_deleted=0,
+                rows_updated=0,
+                execution_millis=execution_millis,
+            )
+
+    with phases.time("fetch_src_rows") as phase:
+        src_rows = phase.add_rows(src_ds.fetch_rows(col_names=None, after=None))
+
+    _upsert(
+        dst_ds=dst_ds,
+        rows=src_rows,
+        sizer=sizes.for_phase("upsert", columns=src_ds.get_table().columns),
+        phases=phases,
+    )
 
     execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
     return data.SyncResult.succeeded(
@@ -272,13 +764,109 @@ def _full_refresh(
     )
 
 
+def _cdc_refresh(
+    *,
+    src_ds: data.CdcSrcDs,
+    dst_ds: data.DstDs,
+    watermark: str | None,
+    start_time: datetime.datetime,
+    sizes: _BatchSizes,
+    phases: _Phases,
+) -> data.SyncResult:
+    src_table = src_ds.get_table()
+
+    with phases.time("fetch_changes") as phase:
+        batch = src_ds.fetch_changes(after=watermark, limit=_MAX_CHANGES_PER_SYNC)
+        if isinstance(batch, data.Error):
+            raise batch
+        phase.rows += len(batch.changes)
+
+    if batch.more:
+        logger.info(
+            f"More than {_MAX_CHANGES_PER_SYNC} changes were captured, so the rest will be "
+            f"applied by the next sync."
+        )
+
+    # only the last change to each row matters, except that a row inserted and then updated is
+    # still new to dst
+    ops: dict[data.RowKey, str] = {}
+    for change in batch.changes:
+        if change.op == "update" and ops.get(change.key) == "insert":
+            continue
+        ops[change.key] = change.op
+
+    if not ops:
+        return dataclasses.replace(
+            data.SyncResult.skipped(reason="no changes were captured since the last sync."),
+            watermark=batch.watermark,
+        )
+
+    changed_keys = [key for key, op in ops.items() if op != "delete"]
+
+    # the rows are fetched as they are now, so a change that was captured but since undone, or a
+    # row that has since been deleted, is applied as it ended up
+    src_rows: list[data.Row] = []
+    for key_chunk in _iter_batches(
+        changed_keys,
+        sizer=sizes.for_phase("fetch_src_rows_by_key", columns=src_table.columns),
+    ):
+        with phases.time("fetch_src_rows_by_key") as phase:
+            src_rows.extend(
+                phase.add_rows(src_ds.fetch_rows_by_key(col_names=None, keys=set(key_chunk)))
+            )
+
+    found_keys = {data.FrozenDict({col: row[col] for col in src_table.pk}) for row in src_rows}
+    for key in changed_keys:
+        if key not in found_keys:
+            ops[key] = "delete"
+
+    logger.info(
+        f"{len(batch.changes)} changes were captured, to {len(ops)} rows, of which "
+        f"{len(found_keys)} will be upserted, and {len(ops) - len(found_keys)} deleted."
+    )
+
+    if src_rows:
+        _upsert(
+            dst_ds=dst_ds,
+            rows=src_rows,
+            sizer=sizes.for_phase("upsert", columns=src_table.columns),
+            phases=phases,
+        )
+
+    deleted_keys = [key for key, op in ops.items() if op == "delete"]
+    rows_deleted = _delete(
+        dst_ds=dst_ds,
+        keys=deleted_keys,
+        sizer=sizes.for_phase(
+            "delete",
+            columns=(col for col in src_table.columns if col.name in src_table.pk),
+        ),
+        phases=phases,
+    )
+
+    execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
+
+    return dataclasses.replace(
+        data.SyncResult.succeeded(
+            rows_added=sum(1 for op in ops.values() if op == "insert"),
+            rows_deleted=rows_deleted,
+            rows_updated=sum(1 for op in ops.values() if op == "update"),
+            execution_millis=execution_millis,
+        ),
+        watermark=batch.watermark,
+    )
+
+
 def _incremental_refresh_from_last(
     *,
     src_ds: data.SrcDs,
     dst_ds: data.DstDs,
     after: dict[str, typing.Hashable] | None,
     start_time: datetime.datetime,
-    batch_size: int,
+    sizes: _BatchSizes,
+    budget: _MemoryBudget | None,
+    diff_workers: int,
+    phases: _Phases,
 ) -> data.SyncResult:
     if after is None:
         final_after: dict[str, typing.Hashable] | None = None
@@ -291,26 +879,78 @@ def _incremental_refresh_from_last(
 
     src_table = src_ds.get_table()
 
-    src_rows = src_ds.fetch_rows(col_names=None, after=final_after)
-    dst_rows = dst_ds.fetch_rows(col_names=None, after=final_after)
+    if budget is not None:
+        with phases.time("get_row_counts"):
+            src_row_ct = src_ds.get_row_count()
+            dst_row_ct = dst_ds.get_row_count()
 
-    row_diff = data.compare_rows(
-        src_rows=src_rows,
-        dst_rows=dst_rows,
-        key_cols=src_table.pk,
-    )
+        # the rows after the watermark aren't counted up front, so assume the worst
+        if not budget.fits(rows=src_row_ct + dst_row_ct):
+            key_budget = budget.for_columns(src_table.pk)
+            if not key_budget.fits(rows=dst_row_ct):
+                return _over_budget(budget=key_budget, rows=dst_row_ct, what="dst keys")
+
+            logger.info(
+                f"Comparing {src_row_ct + dst_row_ct} rows would take an estimated "
+                f"{budget.bytes_for(rows=src_row_ct + dst_row_ct):,} bytes, which is over the "
+                f"{budget.max_bytes:,} byte budget, so src rows will be streamed "
+                f"{budget.stream_batch_size} rows at a time and checked against the dst keys."
+            )
+
+            with phases.time("fetch_dst_keys") as phase:
+                dst_keys = {
+                    data.FrozenDict(row)
+                    for row in phase.add_rows(
+                        dst_ds.fetch_rows(col_names=src_table.pk, after=final_after)
+                    )
+                }
+
+            # without the dst rows, an update is a src row whose key is already in dst, and that
+            # dst says changed
+            rows_added, rows_updated = _stream_upsert(
+                dst_ds=dst_ds,
+                batches=src_ds.fetch_row_batches(
+                    col_names=None,
+                    after=final_after,
+                    batch_size=budget.stream_batch_size,
+                ),
+                key_cols=src_table.pk,
+                dst_keys=dst_keys,
+                phases=phases,
+            )
+
+            execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
+            return data.SyncResult.succeeded(
+                rows_added=rows_added,
+                rows_deleted=0,
+                rows_updated=rows_updated,
+                execution_millis=execution_millis,
+            )
+
+    with phases.time("fetch_src_rows") as phase:
+        src_rows = phase.add_rows(src_ds.fetch_rows(col_names=None, after=final_after))
+
+    with phases.time("fetch_dst_rows") as phase:
+        dst_rows = phase.add_rows(dst_ds.fetch_rows(col_names=None, after=final_after))
+
+    with phases.time("compare_rows") as phase:
+        row_diff = data.compare_rows(
+            src_rows=src_rows,
+            dst_rows=dst_rows,
+            key_cols=src_table.pk,
+            max_workers=_diff_workers(budget, diff_workers=diff_workers),
+        )
+        phase.rows += len(src_rows) + len(dst_rows)
 
     rows = list(row_diff.added.values()) + list(
         src_row for src_row, dst_row in row_diff.updated.values()
     )
-    rows_to_upsert = len(rows)
-    rows_upserted = 0
-    for chunk in iter_chunk(items=rows, n=batch_size):
-        logger.info(
-            f"Upserting rows {rows_upserted} to {rows_upserted + len(chunk)} of {rows_to_upsert}..."
-        )
-        dst_ds.upsert_rows_from_staging(chunk)
-        rows_upserted += len(chunk)
+    _upsert(
+        dst_ds=dst_ds,
+        rows=rows,
+        sizer=sizes.for_phase("upsert", columns=src_table.columns),
+        phases=phases,
+    )
 
     execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
 
@@ -328,83 +968,713 @@ def _incremental_compare_refresh(
     dst_ds: data.DstDs,
     compare_cols: set[str] | None,
     start_time: datetime.datetime,
-    batch_size: int,
+    sizes: _BatchSizes,
+    budget: _MemoryBudget | None,
+    history: data.SyncHistory,
+    digest_snapshot: adapter.digest_snapshot.DigestSnapshot | None,
+    diff_workers: int,
+    phases: _Phases,
 ) -> data.SyncResult:
     assert compare_cols, "compare_cols was empty."
 
     src_table = src_ds.get_table()
 
-    min_cols = compare_cols.union(src_table.pk)
+    with phases.time("get_table_stats"):
+        stats = src_ds.get_table_stats()
+        if isinstance(stats, data.Error):
+            raise stats
+
+    # comparing every column, src rows are reduced to digests as they're fetched, and compared to
+    # dst's poa_hd, so neither side is held as rows
+    hd_cols = {col.name for col in src_table.columns} - set(src_table.pk)
+    by_digest = compare_cols == {"*"} or compare_cols >= hd_cols
+    min_cols = (hd_cols if by_digest else compare_cols).union(src_table.pk)
+
+    spilled_diff: adapter.spill.KeyDiff | None = None
+    if budget is not None:
+        with phases.time("get_row_counts"):
+            src_row_ct = src_ds.get_row_count()
+            dst_row_ct = dst_ds.get_row_count()
+
+        # a digest is about as big as a key column
+        min_budget = budget.for_columns(src_table.pk if by_digest else min_cols)
+        if not min_budget.fits(rows=src_row_ct + dst_row_ct):
+            src_row_ct, spilled_diff = _spill_compare(
+                src_ds=src_ds,
+                dst_ds=dst_ds,
+                by_digest=by_digest,
+                min_cols=min_cols,
+                pk=src_table.pk,
+                budget=min_budget,
+                rows=src_row_ct + dst_row_ct,
+                diff_workers=diff_workers,
+                phases=phases,
+            )
+
+            # only the keys that changed are held, but they still have to fit
+            key_budget = budget.for_columns(src_table.pk)
+            key_ct = sum(len(keys) for keys in spilled_diff)
+            if not key_budget.fits(rows=key_ct):
+                return _over_budget(budget=key_budget, rows=key_ct, what="changed keys")
+
+    if spilled_diff is not None:
+        min_src_rows: typing.Sequence[data.Row] = ()
+    elif by_digest:
+        src_digests: dict[data.RowKey, str] = {}
+        digest_batches = src_ds.fetch_row_batches(
+            col_names=None,
+            after=None,
+            batch_size=sizes.for_phase("fetch_src_digests", columns=src_table.columns).size,
+        )
+        if isinstance(digest_batches, data.Error):
+            raise digest_batches
+
+        for batch in digest_batches:
+            with phases.time("fetch_src_digests") as phase:
+                phase.rows += len(batch)
+                for row in batch:
+                    key = data.FrozenDict({col: row[col] for col in src_table.pk})
+                    src_digests[key] = data.row_digest(row, col_names=hd_cols)
 
-    min_src_rows = src_ds.fetch_rows(col_names=min_cols, after=None)
+        # keys are dicts, so they stand in for rows with just the key columns
+        min_src_rows = list(src_digests.keys())
+    else:
+        with phases.time("fetch_src_keys") as phase:
+            min_src_rows = phase.add_rows(src_ds.fetch_rows(col_names=min_cols, after=None))
 
-    src_row_ct = len(min_src_rows)
+    if spilled_diff is None:
+        src_row_ct = len(min_src_rows)
 
     if src_row_ct == 0:
-        return data.SyncResult.skipped(
-            reason=f"{src_table.db_name}.{src_table.schema_name}.{src_table.table_name} is empty."
+        reason = f"{src_table.db_name}.{src_table.schema_name}.{src_table.table_name} is empty."
+        return dataclasses.replace(
+            data.SyncResult.skipped(reason=reason),
+            plan=data.SyncPlan(strategy="skip", reason=reason, stats=stats),
         )
 
-    min_dst_rows = dst_ds.fetch_rows(col_names=min_cols, after=None)
+    if spilled_diff is not None:
+        added_keys, updated_keys, deleted_keys = spilled_diff
+    elif by_digest:
+        if digest_snapshot is not None and digest_snapshot.last is not None:
+            # the last sync left dst's digests behind, so dst isn't read at all
+            dst_digests = digest_snapshot.last
+        else:
+            with phases.time("fetch_dst_digests") as phase:
+                fetched_digests = dst_ds.fetch_digests()
+                if isinstance(fetched_digests, data.Error):
+                    raise fetched_digests
+                dst_digests = fetched_digests
+                phase.rows += len(dst_digests)
 
-    row_diff = data.compare_rows(
-        src_rows=min_src_rows,
-        dst_rows=min_dst_rows,
-        key_cols=src_table.pk,
-    )
+        with phases.time("compare_digests") as phase:
+            added_keys = src_digests.keys() - dst_digests.keys()
+            updated_keys = {
+                key
+                for key, digest in src_digests.items()
+                if key in dst_digests and dst_digests[key] != digest
+            }
+            deleted_keys = set(dst_digests.keys() - src_digests.keys())
+            phase.rows += len(src_digests) + len(dst_digests)
+    else:
+        with phases.time("fetch_dst_keys") as phase:
+            min_dst_rows = phase.add_rows(dst_ds.fetch_rows(col_names=min_cols, after=None))
+
+        with phases.time("compare_rows") as phase:
+            row_diff = data.compare_rows(
+                src_rows=min_src_rows,
+                dst_rows=min_dst_rows,
+                key_cols=src_table.pk,
+                max_workers=_diff_workers(budget, diff_workers=diff_workers),
+            )
+            phase.rows += len(min_src_rows) + len(min_dst_rows)
 
-    changed_keys = set(row_diff.added.keys()).union(row_diff.updated.keys())
-    deleted_keys = set(row_diff.deleted.keys())
+        added_keys = set(row_diff.added.keys())
+        updated_keys = set(row_diff.updated.keys())
+        deleted_keys = set(row_diff.deleted.keys())
+
+    changed_keys = set(added_keys).union(updated_keys)
 
     logger.info(
-        f"There were {len(row_diff.added.keys())} rows added, {len(row_diff.updated.keys())} updated, "
-        f"and {len(row_diff.deleted.keys())} rows deleted from src."
+        f"There were {len(added_keys)} rows added, {len(updated_keys)} updated, "
+        f"and {len(deleted_keys)} rows deleted from src."
     )
 
     chg_row_ct = len(changed_keys) + len(deleted_keys)
 
     if chg_row_ct == 0:
-        return data.SyncResult.skipped(reason="src and dst were compared, and they were the same.")
+        if by_digest and digest_snapshot is not None and spilled_diff is None:
+            digest_snapshot.stage(src_digests)
 
-    if (proportion_chg := chg_row_ct / src_row_ct) > 0.5:
-        logger.info(
-            f"There were {chg_row_ct} rows that have changed of {src_row_ct} totals rows "
-            f"({int(proportion_chg * 100)}%), so the full table will be pulled."
+        reason = "src and dst were compared, and they were the same."
+        return dataclasses.replace(
+            data.SyncResult.skipped(reason=reason),
+            plan=data.SyncPlan(strategy="skip", reason=reason, stats=stats),
         )
-        src_rows = src_ds.fetch_rows(col_names=None, after=None)
+
+    key_range = _key_range(src_rows=min_src_rows, changed_keys=changed_keys, table=src_table)
+
+    plan = dataclasses.replace(
+        data.plan_fetch(
+            history=history,
+            src_rows=src_row_ct,
+            changed_rows=len(changed_keys),
+            range_rows=None if key_range is None else key_range[1],
+        ),
+        stats=stats,
+    )
+    logger.info(
+        f"{len(changed_keys)} of {src_row_ct} rows have changed, so they will be fetched by "
+        f"{plan.strategy}, as the estimates were {plan.reason}"
+    )
+
+    if plan.strategy == "range_fetch":
+        assert key_range is not None, "range_fetch was planned for a key that can't be ranged."
+        fetch_after: dict[str, typing.Hashable] | None = key_range[0]
+        fetch_row_ct = key_range[1]
+    elif plan.strategy == "full_pull":
+        fetch_after = None
+        fetch_row_ct = src_row_ct
     else:
-        src_rows = src_ds.fetch_rows_by_key(col_names=None, keys=changed_keys)
+        fetch_after = None
+        fetch_row_ct = len(changed_keys)
 
-    if src_rows:
-        rows_to_upsert = len(src_rows)
-        rows_upserted = 0
-        for chunk in iter_chunk(items=src_rows, n=batch_size):
-            logger.info(
-                f"Upserting rows {rows_upserted} to {rows_upserted + len(chunk)} of {rows_to_upsert}..."
+    fetch_start = time.perf_counter()
+    if budget is not None and not budget.fits(rows=fetch_row_ct):
+        logger.info(
+            f"{fetch_row_ct} rows would take an estimated {budget.bytes_for(rows=fetch_row_ct):,} "
+            f"bytes, which is over the {budget.max_bytes:,} byte budget, so they will be "
+            f"streamed {budget.stream_batch_size} rows at a time."
+        )
+        if plan.strategy == "key_fetch":
+            batches: typing.Iterable[typing.Sequence[data.Row]] = (
+                src_ds.fetch_rows_by_key(col_names=None, keys=set(key_chunk))
+                for key_chunk in iter_chunk(list(changed_keys), budget.stream_batch_size)
+            )
+        else:
+            batches = src_ds.fetch_row_batches(
+                col_names=None,
+                after=fetch_after,
+                batch_size=budget.stream_batch_size,
             )
-            dst_ds.upsert_rows_from_staging(chunk)
-            rows_upserted += len(chunk)
 
-    if deleted_keys:
-        keys_to_delete = len(deleted_keys)
-        keys_deleted = 0
-        for chunk in iter_chunk(items=list(deleted_keys), n=batch_size):
-            logger.info(
-                f"Deleting rows {keys_deleted} to {keys_deleted + len(chunk)} of {keys_to_delete}..."
+        rows_changed, _ = _stream_upsert(
+            dst_ds=dst_ds, batches=batches, key_cols=(), dst_keys=None, phases=phases
+        )
+        # the added keys that were deleted from src before they were fetched weren't written, but
+        # there's no telling which they were
+        rows_updated = max(rows_changed - len(added_keys), 0)
+
+        # the rows that were written aren't kept, so the snapshot doesn't have their new digests,
+        # and the next compare writes them again
+        written_rows: typing.Sequence[data.Row] = ()
+    else:
+        if plan.strategy == "full_pull":
+            with phases.time("fetch_src_rows") as phase:
+                src_rows = phase.add_rows(src_ds.fetch_rows(col_names=None, after=None))
+        elif plan.strategy == "range_fetch":
+            with phases.time("fetch_src_rows_in_range") as phase:
+                src_rows = phase.add_rows(src_ds.fetch_rows(col_names=None, after=fetch_after))
+        elif sizes.adaptive:
+            key_rows: list[data.Row] = []
+            for key_chunk in _iter_batches(
+                list(changed_keys),
+                sizer=sizes.for_phase("fetch_src_rows_by_key", columns=src_table.columns),
+            ):
+                with phases.time("fetch_src_rows_by_key") as phase:
+                    key_rows.extend(
+                        phase.add_rows(
+                            src_ds.fetch_rows_by_key(col_names=None, keys=set(key_chunk))
+                        )
+                    )
+            src_rows = key_rows
+        else:
+            with phases.time("fetch_src_rows_by_key") as phase:
+                src_rows = phase.add_rows(
+                    src_ds.fetch_rows_by_key(col_names=None, keys=changed_keys)
+                )
+
+        rows_changed = 0
+        if src_rows:
+            rows_changed = _upsert(
+                dst_ds=dst_ds,
+                rows=src_rows,
+                sizer=sizes.for_phase("upsert", columns=src_table.columns),
+                phases=phases,
             )
-            dst_ds.delete_rows(keys=set(chunk))
-            keys_deleted += len(chunk)
+
+        written_rows = src_rows
+
+        # an updated key is counted if dst says its row changed, and not just its digest, as a
+        # row hashed before poa_hd was a data.row_digest
+        rows_updated = rows_changed - sum(
+            data.FrozenDict({col: row[col] for col in src_table.pk}) in added_keys
+            for row in src_rows
+        )
+
+    # a row can change again between its digest being read and the row itself, or be deleted, so
+    # the snapshot gets the digests of the rows that were actually written.  An updated row that
+    # wasn't written is still in dst as it was, so it keeps dst's digest, and the next compare
+    # deletes or writes it.  A spilled diff didn't keep src's digests, so there's no snapshot to
+    # write.
+    if by_digest and digest_snapshot is not None and spilled_diff is None:
+        new_digests = {
+            key: digest for key, digest in src_digests.items() if key not in changed_keys
+        }
+        new_digests.update((key, dst_digests[key]) for key in updated_keys)
+        for row in written_rows:
+            key = data.FrozenDict({col: row[col] for col in src_table.pk})
+            new_digests[key] = data.row_digest(row, col_names=hd_cols)
+        digest_snapshot.stage(new_digests)
+
+    plan = dataclasses.replace(
+        plan,
+        actual_millis=int((time.perf_counter() - fetch_start) * 1000),
+    )
+
+    rows_deleted = _delete(
+        dst_ds=dst_ds,
+        keys=list(deleted_keys),
+        sizer=sizes.for_phase(
+            "delete",
+            columns=(col for col in src_table.columns if col.name in src_table.pk),
+        ),
+        phases=phases,
+    )
 
     execution_millis = int((datetime.datetime.now() - start_time).total_seconds() * 1000)
 
-    return data.SyncResult.succeeded(
-        rows_added=len(row_diff.added),
-        rows_deleted=len(row_diff.deleted),
-        rows_updated=len(row_diff.updated),
-        execution_millis=execution_millis,
+    return dataclasses.replace(
+        data.SyncResult.succeeded(
+            rows_added=len(added_keys),
+            rows_deleted=rows_deleted,
+            rows_updated=rows_updated,
+            execution_millis=execution_millis,
+        ),
+        plan=plan,
     )
 
 
-def iter_chunk(items: list[typing.Any], n: int) -> typing.Generator[typing.Any, None, None]:
+def _upsert(
+    *,
+    dst_ds: data.DstDs,
+    rows: typing.Sequence[data.Row],
+    sizer: data.BatchSizer,
+    phases: _Phases,
+) -> int:
+    """Upsert rows to dst in batches, and return how many were added or had a value change, which
+    can be fewer than there were rows, if some were already the same in dst.
+    """
+    rows_to_upsert = len(rows)
+    rows_upserted = 0
+    rows_changed = 0
+    for chunk in _iter_batches(rows, sizer=sizer):
+        logger.info(
+            f"Upserting rows {rows_upserted} to {rows_upserted + len(chunk)} of {rows_to_upsert}..."
+        )
+        with phases.time("upsert") as phase:
+            upserted = dst_ds.upsert_rows_from_staging(chunk)
+            if isinstance(upserted, data.Error):
+                raise upserted
+            phase.add_rows(chunk)
+        rows_upserted += len(chunk)
+        rows_changed += upserted
+
+    return rows_changed
+
+
+def _delete(
+    *,
+    dst_ds: data.DstDs,
+    keys: typing.Sequence[data.RowKey],
+    sizer: data.BatchSizer,
+    phases: _Phases,
+) -> int:
+    """Delete keys from dst in batches, and return how many rows were deleted, which can be fewer
+    than there were keys, if some were already gone.
+    """
+    keys_to_delete = len(keys)
+    keys_deleted = 0
+    rows_deleted = 0
+    for chunk in _iter_batches(keys, sizer=sizer):
+        logger.info(
+            f"Deleting rows {keys_deleted} to {keys_deleted + len(chunk)} of {keys_to_delete}..."
+        )
+        with phases.time("delete") as phase:
+            deleted = dst_ds.delete_rows(keys=chunk)
+            if isinstance(deleted, data.Error):
+                raise deleted
+            phase.rows += len(chunk)
+        keys_deleted += len(chunk)
+        rows_deleted += deleted
+
+    return rows_deleted
+
+
+def iter_chunk(
+    items: typing.Sequence[typing.Any], n: int
+) -> typing.Generator[typing.Any, None, None]:
     for i in range(0, len(items), n):
         yield items[i : i + n]
+
+
+def _iter_batches(
+    items: typing.Sequence[typing.Any], /, *, sizer: data.BatchSizer
+) -> typing.Generator[typing.Sequence[typing.Any], None, None]:
+    """Like iter_chunk, but each batch is sized by sizer, from how long the one before it took."""
+    i = 0
+    while i < len(items):
+        batch = items[i : i + sizer.size]
+        start = time.perf_counter()
+        yield batch
+        sizer.observe(rows=len(batch), seconds=time.perf_counter() - start)
+        i += len(batch)
+
+
+class _Phase:
+    """Running totals for one phase name.  A phase that runs once per batch, like upsert, is
+    reported as a single phase with calls > 1.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.est_bytes: int | None = None
+        self.rows = 0
+        self.seconds = 0.0
+
+    def add_rows(self, rows: typing.Sequence[data.Row], /) -> typing.Sequence[data.Row]:
+        self.rows += len(rows)
+        self.est_bytes = (self.est_bytes or 0) + _estimate_bytes(rows)
+        return rows
+
+
+class _Phases:
+    def __init__(self) -> None:
+        self._phases: dict[str, _Phase] = {}
+
+    def result(self, *, batch_sizes: dict[str, int]) -> tuple[data.SyncPhase, ...]:
+        return tuple(
+            data.SyncPhase(
+                name=name,
+                calls=phase.calls,
+                execution_millis=int(phase.seconds * 1000),
+                rows=phase.rows or None,
+                est_bytes=phase.est_bytes,
+                batch_size=batch_sizes.get(name),
+            )
+            for name, phase in self._phases.items()
+        )
+
+    def time(self, name: str, /) -> _PhaseTimer:
+        phase = self._phases.setdefault(name, _Phase())
+        phase.calls += 1
+        return _PhaseTimer(phase)
+
+
+class _PhaseTimer:
+    """Adds the time spent in a with block to a phase.
+
+    This isn't a contextlib.contextmanager, since that sets __traceback__ on an exception that
+    passes through it, which a frozen data.Error can't take, so the error would be replaced by a
+    FrozenInstanceError.
+    """
+
+    def __init__(self, phase: _Phase, /) -> None:
+        self._phase: typing.Final[_Phase] = phase
+        self._start = 0.0
+
+    def __enter__(self) -> _Phase:
+        self._start = time.perf_counter()
+        return self._phase
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._phase.seconds += time.perf_counter() - self._start
+
+
+def _estimate_bytes(rows: typing.Sequence[data.Row], /, sample_size: int = 100) -> int:
+    # sizing every value would cost as much as the phase being timed, so extrapolate from a sample
+    if not rows:
+        return 0
+
+    sample = rows[:sample_size]
+    sample_bytes = sum(
+        sys.getsizeof(value) for row in sample for value in row.values() if value is not None
+    )
+    return sample_bytes * len(rows) // len(sample)
+
+
+class _BatchSizes:
+    """A data.BatchSizer for each phase that runs in batches.
+
+    With batch_seconds, each one starts from the size the phase ended on last time, and adapts to
+    the table from there, up to _MAX_BATCH_BYTES.  Without it, every batch is batch_size rows, as
+    before, unless --max-memory makes that too many.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int,
+        batch_seconds: float | None,
+        warm: dict[str, int],
+        max_memory_bytes: int | None,
+    ) -> None:
+        self._batch_size: typing.Final[int] = batch_size
+        self._batch_seconds: typing.Final[float | None] = batch_seconds
+        self._warm: typing.Final[dict[str, int]] = warm
+        # a batch is held as rows, again as staging parameters, and again in the driver's buffers
+        self._max_bytes: typing.Final[int | None] = (
+            None if max_memory_bytes is None else max_memory_bytes // 3
+        )
+        self._sizers: dict[str, data.BatchSizer] = {}
+
+    @property
+    def adaptive(self) -> bool:
+        return self._batch_seconds is not None
+
+    def for_phase(self, name: str, /, *, columns: typing.Iterable[data.Column]) -> data.BatchSizer:
+        if (sizer := self._sizers.get(name)) is not None:
+            return sizer
+
+        if self._batch_seconds is None:
+            sizer = data.BatchSizer(
+                initial=self._batch_size,
+                row_bytes=data.estimate_row_bytes(columns),
+                max_bytes=self._max_bytes,
+                target_seconds=None,
+            )
+        else:
+            sizer = data.BatchSizer.start(
+                columns=columns,
+                warm_size=self._warm.get(name),
+                max_bytes=_MAX_BATCH_BYTES if self._max_bytes is None else self._max_bytes,
+                target_seconds=self._batch_seconds,
+            )
+
+        self._sizers[name] = sizer
+        return sizer
+
+    def result(self) -> dict[str, int]:
+        """The size each adaptive phase ended on, so the next run can start from it."""
+        if not self.adaptive:
+            return {}
+        return {name: sizer.size for name, sizer in self._sizers.items()}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class _MemoryBudget:
+    """How many rows of a table can be held in memory at once under --max-memory."""
+
+    max_bytes: int
+    columns: frozenset[data.Column]
+    batch_size: int
+
+    def bytes_for(self, *, rows: int) -> int:
+        return rows * data.estimate_row_bytes(self.columns)
+
+    def fits(self, *, rows: int) -> bool:
+        return self.bytes_for(rows=rows) <= self.max_bytes
+
+    def for_columns(self, col_names: typing.Iterable[str], /) -> _MemoryBudget:
+        names = set(col_names)
+        return dataclasses.replace(
+            self,
+            columns=frozenset(col for col in self.columns if col.name in names),
+        )
+
+    @property
+    def stream_batch_size(self) -> int:
+        # a batch is held as rows, again as staging parameters, and again in the driver's buffers
+        return max(1, min(self.batch_size, self.max_bytes // (3 * self.bytes_for(rows=1))))
+
+
+def _spill_compare(
+    *,
+    src_ds: data.SrcDs,
+    dst_ds: data.DstDs,
+    by_digest: bool,
+    min_cols: set[str],
+    pk: tuple[str, ...],
+    budget: _MemoryBudget,
+    rows: int,
+    diff_workers: int,
+    phases: _Phases,
+) -> tuple[int, adapter.spill.KeyDiff]:
+    """Diff src and dst through temp files, for when their compare columns don't fit in memory
+    together.  Returns the number of src rows, and the keys that differ.
+
+    Both sides are reduced to (key, digest) pairs as they're streamed, and hash-partitioned to
+    disk, so that diff_workers partitions, with their dict overhead, fit in the budget at once.
+    """
+    partitions = min(
+        adapter.spill.MAX_PARTITIONS,
+        max(2, -(-2 * diff_workers * budget.bytes_for(rows=rows) // budget.max_bytes)),
+    )
+    logger.info(
+        f"The {rows} rows of src and dst compare columns would take an estimated "
+        f"{budget.bytes_for(rows=rows):,} bytes, which is over the {budget.max_bytes:,} byte "
+        f"budget, so they will be diffed on disk in {partitions} partitions."
+    )
+
+    hd_cols = min_cols - set(pk)
+
+    def pairs(
+        batches: typing.Iterator[typing.Sequence[data.Row]] | data.Error,
+        /,
+        *,
+        phase_name: str,
+        digest_col: str | None,
+    ) -> typing.Generator[list[tuple[data.RowKey, str]], None, None]:
+        if isinstance(batches, data.Error):
+            raise batches
+
+        batch_iter = iter(batches)
+        while True:
+            with phases.time(phase_name) as phase:
+                batch = next(batch_iter, None)
+                if batch is None:
+                    return
+                phase.rows += len(batch)
+
+                chunk = [
+                    (
+                        data.FrozenDict({col: row[col] for col in pk}),
+                        (
+                            data.row_digest(row, col_names=hd_cols)
+                            if digest_col is None
+                            else typing.cast(str, row[digest_col])
+                        ),
+                    )
+                    for row in batch
+                ]
+            yield chunk
+
+    with adapter.spill.SpilledDiff(key_cols=pk, partitions=partitions) as spilled:
+        spilled.write_src(
+            pairs(
+                src_ds.fetch_row_batches(
+                    col_names=min_cols, after=None, batch_size=budget.stream_batch_size
+                ),
+                phase_name="spill_src",
+                digest_col=None,
+            )
+        )
+
+        # dst keeps the digest of every column in poa_hd, otherwise its rows are digested the
+        # same way src's are
+        spilled.write_dst(
+            pairs(
+                dst_ds.fetch_row_batches(
+                    col_names=set(pk).union({"poa_hd"}) if by_digest else min_cols,
+                    after=None,
+                    batch_size=budget.stream_batch_size,
+                ),
+                phase_name="spill_dst",
+                digest_col="poa_hd" if by_digest else None,
+            )
+        )
+
+        with phases.time("diff_partitions") as phase:
+            key_diff = spilled.diff(max_workers=diff_workers)
+            phase.rows += spilled.src_pairs + spilled.dst_pairs
+
+        return spilled.src_pairs, key_diff
+
+
+def _diff_workers(budget: _MemoryBudget | None, /, *, diff_workers: int) -> int:
+    # each worker gets its own copy of the rows it diffs, which --max-memory doesn't allow for
+    return diff_workers if budget is None else 1
+
+
+def _over_budget(*, budget: _MemoryBudget, rows: int, what: str) -> data.SyncResult:
+    return data.SyncResult.failed(
+        error_message=(
+            f"The {rows} rows of {what} would take an estimated {budget.bytes_for(rows=rows):,} "
+            f"bytes, which is over the {budget.max_bytes:,} byte budget, so --max-memory will "
+            f"need to be raised."
+        )
+    )
+
+
+def _stream_upsert(
+    *,
+    dst_ds: data.DstDs,
+    batches: typing.Iterable[typing.Sequence[data.Row]] | data.Error,
+    key_cols: typing.Iterable[str],
+    dst_keys: set[data.FrozenDict] | None,
+    phases: _Phases,
+) -> tuple[int, int]:
+    """Upsert batches as they are fetched, so only one is held in memory at a time.
+
+    If dst_keys are given, rows whose key isn't in them are counted as added, and the rest of the
+    rows dst says changed as updated, otherwise every row dst says changed is counted as added.
+    Returns (rows added, rows updated).
+    """
+    if isinstance(batches, data.Error):
+        raise batches
+
+    key_cols = tuple(key_cols)
+
+    rows_added = 0
+    rows_updated = 0
+    batch_iter = iter(batches)
+    while True:
+        with phases.time("fetch_src_rows") as phase:
+            batch = next(batch_iter, None)
+            if batch is None:
+                break
+            phase.add_rows(batch)
+
+        rows_upserted = rows_added + rows_updated
+        logger.info(f"Upserting rows {rows_upserted} to {rows_upserted + len(batch)}...")
+
+        with phases.time("upsert") as phase:
+            upserted = dst_ds.upsert_rows_from_staging(batch)
+            if isinstance(upserted, data.Error):
+                raise upserted
+            phase.add_rows(batch)
+
+        if dst_keys is None:
+            rows_added += upserted
+        else:
+            added = sum(
+                data.FrozenDict({col: row[col] for col in key_cols}) not in dst_keys
+                for row in batch
+            )
+            rows_added += added
+            rows_updated += max(upserted - added, 0)
+
+    return rows_added, rows_updated
+
+
+def _key_range(
+    *,
+    src_rows: typing.Sequence[data.Row],
+    changed_keys: set[data.RowKey],
+    table: data.Table,
+) -> tuple[dict[str, typing.Hashable], int] | None:
+    """The filter for every src row from the lowest changed key on, and how many rows that is.
+
+    None if the key has more than one column, its type isn't in _RANGE_KEY_TYPES, or the range
+    would be the whole table anyway.
+    """
+    if len(table.pk) != 1 or not changed_keys:
+        return None
+
+    (key_col,) = table.pk
+
+    col = next(c for c in table.columns if c.name == key_col)
+    if col.data_type not in _RANGE_KEY_TYPES:
+        return None
+
+    try:
+        values = sorted(row[key_col] for row in src_rows)
+        lowest_changed = min(key[key_col] for key in changed_keys)
+    except TypeError:
+        return None
+
+    # fetch_rows filters on >, so the range starts after the key just below the lowest changed one
+    start = bisect.bisect_left(values, lowest_changed)
+    if start == 0:
+        return None
+
+    return {key_col: values[start - 1]}, len(values) - start
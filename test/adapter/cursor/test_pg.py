@@ -0,0 +1,169 @@
+import datetime
+import decimal
+import typing
+import uuid
+
+import psycopg
+import pydantic
+import pytest
+from psycopg import sql
+from psycopg.rows import dict_row
+
+from src import data
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.cursor_provider.pg import PgCursorProvider
+
+
+@pytest.fixture(scope="function")
+def order_table_fixture(pg_connection_str_fixture: str) -> typing.Generator[None, None, None]:
+    # a temp table would only be seen by the connection that made it, and a provider opens its own
+    with psycopg.connect(pg_connection_str_fixture, autocommit=True) as con:
+        con.execute("DROP TABLE IF EXISTS public.tmp_order")
+        _create_order_table(con=con, temp=False)
+
+        yield
+
+        con.execute("DROP TABLE public.tmp_order")
+
+
+def _create_order_table(*, con: psycopg.Connection, temp: bool = True) -> None:
+    con.execute(
+        sql.SQL(
+            """
+        CREATE {table} (
+            order_id    INT PRIMARY KEY
+        ,   big_id      BIGINT
+        ,   amount      NUMERIC(18, 2)
+        ,   ratio       DOUBLE PRECISION
+        ,   note        TEXT
+        ,   shipped     BOOL
+        ,   order_date  DATE
+        ,   created_at  TIMESTAMP
+        ,   updated_at  TIMESTAMPTZ
+        ,   customer_id UUID
+        )
+        """
+        ).format(
+            table=sql.SQL("TEMP TABLE tmp_order" if temp else "TABLE public.tmp_order")
+        )
+    )
+    con.execute(
+        """
+        INSERT INTO tmp_order VALUES
+            (1, 9007199254740993, 12345678901234.10, 0.1, 'a;b -- c', true, '2024-01-02',
+             '2024-01-02 03:04:05.678', '2024-01-02 03:04:05.678+00',
+             '00000000-0000-0000-0000-000000000001')
+        ,   (2, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
+        ,   (3, -1, -0.01, -1.5e300, '', false, '0001-01-01',
+             '1999-12-31 23:59:59.999999', '2038-01-19 03:14:08+00',
+             'ffffffff-ffff-ffff-ffff-ffffffffffff')
+        """
+    )
+
+
+def test_a_str_query_is_checked(pg_connection_fixture: psycopg.Connection) -> None:
+    with pg_connection_fixture.cursor(row_factory=dict_row) as raw_cur:
+        cur = PgCursor(cursor=raw_cur)
+
+        assert isinstance(cur.fetch_one(sql="SELECT 1 AS v -- x", params=None), data.Error)
+        assert isinstance(cur.fetch_one(sql="SELECT %s AS v", params=("a;b",)), data.Error)
+        assert isinstance(cur.execute(sql="SELECT 1; SELECT 2", params=None), data.Error)
+
+
+def test_composed_sql_is_trusted(pg_connection_fixture: psycopg.Connection) -> None:
+    _create_order_table(con=pg_connection_fixture)
+
+    with pg_connection_fixture.cursor(row_factory=dict_row) as raw_cur:
+        cur = PgCursor(cursor=raw_cur)
+
+        # the same text the check refuses as a str runs as composed sql, since its parts were
+        # quoted by psycopg
+        row = cur.fetch_one(
+            sql=sql.SQL("SELECT %s AS v, {} AS w").format(sql.Literal("-- /* */")),
+            params=("a;b",),
+        )
+        assert row == {"v": "a;b", "w": "-- /* */"}
+
+        assert (
+            cur.execute_many(
+                sql=sql.SQL("UPDATE {} SET note = %s WHERE order_id = %s").format(
+                    sql.Identifier("tmp_order")
+                ),
+                params=[("x;y", 2), ("/* z */", 3)],
+            )
+            is None
+        )
+
+        rows = cur.fetch_all(
+            sql=sql.SQL("SELECT note FROM {} ORDER BY order_id").format(
+                sql.Identifier("tmp_order")
+            ),
+            params=None,
+        )
+        assert rows == ({"note": "a;b -- c"}, {"note": "x;y"}, {"note": "/* z */"})
+
+
+def test_prepared_rows_match_unprepared_rows(pg_connection_fixture: psycopg.Connection) -> None:
+    _create_order_table(con=pg_connection_fixture)
+
+    with pg_connection_fixture.cursor(row_factory=dict_row) as raw_cur:
+        cur = PgCursor(cursor=raw_cur)
+        qry = sql.SQL("SELECT * FROM tmp_order WHERE order_id >= %s ORDER BY order_id")
+
+        rows = cur.fetch_all(sql=qry, params=(2,))
+        assert isinstance(rows, tuple)
+        assert [row["order_id"] for row in rows] == [2, 3]
+
+        # twice, so the second fetch runs the statement the first one prepared
+        for _ in range(2):
+            assert cur.fetch_all(sql=qry, params=(2,), prepare=True) == rows
+            assert cur.fetch_one(sql=qry, params=(2,), prepare=True) == rows[0]
+
+
+def test_binary_rows_match_text_rows(
+    pg_connection_str_fixture: str, order_table_fixture: None
+) -> None:
+    qry = sql.SQL("SELECT * FROM public.tmp_order ORDER BY order_id")
+
+    def fetch(*, binary: bool) -> tuple[data.Row, ...] | data.Error:
+        provider = PgCursorProvider(
+            db_config=data.DbConfig(
+                db_id="pg",
+                api=data.API.PSYCOPG,
+                host=None,
+                db_name=None,
+                keyring_db_username_entry=None,
+                keyring_db_password_entry=None,
+                connection_string=pydantic.SecretStr(pg_connection_str_fixture),
+                binary=binary,
+            )
+        )
+        with provider.open() as cur:
+            assert not isinstance(cur, data.Error)
+            return cur.fetch_all(sql=qry, params=None)
+    text_rows = fetch(binary=False)
+    assert isinstance(text_rows, tuple)
+    assert text_rows[0] == {
+        "order_id": 1,
+        "big_id": 9007199254740993,
+        "amount": decimal.Decimal("12345678901234.10"),
+        "ratio": 0.1,
+        "note": "a;b -- c",
+        "shipped": True,
+        "order_date": datetime.date(2024, 1, 2),
+        "created_at": datetime.datetime(2024, 1, 2, 3, 4, 5, 678000),
+        "updated_at": datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+        "customer_id": uuid.UUID(int=1),
+    }
+
+    binary_rows = fetch(binary=True)
+    assert binary_rows == text_rows
+    assert isinstance(binary_rows, tuple)
+    # the same types too, and not just equal values, since a row's digest tags each value with its
+    # type
+    assert [
+        {col: type(value) for col, value in row.items()} for row in binary_rows
+    ] == [{col: type(value) for col, value in row.items()} for row in text_rows]
+    assert [data.row_digest(row, col_names=row.keys()) for row in binary_rows] == [
+        data.row_digest(row, col_names=row.keys()) for row in text_rows
+    ]
@@ -0,0 +1,144 @@
+import datetime
+import decimal
+import json
+import pathlib
+
+import pytest
+
+from src import data
+from src.adapter.ds.dst_ds.file import FileDstDs
+
+
+@pytest.fixture(scope="session")
+def order_table_fixture() -> data.Table:
+    return data.Table(
+        db_name="src",
+        schema_name="sales",
+        table_name="order",
+        pk=("order_id",),
+        columns=frozenset(
+            {
+                data.Column(
+                    name="order_id",
+                    data_type=data.DataType.Int,
+                    nullable=False,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="order_date",
+                    data_type=data.DataType.Date,
+                    nullable=False,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="note",
+                    data_type=data.DataType.Text,
+                    nullable=True,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="amount",
+                    data_type=data.DataType.Decimal,
+                    nullable=True,
+                    length=None,
+                    precision=18,
+                    scale=2,
+                ),
+            }
+        ),
+    )
+
+
+def _ds(export: data.FileExport, table: data.Table) -> FileDstDs:
+    return FileDstDs(
+        export=export,
+        dst_db_name="lake",
+        dst_schema_name="sales",
+        dst_table_name="order",
+        src_table=table,
+        after={},
+    )
+
+
+def _rows() -> list[data.Row]:
+    return [
+        {
+            "order_id": i,
+            "order_date": datetime.date(2024, 1, 1 + i % 2),
+            "note": ("", None, "a,b\nc")[i % 3],
+            "amount": decimal.Decimal(i) / 4,
+        }
+        for i in range(7)
+    ]
+
+
+@pytest.mark.parametrize(
+    "file_format, compression",
+    (("csv", "gzip"), ("csv", None), ("jsonl", "gzip"), ("jsonl", None)),
+)
+def test_rows_read_back_as_written(
+    tmp_path: pathlib.Path,
+    order_table_fixture: data.Table,
+    file_format: str,
+    compression: str | None,
+) -> None:
+    export = data.FileExport(
+        folder=tmp_path,
+        format=file_format,
+        compression=compression,
+        partition_col="order_date",
+        rows_per_file=2,
+    )
+
+    ds = _ds(export, order_table_fixture)
+    assert ds.table_exists() is False
+    assert ds.create() is None
+    assert ds.upsert_rows_from_staging(_rows()) == 7
+
+    updated = {**_rows()[0], "note": "changed"}
+    assert ds.upsert_rows_from_staging([updated]) == 1
+    assert ds.delete_rows(keys=[data.FrozenDict({"order_id": 6})]) == 1
+    assert ds.delete_rows(keys=[data.FrozenDict({"order_id": 6})]) == 0
+
+    # a new instance reads everything back from the files
+    ds = _ds(export, order_table_fixture)
+    expected = [updated, *_rows()[1:6]]
+    rows = ds.fetch_rows(col_names=None, after=None)
+    assert isinstance(rows, list)
+    assert sorted(rows, key=lambda row: row["order_id"]) == expected
+    assert ds.get_row_count() == 6
+    assert ds.get_max_values(["order_id"]) == {"order_id": 6}
+
+    manifest = json.loads((tmp_path / "sales" / "order" / "manifest.json").read_text())
+    assert {part["partition"] for part in manifest["parts"]} == {
+        "order_date=2024-01-01",
+        "order_date=2024-01-02",
+        "poa_op=d",
+    }
+    assert all(part["rows"] <= 2 for part in manifest["parts"])
+
+
+def test_an_append_past_the_manifest_is_cut_off(
+    tmp_path: pathlib.Path, order_table_fixture: data.Table
+) -> None:
+    export = data.FileExport(folder=tmp_path)
+
+    ds = _ds(export, order_table_fixture)
+    assert ds.create() is None
+    assert ds.upsert_rows_from_staging(_rows()) == 7
+
+    (part,) = (tmp_path / "sales" / "order").glob("part-*.csv.gz")
+    committed_bytes = part.stat().st_size
+    with part.open("ab") as fh:
+        fh.write(b"half of a gzip member")
+
+    digests = _ds(export, order_table_fixture).fetch_digests()
+    assert isinstance(digests, dict)
+    assert len(digests) == 7
+    assert part.stat().st_size == committed_bytes
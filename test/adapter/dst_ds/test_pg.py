@@ -1,11 +1,13 @@
 import datetime
+import decimal
 
+import psycopg
 import pytest
-from psycopg2._psycopg import cursor
-from psycopg2.extras import RealDictCursor
+from psycopg.rows import dict_row
 
 from src import data
-from src.adapter.ds.dst_ds import PgDstDs
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.ds.dst_ds.pg import PgDstDs
 
 
 @pytest.fixture(scope="session")
@@ -86,17 +88,17 @@ def customer_table_fixture() -> data.Table:
     )
 
 
-def test_create(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_create(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     assert not _customer_table_exists(
         cur=pg_cursor_fixture
     ), "The table should not exist before create."
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     ds.create()
     assert _customer_table_exists(
@@ -104,7 +106,7 @@ def test_create(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.
     ), "The table was not created after create()."
 
 
-def test_delete_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_delete_rows(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
         """
@@ -117,22 +119,27 @@ def test_delete_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture:
     """
     )
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
-    ds.delete_rows(keys={data.FrozenDict({"customer_id": 2})})
+    deleted = ds.delete_rows(
+        keys=[data.FrozenDict({"customer_id": 2}), data.FrozenDict({"customer_id": 4})]
+    )
+    assert deleted == 1, f"1 row should have been deleted, but delete_rows returned {deleted}."
     pg_cursor_fixture.execute("SELECT poa_op FROM poa.src_sales_customer WHERE customer_id = 2")
     assert (
         pg_cursor_fixture.fetchone()["poa_op"] == "d"
     ), "customer_id = 2 should have been deleted, but it wasn't."  # noqa
+    deleted_again = ds.delete_rows(keys=[data.FrozenDict({"customer_id": 2})])
+    assert deleted_again == 0, "a row that was already deleted shouldn't be counted again."
 
 
 def test_fetch_rows_when_after_is_none(
-    pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table
+    pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table
 ):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
@@ -146,23 +153,23 @@ def test_fetch_rows_when_after_is_none(
     """
     )
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     rows = ds.fetch_rows(col_names={"first_name", "last_name"}, after=None)
-    assert rows == [
+    assert rows == (
         {"first_name": "Steve", "last_name": "Smith"},
         {"first_name": "Mandie", "last_name": "Mandlebrot"},
         {"first_name": "Bill", "last_name": "Button"},
-    ]
+    )
 
 
 def test_fetch_rows_when_after_is_not_none(
-    pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table
+    pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table
 ):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
@@ -176,12 +183,12 @@ def test_fetch_rows_when_after_is_not_none(
     """
     )
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     rows = ds.fetch_rows(
         col_names={"first_name", "last_name"},
@@ -196,7 +203,7 @@ def test_fetch_rows_when_after_is_not_none(
     }
 
 
-def test_get_max_values(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_get_max_values(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
         """
@@ -209,12 +216,12 @@ def test_get_max_values(pg_cursor_fixture: RealDictCursor, customer_table_fixtur
     """
     )
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     rows = ds.get_max_values({"date_added", "date_deleted"})
     assert rows == {
@@ -223,7 +230,7 @@ def test_get_max_values(pg_cursor_fixture: RealDictCursor, customer_table_fixtur
     }
 
 
-def test_get_row_count(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_get_row_count(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
         """
@@ -236,31 +243,31 @@ def test_get_row_count(pg_cursor_fixture: RealDictCursor, customer_table_fixture
     """
     )
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="dst",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     rows = ds.get_row_count()
     assert rows == 3
 
 
-def test_table_exists(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_table_exists(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="src",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     assert ds.table_exists()
 
 
-def test_truncate(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_truncate(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
         """
@@ -276,12 +283,12 @@ def test_truncate(pg_cursor_fixture: RealDictCursor, customer_table_fixture: dat
     initial_rows = pg_cursor_fixture.fetchone()["ct"]  # noqa
     assert initial_rows == 3, f"initial rows should be 3, but there were {initial_rows} rows."
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="src",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     ds.truncate()
     pg_cursor_fixture.execute("SELECT COUNT(*) AS ct FROM poa.src_sales_customer")
@@ -291,7 +298,7 @@ def test_truncate(pg_cursor_fixture: RealDictCursor, customer_table_fixture: dat
     ), f"rows after truncate should be 0, but there were {rows_after_truncate} rows."
 
 
-def test_upsert_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture: data.Table):
+def test_upsert_rows(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
     _create_customer_table(cur=pg_cursor_fixture)
     pg_cursor_fixture.execute(
         """
@@ -307,12 +314,12 @@ def test_upsert_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture:
     initial_rows = pg_cursor_fixture.fetchone()["ct"]  # noqa
     assert initial_rows == 3, f"initial rows should be 3, but there were {initial_rows} rows."
     ds = PgDstDs(
-        cur=pg_cursor_fixture,
+        cur=PgCursor(cursor=pg_cursor_fixture),
         dst_db_name="src",
         dst_schema_name="poa",
         dst_table_name="src_sales_customer",
         src_table=customer_table_fixture,
-        batch_ts=datetime.datetime.now(),
+        after={},
     )
     rows = [
         {
@@ -336,7 +343,8 @@ def test_upsert_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture:
             "purchases": 13.45,
         },
     ]
-    ds.upsert_rows_from_staging(rows)
+    assert ds.create_staging_table() is None
+    assert ds.upsert_rows_from_staging(rows) == 2
     pg_cursor_fixture.execute("SELECT COUNT(*) AS ct FROM poa.src_sales_customer")
     rows_after_upsert = pg_cursor_fixture.fetchone()["ct"]  # noqa
     assert (
@@ -344,7 +352,78 @@ def test_upsert_rows(pg_cursor_fixture: RealDictCursor, customer_table_fixture:
     ), f"rows after truncate should be 4, but there were {rows_after_upsert} rows."
 
 
-def _create_customer_table(*, cur: cursor) -> None:
+def test_fetch_digests(pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table):
+    _create_customer_table(cur=pg_cursor_fixture)
+    ds = PgDstDs(
+        cur=PgCursor(cursor=pg_cursor_fixture),
+        dst_db_name="src",
+        dst_schema_name="poa",
+        dst_table_name="src_sales_customer",
+        src_table=customer_table_fixture,
+        after={},
+    )
+    row = {
+        "birth_date": datetime.date(1912, 3, 4),
+        "customer_id": 1,
+        "date_added": datetime.datetime(2010, 1, 2, tzinfo=datetime.timezone.utc),
+        "date_deleted": None,
+        "first_name": "Steve",
+        "last_name": "Smith",
+        "middle_name": "S",
+        "purchases": 2345.67,
+    }
+    assert ds.create_staging_table() is None
+    assert ds.upsert_rows_from_staging([row]) == 1
+    digests = ds.fetch_digests()
+    assert digests == {
+        data.FrozenDict({"customer_id": 1}): data.row_digest(
+            row, col_names=set(row.keys()) - {"customer_id"}
+        )
+    }, "poa_hd should match data.row_digest for the row."
+
+
+def test_a_row_hashed_the_old_way_only_gets_its_digest_rewritten(
+    pg_cursor_fixture: psycopg.Cursor, customer_table_fixture: data.Table
+):
+    _create_customer_table(cur=pg_cursor_fixture)
+    pg_cursor_fixture.execute(
+        """
+        INSERT INTO poa.src_sales_customer
+            (birth_date, customer_id, date_added, date_deleted, first_name, last_name, middle_name, purchases, poa_hd, poa_op, poa_ts)
+        VALUES
+            ('1912-03-04', 1, '2010-01-02 +0', null, 'Steve', 'Smith', 'S', 2345.67, md5('1'), 'a', '2022-09-10 +0')
+    """
+    )
+    ds = PgDstDs(
+        cur=PgCursor(cursor=pg_cursor_fixture),
+        dst_db_name="src",
+        dst_schema_name="poa",
+        dst_table_name="src_sales_customer",
+        src_table=customer_table_fixture,
+        after={},
+    )
+    row = {
+        "birth_date": datetime.date(1912, 3, 4),
+        "customer_id": 1,
+        "date_added": datetime.datetime(2010, 1, 2, tzinfo=datetime.timezone.utc),
+        "date_deleted": None,
+        "first_name": "Steve",
+        "last_name": "Smith",
+        "middle_name": "S",
+        "purchases": decimal.Decimal("2345.67"),
+    }
+    assert ds.create_staging_table() is None
+    assert ds.upsert_rows_from_staging([row]) == 0
+
+    pg_cursor_fixture.execute("SELECT poa_hd, poa_op, poa_ts FROM poa.src_sales_customer")
+    assert pg_cursor_fixture.fetchone() == {
+        "poa_hd": data.row_digest(row, col_names=set(row.keys()) - {"customer_id"}),
+        "poa_op": "a",
+        "poa_ts": datetime.datetime(2022, 9, 10, tzinfo=datetime.timezone.utc),
+    }
+
+
+def _create_customer_table(*, cur: psycopg.Cursor) -> None:
     cur.execute(
         """
         CREATE TABLE poa.src_sales_customer (
@@ -364,7 +443,7 @@ def _create_customer_table(*, cur: cursor) -> None:
     )
 
 
-def _customer_table_exists(*, cur: cursor) -> bool:
+def _customer_table_exists(*, cur: psycopg.Cursor) -> bool:
     cur.execute(
         """
         SELECT COUNT(*) AS ct 
@@ -374,3 +453,35 @@ def _customer_table_exists(*, cur: cursor) -> bool:
     )
     result = cur.fetchone()
     return result["ct"] > 0  # noqa
+
+
+def test_lock_is_skipped_while_another_sync_holds_it(
+    pg_connection_str_fixture: str, customer_table_fixture: data.Table
+) -> None:
+    def _ds(cur: psycopg.Cursor) -> PgDstDs:
+        return PgDstDs(
+            cur=PgCursor(cursor=cur),
+            dst_db_name="src",
+            dst_schema_name="poa",
+            dst_table_name="src_sales_customer",
+            src_table=customer_table_fixture,
+            after={},
+            lock_policy=data.LockPolicy.SKIP,
+        )
+
+    with (
+        psycopg.connect(pg_connection_str_fixture) as first,
+        psycopg.connect(pg_connection_str_fixture) as second,
+    ):
+        with first.cursor(row_factory=dict_row) as cur:
+            assert _ds(cur).lock() is True
+
+        with second.cursor(row_factory=dict_row) as cur:
+            assert _ds(cur).lock() is False
+
+        # the lock goes with the transaction that took it
+        first.commit()
+        second.rollback()
+
+        with second.cursor(row_factory=dict_row) as cur:
+            assert _ds(cur).lock() is True
@@ -0,0 +1,165 @@
+import datetime
+import decimal
+import pathlib
+import uuid
+
+import pytest
+
+from src import data
+from src.adapter.cursor_provider.sqlite import SqliteCursorProvider
+from src.adapter.ds.dst_ds.sqlite import SqliteDstDs
+
+
+@pytest.fixture(scope="session")
+def order_table_fixture() -> data.Table:
+    return data.Table(
+        db_name="src",
+        schema_name="sales",
+        table_name="order",
+        pk=("order_id",),
+        columns=frozenset(
+            {
+                data.Column(
+                    name="order_id",
+                    data_type=data.DataType.Int,
+                    nullable=False,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="order_date",
+                    data_type=data.DataType.Date,
+                    nullable=False,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="note",
+                    data_type=data.DataType.Text,
+                    nullable=True,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="amount",
+                    data_type=data.DataType.Decimal,
+                    nullable=True,
+                    length=None,
+                    precision=18,
+                    scale=2,
+                ),
+                data.Column(
+                    name="customer_id",
+                    data_type=data.DataType.UUID,
+                    nullable=True,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+                data.Column(
+                    name="shipped",
+                    data_type=data.DataType.TimestampTZ,
+                    nullable=True,
+                    length=None,
+                    precision=None,
+                    scale=None,
+                ),
+            }
+        ),
+    )
+
+
+def _db_config(tmp_path: pathlib.Path) -> data.DbConfig:
+    return data.DbConfig(
+        db_id="edge",
+        api=data.API.SQLITE,
+        host=None,
+        db_name="edge",
+        keyring_db_username_entry=None,
+        keyring_db_password_entry=None,
+        connection_string=None,
+        path=tmp_path / "edge.sqlite",
+    )
+
+
+def _ds(cur: data.Cursor, table: data.Table) -> SqliteDstDs:
+    return SqliteDstDs(
+        cur=cur,
+        dst_db_name="edge",
+        dst_schema_name="sales",
+        dst_table_name="order",
+        src_table=table,
+        after={},
+    )
+
+
+def _rows() -> list[data.Row]:
+    return [
+        {
+            "order_id": i,
+            "order_date": datetime.date(2024, 1, 1 + i % 2),
+            "note": (None, "a;b -- c", "")[i % 3],
+            "amount": decimal.Decimal("12345678901234.10") + i,
+            "customer_id": uuid.UUID(int=i),
+            "shipped": datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+            + datetime.timedelta(minutes=i),
+        }
+        for i in range(1200)
+    ]
+
+
+def test_rows_read_back_as_written(
+    tmp_path: pathlib.Path, order_table_fixture: data.Table
+) -> None:
+    provider = SqliteCursorProvider(db_config=_db_config(tmp_path))
+
+    with provider.open() as cur:
+        ds = _ds(cur, order_table_fixture)
+        assert ds.table_exists() is False
+        assert ds.create() is None
+        assert ds.upsert_rows_from_staging(_rows()) == 1200
+
+        updated = {**_rows()[0], "note": "changed"}
+        assert ds.upsert_rows_from_staging([updated]) == 1
+
+        # keys are deleted in batches, so more than fit in one statement are still counted
+        keys = [data.FrozenDict({"order_id": i}) for i in range(6, 2000)]
+        assert ds.delete_rows(keys=keys) == 1194
+        assert ds.delete_rows(keys=keys) == 0
+
+    with provider.open() as cur:
+        ds = _ds(cur, order_table_fixture)
+        expected = [updated, *_rows()[1:6]]
+        assert ds.fetch_rows(col_names=None, after=None) == expected
+        assert ds.get_row_count() == 6
+        assert ds.get_max_values(["order_id", "amount"]) == {
+            "order_id": 1199,
+            "amount": decimal.Decimal("12345678902433.10"),
+        }
+
+        after = ds.fetch_rows(
+            col_names={"order_id"}, after={"order_date": datetime.date(2024, 1, 1)}
+        )
+        assert after == [{"order_id": 1}, {"order_id": 3}, {"order_id": 5}]
+
+        digests = ds.fetch_digests()
+        assert isinstance(digests, dict)
+        assert set(digests) == {data.FrozenDict({"order_id": i}) for i in range(6)}
+
+
+def test_an_unchanged_row_is_left_alone(
+    tmp_path: pathlib.Path, order_table_fixture: data.Table
+) -> None:
+    provider = SqliteCursorProvider(db_config=_db_config(tmp_path))
+
+    with provider.open() as cur:
+        ds = _ds(cur, order_table_fixture)
+        assert ds.create() is None
+        assert ds.upsert_rows_from_staging(_rows()[:2]) == 2
+        assert ds.upsert_rows_from_staging(_rows()[:2]) == 0
+
+        rows = cur.fetch_all(sql='SELECT poa_op FROM "sales_order"', params=None)
+        assert rows == ({"poa_op": "a"}, {"poa_op": "a"})
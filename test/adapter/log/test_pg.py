@@ -5,6 +5,7 @@ import psycopg
 import pytest
 
 from src import data
+from src.adapter.cursor.pg import PgCursor
 from src.adapter.log.pg import PgLog
 
 
@@ -14,7 +15,7 @@ class CursorProvider(data.CursorProvider):
 
     @contextlib.contextmanager
     def open(self) -> typing.Generator[typing.Any, None, None]:
-        yield self._cur
+        yield PgCursor(cursor=self._cur)
 
 
 @pytest.fixture(scope="function")
@@ -83,7 +84,159 @@ def test_sync_succeeded(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log
         OVERRIDING SYSTEM VALUE VALUES (1, 'src-db', 'src-schema', 'src-table', TRUE, now());
     """
     )
-    log_fixture.sync_succeeded(sync_id=1, execution_millis=100)
+    log_fixture.sync_succeeded(
+        sync_id=1,
+        rows_added=3,
+        rows_deleted=0,
+        rows_updated=1,
+        execution_millis=100,
+        peak_rss_bytes=None,
+        peak_traced_bytes=None,
+    )
     pg_cursor_fixture.execute("SELECT ss.execution_millis FROM poa.sync_success AS ss;")
     execution_millis = [row["execution_millis"] for row in pg_cursor_fixture.fetchall()]  # type: ignore
     assert execution_millis == [100]
+
+
+def test_sync_phases(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log) -> None:
+    pg_cursor_fixture.execute(
+        """
+        INSERT INTO poa.sync (sync_id, src_db_name, src_schema_name, src_table_name, incremental, ts) 
+        OVERRIDING SYSTEM VALUE VALUES (1, 'src-db', 'src-schema', 'src-table', TRUE, now());
+    """
+    )
+    log_fixture.sync_phases(
+        sync_id=1,
+        phases=(
+            data.SyncPhase(name="fetch_src_rows", calls=1, execution_millis=20, rows=3, est_bytes=300),
+            data.SyncPhase(name="upsert", calls=2, execution_millis=10, rows=3, est_bytes=None),
+        ),
+    )
+    pg_cursor_fixture.execute(
+        "SELECT sp.phase, sp.calls, sp.rows FROM poa.sync_phase AS sp ORDER BY sp.phase;"
+    )
+    phases = [(row["phase"], row["calls"], row["rows"]) for row in pg_cursor_fixture.fetchall()]  # type: ignore
+    assert phases == [("fetch_src_rows", 1, 3), ("upsert", 2, 3)]
+
+
+def test_batch_sizes(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log) -> None:
+    pg_cursor_fixture.execute(
+        """
+        INSERT INTO poa.sync (sync_id, src_db_name, src_schema_name, src_table_name, incremental, ts) 
+        OVERRIDING SYSTEM VALUE VALUES 
+            (1, 'src-db', 'src-schema', 'src-table', TRUE, now() - INTERVAL '1 DAY')
+        ,   (2, 'src-db', 'src-schema', 'src-table', TRUE, now());
+    """
+    )
+    log_fixture.sync_phases(
+        sync_id=1,
+        phases=(
+            data.SyncPhase(name="upsert", calls=2, execution_millis=10, rows=3, est_bytes=None, batch_size=100),
+            data.SyncPhase(name="delete", calls=1, execution_millis=10, rows=1, est_bytes=None, batch_size=50),
+        ),
+    )
+    log_fixture.sync_phases(
+        sync_id=2,
+        phases=(
+            data.SyncPhase(name="upsert", calls=2, execution_millis=10, rows=3, est_bytes=None, batch_size=200),
+            data.SyncPhase(name="truncate", calls=1, execution_millis=10, rows=None, est_bytes=None),
+        ),
+    )
+    batch_sizes = log_fixture.batch_sizes(
+        src_db_name="src-db", src_schema_name="src-schema", src_table_name="src-table"
+    )
+    assert batch_sizes == {"delete": 50, "upsert": 200}
+
+
+def test_sync_plan(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log) -> None:
+    pg_cursor_fixture.execute(
+        """
+        INSERT INTO poa.sync (sync_id, src_db_name, src_schema_name, src_table_name, incremental, ts) 
+        OVERRIDING SYSTEM VALUE VALUES (1, 'src-db', 'src-schema', 'src-table', TRUE, now());
+    """
+    )
+    log_fixture.sync_plan(
+        sync_id=1,
+        plan=data.SyncPlan(
+            strategy="key_fetch",
+            reason="full_pull ~100 ms, key_fetch ~10 ms.",
+            stats=data.TableStats(estimated_rows=1000),
+            est_millis=5,
+            raw_est_millis=10,
+            actual_millis=20,
+        ),
+    )
+    log_fixture.sync_succeeded(sync_id=1, rows_added=0, rows_deleted=0, rows_updated=1, execution_millis=100, peak_rss_bytes=None, peak_traced_bytes=None)
+    history = log_fixture.sync_history(
+        src_db_name="src-db", src_schema_name="src-schema", src_table_name="src-table"
+    )
+    assert history == data.SyncHistory(corrections={"key_fetch": 2.0})
+
+
+def test_table_snapshot(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log) -> None:
+    for fingerprint in ("1:2:3", "1:2:4"):
+        log_fixture.save_table_snapshot(
+            src_db_name="src-db",
+            src_schema_name=None,
+            src_table_name="src-table",
+            dst_db_name="dst-db",
+            dst_schema_name="dst-schema",
+            dst_table_name="dst-table",
+            snapshot=data.TableSnapshot(fingerprint=fingerprint, estimated_rows=10),
+        )
+    snapshot = log_fixture.table_snapshot(
+        src_db_name="src-db",
+        src_schema_name=None,
+        src_table_name="src-table",
+        dst_db_name="dst-db",
+        dst_schema_name="dst-schema",
+        dst_table_name="dst-table",
+    )
+    assert snapshot == data.TableSnapshot(fingerprint="1:2:4", estimated_rows=10)
+
+    # another dst of the same src hasn't been synced, so it has no snapshot to skip by
+    other_snapshot = log_fixture.table_snapshot(
+        src_db_name="src-db",
+        src_schema_name=None,
+        src_table_name="src-table",
+        dst_db_name="dst-db",
+        dst_schema_name="dst-schema",
+        dst_table_name="other-dst-table",
+    )
+    assert other_snapshot is None
+
+
+def test_watermark(pg_cursor_fixture: psycopg.Cursor, log_fixture: data.Log) -> None:
+    assert (
+        log_fixture.watermark(
+            src_db_name="src-db",
+            src_schema_name="public",
+            src_table_name="src-table",
+            dst_db_name="dst-db",
+            dst_schema_name="dst-schema",
+            dst_table_name="dst-table",
+            capture="logical-replication",
+        )
+        is None
+    )
+    for watermark in ("0/16B3748", "0/16B37F0"):
+        log_fixture.save_watermark(
+            src_db_name="src-db",
+            src_schema_name="public",
+            src_table_name="src-table",
+            dst_db_name="dst-db",
+            dst_schema_name="dst-schema",
+            dst_table_name="dst-table",
+            capture="logical-replication",
+            watermark=watermark,
+        )
+    watermark = log_fixture.watermark(
+        src_db_name="src-db",
+        src_schema_name="public",
+        src_table_name="src-table",
+        dst_db_name="dst-db",
+        dst_schema_name="dst-schema",
+        dst_table_name="dst-table",
+        capture="logical-replication",
+    )
+    assert watermark == "0/16B37F0"
@@ -0,0 +1,109 @@
+import datetime
+import decimal
+import gzip
+import json
+import pathlib
+
+import pytest
+
+from src import data
+from src.adapter.ds.src_ds.file import FileSrcDs
+
+_CSV: str = (
+    "order_id,order_date,note,amount\n"
+    + "".join(f'{i},2024-01-0{1 + i % 2},"a,b\nc{i}",{i}.25\n' for i in range(6))
+    + "6,2024-01-03,,\\N\n"
+)
+
+_JSONL: str = "".join(
+    json.dumps(
+        {
+            "order_id": i,
+            "order_date": f"2024-01-0{1 + i % 2}",
+            "note": f"a,b\nc{i}",
+            "amount": i + 0.25,
+        }
+    )
+    + "\n"
+    for i in range(6)
+) + json.dumps({"order_id": 6, "order_date": "2024-01-03", "note": "", "amount": None}) + "\n"
+
+
+def _ds(export: data.FileExport) -> FileSrcDs:
+    return FileSrcDs(
+        export=export,
+        db_name="lake",
+        schema_name="sales",
+        table_name="order",
+        pk_cols=("order_id",),
+        after={"order_date": datetime.date(2024, 1, 1)},
+    )
+
+
+@pytest.mark.parametrize(
+    "file_format, compression",
+    (("csv", "gzip"), ("csv", None), ("jsonl", "gzip"), ("jsonl", None)),
+)
+def test_rows_are_read_with_inferred_types(
+    tmp_path: pathlib.Path, file_format: str, compression: str | None
+) -> None:
+    export = data.FileExport(folder=tmp_path, format=file_format, compression=compression)
+
+    content = (_CSV if file_format == "csv" else _JSONL).encode("utf-8")
+    if compression == "gzip":
+        content = gzip.compress(content)
+    path = tmp_path / "sales" / ("order." + file_format + (".gz" if compression else ""))
+    path.parent.mkdir()
+    path.write_bytes(content)
+
+    ds = _ds(export)
+    table = ds.get_table()
+    assert isinstance(table, data.Table)
+    assert {c.name: c.data_type for c in table.columns} == {
+        "order_id": data.DataType.Int,
+        "order_date": data.DataType.Date,
+        "note": data.DataType.Text,
+        "amount": data.DataType.Decimal,
+    }
+    assert [c.nullable for c in table.columns if c.name == "order_id"] == [False]
+
+    # the ds's after skips the rows of 2024-01-01
+    rows = ds.fetch_rows(col_names={"order_id"}, after=None)
+    assert rows == [{"order_id": 1}, {"order_id": 3}, {"order_id": 5}, {"order_id": 6}]
+    assert ds.get_row_count() == 4
+
+    keys = [data.FrozenDict({"order_id": order_id}) for order_id in (4, 6, 99)]
+    for _ in range(2):
+        found = ds.fetch_rows_by_key(col_names=None, keys=keys)
+        assert isinstance(found, list)
+        assert sorted(found, key=lambda row: row["order_id"]) == [
+            {
+                "order_id": 4,
+                "order_date": datetime.date(2024, 1, 1),
+                "note": "a,b\nc4",
+                "amount": decimal.Decimal("4.25"),
+            },
+            {
+                "order_id": 6,
+                "order_date": datetime.date(2024, 1, 3),
+                "note": "",
+                "amount": None,
+            },
+        ]
+
+
+def test_the_index_is_rebuilt_when_the_file_changes(tmp_path: pathlib.Path) -> None:
+    export = data.FileExport(folder=tmp_path, format="csv", compression=None)
+
+    path = tmp_path / "sales" / "order.csv"
+    path.parent.mkdir()
+    path.write_text(_CSV)
+
+    key = data.FrozenDict({"order_id": 2})
+    assert _ds(export).fetch_rows_by_key(col_names=["note"], keys=[key]) == [{"note": "a,b\nc2"}]
+
+    # the key's last row is the one found, like an upsert
+    with path.open("a") as fh:
+        fh.write("2,2024-01-01,changed,1.5\n")
+
+    assert _ds(export).fetch_rows_by_key(col_names=["note"], keys=[key]) == [{"note": "changed"}]
@@ -0,0 +1,94 @@
+import typing
+
+import psycopg
+import pytest
+from psycopg.rows import dict_row
+
+from src import data
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.ds.src_ds.pg_cdc import PgCdcSrcDs, _slot_name
+
+
+@pytest.fixture(scope="function")
+def cdc_connection_fixture(
+    pg_connection_str_fixture: str,
+) -> typing.Generator[psycopg.Connection, None, None]:
+    with psycopg.connect(
+        pg_connection_str_fixture, autocommit=True, row_factory=dict_row
+    ) as con:
+        row = con.execute("SHOW wal_level").fetchone()
+        if row is None or row["wal_level"] != "logical":
+            pytest.skip("wal_level has to be logical to create a replication slot.")
+
+        con.execute("DROP TABLE IF EXISTS public.cdc_customer")
+        con.execute("CREATE TABLE public.cdc_customer (customer_id INT PRIMARY KEY, name TEXT)")
+
+        yield con
+
+        con.execute(
+            """
+            SELECT pg_drop_replication_slot(s.slot_name)
+            FROM pg_replication_slots AS s
+            WHERE s.slot_name = 'poa_public_cdc_customer_dst_poa_cdc_customer'
+            """
+        )
+        con.execute("DROP TABLE public.cdc_customer")
+
+
+def test_a_change_committed_after_the_watermark_is_not_lost(
+    pg_connection_str_fixture: str, cdc_connection_fixture: psycopg.Connection
+) -> None:
+    ds = PgCdcSrcDs(
+        cur=PgCursor(cursor=cdc_connection_fixture.cursor()),
+        db_name="testdb",
+        schema_name="public",
+        table_name="cdc_customer",
+        after={},
+        consumer="dst.poa.cdc_customer",
+    )
+    assert ds.start_capture() is True
+
+    with (
+        psycopg.connect(pg_connection_str_fixture) as slow,
+        psycopg.connect(pg_connection_str_fixture) as fast,
+    ):
+        # written first, but committed after the next batch has been applied and confirmed
+        slow.execute("INSERT INTO public.cdc_customer VALUES (1, 'Steve')")
+
+        fast.execute("INSERT INTO public.cdc_customer VALUES (2, 'Mandie')")
+        fast.commit()
+
+        first = ds.fetch_changes(after=None, limit=1000)
+        assert isinstance(first, data.ChangeBatch)
+        assert [change.key for change in first.changes] == [{"customer_id": 2}]
+        assert first.watermark is not None
+        assert ds.confirm(watermark=first.watermark) is None
+
+        slow.commit()
+
+    second = ds.fetch_changes(after=first.watermark, limit=1000)
+    assert isinstance(second, data.ChangeBatch)
+    assert [change.key for change in second.changes] == [{"customer_id": 1}]
+    assert second.watermark is not None
+    assert ds.confirm(watermark=second.watermark) is None
+
+    # a confirmed batch isn't read again
+    third = ds.fetch_changes(after=second.watermark, limit=1000)
+    assert isinstance(third, data.ChangeBatch)
+    assert third.changes == ()
+
+
+def test_each_consumer_gets_a_slot_of_its_own() -> None:
+    first = _slot_name(schema_name="public", table_name="customer", consumer="dst.poa.customer")
+    second = _slot_name(schema_name="public", table_name="customer", consumer="dst.poa.customer2")
+    assert first == "poa_public_customer_dst_poa_customer"
+    assert first != second
+
+    # names past what pg allows still differ, even where they'd be cut short to the same name
+    long_table_name = "customer_" + "x" * 60
+    long_names = {
+        _slot_name(schema_name="public", table_name=long_table_name, consumer=f"dst.poa.{i}")
+        for i in range(10)
+    }
+    assert len(long_names) == 10
+    assert all(len(name) == 63 for name in long_names)
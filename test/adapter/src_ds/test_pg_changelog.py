@@ -0,0 +1,179 @@
+import typing
+
+import psycopg
+import pydantic
+import pytest
+from psycopg.rows import dict_row
+
+from src import data
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.cursor_provider.pg import PgCursorProvider
+from src.adapter.ds.src_ds.pg_changelog import PgChangelogSrcDs
+
+
+@pytest.fixture(scope="function")
+def changelog_connection_fixture(
+    pg_connection_str_fixture: str,
+) -> typing.Generator[psycopg.Connection, None, None]:
+    with psycopg.connect(
+        pg_connection_str_fixture, autocommit=True, row_factory=dict_row
+    ) as con:
+        con.execute("DROP TABLE IF EXISTS public.changelog_customer")
+        con.execute("DROP TABLE IF EXISTS public.poa_changelog")
+        con.execute("DROP TABLE IF EXISTS public.poa_changelog_consumer")
+        con.execute(
+            "CREATE TABLE public.changelog_customer (customer_id INT PRIMARY KEY, name TEXT)"
+        )
+        con.execute("INSERT INTO public.changelog_customer VALUES (1, 'Steve'), (2, 'Mandie')")
+
+        yield con
+
+        con.execute("DROP TABLE public.changelog_customer")
+        con.execute("DROP FUNCTION IF EXISTS public.poa_changelog_changelog_customer CASCADE")
+        con.execute("DROP TABLE IF EXISTS public.poa_changelog")
+        con.execute("DROP TABLE IF EXISTS public.poa_changelog_consumer")
+
+
+def _ds(
+    *, con: psycopg.Connection, con_str: str, consumer: str = "dst.poa.customer"
+) -> PgChangelogSrcDs:
+    return PgChangelogSrcDs(
+        cur=PgCursor(cursor=con.cursor()),
+        cursor_provider=PgCursorProvider(
+            db_config=data.DbConfig(
+                db_id="src",
+                api=data.API.PSYCOPG,
+                host=None,
+                db_name=None,
+                keyring_db_username_entry=None,
+                keyring_db_password_entry=None,
+                connection_string=pydantic.SecretStr(con_str),
+            )
+        ),
+        db_name="testdb",
+        schema_name="public",
+        table_name="changelog_customer",
+        after={},
+        consumer=consumer,
+    )
+
+
+def test_start_capture_installs_the_triggers_once(
+    pg_connection_str_fixture: str,
+    changelog_connection_fixture: psycopg.Connection,
+) -> None:
+    ds = _ds(con=changelog_connection_fixture, con_str=pg_connection_str_fixture)
+
+    assert ds.start_capture() is True
+    assert ds.start_capture() is False
+
+    # the triggers are there, but nothing was logged for a second consumer before now
+    second = _ds(
+        con=changelog_connection_fixture,
+        con_str=pg_connection_str_fixture,
+        consumer="dst.poa.customer2",
+    )
+    assert second.start_capture() is True
+
+
+def test_fetch_changes_logs_each_statement_and_advances_the_watermark(
+    pg_connection_str_fixture: str,
+    changelog_connection_fixture: psycopg.Connection,
+) -> None:
+    ds = _ds(con=changelog_connection_fixture, con_str=pg_connection_str_fixture)
+    assert ds.start_capture() is True
+
+    before = ds.current_watermark()
+    assert isinstance(before, str)
+
+    con = changelog_connection_fixture
+    con.execute("INSERT INTO public.changelog_customer VALUES (3, 'Mark')")
+    con.execute("UPDATE public.changelog_customer SET customer_id = 4 WHERE customer_id = 1")
+    con.execute("DELETE FROM public.changelog_customer WHERE customer_id = 2")
+
+    batch = ds.fetch_changes(after=before, limit=1000)
+    assert isinstance(batch, data.ChangeBatch)
+    assert [change.op for change in batch.changes] == ["insert", "update", "update", "delete"]
+    # an update logs the key it had before and the key it has after
+    assert batch.changes[0].key == {"customer_id": 3}
+    assert {change.key["customer_id"] for change in batch.changes[1:3]} == {1, 4}
+    assert batch.changes[3].key == {"customer_id": 2}
+    assert batch.watermark is not None
+    assert batch.more is False
+
+    before_change_id, _, before_xmin = before.partition(":")
+    change_id, _, xmin = batch.watermark.partition(":")
+    assert int(change_id) > int(before_change_id)
+    assert int(xmin) > int(before_xmin)
+
+    assert ds.confirm(watermark=batch.watermark) is None
+
+    # a confirmed batch is deleted from the changelog, so it isn't read again
+    drained = ds.fetch_changes(after=batch.watermark, limit=1000)
+    assert isinstance(drained, data.ChangeBatch)
+    assert drained.changes == ()
+
+
+def test_a_change_is_not_drained_while_an_older_transaction_is_running(
+    pg_connection_str_fixture: str,
+    changelog_connection_fixture: psycopg.Connection,
+) -> None:
+    ds = _ds(con=changelog_connection_fixture, con_str=pg_connection_str_fixture)
+    assert ds.start_capture() is True
+
+    with (
+        psycopg.connect(pg_connection_str_fixture) as slow,
+        psycopg.connect(pg_connection_str_fixture) as fast,
+    ):
+        slow.execute("INSERT INTO public.changelog_customer VALUES (3, 'Mark')")
+
+        fast.execute("INSERT INTO public.changelog_customer VALUES (4, 'Sarah')")
+        fast.commit()
+
+        # draining 4 would move the watermark past 3, which commits later
+        waiting = ds.fetch_changes(after=None, limit=1000)
+        assert isinstance(waiting, data.ChangeBatch)
+        assert waiting.changes == ()
+
+        slow.commit()
+
+    batch = ds.fetch_changes(after=None, limit=1000)
+    assert isinstance(batch, data.ChangeBatch)
+    assert [change.key for change in batch.changes] == [
+        {"customer_id": 3},
+        {"customer_id": 4},
+    ]
+
+
+def test_each_consumer_drains_its_own_changes(
+    pg_connection_str_fixture: str,
+    changelog_connection_fixture: psycopg.Connection,
+) -> None:
+    first = _ds(
+        con=changelog_connection_fixture,
+        con_str=pg_connection_str_fixture,
+        consumer="dst.poa.customer",
+    )
+    second = _ds(
+        con=changelog_connection_fixture,
+        con_str=pg_connection_str_fixture,
+        consumer="dst.poa.customer2",
+    )
+    assert first.start_capture() is True
+    assert second.start_capture() is True
+
+    changelog_connection_fixture.execute("INSERT INTO public.changelog_customer VALUES (3, 'Mark')")
+
+    first_batch = first.fetch_changes(after=None, limit=1000)
+    assert isinstance(first_batch, data.ChangeBatch)
+    assert first_batch.watermark is not None
+    assert first.confirm(watermark=first_batch.watermark) is None
+
+    drained = first.fetch_changes(after=first_batch.watermark, limit=1000)
+    assert isinstance(drained, data.ChangeBatch)
+    assert drained.changes == ()
+
+    # what the first consumer confirmed is still there for the second one
+    second_batch = second.fetch_changes(after=None, limit=1000)
+    assert isinstance(second_batch, data.ChangeBatch)
+    assert [change.key for change in second_batch.changes] == [{"customer_id": 3}]
@@ -0,0 +1,120 @@
+import typing
+
+import psycopg
+import pytest
+from psycopg import sql
+from psycopg.rows import dict_row
+
+from src import data
+from src.adapter.cursor.pg import PgCursor
+from src.adapter.ds.src_ds.pg_xmin import PgXminSrcDs, _full_xid
+
+
+@pytest.fixture(scope="function")
+def xmin_connection_fixture(
+    pg_connection_str_fixture: str,
+) -> typing.Generator[psycopg.Connection, None, None]:
+    with psycopg.connect(
+        pg_connection_str_fixture, autocommit=True, row_factory=dict_row
+    ) as con:
+        con.execute("DROP TABLE IF EXISTS public.xmin_customer")
+        con.execute("CREATE TABLE public.xmin_customer (customer_id INT PRIMARY KEY, name TEXT)")
+        con.execute("INSERT INTO public.xmin_customer VALUES (1, 'Steve'), (2, 'Mandie')")
+
+        yield con
+
+        con.execute("DROP TABLE public.xmin_customer")
+
+
+def _ds(*, con: psycopg.Connection) -> PgXminSrcDs:
+    return PgXminSrcDs(
+        cur=PgCursor(cursor=con.cursor()),
+        db_name="testdb",
+        schema_name="public",
+        table_name="xmin_customer",
+        after={},
+    )
+
+
+def _keys(batch: data.ChangeBatch | data.Error, /) -> set[int]:
+    assert isinstance(batch, data.ChangeBatch)
+    return {typing.cast(int, change.key["customer_id"]) for change in batch.changes}
+
+
+def test_fetch_changes_finds_rows_written_since_the_watermark(
+    pg_connection_str_fixture: str,
+    xmin_connection_fixture: psycopg.Connection,
+) -> None:
+    ds = _ds(con=xmin_connection_fixture)
+
+    first = ds.current_watermark()
+    assert isinstance(first, str)
+
+    with (
+        psycopg.connect(pg_connection_str_fixture) as slow,
+        psycopg.connect(pg_connection_str_fixture) as fast,
+    ):
+        slow.execute("INSERT INTO public.xmin_customer VALUES (3, 'Mark')")
+        slow_xid = slow.execute("SELECT txid_current()").fetchone()
+        assert slow_xid is not None
+
+        fast.execute("UPDATE public.xmin_customer SET name = 'Mandy' WHERE customer_id = 2")
+        fast.commit()
+
+        batch = ds.fetch_changes(after=first, limit=1000)
+        assert _keys(batch) == {2}
+        assert isinstance(batch, data.ChangeBatch)
+        assert batch.watermark is not None
+        # held back at the transaction that hasn't committed yet
+        assert int(batch.watermark) == slow_xid[0]
+
+        slow.commit()
+
+    # 3 committed after the last read, but its transaction is newer than that read's watermark,
+    # and so is 2's, which is read again
+    second = ds.fetch_changes(after=batch.watermark, limit=1000)
+    assert _keys(second) == {2, 3}
+    assert isinstance(second, data.ChangeBatch)
+    assert second.watermark is not None
+    assert int(second.watermark) > int(batch.watermark)
+
+    assert _keys(ds.fetch_changes(after=second.watermark, limit=1000)) == set()
+
+
+def test_fetch_changes_refuses_a_watermark_older_than_xmin_can_tell_apart(
+    xmin_connection_fixture: psycopg.Connection,
+) -> None:
+    ds = _ds(con=xmin_connection_fixture)
+
+    row = xmin_connection_fixture.execute(
+        "SELECT txid_snapshot_xmax(txid_current_snapshot()) AS xmax"
+    ).fetchone()
+    assert row is not None
+
+    result = ds.fetch_changes(after=str(row["xmax"] - 2**31), limit=1000)
+    assert isinstance(result, data.Error)
+
+
+@pytest.mark.parametrize(
+    "xid, xmax, expected",
+    [
+        pytest.param(50, 150, 50, id="same epoch"),
+        pytest.param(50, 2**32 + 150, 2**32 + 50, id="after wraparound"),
+        pytest.param(2**32 - 50, 2**32 + 150, 2**32 - 50, id="before wraparound"),
+        pytest.param(2**32 - 50, 2 * 2**32 + 150, 2**32 + 2**32 - 50, id="later epoch"),
+    ],
+)
+def test_full_xid_counts_back_from_xmax_across_wraparound(
+    pg_cursor_fixture: psycopg.Cursor, xid: int, xmax: int, expected: int
+) -> None:
+    row = pg_cursor_fixture.execute(
+        sql.SQL("SELECT {full_xid} AS full_xid").format(
+            full_xid=_full_xid(
+                xid=sql.SQL("{}::BIGINT").format(sql.Literal(xid)),
+                xmax=sql.SQL("{}::BIGINT").format(sql.Literal(xmax)),
+            )
+        )
+    ).fetchone()
+
+    assert row is not None
+    assert row["full_xid"] == expected
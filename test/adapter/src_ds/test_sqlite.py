@@ -0,0 +1,107 @@
+import datetime
+import decimal
+import pathlib
+import sqlite3
+
+from src import adapter, data
+from src.adapter.cursor_provider.sqlite import SqliteCursorProvider
+
+
+def _provider(tmp_path: pathlib.Path) -> SqliteCursorProvider:
+    path = tmp_path / "edge.sqlite"
+    with sqlite3.connect(path) as con:
+        con.execute(
+            """
+            CREATE TABLE sales_order (
+                order_id INTEGER PRIMARY KEY
+            ,   order_date DATE NOT NULL
+            ,   amount DECIMAL(18, 2) NULL
+            ,   note VARCHAR(20) NULL
+            )
+            """
+        )
+        con.executemany(
+            "INSERT INTO sales_order VALUES (?, ?, ?, ?)",
+            [(i, f"2024-01-0{1 + i % 2}", i + 0.25, f"note {i}") for i in range(2000)],
+        )
+
+    return SqliteCursorProvider(
+        db_config=data.DbConfig(
+            db_id="edge",
+            api=data.API.SQLITE,
+            host=None,
+            db_name="edge",
+            keyring_db_username_entry=None,
+            keyring_db_password_entry=None,
+            connection_string=None,
+            path=path,
+        )
+    )
+
+
+def test_get_table(tmp_path: pathlib.Path) -> None:
+    with _provider(tmp_path).open() as cur:
+        ds = adapter.src_ds.create(
+            api=data.API.SQLITE,
+            cur=cur,
+            db_name="edge",
+            schema_name="sales",
+            table_name="order",
+            pk_cols=None,
+            after={},
+        )
+        table = ds.get_table()
+        assert isinstance(table, data.Table)
+        assert table.pk == ("order_id",)
+        assert {c.name: (c.data_type, c.nullable) for c in table.columns} == {
+            "order_id": (data.DataType.BigInt, False),
+            "order_date": (data.DataType.Date, False),
+            "amount": (data.DataType.Decimal, True),
+            "note": (data.DataType.Text, True),
+        }
+
+
+def test_fetch_rows_in_key_order(tmp_path: pathlib.Path) -> None:
+    with _provider(tmp_path).open() as cur:
+        ds = adapter.src_ds.create(
+            api=data.API.SQLITE,
+            cur=cur,
+            db_name="edge",
+            schema_name="sales",
+            table_name="order",
+            pk_cols=None,
+            after={"order_date": datetime.date(2024, 1, 1)},
+        )
+        assert ds.get_row_count() == 1000
+
+        batches = ds.fetch_row_batches(col_names={"order_id"}, after=None, batch_size=300)
+        assert [len(batch) for batch in batches] == [300, 300, 300, 100]
+
+        rows = ds.fetch_rows(col_names={"order_id", "order_date"}, after=None)
+        assert [row["order_id"] for row in rows] == list(range(1, 2000, 2))
+        assert rows[0]["order_date"] == datetime.date(2024, 1, 2)
+
+
+def test_fetch_rows_by_key(tmp_path: pathlib.Path) -> None:
+    with _provider(tmp_path).open() as cur:
+        ds = adapter.src_ds.create(
+            api=data.API.SQLITE,
+            cur=cur,
+            db_name="edge",
+            schema_name="sales",
+            table_name="order",
+            pk_cols=None,
+            after={},
+        )
+
+        # more keys than fit in one statement
+        keys = [data.FrozenDict({"order_id": i}) for i in range(1500, 2500)]
+        rows = ds.fetch_rows_by_key(col_names=None, keys=keys)
+        assert isinstance(rows, list)
+        assert len(rows) == 500
+        assert min(rows, key=lambda row: row["order_id"]) == {
+            "order_id": 1500,
+            "order_date": datetime.date(2024, 1, 1),
+            "amount": decimal.Decimal("1500.25"),
+            "note": "note 1500",
+        }
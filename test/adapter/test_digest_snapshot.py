@@ -0,0 +1,45 @@
+import datetime
+import pathlib
+
+from src import data
+from src.adapter.digest_snapshot import DigestSnapshot
+
+
+def _snapshot(folder: pathlib.Path, *, col_names: tuple[str, ...]) -> DigestSnapshot:
+    return DigestSnapshot(
+        folder=folder,
+        dst_db_name="dw",
+        dst_schema_name="sales",
+        dst_table_name="customer",
+        key_cols=("customer_id", "valid_from"),
+        col_names=col_names,
+    )
+
+
+def test_take_reads_what_was_saved_and_removes_it(tmp_path: pathlib.Path) -> None:
+    digests = {
+        data.FrozenDict({"customer_id": 1, "valid_from": datetime.date(2024, 1, 1)}): "a" * 32,
+        data.FrozenDict({"customer_id": 2, "valid_from": datetime.date(2024, 1, 2)}): "b" * 32,
+    }
+
+    first = _snapshot(tmp_path, col_names=("name", "amount"))
+    assert first.take() is None
+    assert first.last is None
+    first.stage(digests)
+    assert first.save(unchanged=False) is None
+    assert first.path.exists()
+
+    second = _snapshot(tmp_path, col_names=("amount", "name"))
+    assert second.take() is None
+    assert second.last == digests
+    assert not second.path.exists()
+
+    # a skipped sync puts back what it took
+    assert second.save(unchanged=True) is None
+    assert second.path.exists()
+
+    # the columns changed, so the digests no longer match dst's
+    third = _snapshot(tmp_path, col_names=("name",))
+    assert third.take() is None
+    assert third.last is None
+    assert not third.path.exists()
@@ -0,0 +1,36 @@
+import pathlib
+
+from src import data
+from src.adapter.metrics import SyncMetrics
+
+
+def test_write_accumulates_across_syncs(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "poa.prom"
+
+    for _ in range(2):
+        metrics = SyncMetrics(src_table="src.sales.customer", dst_table="dw.sales.customer")
+        metrics.add_connect_seconds(side="src", seconds=0.02)
+        metrics.add_result(
+            data.SyncResult.succeeded(
+                rows_added=10,
+                rows_deleted=1,
+                rows_updated=3,
+                execution_millis=2_000,
+            )
+        )
+        assert metrics.write(path=path) is None
+
+    failed = SyncMetrics(src_table="src.sales.customer", dst_table="dw.sales.customer")
+    failed.add_result(data.SyncResult.failed(error_message="Test"))
+    assert failed.write(path=path) is None
+
+    lines = path.read_text().splitlines()
+    labels = 'src_table="src.sales.customer",dst_table="dw.sales.customer"'
+    assert f'poa_sync_rows_total{{{labels},op="added"}} 20' in lines
+    assert f"poa_sync_duration_seconds_count{{{labels}}} 2" in lines
+    assert f'poa_sync_duration_seconds_bucket{{{labels},le="1"}} 0' in lines
+    assert f'poa_sync_duration_seconds_bucket{{{labels},le="5"}} 2' in lines
+    assert f"poa_sync_rows_per_second{{{labels}}} 7" in lines
+    assert f'poa_sync_connect_seconds_count{{{labels},side="src"}} 2' in lines
+    assert f"poa_sync_errors_total{{{labels}}} 1" in lines
+    assert "# TYPE poa_sync_duration_seconds histogram" in lines
@@ -0,0 +1,60 @@
+import datetime
+import json
+import pathlib
+
+from src import data
+from src.adapter.schedule import load
+
+
+def test_load(tmp_path: pathlib.Path) -> None:
+    schedule_file = tmp_path / "schedule.json"
+    schedule_file.write_text(
+        json.dumps(
+            {
+                "jobs": [
+                    {
+                        "name": "customer",
+                        "src-db": "src",
+                        "src-table": "customer",
+                        "dst-db": "dw",
+                        "dst-schema": "sales",
+                        "dst-table": "customer",
+                        "pk": ["customer_id"],
+                        "cron": "*/15 6-18 * * 1-5",
+                    }
+                ]
+            }
+        )
+    )
+
+    jobs = load(schedule_file=schedule_file)
+    assert not isinstance(jobs, data.Error)
+    assert [job.name for job in jobs] == ["customer"]
+
+    # a Friday evening, so the next run is Monday morning
+    assert jobs[0].next_run(datetime.datetime(2024, 3, 1, 18, 50)) == datetime.datetime(
+        2024, 3, 4, 6, 0
+    )
+
+
+def test_load_requires_a_schedule(tmp_path: pathlib.Path) -> None:
+    schedule_file = tmp_path / "schedule.json"
+    schedule_file.write_text(
+        json.dumps(
+            {
+                "jobs": [
+                    {
+                        "name": "customer",
+                        "src-db": "src",
+                        "src-table": "customer",
+                        "dst-db": "dw",
+                        "dst-schema": "sales",
+                        "dst-table": "customer",
+                        "pk": ["customer_id"],
+                    }
+                ]
+            }
+        )
+    )
+
+    assert isinstance(load(schedule_file=schedule_file), data.Error)
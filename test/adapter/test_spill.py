@@ -0,0 +1,32 @@
+import decimal
+
+import pytest
+
+from src import data
+from src.adapter.spill import SpilledDiff
+
+
+def _key(customer_id: int | decimal.Decimal) -> data.RowKey:
+    return data.FrozenDict({"customer_id": customer_id})
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_diff_matches_in_memory_diff(max_workers: int) -> None:
+    src = {_key(i): f"{i:032x}" for i in range(1_000)}
+    dst = {_key(decimal.Decimal(i)): f"{i:032x}" for i in range(10, 1_010)}
+    for i in range(100, 110):
+        src[_key(i)] = "f" * 32
+
+    with SpilledDiff(key_cols=("customer_id",), partitions=7) as spilled:
+        # in a few batches, the way rows are fetched
+        items = list(src.items())
+        spilled.write_src(items[i : i + 300] for i in range(0, len(items), 300))
+        spilled.write_dst([list(dst.items())])
+
+        added, updated, deleted = spilled.diff(max_workers=max_workers)
+
+    assert spilled.src_pairs == 1_000
+    assert spilled.dst_pairs == 1_000
+    assert added == {_key(i) for i in range(10)}
+    assert updated == {_key(i) for i in range(100, 110)}
+    assert deleted == {_key(i) for i in range(1_000, 1_010)}
@@ -33,10 +33,8 @@ def pg_connection_fixture(
         with con.cursor() as cur:
             cur.execute("DROP SCHEMA IF EXISTS poa CASCADE;")
             sql_path = _root_dir_fixture.parent / "setup.sql"
-            with sql_path.open("r") as fh:
-                qry = "\n".join(fh.readlines())
-                for fragment in qry.split(";"):
-                    cur.execute(typing.cast(sql.LiteralString, fragment))
+            # the script is run whole, since its function bodies have semicolons of their own
+            cur.execute(typing.cast(sql.LiteralString, sql_path.read_text()))
         yield con
 
 
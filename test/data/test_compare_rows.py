@@ -0,0 +1,63 @@
+import datetime
+import decimal
+import importlib
+
+import pytest
+
+from src import data
+
+# the module, since the package exports the function under the same name
+compare_rows_module = importlib.import_module("src.data.compare_rows")
+
+
+def _rows(ids: range, *, extra: int = 0) -> list[data.Row]:
+    return [
+        {
+            "customer_id": i,
+            "name": None if i % 7 == 0 else f"Steve {i}",
+            "purchases": decimal.Decimal(i + extra) / 100,
+            "date_added": datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365),
+        }
+        for i in ids
+    ]
+
+
+def test_parallel_diff_matches_serial_diff(monkeypatch: pytest.MonkeyPatch) -> None:
+    src_rows = _rows(range(0, 2_000)) + _rows(range(2_000, 2_100), extra=1)
+    dst_rows = _rows(range(50, 2_200))
+
+    serial = data.compare_rows(src_rows=src_rows, dst_rows=dst_rows, key_cols=("customer_id",))
+
+    # small enough that these rows are split across workers
+    monkeypatch.setattr(compare_rows_module, "_MIN_ROWS_PER_WORKER", 100)
+    parallel = data.compare_rows(
+        src_rows=src_rows,
+        dst_rows=dst_rows,
+        key_cols=("customer_id",),
+        max_workers=4,
+    )
+
+    assert len(serial.added) == 50
+    assert len(serial.updated) == 100
+    assert len(serial.deleted) == 100
+    assert parallel == serial
+    assert list(parallel.added) == list(serial.added)
+    assert list(parallel.updated) == list(serial.updated)
+    assert list(parallel.deleted) == list(serial.deleted)
+
+
+def test_diff_is_serial_unless_workers_are_asked_for(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(**_: object) -> data.RowDiff:
+        raise AssertionError("The rows were diffed in worker processes.")
+
+    monkeypatch.setattr(compare_rows_module, "_MIN_ROWS_PER_WORKER", 1)
+    monkeypatch.setattr(compare_rows_module, "_compare_rows_in_parallel", fail)
+
+    diff = data.compare_rows(
+        src_rows=_rows(range(0, 10)),
+        dst_rows=_rows(range(5, 15)),
+        key_cols=("customer_id",),
+    )
+
+    assert len(diff.added) == 5
+    assert len(diff.deleted) == 5
@@ -0,0 +1,20 @@
+from src import data
+
+
+def test_the_raw_estimate_is_not_corrected() -> None:
+    plan = data.plan_fetch(
+        history=data.SyncHistory(
+            fetch_millis_per_row=0.01,
+            fetch_by_key_millis_per_row=0.03,
+            upsert_millis_per_row=0.01,
+            corrections={"key_fetch": 0.5},
+        ),
+        src_rows=10_000,
+        changed_rows=1_000,
+        range_rows=None,
+    )
+
+    assert plan.strategy == "key_fetch"
+    assert plan.est_millis == 20
+    # so the next correction is measured against the estimate, and not against this correction
+    assert plan.raw_est_millis == 40
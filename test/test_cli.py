@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+from bench.startup import DRIVERS
+
+
+def test_import_does_not_load_drivers() -> None:
+    completed = subprocess.run(
+        (
+            sys.executable,
+            "-c",
+            "import sys, src.cli; print(','.join(sorted(m for m in sys.modules if '.' not in m)))",
+        ),
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    assert set(completed.stdout.strip().split(",")).isdisjoint(DRIVERS)